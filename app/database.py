@@ -5,8 +5,14 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text, Date, Numeric, ForeignKey, BigInteger, text, LargeBinary
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean, DateTime, Text, Date, Numeric, ForeignKey, BigInteger, text, LargeBinary, Index
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, deferred
+from sqlalchemy.pool import QueuePool
+from flask import g, has_request_context, current_app
+import time
+import threading
+from contextlib import contextmanager
 from sqlalchemy.sql import func
 from datetime import datetime, UTC, timezone
 import json
@@ -55,35 +61,214 @@ except Exception as e:
     print(f"❌ Erro na configuração: {e}")
     sys.exit(1)
 
-# Verificar driver
-try:
-    import psycopg2
-    print("✅ Driver psycopg2 disponível")
-except ImportError:
-    print("❌ Driver psycopg2 não encontrado!")
-    print("💡 Execute: pip install psycopg2-binary")
-    sys.exit(1)
+# Verificar driver (somente PostgreSQL - SQLite é usado em desenvolvimento/benchmarks)
+IS_POSTGRES = DATABASE_URL.startswith('postgres')
+
+if IS_POSTGRES:
+    try:
+        import psycopg2
+        print("✅ Driver psycopg2 disponível")
+    except ImportError:
+        print("❌ Driver psycopg2 não encontrado!")
+        print("💡 Execute: pip install psycopg2-binary")
+        sys.exit(1)
+
+# ===== POOL DE CONEXÕES (dimensionado pelo ambiente e instrumentado) =====
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+
+# Limites (ms) do histograma de espera por conexão
+FAIXAS_ESPERA_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+class MetricasPool:
+    """Contadores de checkout: espera por conexão, pico de uso e timeouts"""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        with self._trava:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.espera_total_ms = 0.0
+            self.espera_maxima_ms = 0.0
+            self.pico_em_uso = 0
+            self.histograma = [0] * (len(FAIXAS_ESPERA_MS) + 1)
+
+    def registrar(self, espera_ms, em_uso):
+        with self._trava:
+            self.checkouts += 1
+            self.espera_total_ms += espera_ms
+            self.espera_maxima_ms = max(self.espera_maxima_ms, espera_ms)
+            self.pico_em_uso = max(self.pico_em_uso, em_uso)
+            self.histograma[next((i for i, limite in enumerate(FAIXAS_ESPERA_MS) if espera_ms <= limite), len(FAIXAS_ESPERA_MS))] += 1
 
-# Configurar engine para AWS RDS
-print("🔧 Configurando engine para AWS RDS...")
-
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Desabilitado para produção
-    pool_size=5,  # Pool menor para começar
-    max_overflow=10,
-    pool_recycle=3600,  # Reconectar a cada hora
-    pool_pre_ping=True,  # Verificar conexão antes de usar
-    connect_args={
-        'sslmode': 'require',  # SSL obrigatório para AWS RDS
-        'connect_timeout': 30,
-        'application_name': 'arconset_hvac_app'
+    def registrar_timeout(self):
+        with self._trava:
+            self.timeouts += 1
+
+    def resumo(self):
+        with self._trava:
+            faixas = [f'<={limite}ms' for limite in FAIXAS_ESPERA_MS] + [f'>{FAIXAS_ESPERA_MS[-1]}ms']
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'espera_media_ms': round(self.espera_total_ms / self.checkouts, 3) if self.checkouts else 0,
+                'espera_maxima_ms': round(self.espera_maxima_ms, 3),
+                'pico_em_uso': self.pico_em_uso,
+                'histograma_espera': dict(zip(faixas, self.histograma))
+            }
+
+metricas_checkout = MetricasPool()
+
+class PoolMedido(QueuePool):
+    """QueuePool que mede o tempo de espera de cada checkout"""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except sa_exc.TimeoutError:
+            metricas_checkout.registrar_timeout()
+            raise
+        metricas_checkout.registrar((time.perf_counter() - inicio) * 1000, self.checkedout())
+        return conexao
+
+def opcoes_pool():
+    return {
+        'poolclass': PoolMedido,
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE
     }
-)
+
+if IS_POSTGRES:
+    # Configurar engine para AWS RDS
+    print(f"🔧 Configurando engine para AWS RDS (pool {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}, timeout {DB_POOL_TIMEOUT}s)...")
+
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,  # Desabilitado para produção
+        pool_pre_ping=True,  # Verificar conexão antes de usar
+        connect_args={
+            'sslmode': 'require',  # SSL obrigatório para AWS RDS
+            'connect_timeout': 30,
+            'application_name': 'arconset_hvac_app'
+        },
+        **opcoes_pool()
+    )
+else:
+    print(f"🔧 Configurando engine local ({DATABASE_URL.split(':')[0]})...")
+
+    # SQLite em memória usa um pool próprio (uma conexão por thread)
+    em_memoria = DATABASE_URL.startswith('sqlite') and ':memory:' in DATABASE_URL
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        connect_args={'check_same_thread': False} if DATABASE_URL.startswith('sqlite') else {},
+        **({} if em_memoria else opcoes_pool())
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# ===== RÉPLICA DE LEITURA (opcional) =====
+# Com DATABASE_READ_URL definida, as rotas marcadas com @somente_leitura
+# (services/replica_leitura.py) leem da réplica. Opções de SSL vão na própria
+# URL (ex.: ?sslmode=require), para funcionar também com containers locais.
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL')
+engine_leitura = None
+SessionLeitura = None
+
+if DATABASE_READ_URL:
+    print(f"🔧 Configurando engine de leitura ({DATABASE_READ_URL.split(':')[0]})...")
+    engine_leitura = create_engine(
+        DATABASE_READ_URL,
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        connect_args={'check_same_thread': False} if DATABASE_READ_URL.startswith('sqlite') else {}
+    )
+    SessionLeitura = sessionmaker(autocommit=False, autoflush=False, bind=engine_leitura)
+
+# ===== SESSÃO POR REQUISIÇÃO =====
+def obter_sessao():
+    """
+    Sessão da requisição atual, compartilhada por middleware e rota
+
+    Dentro de uma requisição devolve sempre a mesma sessão (no máximo uma
+    conexão do pool por requisição). db.close() nas rotas só devolve a
+    conexão ao pool; o fechamento definitivo é feito no teardown.
+    Fora de requisição (scripts, workers) ou em apps sem
+    registrar_sessao_requisicao devolve uma sessão nova.
+    Em rotas @somente_leitura liberadas para a réplica, devolve a sessão
+    da réplica.
+    """
+    if not _sessao_por_requisicao():
+        return SessionLocal()
+    if g.get('_usar_replica'):
+        db = g.get('_sessao_leitura')
+        if db is None:
+            db = g._sessao_leitura = SessionLeitura()
+        return db
+    db = g.get('_sessao_db')
+    if db is None:
+        db = g._sessao_db = SessionLocal()
+    return db
+
+@contextmanager
+def sessao_compartilhada():
+    """
+    Sessão para middleware/serviços chamados antes da rota
+
+    Na requisição usa a sessão da requisição sem fechá-la: a conexão já
+    obtida segue para a rota (um checkout só). Fora dela, sessão própria.
+    """
+    if _sessao_por_requisicao():
+        yield obter_sessao()
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _sessao_por_requisicao():
+    return has_request_context() and 'sessao_requisicao' in current_app.extensions
+
+def registrar_sessao_requisicao(app):
+    """Fechar a sessão da requisição no teardown (inclusive em erro)"""
+    app.extensions['sessao_requisicao'] = True
+
+    @app.teardown_appcontext
+    def _fechar_sessao_requisicao(exc):
+        for chave in ('_sessao_db', '_sessao_leitura'):
+            db = g.pop(chave, None)
+            if db is not None:
+                db.close()
+
+def metricas_pool():
+    """Estado atual do pool + métricas acumuladas de checkout"""
+    pool = engine.pool
+    estado = {'classe': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update({
+            'tamanho': pool.size(),
+            'max_overflow': DB_MAX_OVERFLOW,
+            'timeout_s': DB_POOL_TIMEOUT,
+            'em_uso': pool.checkedout(),
+            'disponiveis': pool.checkedin(),
+            'overflow': max(0, pool.overflow())
+        })
+    return {**estado, **metricas_checkout.resumo()}
+
 def get_db():
     """Gerador de sessão do banco - AWS RDS"""
     db = SessionLocal()
@@ -92,6 +277,13 @@ def get_db():
     finally:
         db.close()
 
+def _contagem(obj, nome, calcular):
+    """Contagem pré-carregada por services/serializers.py ou calculada na hora"""
+    contagens = getattr(obj, '_contagens', None)
+    if contagens is not None and nome in contagens:
+        return contagens[nome] or 0
+    return calcular()
+
 # ===== 🆕 NOVO MODELO: PASTAS VIRTUAIS =====
 class Pasta(Base):
     """📁 Modelo para pastas virtuais no banco"""
@@ -129,8 +321,8 @@ class Pasta(Base):
             'pasta_pai_nome': self.pasta_pai.nome if self.pasta_pai else None,
             'projeto_id': self.projeto_id,
             'projeto_nome': self.projeto.nome if self.projeto else None,
-            'total_arquivos': len(self.arquivos) if self.arquivos else 0,
-            'total_subpastas': len(self.subpastas) if self.subpastas else 0,
+            'total_arquivos': _contagem(self, 'total_arquivos', lambda: len(self.arquivos) if self.arquivos else 0),
+            'total_subpastas': _contagem(self, 'total_subpastas', lambda: len(self.subpastas) if self.subpastas else 0),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'criado_por': self.criado_por
@@ -139,6 +331,10 @@ class Pasta(Base):
 # ===== MODELOS EXISTENTES (MANTIDOS) =====
 class Cliente(Base):
     __tablename__ = 'clientes'
+    __table_args__ = (
+        # Paginação por cursor (services/paginacao.py)
+        Index('ix_clientes_created_at_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(200), nullable=False)
@@ -151,6 +347,10 @@ class Cliente(Base):
     cep = Column(String(10))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Busca (services/busca_clientes.py): nome sem acentos/minúsculo e CPF/CNPJ só com dígitos
+    busca_nome = Column(String(200), nullable=True, index=True)
+    documento_digitos = Column(String(20), nullable=True, index=True)
+    
     # Relacionamentos
     projetos = relationship('Projeto', back_populates='cliente')
     
@@ -166,11 +366,15 @@ class Cliente(Base):
             'estado': self.estado,
             'cep': self.cep,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'total_projetos': len(self.projetos) if self.projetos else 0
+            'total_projetos': _contagem(self, 'total_projetos', lambda: len(self.projetos) if self.projetos else 0)
         }
 
 class Projeto(Base):
     __tablename__ = 'projetos'
+    __table_args__ = (
+        # Paginação por cursor (services/paginacao.py)
+        Index('ix_projetos_created_at_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(200), nullable=False)
@@ -216,12 +420,16 @@ class Projeto(Base):
             'observacoes': self.observacoes,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'total_arquivos': len(self.arquivos) if self.arquivos else 0,
+            'total_arquivos': _contagem(self, 'total_arquivos', lambda: len(self.arquivos) if self.arquivos else 0),
             'equipe': [ep.funcionario.nome for ep in self.equipe_projeto if ep.ativo] if hasattr(self, 'equipe_projeto') else []
         }
 
 class Funcionario(Base):
     __tablename__ = 'funcionarios'
+    __table_args__ = (
+        # Paginação por cursor (services/paginacao.py)
+        Index('ix_funcionarios_created_at_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(200), nullable=False)
@@ -251,7 +459,7 @@ class Funcionario(Base):
             'status': self.status,
             'especialidades': json.loads(self.especialidades) if self.especialidades else [],
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'projetos_ativos': len([ep for ep in self.equipe_projeto if ep.projeto.status == 'Em Andamento' and ep.ativo]) if hasattr(self, 'equipe_projeto') else 0
+            'projetos_ativos': _contagem(self, 'projetos_ativos', lambda: len([ep for ep in self.equipe_projeto if ep.projeto.status == 'Em Andamento' and ep.ativo]) if hasattr(self, 'equipe_projeto') else 0)
         }
 
 class EquipeProjeto(Base):
@@ -283,6 +491,10 @@ class EquipeProjeto(Base):
 
 class Conta(Base):
     __tablename__ = 'contas'
+    __table_args__ = (
+        # Paginação por cursor (services/paginacao.py)
+        Index('ix_contas_data_vencimento_id', 'data_vencimento', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     descricao = Column(String(200), nullable=False)
@@ -329,6 +541,10 @@ class Conta(Base):
 # ===== 🆕 MODELO ARQUIVO ATUALIZADO PARA AWS + PASTAS =====
 class Arquivo(Base):
     __tablename__ = 'arquivos'
+    __table_args__ = (
+        # Paginação por cursor (services/paginacao.py)
+        Index('ix_arquivos_created_at_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nome_original = Column(String(500), nullable=False)
@@ -343,11 +559,17 @@ class Arquivo(Base):
     pasta = relationship("Pasta", back_populates="arquivos")
     
     # 🆕 ARMAZENAMENTO AWS HÍBRIDO
-    arquivo_blob = Column(LargeBinary, nullable=True, comment='Arquivo pequeno em binário')
+    # Conteúdo de arquivos pequenos fica em arquivo_conteudo (carregado sob demanda).
+    # A coluna antiga permanece apenas até a migração (migrar_conteudo_arquivos.py)
+    # e é deferred: listagens e contagens nunca trazem as páginas do blob.
+    arquivo_blob_legado = deferred(Column('arquivo_blob', LargeBinary, nullable=True, comment='LEGADO: migrar para arquivo_conteudo'))
+    conteudo = relationship('ArquivoConteudo', uselist=False, lazy='select',
+                            cascade='all, delete-orphan', passive_deletes=True)
     aws_s3_key = Column(String(1000), nullable=True, comment='Chave do arquivo no S3')
     aws_s3_bucket = Column(String(100), nullable=True, comment='Bucket do S3')
     aws_s3_url = Column(String(2000), nullable=True, comment='URL pública do S3')
-    storage_type = Column(String(20), default='database', comment='database, s3, hybrid')
+    storage_type = Column(String(20), default='database', comment='database, s3, local, hybrid')
+    hash_sha256 = Column(String(64), nullable=True, index=True, comment='SHA-256 do conteúdo (calculado no upload)')
     
     # Relacionamentos existentes (compatibilidade)
     projeto_id = Column(Integer, ForeignKey('projetos.id'), nullable=True)
@@ -365,24 +587,43 @@ class Arquivo(Base):
     uploaded_by = Column(String(100), nullable=True)
     is_public = Column(Boolean, default=False, comment='Arquivo público')
     
-    def to_dict(self):
-        """Converter para dicionário compatível com frontend"""
-        return {
+    @property
+    def arquivo_blob(self):
+        """Bytes armazenados no banco (tabela arquivo_conteudo ou coluna legada)"""
+        if self.conteudo is not None:
+            return self.conteudo.dados
+        return self.arquivo_blob_legado
+
+    @arquivo_blob.setter
+    def arquivo_blob(self, dados):
+        if dados is None:
+            self.conteudo = None
+        elif self.conteudo is None:
+            self.conteudo = ArquivoConteudo(dados=dados)
+        else:
+            self.conteudo.dados = dados
+        self.arquivo_blob_legado = None
+    
+    # Aliases duplicados mantidos para o frontend legado (?compact=1 omite)
+    ALIASES_LEGADOS = ('name', 'fileName', 'size', 'fileSize', 'type', 'mimeType',
+                       'category', 'description', 'projectId', 'uploadDate')
+
+    def to_dict(self, compacto=False, campos=None):
+        """
+        Converter para dicionário compatível com frontend
+
+        compacto=True omite os aliases legados (name/fileName, size/fileSize...);
+        campos=('id', 'nome_original', ...) devolve só as chaves pedidas.
+        """
+        created_at = self.created_at.isoformat() if self.created_at else None
+        dados = {
             'id': self.id,
-            'name': self.nome_original,
-            'fileName': self.nome_original,
             'nome_original': self.nome_original,
             'nome_arquivo': self.nome_arquivo,
-            'size': self.tamanho,
-            'fileSize': self.tamanho,
             'tamanho': self.tamanho,
             'tipo_mime': self.tipo_mime,
-            'type': self.tipo_mime,
-            'mimeType': self.tipo_mime,
             'tipo_documento': self.tipo_documento,
-            'category': self.tipo_documento,
             'descricao': self.descricao,
-            'description': self.descricao,
             
             # 🆕 DADOS DAS PASTAS
             'pasta_id': self.pasta_id,
@@ -390,13 +631,13 @@ class Arquivo(Base):
             
             # Dados do projeto
             'projeto_id': self.projeto_id,
-            'projectId': self.projeto_id,
             'projeto_nome': self.projeto.nome if self.projeto else None,
             
             # 🆕 DADOS AWS
             'storage_type': self.storage_type,
             'aws_s3_url': self.aws_s3_url,
             'aws_s3_key': self.aws_s3_key,
+            'hash_sha256': self.hash_sha256,
             'is_cloud': self.storage_type in ['s3', 'hybrid'],
             'is_database': self.storage_type == 'database',
             'is_public': self.is_public,
@@ -413,11 +654,28 @@ class Arquivo(Base):
             'tags': json.loads(self.tags) if self.tags else [],
             
             # Metadados
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'uploadDate': self.created_at.isoformat() if self.created_at else None,
+            'created_at': created_at,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'uploaded_by': self.uploaded_by
         }
+        
+        if not compacto or campos:
+            dados.update({
+                'name': self.nome_original,
+                'fileName': self.nome_original,
+                'size': self.tamanho,
+                'fileSize': self.tamanho,
+                'type': self.tipo_mime,
+                'mimeType': self.tipo_mime,
+                'category': self.tipo_documento,
+                'description': self.descricao,
+                'projectId': self.projeto_id,
+                'uploadDate': created_at
+            })
+        
+        if campos:
+            return {campo: dados[campo] for campo in campos if campo in dados}
+        return dados
     
     def __repr__(self):
         return f"<Arquivo(id={self.id}, nome='{self.nome_original}', storage='{self.storage_type}')>"
@@ -446,7 +704,124 @@ class Notificacao(Base):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class ArquivoConteudo(Base):
+    """💾 Bytes de arquivos armazenados no banco, fora da tabela quente 'arquivos'"""
+    __tablename__ = 'arquivo_conteudo'
+
+    arquivo_id = Column(Integer, ForeignKey('arquivos.id', ondelete='CASCADE'), primary_key=True)
+    dados = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+@event.listens_for(Arquivo, 'after_delete')
+def _remover_conteudo(mapper, connection, arquivo):
+    """Apagar o conteúdo sem carregá-lo (o SQLite não aplica ON DELETE CASCADE por padrão)"""
+    connection.execute(ArquivoConteudo.__table__.delete().where(ArquivoConteudo.arquivo_id == arquivo.id))
+
+# ===== 🆕 SNAPSHOT MATERIALIZADO DO DASHBOARD =====
+class DashboardSnapshot(Base):
+    """📊 Agregados do dashboard pré-calculados (linha única, id=1)"""
+    __tablename__ = 'dashboard_snapshot'
+
+    id = Column(Integer, primary_key=True)
+    referencia = Column(Date, nullable=False, comment='Data usada nos cálculos de atraso/prazo')
+    dados = Column(Text, nullable=False, comment='JSON com os agregados')
+    atualizado_em = Column(DateTime(timezone=True), nullable=False)
+
+    def idade_segundos(self):
+        """Há quanto tempo o snapshot foi calculado"""
+        atualizado_em = self.atualizado_em
+        if atualizado_em.tzinfo is None:
+            atualizado_em = atualizado_em.replace(tzinfo=timezone.utc)
+        return round((datetime.now(timezone.utc) - atualizado_em).total_seconds(), 3)
+
+    def to_dict(self):
+        return {
+            'referencia': self.referencia.isoformat() if self.referencia else None,
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None,
+            'idade_segundos': self.idade_segundos() if self.atualizado_em else None
+        }
+
+class ArquivoBlob(Base):
+    """🧬 Conteúdo físico compartilhado, endereçado pelo SHA-256 (services/blob_store.py)"""
+    __tablename__ = 'arquivo_blobs'
+
+    sha256 = Column(String(64), primary_key=True)
+    tamanho = Column(BigInteger, nullable=False, default=0)
+    tipo_mime = Column(String(200), nullable=True)
+    storage_type = Column(String(20), nullable=False, comment='local, s3')
+    caminho = Column(String(1000), nullable=True)
+    aws_s3_key = Column(String(1000), nullable=True)
+    aws_s3_bucket = Column(String(100), nullable=True)
+    referencias = Column(Integer, nullable=False, default=1, comment='Quantidade de Arquivo apontando para este conteúdo')
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'tamanho': self.tamanho,
+            'tipo_mime': self.tipo_mime,
+            'storage_type': self.storage_type,
+            'referencias': self.referencias,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+# ===== 🆕 SINCRONIZAÇÃO INCREMENTAL (services/sincronizacao.py) =====
+class SyncAlteracao(Base):
+    """🔄 Versão atual de cada linha sincronizável; excluido=True é a lápide de uma exclusão"""
+    __tablename__ = 'sync_alteracoes'
+
+    entidade = Column(String(50), primary_key=True, comment='clientes, projetos, contas...')
+    entidade_id = Column(Integer, primary_key=True)
+    versao = Column(BigInteger, nullable=False)
+    excluido = Column(Boolean, nullable=False, default=False)
+    alterado_em = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_sync_alteracoes_versao', 'versao', 'entidade', 'entidade_id'),
+    )
+
+class SyncContador(Base):
+    """🔢 Última versão emitida (linha única, id=1); cada transação que altera dados pega a próxima"""
+    __tablename__ = 'sync_contador'
+
+    id = Column(Integer, primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
+
 # ===== FUNÇÕES DE TESTE E INICIALIZAÇÃO =====
+def atualizar_esquema(bind=None):
+    """
+    Criar colunas anuláveis e índices declarados nos modelos que ainda não existem no banco
+
+    create_all() só cria colunas e índices junto com tabelas novas; tabelas
+    já existentes no RDS recebem as colunas/índices novos por aqui.
+    """
+    from sqlalchemy import inspect
+    bind = bind or engine
+    inspector = inspect(bind)
+    tabelas_existentes = set(inspector.get_table_names())
+
+    for tabela in Base.metadata.sorted_tables:
+        if tabela.name not in tabelas_existentes:
+            continue
+        colunas_existentes = {col['name'] for col in inspector.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name in colunas_existentes or not coluna.nullable:
+                continue
+            tipo = coluna.type.compile(dialect=bind.dialect)
+            try:
+                with bind.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}'))
+                print(f"✅ Coluna {tabela.name}.{coluna.name} adicionada")
+            except Exception as e:
+                print(f"⚠️  Não foi possível adicionar {tabela.name}.{coluna.name}: {e}")
+
+    for tabela in Base.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            try:
+                indice.create(bind=bind, checkfirst=True)
+            except Exception as e:
+                print(f"⚠️  Não foi possível criar o índice {indice.name}: {e}")
+
 def init_db():
     """Inicializar banco de dados AWS RDS com novas tabelas"""
     try:
@@ -454,6 +829,7 @@ def init_db():
         
         # 🆕 CRIAR NOVAS TABELAS (PASTAS)
         Base.metadata.create_all(bind=engine)
+        atualizar_esquema()
         print("✅ Tabelas criadas/atualizadas no AWS RDS com sucesso")
         
         # Listar tabelas criadas
@@ -0,0 +1,27 @@
+# 📁 gunicorn.conf.py - SERVIDOR DE PRODUÇÃO (gunicorn -c gunicorn.conf.py, a partir de app/)
+# Cada stream de /api/events (services/eventos.py) ocupa uma thread por até
+# EVENTOS_DURACAO_MAXIMA. Com o worker sync padrão do gunicorn, cada aba do
+# dashboard prenderia um worker inteiro e poucas abas derrubariam a API; por
+# isso o stream responde 503 em worker sync e aqui o worker é gthread:
+#   - GUNICORN_THREADS threads por worker
+#   - GUNICORN_THREADS_API delas ficam sempre livres para o resto da API
+#   - EVENTOS_MAX_CONEXOES (por processo) fica limitado às demais; acima
+#     disso o stream responde 503 e o frontend continua no polling
+import os
+
+wsgi_app = 'main:create_app()'
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '64'))
+# Streams SSE mandam heartbeat a cada EVENTOS_HEARTBEAT; o timeout só vale para o worker travado
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+accesslog = '-'
+
+# ===== LIMITE DE CONEXÕES SSE =====
+# Lido pelos workers ao importar services/eventos.py (depois do fork)
+_reserva_api = int(os.getenv('GUNICORN_THREADS_API', '16'))
+_limite_sse = max(threads - _reserva_api, 0)
+os.environ['EVENTOS_MAX_CONEXOES'] = str(min(int(os.getenv('EVENTOS_MAX_CONEXOES', _limite_sse)), _limite_sse))
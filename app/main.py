@@ -1,14 +1,26 @@
 # 🚀 main.py - VERSÃO HÍBRIDA OTIMIZADA PARA PRODUÇÃO
-from flask import Flask, jsonify, request, send_file, make_response
+from flask import Flask, jsonify, request, make_response, g
 from flask_cors import CORS
-from database import SessionLocal, Base, engine, get_db, Arquivo, Pasta
+from database import SessionLocal, obter_sessao, registrar_sessao_requisicao, metricas_pool, Base, engine, get_db, Arquivo, Pasta, atualizar_esquema
+from services.upload_stream import processar_upload, criar_destino, ArquivoMuitoGrande
+from services.download import servir_arquivo, resposta_indisponivel, ArquivoIndisponivel
+from services.blob_store import registrar_upload, criar_arquivo_por_hash, e_compartilhado, autorizar_upload_por_hash
+from services.busca_arquivos import preparar_indice as preparar_busca_arquivos
+from services.busca_clientes import preparar_indice as preparar_busca_clientes
+from services.sincronizacao import preparar_sync
+from services.dashboard_snapshot import preparar_snapshot
+from services.replica_leitura import estatisticas as estatisticas_replica
+from services.metricas import registrar_metricas, acesso_metricas
+from services.perfil_sql import registrar_perfil_sql
+from services.json_rapido import registrar_json
+from services.eventos import registrar_eventos
+from services.serializers import carregar, opcoes_serializacao
 import os
 import sys
 from dotenv import load_dotenv
 from datetime import datetime, UTC
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import FileStorage
-import uuid
 import mimetypes
 
 load_dotenv()
@@ -35,7 +47,7 @@ except ImportError as e:
 # Sistema de autenticação
 try:
     from routes.auth import auth_bp
-    from middleware.auth_middleware import initialize_auth_system
+    from middleware.auth_middleware import initialize_auth_system, auth_required as login_required
     HAS_AUTH = True
     print("✅ Autenticação disponível")
 except ImportError:
@@ -69,6 +81,7 @@ optional_modules = [
     ('routes.dashboard', 'dashboard_bp'),
     ('routes.bank_routes', 'bank_bp'),
     ('routes.webhook_receiver', 'webhook_bp'),
+    ('routes.sync', 'sync_bp'),
     ('models.user_settings', 'user_settings_bp')
 ]
 
@@ -139,41 +152,45 @@ def setup_file_routes(app):
         if not file.filename:
             return jsonify({'success': False, 'error': 'Nome inválido'}), 400
         
-        # Validar tamanho
-        file.seek(0, 2)
-        file_size = file.tell()
-        file.seek(0)
-        
-        if file_size > MAX_FILE_SIZE:
-            return jsonify({
-                'success': False, 
-                'error': f'Arquivo muito grande. Máximo: {MAX_FILE_SIZE // (1024*1024)}MB'
-            }), 400
-        
         if not allowed_file(file.filename):
             return jsonify({'success': False, 'error': 'Tipo não permitido'}), 400
         
-        # Salvar arquivo
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
+        projeto_id = request.form.get('projeto_id', type=int)
+        pasta_id = request.form.get('pasta_id', type=int)
         
-        file.save(file_path)
+        # Salvar arquivo (streaming: tamanho, SHA-256 e MIME em uma passada)
+        filename = secure_filename(file.filename)
+        destino, unique_filename = criar_destino(
+            UPLOAD_FOLDER, filename, file.filename, pasta_id=pasta_id, projeto_id=projeto_id
+        )
+        try:
+            resultado = processar_upload(file.stream, destino, file.filename, MAX_FILE_SIZE, file.content_type)
+        except ArquivoMuitoGrande as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        file_size = resultado['tamanho']
         
         # Salvar no banco
-        db = SessionLocal()
+        db = obter_sessao()
         try:
+            # Deduplicação por SHA-256: conteúdo repetido aponta para o blob existente
+            resultado, reaproveitado = registrar_upload(db, resultado)
+            file_path = resultado.get('caminho')
+            
             novo_arquivo = Arquivo(
                 nome_original=file.filename,
                 nome_arquivo=unique_filename,
                 caminho=file_path,
                 tamanho=file_size,
-                tipo_mime=file.content_type or 'application/octet-stream',
+                tipo_mime=resultado['tipo_mime'],
+                hash_sha256=resultado['hash_sha256'],
+                storage_type=resultado['storage_type'],
+                aws_s3_key=resultado.get('aws_s3_key'),
+                aws_s3_bucket=resultado.get('aws_s3_bucket'),
                 tipo_documento=request.form.get('tipo_documento', 'Geral'),
-                projeto_id=request.form.get('projeto_id', type=int),
-                pasta_id=request.form.get('pasta_id', type=int),
+                projeto_id=projeto_id,
+                pasta_id=pasta_id,
                 descricao=request.form.get('descricao', ''),
+                uploaded_by=auth_data.get('username') if isinstance(auth_data, dict) else None,
                 created_at=datetime.now(UTC)
             )
             
@@ -184,6 +201,7 @@ def setup_file_routes(app):
             return jsonify({
                 'success': True,
                 'message': 'Upload realizado com sucesso',
+                'deduplicado': reaproveitado,
                 'data': novo_arquivo.to_dict()
             })
             
@@ -196,15 +214,64 @@ def setup_file_routes(app):
                 'data': {
                     'id': int(file_size % 10000),
                     'nome_original': file.filename,
-                    'tamanho': file_size,
-                    'tipo_mime': file.content_type,
-                    'caminho': file_path,
+                    'tamanho': resultado['tamanho'],
+                    'tipo_mime': resultado['tipo_mime'],
+                    'caminho': resultado.get('caminho'),
                     'created_at': datetime.now(UTC).isoformat()
                 }
             })
         finally:
             db.close()
     
+    # Upload por hash só com o sistema de autenticação (sem ele o cliente envia o arquivo)
+    if HAS_AUTH:
+        @app.route('/api/arquivos/upload/por-hash', methods=['POST'])
+        @login_required()
+        def upload_por_hash():
+            """Upload instantâneo: conteúdo já armazenado é referenciado pelo SHA-256 (com prova de posse)"""
+            data = request.get_json() or {}
+            nome_original = data.get('nome_original') or data.get('fileName')
+            if not data.get('sha256') or not nome_original:
+                return jsonify({'success': False, 'error': 'sha256 e nome_original são obrigatórios'}), 400
+            if not allowed_file(nome_original):
+                return jsonify({'success': False, 'error': 'Tipo de arquivo não permitido'}), 400
+            
+            db = obter_sessao()
+            try:
+                sha256 = str(data['sha256']).lower()
+                recusa = autorizar_upload_por_hash(
+                    db, sha256, g.user_id, g.username, data.get('projeto_id'),
+                    desafio=data.get('desafio'), prova=data.get('prova')
+                )
+                if recusa:
+                    corpo, status = recusa
+                    return jsonify(corpo), status
+                
+                arquivo = criar_arquivo_por_hash(
+                    db, sha256, nome_original,
+                    tipo_documento=data.get('tipo_documento', 'Geral'),
+                    projeto_id=data.get('projeto_id'),
+                    pasta_id=data.get('pasta_id'),
+                    descricao=data.get('descricao', ''),
+                    uploaded_by=g.username
+                )
+                if not arquivo:
+                    return jsonify({'success': False, 'upload_necessario': True, 'error': 'Conteúdo não encontrado'}), 404
+            
+                db.commit()
+                db.refresh(arquivo)
+                return jsonify({
+                    'success': True,
+                    'message': 'Arquivo registrado sem transferência',
+                    'data': arquivo.to_dict()
+                }), 201
+            
+            except Exception as e:
+                db.rollback()
+                return jsonify({'success': False, 'error': str(e)}), 500
+            finally:
+                db.close()
+    
     @app.route('/api/arquivos', methods=['GET'])
     def listar_arquivos():
         """Listar arquivos otimizado"""
@@ -212,7 +279,7 @@ def setup_file_routes(app):
         if not auth_ok:
             return auth_data, 401
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             pasta_id = request.args.get('pasta_id', type=int)
             projeto_id = request.args.get('projeto_id', type=int)
@@ -224,11 +291,13 @@ def setup_file_routes(app):
             if projeto_id:
                 query = query.filter(Arquivo.projeto_id == projeto_id)
             
-            arquivos = query.order_by(Arquivo.created_at.desc()).limit(100).all()
+            # pasta/projeto em lote (sem N+1) e ?compact=1 / ?fields= para payload menor
+            arquivos = carregar(query.order_by(Arquivo.created_at.desc()).limit(100), Arquivo)
+            opcoes = opcoes_serializacao(request.args)
             
             return jsonify({
                 'success': True,
-                'data': [arquivo.to_dict() for arquivo in arquivos],
+                'data': [arquivo.to_dict(**opcoes) for arquivo in arquivos],
                 'total': len(arquivos)
             })
             
@@ -264,14 +333,16 @@ def setup_file_routes(app):
         if not auth_ok:
             return auth_data, 401
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
-            if not arquivo or not os.path.exists(arquivo.caminho):
+            if not arquivo:
                 return jsonify({'success': False, 'error': 'Arquivo não encontrado'}), 404
             
-            return send_file(arquivo.caminho, as_attachment=True, download_name=arquivo.nome_original)
+            return servir_arquivo(arquivo, como_anexo=True)
             
+        except ArquivoIndisponivel as e:
+            return resposta_indisponivel(e)
         finally:
             db.close()
     
@@ -282,14 +353,14 @@ def setup_file_routes(app):
         if not auth_ok:
             return auth_data, 401
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
             if not arquivo:
                 return jsonify({'success': False, 'error': 'Arquivo não encontrado'}), 404
             
-            # Deletar arquivo físico
-            if arquivo.caminho and os.path.exists(arquivo.caminho):
+            # Deletar arquivo físico (conteúdo deduplicado é liberado pelo blob store)
+            if not e_compartilhado(db, arquivo) and arquivo.caminho and os.path.exists(arquivo.caminho):
                 os.remove(arquivo.caminho)
             
             # Deletar do banco
@@ -341,6 +412,9 @@ def create_app():
     global app
     app = Flask(__name__)
     
+    # JSON via orjson (fallback: stdlib)
+    registrar_json(app)
+    
     # Configurações
     app.config.update({
         'UPLOAD_FOLDER': UPLOAD_FOLDER,
@@ -353,6 +427,11 @@ def create_app():
     # Criar tabelas
     try:
         Base.metadata.create_all(bind=engine)
+        atualizar_esquema()
+        preparar_busca_arquivos()
+        preparar_busca_clientes()
+        preparar_sync()
+        preparar_snapshot()
         print("✅ Tabelas do banco criadas/verificadas")
         
         if HAS_AUTH:
@@ -362,11 +441,23 @@ def create_app():
         if PRODUCTION_MODE:
             sys.exit(1)
     
+    # Uma sessão (e no máximo uma conexão do pool) por requisição
+    registrar_sessao_requisicao(app)
+    
+    # Métricas (latência, SQL e bytes por rota) em /metrics
+    registrar_metricas(app)
+    
+    # Queries lentas e N+1 (log + /api/admin/perfil-sql)
+    registrar_perfil_sql(app)
+    
+    # Eventos de mudança (SSE) em /api/events no lugar do polling do dashboard
+    registrar_eventos(app)
+    
     # CORS otimizado
     CORS(app, 
          origins=["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000"],
          supports_credentials=True,
-         allow_headers=['Content-Type', 'Authorization', 'Accept'],
+         allow_headers=['Content-Type', 'Authorization', 'Accept', 'Last-Event-ID'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])
     
     # Handlers CORS
@@ -376,7 +467,7 @@ def create_app():
             response = make_response()
             response.headers['Access-Control-Allow-Origin'] = request.headers.get('Origin', '*')
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, Last-Event-ID'
             response.headers['Access-Control-Allow-Credentials'] = 'true'
             return response
     
@@ -426,7 +517,7 @@ def create_app():
         # Teste básico do banco
         db_ok = False
         try:
-            db = SessionLocal()
+            db = obter_sessao()
             from sqlalchemy import text
             db.execute(text('SELECT 1'))
             db_ok = True
@@ -451,6 +542,15 @@ def create_app():
             }
         })
     
+    @app.route('/api/db/pool', methods=['GET'])
+    @acesso_metricas
+    def db_pool_metrics():
+        """Métricas do pool de conexões (uso, overflow, espera e timeouts) e da réplica de leitura"""
+        try:
+            return jsonify({'success': True, 'pool': metricas_pool(), 'replica': estatisticas_replica()})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+    
     @app.route('/api/dashboard-data', methods=['GET'])
     def dashboard_data():
         """Dados do dashboard otimizados"""
@@ -458,7 +558,7 @@ def create_app():
         if not auth_ok:
             return auth_data, 401
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             # Estatísticas básicas
             stats = {
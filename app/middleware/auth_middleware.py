@@ -1,8 +1,10 @@
 # 📁 middleware/auth_middleware.py - VERSÃO DE PRODUÇÃO FINAL
 from functools import wraps
 from flask import request, jsonify, g
-from database import SessionLocal
+from database import SessionLocal, sessao_compartilhada
 from models.user import User
+from services.cache_principal import obter_principal, revogar_tokens, revogacao_atual
+from services.cache_tokens import CacheTokens, invalidar_usuario
 import structlog
 import jwt
 import os
@@ -16,6 +18,9 @@ JWT_SECRET = os.getenv('JWT_SECRET')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', '24'))
 
+# Tokens já verificados (expiram no 'exp'; revoke_user_tokens invalida)
+_tokens_verificados = CacheTokens('auth_middleware')
+
 def generate_jwt_token(user_data, expires_hours=None):
     """Gerar token JWT para o usuário"""
     try:
@@ -27,6 +32,7 @@ def generate_jwt_token(user_data, expires_hours=None):
             'username': user_data['username'],
             'role': user_data['role'],
             'email': user_data.get('email'),
+            'rev': revogacao_atual(user_data['user_id']),
             'exp': datetime.now(UTC) + timedelta(hours=expires_hours),
             'iat': datetime.now(UTC)
         }
@@ -46,7 +52,12 @@ def generate_jwt_token(user_data, expires_hours=None):
 def verify_jwt_token(token):
     """Verificar e decodificar token JWT"""
     try:
+        payload = _tokens_verificados.obter(token)
+        if payload is not None:
+            return payload
+        
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        geracao = _tokens_verificados.geracao(payload.get('user_id'))
         
         # Verificar se o token não expirou
         exp_timestamp = payload.get('exp')
@@ -55,6 +66,7 @@ def verify_jwt_token(token):
             return None
         
         logger.debug("jwt_token_verified", user_id=payload.get('user_id'))
+        _tokens_verificados.definir(token, payload, geracao)
         return payload
         
     except jwt.ExpiredSignatureError:
@@ -128,7 +140,7 @@ def auth_required(roles=None):
                         'code': 'INVALID_TOKEN'
                     }), 401
                 
-                # 4. Buscar usuário no banco
+                # 4. Obter usuário (cache de principal)
                 user_id = payload.get('user_id')
                 if not user_id:
                     logger.error("token_missing_user_id", payload=payload)
@@ -138,57 +150,61 @@ def auth_required(roles=None):
                         'code': 'INVALID_TOKEN_DATA'
                     }), 401
                 
-                db = SessionLocal()
-                try:
-                    user = db.query(User).filter(User.id == user_id).first()
-                    
-                    if not user:
-                        logger.warning("user_not_found", user_id=user_id)
-                        return jsonify({
-                            'success': False,
-                            'error': 'Usuário não encontrado',
-                            'code': 'USER_NOT_FOUND'
-                        }), 401
-                    
-                    if not user.is_active:
-                        logger.warning("user_inactive", user_id=user_id, username=user.username)
+                # Principal em cache (LRU -> Redis -> banco), invalidado em alterações
+                user = obter_principal(user_id)
+                
+                if not user:
+                    logger.warning("user_not_found", user_id=user_id)
+                    return jsonify({
+                        'success': False,
+                        'error': 'Usuário não encontrado',
+                        'code': 'USER_NOT_FOUND'
+                    }), 401
+                
+                if not user.is_active:
+                    logger.warning("user_inactive", user_id=user_id, username=user.username)
+                    return jsonify({
+                        'success': False,
+                        'error': 'Conta do usuário foi desativada',
+                        'code': 'USER_INACTIVE'
+                    }), 401
+                
+                if user.token_revogado(payload):
+                    logger.warning("revoked_token", user_id=user_id)
+                    return jsonify({
+                        'success': False,
+                        'error': 'Token revogado',
+                        'code': 'TOKEN_REVOKED'
+                    }), 401
+                
+                # 5. Verificar roles se especificados
+                if roles:
+                    required_roles = roles if isinstance(roles, list) else [roles]
+                    if user.role not in required_roles:
+                        logger.warning("insufficient_permissions", 
+                                     user_id=user_id,
+                                     user_role=user.role,
+                                     required_roles=required_roles)
                         return jsonify({
                             'success': False,
-                            'error': 'Conta do usuário foi desativada',
-                            'code': 'USER_INACTIVE'
-                        }), 401
-                    
-                    # 5. Verificar roles se especificados
-                    if roles:
-                        required_roles = roles if isinstance(roles, list) else [roles]
-                        if user.role not in required_roles:
-                            logger.warning("insufficient_permissions", 
-                                         user_id=user_id,
-                                         user_role=user.role,
-                                         required_roles=required_roles)
-                            return jsonify({
-                                'success': False,
-                                'error': 'Permissão insuficiente para acessar este recurso',
-                                'code': 'INSUFFICIENT_PERMISSIONS'
-                            }), 403
-                    
-                    # 6. Adicionar usuário ao contexto da requisição
-                    g.current_user = user
-                    g.user_id = user.id
-                    g.user_role = user.role
-                    g.username = user.username
-                    g.user_email = user.email
-                    
-                    # 7. Log de acesso autorizado
-                    logger.info("authorized_access", 
-                               user_id=user.id,
-                               username=user.username,
-                               role=user.role,
-                               endpoint=request.endpoint,
-                               method=request.method)
-                    
-                finally:
-                    db.close()
+                            'error': 'Permissão insuficiente para acessar este recurso',
+                            'code': 'INSUFFICIENT_PERMISSIONS'
+                        }), 403
+                
+                # 6. Adicionar usuário ao contexto da requisição
+                g.current_user = user
+                g.user_id = user.id
+                g.user_role = user.role
+                g.username = user.username
+                g.user_email = user.email
+                
+                # 7. Log de acesso autorizado
+                logger.info("authorized_access", 
+                           user_id=user.id,
+                           username=user.username,
+                           role=user.role,
+                           endpoint=request.endpoint,
+                           method=request.method)
                 
                 # 8. Chamar a função original
                 return f(*args, **kwargs)
@@ -253,8 +269,8 @@ def validate_token_for_verification(token):
         if not user_id:
             return False, None, "Token não contém ID do usuário"
         
-        db = SessionLocal()
-        try:
+        # Sessão da requisição: a rota /verify-token reaproveita a mesma conexão
+        with sessao_compartilhada() as db:
             user = db.query(User).filter(User.id == user_id).first()
             
             if not user:
@@ -279,9 +295,6 @@ def validate_token_for_verification(token):
             logger.info("token_validation_success", user_id=user_id)
             return True, user_data, None
             
-        finally:
-            db.close()
-            
     except Exception as e:
         logger.error("validate_token_error", error=str(e))
         return False, None, f"Erro interno: {str(e)}"
@@ -319,11 +332,11 @@ def create_auth_response(user):
         return None
 
 def revoke_user_tokens(user_id):
-    """Revogar todos os tokens de um usuário (implementação básica)"""
+    """Revogar todos os tokens de um usuário (tokens emitidos antes deixam de valer)"""
     try:
-        # Em uma implementação mais robusta, você manteria uma blacklist de tokens
-        # Por enquanto, registramos o evento para auditoria
-        logger.info("user_tokens_revoked", user_id=user_id)
+        revogacao = revogar_tokens(user_id)
+        invalidar_usuario(user_id)
+        logger.info("user_tokens_revoked", user_id=user_id, revocation=revogacao)
         return True
         
     except Exception as e:
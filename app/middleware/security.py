@@ -13,6 +13,7 @@ import hashlib
 import hmac
 from flask_cors import CORS
 from typing import Dict, Any, Optional
+from services.cache_tokens import CacheTokens, invalidar_usuario
 
 # 🔧 Logger simples
 logger = structlog.get_logger()
@@ -23,6 +24,8 @@ class SimpleSecurityManager:
         self.encryption_key = self._init_encryption_key()
         self.jwt_secret = os.getenv('JWT_SECRET')
         self.redis_client = self._init_redis()
+        # Tokens já verificados: dispensa HMAC e EXISTS no Redis até o 'exp'
+        self.tokens_verificados = CacheTokens('security_manager')
         
         if not self.jwt_secret or len(self.jwt_secret) < 32:
             raise ValueError("JWT_SECRET deve ter pelo menos 32 caracteres")
@@ -136,6 +139,10 @@ class SimpleSecurityManager:
     def verify_jwt_token(self, token: str) -> Dict[str, Any]:
         """Verificar token JWT simples"""
         try:
+            payload = self.tokens_verificados.obter(token)
+            if payload is not None:
+                return payload
+            
             payload = jwt.decode(
                 token,
                 self.jwt_secret,
@@ -143,12 +150,16 @@ class SimpleSecurityManager:
                 options={'verify_exp': True}
             )
             
+            # Geração lida antes da checagem: revogação concorrente descarta a entrada
+            geracao = self.tokens_verificados.geracao(payload.get('user_id'))
+            
             # Verificar se não foi revogado
             if hasattr(self.redis_client, 'exists'):
                 jti = payload.get('user_id')
                 if jti and not self.redis_client.exists(f"jwt:{jti}"):
                     raise jwt.InvalidTokenError("Token revogado")
             
+            self.tokens_verificados.definir(token, payload, geracao)
             return payload
             
         except jwt.ExpiredSignatureError:
@@ -166,6 +177,8 @@ class SimpleSecurityManager:
             
             if jti and hasattr(self.redis_client, 'delete'):
                 self.redis_client.delete(f"jwt:{jti}")
+                # A chave jwt:{user_id} vale para todos os tokens do usuário
+                invalidar_usuario(jti)
                 return True
             
             return False
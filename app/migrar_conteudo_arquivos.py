@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# migrar_conteudo_arquivos.py - Move arquivos.arquivo_blob para a tabela arquivo_conteudo
+# Uso: python migrar_conteudo_arquivos.py [--lote 200] [--pausa 0.1] [--dry-run] [--vacuum]
+#
+# Cada lote roda em sua própria transação (INSERT ... SELECT + UPDATE para NULL),
+# então a migração pode ser interrompida e retomada a qualquer momento sem
+# bloquear a tabela 'arquivos' por muito tempo.
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select, insert, update, func, text
+from database import engine, Base, Arquivo, ArquivoConteudo
+
+ARQUIVOS = Arquivo.__table__
+CONTEUDO = ArquivoConteudo.__table__
+
+def pendentes(conn):
+    """Quantidade de linhas com blob ainda na tabela 'arquivos'"""
+    return conn.execute(
+        select(func.count()).select_from(ARQUIVOS).where(ARQUIVOS.c.arquivo_blob.isnot(None))
+    ).scalar()
+
+def migrar_lote(tamanho_lote, apos_id=0):
+    """
+    Migrar até tamanho_lote linhas com id > apos_id
+
+    Retorna (migrados, ultimo_id); ultimo_id None quando não há mais linhas.
+    """
+    with engine.begin() as conn:
+        ids = conn.execute(
+            select(ARQUIVOS.c.id)
+            .where(ARQUIVOS.c.arquivo_blob.isnot(None), ARQUIVOS.c.id > apos_id)
+            .order_by(ARQUIVOS.c.id)
+            .limit(tamanho_lote)
+        ).scalars().all()
+        if not ids:
+            return 0, None
+
+        # Linhas já copiadas numa execução interrompida não são duplicadas
+        ja_copiados = set(conn.execute(
+            select(CONTEUDO.c.arquivo_id).where(CONTEUDO.c.arquivo_id.in_(ids))
+        ).scalars())
+        copiar = [id_ for id_ in ids if id_ not in ja_copiados]
+
+        if copiar:
+            conn.execute(insert(CONTEUDO).from_select(
+                ['arquivo_id', 'dados'],
+                select(ARQUIVOS.c.id, ARQUIVOS.c.arquivo_blob).where(ARQUIVOS.c.id.in_(copiar))
+            ))
+        conn.execute(update(ARQUIVOS).where(ARQUIVOS.c.id.in_(ids)).values(arquivo_blob=None))
+
+    return len(ids), ids[-1]
+
+def migrar(tamanho_lote=200, pausa=0.0, verboso=True):
+    """Migrar todas as linhas pendentes em lotes; retorna o total migrado"""
+    Base.metadata.create_all(bind=engine, tables=[CONTEUDO])
+
+    total = 0
+    ultimo_id = 0
+    while True:
+        migrados, ultimo_id = migrar_lote(tamanho_lote, ultimo_id)
+        if not migrados:
+            break
+        total += migrados
+        if verboso:
+            print(f"📦 {total} arquivos migrados (último id {ultimo_id})")
+        if pausa:
+            time.sleep(pausa)
+    return total
+
+def recuperar_espaco():
+    """Devolver ao sistema as páginas liberadas em 'arquivos'"""
+    if engine.dialect.name == 'postgresql':
+        # VACUUM não roda dentro de transação
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('VACUUM (ANALYZE) arquivos'))
+        print("🧹 VACUUM ANALYZE executado (use VACUUM FULL em janela de manutenção para compactar)")
+    elif engine.dialect.name == 'sqlite':
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text('VACUUM'))
+        print("🧹 VACUUM executado")
+
+def main():
+    parser = argparse.ArgumentParser(description='Mover blobs de arquivos para arquivo_conteudo')
+    parser.add_argument('--lote', type=int, default=200, help='Linhas por transação')
+    parser.add_argument('--pausa', type=float, default=0.0, help='Segundos entre lotes (alivia o banco em produção)')
+    parser.add_argument('--dry-run', action='store_true', help='Apenas contar as linhas pendentes')
+    parser.add_argument('--vacuum', action='store_true', help='Executar VACUUM ao final')
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        total_pendente = pendentes(conn)
+    print(f"🔍 {total_pendente} arquivos com conteúdo na tabela 'arquivos'")
+
+    if args.dry_run or not total_pendente:
+        return 0
+
+    inicio = time.perf_counter()
+    total = migrar(args.lote, args.pausa)
+    print(f"✅ {total} arquivos migrados em {time.perf_counter() - inicio:.1f}s")
+
+    if args.vacuum:
+        recuperar_espaco()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
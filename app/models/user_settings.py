@@ -1,6 +1,6 @@
 # 📁 routes/user_settings.py - VERSÃO CORRIGIDA PARA SUA API
 from flask import Blueprint, request, jsonify, g
-from database import SessionLocal
+from database import obter_sessao
 from models.user import User
 from middleware.auth_middleware import auth_required, get_current_user_id
 from datetime import datetime, UTC
@@ -28,7 +28,7 @@ def get_user_settings():
                 'error': 'Usuário não autenticado'
             }), 401
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             # Buscar usuário
             user = db.query(User).filter(User.id == user_id).first()
@@ -109,7 +109,7 @@ def update_user_settings():
                 'error': 'Dados não fornecidos'
             }), 400
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             user = db.query(User).filter(User.id == user_id).first()
             
@@ -242,7 +242,7 @@ def get_user_profile():
     try:
         user_id = get_current_user_id()
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             user = db.query(User).filter(User.id == user_id).first()
             
@@ -1,11 +1,22 @@
 # 📁 routes/arquivos.py - BLUEPRINT DEDICADO PARA SISTEMA DE ARQUIVOS
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify, send_file, current_app, g
 from werkzeug.utils import secure_filename
 from datetime import datetime, UTC
 import os
 import uuid
 import mimetypes
-from database import SessionLocal, Arquivo, Pasta
+from database import obter_sessao, Arquivo, Pasta
+from services.serializers import carregar
+from services.paginacao import parametros_paginacao, paginar, CursorInvalido
+from services.upload_stream import processar_upload, criar_destino, ArquivoMuitoGrande
+from services.download import servir_arquivo, resposta_indisponivel, ArquivoIndisponivel
+from services.blob_store import (
+    registrar_upload, criar_arquivo_por_hash, e_compartilhado, autorizar_upload_por_hash
+)
+from middleware.auth_middleware import auth_required as login_required
+from services.busca_arquivos import buscar
+from services.replica_leitura import somente_leitura
+from services.cache_resultados import em_cache, tags_linhas
 
 # Criar blueprint
 arquivos_bp = Blueprint('arquivos', __name__)
@@ -73,19 +84,6 @@ def upload_arquivo():
                 'error': 'Nome do arquivo inválido'
             }), 400
         
-        # Verificar tamanho do arquivo
-        file.seek(0, 2)  # Ir para o final
-        file_size = file.tell()
-        file.seek(0)     # Voltar para o início
-        
-        max_size = current_app.config.get('MAX_CONTENT_LENGTH', 100 * 1024 * 1024)
-        if file_size > max_size:
-            max_mb = max_size // (1024 * 1024)
-            return jsonify({
-                'success': False, 
-                'error': f'Arquivo muito grande. Máximo: {max_mb}MB'
-            }), 400
-        
         # Verificar extensão
         if not allowed_file(file.filename):
             return jsonify({
@@ -93,30 +91,48 @@ def upload_arquivo():
                 'error': 'Tipo de arquivo não permitido'
             }), 400
         
-        # Preparar salvamento
-        upload_folder = ensure_upload_folder()
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4().hex}_{filename}"
-        file_path = os.path.join(upload_folder, unique_filename)
-        
-        # Salvar arquivo físico
-        file.save(file_path)
-        
         # Dados do formulário
         tipo_documento = request.form.get('tipo_documento', 'Geral')
         projeto_id = request.form.get('projeto_id', type=int)
         pasta_id = request.form.get('pasta_id', type=int)
         descricao = request.form.get('descricao', '')
         
+        # Streaming em uma passada: tamanho, SHA-256 e MIME enquanto grava
+        # (disco local ou S3 multipart), sem carregar o arquivo em memória
+        max_size = current_app.config.get('MAX_CONTENT_LENGTH', 100 * 1024 * 1024)
+        filename = secure_filename(file.filename)
+        destino, unique_filename = criar_destino(
+            ensure_upload_folder(), filename, file.filename,
+            pasta_id=pasta_id, projeto_id=projeto_id
+        )
+        try:
+            resultado = processar_upload(file.stream, destino, file.filename, max_size, file.content_type)
+        except ArquivoMuitoGrande as e:
+            return jsonify({
+                'success': False, 
+                'error': str(e)
+            }), 400
+        
+        file_path = resultado.get('caminho')
+        file_size = resultado['tamanho']
+        
         # Salvar no banco de dados
-        db = SessionLocal()
+        db = obter_sessao()
         try:
+            # Conteúdo repetido passa a apontar para o blob existente (dedup por SHA-256)
+            resultado, reaproveitado = registrar_upload(db, resultado)
+            file_path = resultado.get('caminho')
+            
             novo_arquivo = Arquivo(
                 nome_original=file.filename,
                 nome_arquivo=unique_filename,
                 caminho=file_path,
                 tamanho=file_size,
-                tipo_mime=file.content_type or mimetypes.guess_type(file.filename)[0] or 'application/octet-stream',
+                tipo_mime=resultado['tipo_mime'],
+                hash_sha256=resultado['hash_sha256'],
+                storage_type=resultado['storage_type'],
+                aws_s3_key=resultado.get('aws_s3_key'),
+                aws_s3_bucket=resultado.get('aws_s3_bucket'),
                 tipo_documento=tipo_documento,
                 projeto_id=projeto_id,
                 pasta_id=pasta_id,
@@ -137,6 +153,9 @@ def upload_arquivo():
                     'nome_arquivo': novo_arquivo.nome_arquivo,
                     'tamanho': novo_arquivo.tamanho,
                     'tipo_mime': novo_arquivo.tipo_mime,
+                    'hash_sha256': novo_arquivo.hash_sha256,
+                    'storage_type': novo_arquivo.storage_type,
+                    'deduplicado': reaproveitado,
                     'tipo_documento': novo_arquivo.tipo_documento,
                     'projeto_id': novo_arquivo.projeto_id,
                     'pasta_id': novo_arquivo.pasta_id,
@@ -159,7 +178,8 @@ def upload_arquivo():
                     'nome_original': file.filename,
                     'nome_arquivo': unique_filename,
                     'tamanho': file_size,
-                    'tipo_mime': file.content_type,
+                    'tipo_mime': resultado['tipo_mime'],
+                    'hash_sha256': resultado['hash_sha256'],
                     'caminho': file_path,
                     'created_at': datetime.now(UTC).isoformat()
                 }
@@ -174,6 +194,83 @@ def upload_arquivo():
             'error': f'Erro interno: {str(e)}'
         }), 500
 
+@arquivos_bp.route('/upload/por-hash', methods=['POST'])
+@login_required()
+def upload_por_hash():
+    """
+    Upload instantâneo: registrar arquivo cujo conteúdo (SHA-256) já está armazenado
+
+    Sem acesso prévio ao conteúdo (autor ou projeto), responde 409 com um
+    desafio: o cliente reenvia com 'desafio' e 'prova' (SHA-256 das faixas pedidas).
+    """
+    try:
+        data = request.get_json() or {}
+        nome_original = data.get('nome_original') or data.get('fileName')
+
+        if not data.get('sha256') or not nome_original:
+            return jsonify({
+                'success': False,
+                'error': 'sha256 e nome_original são obrigatórios'
+            }), 400
+
+        if not allowed_file(nome_original):
+            return jsonify({
+                'success': False,
+                'error': 'Tipo de arquivo não permitido'
+            }), 400
+
+        db = obter_sessao()
+        try:
+            sha256 = str(data['sha256']).lower()
+            projeto_id = data.get('projeto_id')
+
+            recusa = autorizar_upload_por_hash(
+                db, sha256, g.user_id, g.username, projeto_id,
+                desafio=data.get('desafio'), prova=data.get('prova')
+            )
+            if recusa:
+                corpo, status = recusa
+                return jsonify(corpo), status
+
+            arquivo = criar_arquivo_por_hash(
+                db, sha256, nome_original,
+                tipo_documento=data.get('tipo_documento', 'Geral'),
+                projeto_id=projeto_id,
+                pasta_id=data.get('pasta_id'),
+                descricao=data.get('descricao', ''),
+                uploaded_by=g.username
+            )
+
+            if not arquivo:
+                # Conteúdo desconhecido: o cliente deve enviar o arquivo em /upload
+                return jsonify({
+                    'success': False,
+                    'upload_necessario': True,
+                    'error': 'Conteúdo não encontrado'
+                }), 404
+
+            db.commit()
+            db.refresh(arquivo)
+
+            return jsonify({
+                'success': True,
+                'message': 'Arquivo registrado sem transferência (conteúdo já armazenado)',
+                'data': arquivo.to_dict()
+            }), 201
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    except Exception as e:
+        print(f"❌ Erro no upload por hash: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Erro interno: {str(e)}'
+        }), 500
+
 # ===== ROTAS DE LISTAGEM =====
 
 @arquivos_bp.route('/', methods=['GET'])
@@ -186,10 +283,10 @@ def listar_arquivos():
         pasta_id = request.args.get('pasta_id', type=int)
         projeto_id = request.args.get('projeto_id', type=int)
         tipo_documento = request.args.get('tipo_documento')
-        limit = request.args.get('limit', 100, type=int)
-        offset = request.args.get('offset', 0, type=int)
+        # ?cursor= (keyset em created_at, id) ou ?offset= (legado)
+        parametros = parametros_paginacao(request.args)
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             # Construir query
             query = db.query(Arquivo)
@@ -205,9 +302,7 @@ def listar_arquivos():
                 query = query.filter(Arquivo.tipo_documento == tipo_documento)
             
             # Ordenar e paginar
-            query = query.order_by(Arquivo.created_at.desc())
-            total = query.count()
-            arquivos = query.offset(offset).limit(limit).all()
+            arquivos, paginacao = paginar(query, Arquivo, Arquivo.created_at, parametros)
             
             # Converter para dicionários
             arquivos_data = []
@@ -230,12 +325,7 @@ def listar_arquivos():
             return jsonify({
                 'success': True,
                 'data': arquivos_data,
-                'pagination': {
-                    'total': total,
-                    'limit': limit,
-                    'offset': offset,
-                    'has_more': (offset + limit) < total
-                },
+                'pagination': paginacao,
                 'filters': {
                     'pasta_id': pasta_id,
                     'projeto_id': projeto_id,
@@ -246,6 +336,11 @@ def listar_arquivos():
         finally:
             db.close()
             
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         print(f"❌ Erro ao listar arquivos: {e}")
         
@@ -290,7 +385,7 @@ def listar_arquivos():
 def download_arquivo(arquivo_id):
     """Download de arquivo específico"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
             
@@ -300,19 +395,11 @@ def download_arquivo(arquivo_id):
                     'error': 'Arquivo não encontrado'
                 }), 404
             
-            if not arquivo.caminho or not os.path.exists(arquivo.caminho):
-                return jsonify({
-                    'success': False, 
-                    'error': 'Arquivo físico não encontrado'
-                }), 404
-            
-            return send_file(
-                arquivo.caminho,
-                as_attachment=True,
-                download_name=arquivo.nome_original,
-                mimetype=arquivo.tipo_mime
-            )
+            # Range/ETag/304 sobre database, s3 ou local
+            return servir_arquivo(arquivo, como_anexo=True)
             
+        except ArquivoIndisponivel as e:
+            return resposta_indisponivel(e)
         finally:
             db.close()
             
@@ -328,7 +415,7 @@ def download_arquivo(arquivo_id):
 def view_arquivo(arquivo_id):
     """Visualizar arquivo (sem download)"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
             
@@ -338,18 +425,11 @@ def view_arquivo(arquivo_id):
                     'error': 'Arquivo não encontrado'
                 }), 404
             
-            if not arquivo.caminho or not os.path.exists(arquivo.caminho):
-                return jsonify({
-                    'success': False, 
-                    'error': 'Arquivo físico não encontrado'
-                }), 404
-            
-            return send_file(
-                arquivo.caminho,
-                as_attachment=False,
-                mimetype=arquivo.tipo_mime
-            )
+            # Range/ETag/304 sobre database, s3 ou local
+            return servir_arquivo(arquivo, como_anexo=False)
             
+        except ArquivoIndisponivel as e:
+            return resposta_indisponivel(e)
         finally:
             db.close()
             
@@ -367,7 +447,7 @@ def view_arquivo(arquivo_id):
 def get_arquivo_info(arquivo_id):
     """Obter informações de um arquivo específico"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
             
@@ -415,7 +495,7 @@ def get_arquivo_info(arquivo_id):
 def deletar_arquivo(arquivo_id):
     """Deletar arquivo específico"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
             
@@ -425,9 +505,10 @@ def deletar_arquivo(arquivo_id):
                     'error': 'Arquivo não encontrado'
                 }), 404
             
-            # Deletar arquivo físico
+            # Deletar arquivo físico (conteúdo compartilhado é liberado pelo blob store
+            # quando a última referência sai)
             file_deleted = False
-            if arquivo.caminho and os.path.exists(arquivo.caminho):
+            if not e_compartilhado(db, arquivo) and arquivo.caminho and os.path.exists(arquivo.caminho):
                 try:
                     os.remove(arquivo.caminho)
                     file_deleted = True
@@ -475,7 +556,7 @@ def atualizar_arquivo(arquivo_id):
                 'error': 'Dados não fornecidos'
             }), 400
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             arquivo = db.query(Arquivo).filter(Arquivo.id == arquivo_id).first()
             
@@ -538,34 +619,41 @@ def atualizar_arquivo(arquivo_id):
 
 # ===== ROTAS DE PASTAS =====
 
+def _listar_pastas(db):
+    # Contagem de arquivos vem como subconsulta na mesma query
+    pastas = carregar(db.query(Pasta).order_by(Pasta.nome), Pasta)
+    
+    pastas_data = []
+    for pasta in pastas:
+        count_arquivos = pasta._contagens['total_arquivos']
+        
+        pastas_data.append({
+            'id': pasta.id,
+            'nome': pasta.nome,
+            'descricao': pasta.descricao,
+            'projeto_id': pasta.projeto_id,
+            'created_at': pasta.created_at.isoformat() if pasta.created_at else None,
+            'arquivos_count': count_arquivos
+        })
+    
+    return {
+        'success': True,
+        'data': pastas_data,
+        'total': len(pastas_data)
+    }
+
 @arquivos_bp.route('/pastas', methods=['GET'])
 @auth_required
 def listar_pastas():
     """Listar todas as pastas"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
-            pastas = db.query(Pasta).order_by(Pasta.nome).all()
-            
-            pastas_data = []
-            for pasta in pastas:
-                # Contar arquivos na pasta
-                count_arquivos = db.query(Arquivo).filter(Arquivo.pasta_id == pasta.id).count()
-                
-                pastas_data.append({
-                    'id': pasta.id,
-                    'nome': pasta.nome,
-                    'descricao': pasta.descricao,
-                    'projeto_id': pasta.projeto_id,
-                    'created_at': pasta.created_at.isoformat() if pasta.created_at else None,
-                    'arquivos_count': count_arquivos
-                })
-            
-            return jsonify({
-                'success': True,
-                'data': pastas_data,
-                'total': len(pastas_data)
-            })
+            # Em cache até alguma escrita em pastas ou em arquivos dessas pastas
+            return jsonify(em_cache(
+                'listar_pastas', None, lambda: _listar_pastas(db),
+                tags=lambda dados: tags_linhas(Pasta, dados['data'])
+            ))
             
         finally:
             db.close()
@@ -595,7 +683,7 @@ def criar_pasta():
                 'error': 'Nome da pasta é obrigatório'
             }), 400
         
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             # Verificar se pasta já existe
             existing = db.query(Pasta).filter(Pasta.nome == data['nome']).first()
@@ -642,10 +730,11 @@ def criar_pasta():
 
 @arquivos_bp.route('/stats', methods=['GET'])
 @auth_required
+@somente_leitura
 def estatisticas_arquivos():
     """Obter estatísticas dos arquivos"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             # Estatísticas básicas
             total_arquivos = db.query(Arquivo).count()
@@ -701,7 +790,7 @@ def estatisticas_arquivos():
 @arquivos_bp.route('/search', methods=['GET'])
 @auth_required
 def buscar_arquivos():
-    """Buscar arquivos por nome ou descrição"""
+    """Buscar arquivos por nome, descrição, tags e nome do projeto/pasta (com relevância)"""
     try:
         query_param = request.args.get('q', '').strip()
         if not query_param:
@@ -710,22 +799,30 @@ def buscar_arquivos():
                 'error': 'Parâmetro de busca "q" é obrigatório'
             }), 400
         
-        db = SessionLocal()
+        filtros = {
+            'pasta_id': request.args.get('pasta_id', type=int),
+            'projeto_id': request.args.get('projeto_id', type=int),
+            'tipo_documento': request.args.get('tipo_documento') or None
+        }
+        
+        db = obter_sessao()
         try:
-            # Buscar por nome ou descrição
-            arquivos = db.query(Arquivo).filter(
-                (Arquivo.nome_original.ilike(f'%{query_param}%')) |
-                (Arquivo.descricao.ilike(f'%{query_param}%'))
-            ).order_by(Arquivo.created_at.desc()).limit(50).all()
+            # Índice textual (FTS5/tsvector) com prefixo e ranking; cursor por relevância
+            encontrados, paginacao = buscar(db, query_param, filtros, parametros_paginacao(request.args, limite_padrao=50))
             
             resultados = []
-            for arquivo in arquivos:
+            for arquivo, relevancia in encontrados:
                 resultados.append({
                     'id': arquivo.id,
                     'nome_original': arquivo.nome_original,
                     'descricao': arquivo.descricao,
                     'tipo_documento': arquivo.tipo_documento,
                     'tamanho': arquivo.tamanho,
+                    'projeto_id': arquivo.projeto_id,
+                    'projeto_nome': arquivo.projeto.nome if arquivo.projeto else None,
+                    'pasta_id': arquivo.pasta_id,
+                    'pasta_nome': arquivo.pasta.nome if arquivo.pasta else None,
+                    'relevancia': round(relevancia, 6) if relevancia is not None else None,
                     'created_at': arquivo.created_at.isoformat() if arquivo.created_at else None,
                     'url_download': f'/api/arquivos/{arquivo.id}/download'
                 })
@@ -734,9 +831,12 @@ def buscar_arquivos():
                 'success': True,
                 'query': query_param,
                 'results': resultados,
-                'total': len(resultados)
+                'total': len(resultados),
+                'pagination': paginacao
             })
             
+        except CursorInvalido as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         finally:
             db.close()
             
@@ -762,7 +862,7 @@ def health_check():
         # Verificar banco de dados
         db_ok = False
         try:
-            db = SessionLocal()
+            db = obter_sessao()
             db.query(Arquivo).count()
             db_ok = True
             db.close()
@@ -773,7 +873,7 @@ def health_check():
         stats = {}
         if db_ok:
             try:
-                db = SessionLocal()
+                db = obter_sessao()
                 stats = {
                     'total_files': db.query(Arquivo).count(),
                     'total_folders': db.query(Pasta).count()
@@ -6,8 +6,9 @@ import structlog
 import re
 
 # ✅ IMPORTS CORRIGIDOS PARA SUA ESTRUTURA
-from database import SessionLocal
+from database import obter_sessao
 from models.user import User
+from services.cache_principal import revogacao_atual
 
 # Tentar importar middleware com fallback
 try:
@@ -163,7 +164,7 @@ def login():
             }), 429
         
         # Buscar usuário no banco
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             user = db.query(User).filter(User.username == username).first()
             
@@ -207,6 +208,7 @@ def login():
                 'user_id': user.id,
                 'username': user.username,
                 'role': user.role,
+                'rev': revogacao_atual(user.id),
                 'login_time': datetime.now(UTC).isoformat(),
                 'ip_address': ip_address
             }
@@ -317,7 +319,7 @@ def verify_token():
                 payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
                 
                 # Verificar usuário no banco
-                db = SessionLocal()
+                db = obter_sessao()
                 try:
                     user = db.query(User).filter(User.id == payload.get('user_id')).first()
                     if user and user.is_active:
@@ -446,7 +448,7 @@ def register():
             }), 429
         
         # Verificar se usuário já existe
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             existing_user = db.query(User).filter(
                 (User.username == username) | (User.email == email)
@@ -532,7 +534,7 @@ def auth_health():
     """Health check do sistema de autenticação"""
     try:
         # Verificar conexão com banco
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             user_count = db.query(User).count()
             admin_count = db.query(User).filter(User.role == 'admin').count()
@@ -1,20 +1,40 @@
 from flask import Blueprint, request, jsonify
-from database import SessionLocal, Cliente, Projeto
-from sqlalchemy import or_
+from database import obter_sessao, Cliente, Projeto
+from services.serializers import carregador, serializar
+from services.paginacao import parametros_paginacao, paginar, CursorInvalido
+from services.busca_clientes import buscar
+from services.cache_resultados import em_cache, tags_linhas
 
 clientes_bp = Blueprint('clientes', __name__)
 
+def _listar_clientes(db, args):
+    clientes, paginacao = paginar(
+        db.query(Cliente), Cliente, Cliente.created_at,
+        parametros_paginacao(args), carregar=carregador(Cliente)
+    )
+    return {
+        'success': True,
+        'data': [cliente.to_dict() for cliente in clientes],
+        'total': paginacao.get('total'),
+        'count': len(clientes),
+        'pagination': paginacao
+    }
+
 @clientes_bp.route('/api/clientes', methods=['GET'])
 def listar_clientes():
-    """Listar todos os clientes"""
-    db = SessionLocal()
+    """Listar clientes (paginação por cursor em created_at, id)"""
+    db = obter_sessao()
     try:
-        clientes = db.query(Cliente).all()
+        # Página em cache até alguma escrita em clientes ou nos projetos destes clientes
+        return jsonify(em_cache(
+            'listar_clientes', request.args, lambda: _listar_clientes(db, request.args),
+            tags=lambda dados: tags_linhas(Cliente, dados['data'])
+        ))
+    except CursorInvalido as e:
         return jsonify({
-            'success': True,
-            'data': [cliente.to_dict() for cliente in clientes],
-            'total': len(clientes)
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -26,7 +46,7 @@ def listar_clientes():
 @clientes_bp.route('/api/clientes', methods=['POST'])
 def criar_cliente():
     """Criar novo cliente"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         data = request.get_json()
         
@@ -83,7 +103,7 @@ def criar_cliente():
 @clientes_bp.route('/api/clientes/<int:cliente_id>', methods=['GET'])
 def obter_cliente(cliente_id):
     """Obter cliente por ID"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
         
@@ -95,8 +115,9 @@ def obter_cliente(cliente_id):
         
         # Incluir projetos do cliente
         cliente_data = cliente.to_dict()
-        projetos = db.query(Projeto).filter(Projeto.cliente_id == cliente_id).all()
-        cliente_data['projetos'] = [projeto.to_dict() for projeto in projetos]
+        cliente_data['projetos'] = serializar(
+            db.query(Projeto).filter(Projeto.cliente_id == cliente_id), Projeto
+        )
         
         return jsonify({
             'success': True,
@@ -114,7 +135,7 @@ def obter_cliente(cliente_id):
 @clientes_bp.route('/api/clientes/<int:cliente_id>', methods=['PUT'])
 def atualizar_cliente(cliente_id):
     """Atualizar cliente"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
         
@@ -174,7 +195,7 @@ def atualizar_cliente(cliente_id):
 @clientes_bp.route('/api/clientes/<int:cliente_id>', methods=['DELETE'])
 def deletar_cliente(cliente_id):
     """Deletar cliente"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
         
@@ -211,8 +232,8 @@ def deletar_cliente(cliente_id):
 
 @clientes_bp.route('/api/clientes/search', methods=['GET'])
 def buscar_clientes():
-    """Buscar clientes por nome, email ou CPF/CNPJ"""
-    db = SessionLocal()
+    """Buscar clientes por nome (aproximado), email ou CPF/CNPJ, por relevância"""
+    db = obter_sessao()
     try:
         query_param = request.args.get('q', '').strip()
         if not query_param:
@@ -221,20 +242,21 @@ def buscar_clientes():
                 'error': 'Parâmetro de busca é obrigatório'
             }), 400
         
-        clientes = db.query(Cliente).filter(
-            or_(
-                Cliente.nome.ilike(f'%{query_param}%'),
-                Cliente.email.ilike(f'%{query_param}%'),
-                Cliente.cpf_cnpj.ilike(f'%{query_param}%')
-            )
-        ).all()
+        # Nome sem acentos com tolerância a erros, email ou CPF/CNPJ sem pontuação (indexado)
+        encontrados, paginacao = buscar(db, query_param, parametros_paginacao(request.args, limite_padrao=20))
         
         return jsonify({
             'success': True,
-            'data': [cliente.to_dict() for cliente in clientes],
-            'total': len(clientes)
+            'data': [{**cliente.to_dict(), 'relevancia': relevancia} for cliente, relevancia in encontrados],
+            'total': len(encontrados),
+            'pagination': paginacao
         })
         
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-from database import SessionLocal, Conta, Notificacao
+from database import obter_sessao, Conta, Notificacao
 from sqlalchemy import func
 import json
+from services.serializers import carregador
+from services.paginacao import parametros_paginacao, paginar, CursorInvalido
+from services.replica_leitura import somente_leitura
+from services.single_flight import coalescer
 
 contas_bp = Blueprint('contas', __name__)
 
@@ -19,8 +23,8 @@ def criar_notificacao(db, titulo, mensagem, tipo='info', projeto_id=None, conta_
 
 @contas_bp.route('/api/contas', methods=['GET'])
 def listar_contas():
-    """Listar todas as contas"""
-    db = SessionLocal()
+    """Listar contas (paginação por cursor em data_vencimento, id)"""
+    db = obter_sessao()
     try:
         status_filter = request.args.get('status')
         projeto_id = request.args.get('projeto_id')
@@ -32,14 +36,24 @@ def listar_contas():
         if projeto_id:
             query = query.filter(Conta.projeto_id == projeto_id)
         
-        contas = query.order_by(Conta.data_vencimento.asc()).all()
+        contas, paginacao = paginar(
+            query, Conta, Conta.data_vencimento, parametros_paginacao(request.args),
+            crescente=True, carregar=carregador(Conta)
+        )
         
         return jsonify({
             'success': True,
             'data': [conta.to_dict() for conta in contas],
-            'total': len(contas)
+            'total': paginacao.get('total'),
+            'count': len(contas),
+            'pagination': paginacao
         })
         
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -51,7 +65,7 @@ def listar_contas():
 @contas_bp.route('/api/contas', methods=['POST'])
 def criar_conta():
     """Criar nova conta"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         data = request.get_json()
         
@@ -129,7 +143,7 @@ def criar_conta():
 @contas_bp.route('/api/contas/<int:conta_id>', methods=['GET'])
 def obter_conta(conta_id):
     """Obter conta por ID"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         conta = db.query(Conta).filter(Conta.id == conta_id).first()
         
@@ -155,7 +169,7 @@ def obter_conta(conta_id):
 @contas_bp.route('/api/contas/<int:conta_id>', methods=['PUT'])
 def atualizar_conta(conta_id):
     """Atualizar conta"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         conta = db.query(Conta).filter(Conta.id == conta_id).first()
         
@@ -215,7 +229,7 @@ def atualizar_conta(conta_id):
 @contas_bp.route('/api/contas/<int:conta_id>/pagar', methods=['PATCH'])
 def marcar_como_paga(conta_id):
     """Marcar conta como paga"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         conta = db.query(Conta).filter(Conta.id == conta_id).first()
         
@@ -269,7 +283,7 @@ def marcar_como_paga(conta_id):
 @contas_bp.route('/api/contas/<int:conta_id>', methods=['DELETE'])
 def deletar_conta(conta_id):
     """Deletar conta"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         conta = db.query(Conta).filter(Conta.id == conta_id).first()
         
@@ -299,46 +313,58 @@ def deletar_conta(conta_id):
 @contas_bp.route('/api/contas/vencimento', methods=['GET'])
 def contas_por_vencimento():
     """Buscar contas por período de vencimento"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         hoje = datetime.now().date()
         periodo = request.args.get('periodo', 'proximos_7_dias')
         
         if periodo == 'em_atraso':
-            contas = db.query(Conta).filter(
+            query = db.query(Conta).filter(
                 Conta.data_vencimento < hoje,
                 Conta.status == 'Pendente'
-            ).all()
+            )
         elif periodo == 'hoje':
-            contas = db.query(Conta).filter(
+            query = db.query(Conta).filter(
                 Conta.data_vencimento == hoje,
                 Conta.status == 'Pendente'
-            ).all()
+            )
         elif periodo == 'proximos_7_dias':
             data_limite = hoje + timedelta(days=7)
-            contas = db.query(Conta).filter(
+            query = db.query(Conta).filter(
                 Conta.data_vencimento.between(hoje, data_limite),
                 Conta.status == 'Pendente'
-            ).all()
+            )
         elif periodo == 'proximos_30_dias':
             data_limite = hoje + timedelta(days=30)
-            contas = db.query(Conta).filter(
+            query = db.query(Conta).filter(
                 Conta.data_vencimento.between(hoje, data_limite),
                 Conta.status == 'Pendente'
-            ).all()
+            )
         else:
             return jsonify({
                 'success': False,
                 'error': 'Período inválido. Use: em_atraso, hoje, proximos_7_dias, proximos_30_dias'
             }), 400
         
+        contas, paginacao = paginar(
+            query, Conta, Conta.data_vencimento, parametros_paginacao(request.args),
+            crescente=True, carregar=carregador(Conta)
+        )
+        
         return jsonify({
             'success': True,
             'data': [conta.to_dict() for conta in contas],
-            'total': len(contas),
-            'periodo': periodo
+            'total': paginacao.get('total'),
+            'count': len(contas),
+            'periodo': periodo,
+            'pagination': paginacao
         })
         
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -348,9 +374,11 @@ def contas_por_vencimento():
         db.close()
 
 @contas_bp.route('/api/contas/relatorio', methods=['GET'])
+@coalescer
+@somente_leitura
 def relatorio_financeiro():
     """Relatório financeiro das contas"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         hoje = datetime.now().date()
         
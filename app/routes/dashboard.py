@@ -3,9 +3,14 @@
 
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-from database import SessionLocal, Projeto, Conta, Arquivo, Cliente, Funcionario, Notificacao, EquipeProjeto
+from database import obter_sessao, Projeto, Conta, Arquivo, Cliente, Funcionario, Notificacao, EquipeProjeto
 from sqlalchemy import func, text, distinct
 from sqlalchemy.exc import OperationalError
+from services.dashboard_stats import calcular_estatisticas_dashboard
+from services.dashboard_snapshot import obter_snapshot
+from services.serializers import carregar
+from services.replica_leitura import somente_leitura
+from services.single_flight import coalescer
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -13,102 +18,27 @@ def safe_query_arquivos(db, limit=10):
     """Query segura para arquivos - trata erro de coluna inexistente"""
     try:
         # Tentar query normal
-        return db.query(Arquivo).order_by(Arquivo.created_at.desc()).limit(limit).all()
+        return carregar(db.query(Arquivo).order_by(Arquivo.created_at.desc()).limit(limit), Arquivo)
     except OperationalError as e:
         error_msg = str(e).lower()
         if "no such column: arquivos.updated_at" in error_msg or "undefined column" in error_msg:
             print("⚠️  Coluna updated_at não existe - usando apenas created_at")
-            return db.query(Arquivo).order_by(Arquivo.created_at.desc()).limit(limit).all()
+            return carregar(db.query(Arquivo).order_by(Arquivo.created_at.desc()).limit(limit), Arquivo)
         else:
             print(f"❌ Erro na consulta de arquivos: {e}")
             return []
 
 @dashboard_bp.route('/api/dashboard/stats', methods=['GET'])
+@coalescer
+@somente_leitura
 def estatisticas_dashboard():
     """Estatísticas gerais do dashboard - CORRIGIDO"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
-        hoje = datetime.now().date()
-        
-        # Projetos
-        total_projetos = db.query(Projeto).count()
-        projetos_ativos = db.query(Projeto).filter(Projeto.status == 'Em Andamento').count()
-        projetos_finalizados = db.query(Projeto).filter(Projeto.status == 'Finalizado').count()
-        
-        # Progresso médio dos projetos ativos
-        progresso_medio = db.query(func.avg(Projeto.progresso)).filter(
-            Projeto.status == 'Em Andamento'
-        ).scalar() or 0
-        
-        # Contas
-        total_contas = db.query(Conta).count()
-        contas_pendentes = db.query(Conta).filter(Conta.status == 'Pendente').count()
-        contas_atrasadas = db.query(Conta).filter(
-            Conta.data_vencimento < hoje,
-            Conta.status == 'Pendente'
-        ).count()
-        
-        # Valores financeiros
-        valor_total_pendente = db.query(func.sum(Conta.valor)).filter(
-            Conta.status == 'Pendente'
-        ).scalar() or 0
-        
-        valor_projetos_ativos = db.query(func.sum(Projeto.valor_total)).filter(
-            Projeto.status == 'Em Andamento'
-        ).scalar() or 0
-        
-        # Arquivos - QUERY SEGURA
-        try:
-            total_arquivos = db.query(Arquivo).count()
-            arquivos_hoje = db.query(Arquivo).filter(
-                func.date(Arquivo.created_at) == hoje
-            ).count()
-        except Exception as e:
-            print(f"⚠️  Erro na consulta de arquivos: {e}")
-            total_arquivos = 0
-            arquivos_hoje = 0
-        
-        # Clientes e funcionários
-        total_clientes = db.query(Cliente).count()
-        funcionarios_ativos = db.query(Funcionario).filter(Funcionario.status == 'Ativo').count()
-        
-        # Projetos por status
-        projetos_por_status = db.query(
-            Projeto.status,
-            func.count(Projeto.id).label('quantidade')
-        ).group_by(Projeto.status).all()
-        
+        # Agregação condicional: 2 round-trips em vez de ~15
         return jsonify({
             'success': True,
-            'data': {
-                'projetos': {
-                    'total': total_projetos,
-                    'ativos': projetos_ativos,
-                    'finalizados': projetos_finalizados,
-                    'progresso_medio': round(float(progresso_medio), 1)
-                },
-                'financeiro': {
-                    'contas_pendentes': contas_pendentes,
-                    'contas_atrasadas': contas_atrasadas,
-                    'valor_pendente': float(valor_total_pendente),
-                    'valor_projetos_ativos': float(valor_projetos_ativos)
-                },
-                'arquivos': {
-                    'total': total_arquivos,
-                    'hoje': arquivos_hoje
-                },
-                'geral': {
-                    'clientes': total_clientes,
-                    'funcionarios_ativos': funcionarios_ativos
-                },
-                'projetos_por_status': [
-                    {
-                        'status': item.status,
-                        'quantidade': item.quantidade
-                    }
-                    for item in projetos_por_status
-                ]
-            }
+            'data': calcular_estatisticas_dashboard(db)
         })
         
     except Exception as e:
@@ -123,13 +53,13 @@ def estatisticas_dashboard():
 @dashboard_bp.route('/api/dashboard/projetos-recentes', methods=['GET'])
 def projetos_recentes():
     """Projetos mais recentes"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         limit = request.args.get('limit', 5, type=int)
         
-        projetos = db.query(Projeto).order_by(
+        projetos = carregar(db.query(Projeto).order_by(
             Projeto.created_at.desc()
-        ).limit(limit).all()
+        ).limit(limit), Projeto)
         
         return jsonify({
             'success': True,
@@ -148,16 +78,16 @@ def projetos_recentes():
 @dashboard_bp.route('/api/dashboard/contas-vencimento', methods=['GET'])
 def contas_proximo_vencimento():
     """Contas próximas do vencimento"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         dias = request.args.get('dias', 7, type=int)
         hoje = datetime.now().date()
         data_limite = hoje + timedelta(days=dias)
         
-        contas = db.query(Conta).filter(
+        contas = carregar(db.query(Conta).filter(
             Conta.data_vencimento.between(hoje, data_limite),
             Conta.status == 'Pendente'
-        ).order_by(Conta.data_vencimento.asc()).all()
+        ).order_by(Conta.data_vencimento.asc()), Conta)
         
         return jsonify({
             'success': True,
@@ -174,9 +104,11 @@ def contas_proximo_vencimento():
         db.close()
 
 @dashboard_bp.route('/api/dashboard/atividade-mensal', methods=['GET'])
+@coalescer
+@somente_leitura
 def atividade_mensal():
     """Atividade dos últimos meses"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         meses = request.args.get('meses', 6, type=int)
         
@@ -258,7 +190,7 @@ def atividade_mensal():
 @dashboard_bp.route('/api/notificacoes', methods=['GET'])
 def listar_notificacoes():
     """Listar notificações"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         limit = request.args.get('limit', 10, type=int)
         apenas_nao_lidas = request.args.get('nao_lidas', 'false').lower() == 'true'
@@ -289,7 +221,7 @@ def listar_notificacoes():
 @dashboard_bp.route('/api/notificacoes/<int:notificacao_id>/marcar-lida', methods=['PATCH'])
 def marcar_notificacao_lida(notificacao_id):
     """Marcar notificação como lida"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         notificacao = db.query(Notificacao).filter(Notificacao.id == notificacao_id).first()
         
@@ -317,47 +249,42 @@ def marcar_notificacao_lida(notificacao_id):
         db.close()
 
 @dashboard_bp.route('/api/dashboard-data', methods=['GET'])
+@coalescer
 def dashboard_data_consolidado():
     """Rota consolidada para dados do dashboard - CORRIGIDA"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         print("🔄 Iniciando carregamento consolidado de dados do dashboard...")
         
-        hoje = datetime.now().date()
-        
-        # 📊 Estatísticas básicas
-        total_projetos = db.query(Projeto).count()
-        total_clientes = db.query(Cliente).count()
-        total_contas = db.query(Conta).count()
+        # 📊 Estatísticas básicas e receita (snapshot materializado)
+        snapshot_dados, snapshot = obter_snapshot(db)
+        total_projetos = snapshot_dados['total_projetos']
+        total_clientes = snapshot_dados['total_clientes']
+        total_contas = snapshot_dados['total_contas']
+        total_arquivos = snapshot_dados['total_arquivos']
+        receita_total = snapshot_dados['receita_total']
         
         # Arquivos - CONSULTA SEGURA
-        total_arquivos = 0
         arquivos_recentes = []
         try:
-            total_arquivos = db.query(Arquivo).count()
             arquivos_recentes = safe_query_arquivos(db, 10)
         except Exception as e:
             print(f"⚠️  Erro ao consultar arquivos: {e}")
         
-        # 💰 Receita total
-        receita_total = db.query(func.sum(Projeto.valor_total)).filter(
-            Projeto.status == 'Finalizado'
-        ).scalar() or 0
-        
         # 🏗️ Projetos recentes (últimos 10)
-        projetos_recentes = db.query(Projeto).order_by(
+        projetos_recentes = carregar(db.query(Projeto).order_by(
             Projeto.created_at.desc()
-        ).limit(10).all()
+        ).limit(10), Projeto)
         
         # 👥 Clientes (últimos 20)
-        clientes = db.query(Cliente).order_by(
+        clientes = carregar(db.query(Cliente).order_by(
             Cliente.created_at.desc()
-        ).limit(20).all()
+        ).limit(20), Cliente)
         
         # 💰 Contas (últimas 20)
-        contas = db.query(Conta).order_by(
+        contas = carregar(db.query(Conta).order_by(
             Conta.data_vencimento.asc()
-        ).limit(20).all()
+        ).limit(20), Conta)
         
         # 🔔 Notificações (últimas 10)
         try:
@@ -410,6 +337,7 @@ def dashboard_data_consolidado():
         return jsonify({
             'success': True,
             'data': dashboard_data,
+            'snapshot': snapshot.to_dict(),
             'timestamp': datetime.now().isoformat(),
             'message': 'Dados consolidados carregados com sucesso'
         })
@@ -430,7 +358,7 @@ def dashboard_data_consolidado():
 @dashboard_bp.route('/api/dashboard/health', methods=['GET'])  
 def dashboard_health():
     """Health check específico do dashboard - CORRIGIDO"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         # Testar algumas queries básicas
         projetos_count = db.query(Projeto).count()
@@ -490,7 +418,7 @@ def dashboard_health():
 @dashboard_bp.route('/api/admin/fix-database', methods=['POST'])
 def fix_database():
     """Corrigir estrutura do banco (ADMIN ONLY)"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         print("🔧 Iniciando correção automática do banco...")
         
@@ -532,58 +460,22 @@ def fix_database():
 
 # Manter outras rotas existentes...
 @dashboard_bp.route('/api/dashboard/resumo-executivo', methods=['GET'])
+@coalescer
 def resumo_executivo():
-    """Resumo executivo completo"""
-    db = SessionLocal()
+    """Resumo executivo completo (lido do snapshot materializado)"""
+    db = obter_sessao()
     try:
-        hoje = datetime.now().date()
-        mes_atual = hoje.replace(day=1)
-        mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
-        
-        # Receita total dos projetos
-        receita_total = db.query(func.sum(Projeto.valor_total)).filter(
-            Projeto.status == 'Finalizado'
-        ).scalar() or 0
-        
-        # Receita do mês atual
-        receita_mes_atual = db.query(func.sum(Projeto.valor_total)).filter(
-            Projeto.status == 'Finalizado',
-            Projeto.data_conclusao >= mes_atual
-        ).scalar() or 0
-        
-        # Receita do mês anterior
-        receita_mes_anterior = db.query(func.sum(Projeto.valor_total)).filter(
-            Projeto.status == 'Finalizado',
-            Projeto.data_conclusao >= mes_anterior,
-            Projeto.data_conclusao < mes_atual
-        ).scalar() or 0
-        
-        # Gastos do mês atual
-        gastos_mes_atual = db.query(func.sum(Conta.valor)).filter(
-            Conta.status == 'Paga',
-            Conta.data_pagamento >= mes_atual
-        ).scalar() or 0
-        
-        # Projetos em atraso (prazo vencido)
-        projetos_em_atraso = db.query(Projeto).filter(
-            Projeto.data_prazo < hoje,
-            Projeto.status == 'Em Andamento'
-        ).count()
-        
-        # Taxa de conclusão média dos projetos
-        projetos_com_prazo = db.query(Projeto).filter(
-            Projeto.data_prazo.isnot(None),
-            Projeto.status == 'Finalizado'
-        ).all()
+        dados, snapshot = obter_snapshot(db)
+        
+        receita_mes_atual = dados['receita_mes_atual']
+        receita_mes_anterior = dados['receita_mes_anterior']
+        gastos_mes_atual = dados['gastos_mes_atual']
+        projetos_em_atraso = dados['projetos_em_atraso']
         
+        # Média de dias entre início e conclusão dos projetos finalizados com prazo
         dias_medios_conclusao = 0
-        if projetos_com_prazo:
-            total_dias = sum([
-                (p.data_conclusao - p.data_inicio).days 
-                for p in projetos_com_prazo 
-                if p.data_inicio and p.data_conclusao
-            ])
-            dias_medios_conclusao = total_dias / len(projetos_com_prazo) if projetos_com_prazo else 0
+        if dados['projetos_finalizados_com_prazo']:
+            dias_medios_conclusao = dados['dias_conclusao_total'] / dados['projetos_finalizados_com_prazo']
         
         # Calcular crescimento mensal
         crescimento_mensal = 0
@@ -594,11 +486,11 @@ def resumo_executivo():
             'success': True,
             'data': {
                 'financeiro': {
-                    'receita_total': float(receita_total),
-                    'receita_mes_atual': float(receita_mes_atual),
-                    'receita_mes_anterior': float(receita_mes_anterior),
-                    'gastos_mes_atual': float(gastos_mes_atual),
-                    'lucro_mes_atual': float(receita_mes_atual - gastos_mes_atual),
+                    'receita_total': dados['receita_total'],
+                    'receita_mes_atual': receita_mes_atual,
+                    'receita_mes_anterior': receita_mes_anterior,
+                    'gastos_mes_atual': gastos_mes_atual,
+                    'lucro_mes_atual': receita_mes_atual - gastos_mes_atual,
                     'crescimento_mensal': round(crescimento_mensal, 2)
                 },
                 'operacional': {
@@ -606,7 +498,8 @@ def resumo_executivo():
                     'dias_medios_conclusao': round(dias_medios_conclusao, 1),
                     'taxa_eficiencia': round(100 - (projetos_em_atraso * 10), 1)  # Métrica simples
                 }
-            }
+            },
+            'snapshot': snapshot.to_dict()
         })
         
     except Exception as e:
@@ -618,18 +511,16 @@ def resumo_executivo():
         db.close()
 
 @dashboard_bp.route('/api/dashboard/alertas', methods=['GET'])
+@coalescer
 def alertas_sistema():
-    """Alertas importantes do sistema"""
-    db = SessionLocal()
+    """Alertas importantes do sistema (lidos do snapshot materializado)"""
+    db = obter_sessao()
     try:
-        hoje = datetime.now().date()
+        dados, snapshot = obter_snapshot(db)
         alertas = []
         
         # Contas em atraso
-        contas_atrasadas = db.query(Conta).filter(
-            Conta.data_vencimento < hoje,
-            Conta.status == 'Pendente'
-        ).count()
+        contas_atrasadas = dados['contas_atrasadas']
         
         if contas_atrasadas > 0:
             alertas.append({
@@ -640,11 +531,7 @@ def alertas_sistema():
             })
         
         # Projetos com prazo próximo
-        projetos_prazo_proximo = db.query(Projeto).filter(
-            Projeto.data_prazo <= hoje + timedelta(days=7),
-            Projeto.data_prazo >= hoje,
-            Projeto.status == 'Em Andamento'
-        ).count()
+        projetos_prazo_proximo = dados['projetos_prazo_proximo']
         
         if projetos_prazo_proximo > 0:
             alertas.append({
@@ -655,27 +542,21 @@ def alertas_sistema():
             })
         
         # Funcionários disponíveis (simplificado)
-        try:
-            funcionarios_ativos = db.query(Funcionario).filter(Funcionario.status == 'Ativo').count()
-            funcionarios_em_projetos = db.query(distinct(EquipeProjeto.funcionario_id)).filter(
-                EquipeProjeto.ativo == True
-            ).count()
-            funcionarios_disponiveis = funcionarios_ativos - funcionarios_em_projetos
-            
-            if funcionarios_disponiveis > 0:
-                alertas.append({
-                    'tipo': 'info',
-                    'titulo': 'Funcionários disponíveis',
-                    'mensagem': f'{funcionarios_disponiveis} funcionário(s) sem projetos ativos',
-                    'acao': 'Alocar funcionários'
-                })
-        except:
-            pass  # Ignorar erro se tabela equipe_projeto não existir
+        funcionarios_disponiveis = dados['funcionarios_ativos'] - dados['funcionarios_em_projetos']
+        
+        if funcionarios_disponiveis > 0:
+            alertas.append({
+                'tipo': 'info',
+                'titulo': 'Funcionários disponíveis',
+                'mensagem': f'{funcionarios_disponiveis} funcionário(s) sem projetos ativos',
+                'acao': 'Alocar funcionários'
+            })
         
         return jsonify({
             'success': True,
             'data': alertas,
-            'total': len(alertas)
+            'total': len(alertas),
+            'snapshot': snapshot.to_dict()
         })
         
     except Exception as e:
@@ -705,7 +586,7 @@ def test_cors():
 @dashboard_bp.route('/api/system/status', methods=['GET'])
 def system_status():
     """Status do sistema e endpoints disponíveis"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         # Testar conexão com banco
         total_projetos = db.query(Projeto).count()
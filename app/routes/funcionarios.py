@@ -1,29 +1,49 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from database import SessionLocal, Funcionario, EquipeProjeto, Projeto
+from database import obter_sessao, Funcionario, EquipeProjeto, Projeto
 import json
+from services.serializers import carregador
+from services.paginacao import parametros_paginacao, paginar, CursorInvalido
+from services.cache_resultados import em_cache, tags_linhas
 
 funcionarios_bp = Blueprint('funcionarios', __name__)
 
+def _listar_funcionarios(db, args):
+    status_filter = args.get('status')
+    
+    query = db.query(Funcionario)
+    if status_filter:
+        query = query.filter(Funcionario.status == status_filter)
+    
+    funcionarios, paginacao = paginar(
+        query, Funcionario, Funcionario.created_at,
+        parametros_paginacao(args), carregar=carregador(Funcionario)
+    )
+    
+    return {
+        'success': True,
+        'data': [funcionario.to_dict() for funcionario in funcionarios],
+        'total': paginacao.get('total'),
+        'count': len(funcionarios),
+        'pagination': paginacao
+    }
+
 @funcionarios_bp.route('/api/funcionarios', methods=['GET'])
 def listar_funcionarios():
-    """Listar todos os funcionários"""
-    db = SessionLocal()
+    """Listar funcionários (paginação por cursor em created_at, id)"""
+    db = obter_sessao()
     try:
-        status_filter = request.args.get('status')
-        
-        query = db.query(Funcionario)
-        if status_filter:
-            query = query.filter(Funcionario.status == status_filter)
-        
-        funcionarios = query.all()
+        # projetos_ativos depende da equipe (tag Funcionario:id) e do status de qualquer projeto
+        return jsonify(em_cache(
+            'listar_funcionarios', request.args, lambda: _listar_funcionarios(db, request.args),
+            tags=lambda dados: tags_linhas(Funcionario, dados['data']) + ['Projeto']
+        ))
         
+    except CursorInvalido as e:
         return jsonify({
-            'success': True,
-            'data': [funcionario.to_dict() for funcionario in funcionarios],
-            'total': len(funcionarios)
-        })
-        
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -35,7 +55,7 @@ def listar_funcionarios():
 @funcionarios_bp.route('/api/funcionarios', methods=['POST'])
 def criar_funcionario():
     """Criar novo funcionário"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         data = request.get_json()
         
@@ -109,7 +129,7 @@ def criar_funcionario():
 @funcionarios_bp.route('/api/funcionarios/<int:funcionario_id>', methods=['GET'])
 def obter_funcionario(funcionario_id):
     """Obter funcionário por ID"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         funcionario = db.query(Funcionario).filter(Funcionario.id == funcionario_id).first()
         
@@ -155,7 +175,7 @@ def obter_funcionario(funcionario_id):
 @funcionarios_bp.route('/api/funcionarios/<int:funcionario_id>', methods=['PUT'])
 def atualizar_funcionario(funcionario_id):
     """Atualizar funcionário"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         funcionario = db.query(Funcionario).filter(Funcionario.id == funcionario_id).first()
         
@@ -227,7 +247,7 @@ def atualizar_funcionario(funcionario_id):
 @funcionarios_bp.route('/api/funcionarios/<int:funcionario_id>', methods=['DELETE'])
 def deletar_funcionario(funcionario_id):
     """Deletar funcionário"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         funcionario = db.query(Funcionario).filter(Funcionario.id == funcionario_id).first()
         
@@ -269,7 +289,7 @@ def deletar_funcionario(funcionario_id):
 @funcionarios_bp.route('/api/funcionarios/<int:funcionario_id>/projetos', methods=['POST'])
 def adicionar_funcionario_projeto(funcionario_id):
     """Adicionar funcionário a um projeto"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         funcionario = db.query(Funcionario).filter(Funcionario.id == funcionario_id).first()
         
@@ -328,7 +348,7 @@ def adicionar_funcionario_projeto(funcionario_id):
 @funcionarios_bp.route('/api/funcionarios/<int:funcionario_id>/projetos/<int:projeto_id>', methods=['DELETE'])
 def remover_funcionario_projeto(funcionario_id, projeto_id):
     """Remover funcionário de um projeto"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         equipe_projeto = db.query(EquipeProjeto).filter(
             EquipeProjeto.funcionario_id == funcionario_id,
@@ -364,7 +384,7 @@ def remover_funcionario_projeto(funcionario_id, projeto_id):
 @funcionarios_bp.route('/api/funcionarios/disponiveis', methods=['GET'])
 def funcionarios_disponiveis():
     """Listar funcionários disponíveis (sem projetos ativos)"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         # Subconsulta para funcionários com projetos ativos
         funcionarios_ocupados_subq = db.query(EquipeProjeto.funcionario_id).filter(
@@ -372,17 +392,28 @@ def funcionarios_disponiveis():
         ).distinct().subquery()
         
         # Funcionários disponíveis
-        funcionarios_disponiveis = db.query(Funcionario).filter(
+        query = db.query(Funcionario).filter(
             ~Funcionario.id.in_(db.query(funcionarios_ocupados_subq.c.funcionario_id)),
             Funcionario.status == 'Ativo'
-        ).all()
+        )
+        funcionarios_disponiveis, paginacao = paginar(
+            query, Funcionario, Funcionario.created_at,
+            parametros_paginacao(request.args), carregar=carregador(Funcionario)
+        )
         
         return jsonify({
             'success': True,
             'data': [funcionario.to_dict() for funcionario in funcionarios_disponiveis],
-            'total': len(funcionarios_disponiveis)
+            'total': paginacao.get('total'),
+            'count': len(funcionarios_disponiveis),
+            'pagination': paginacao
         })
         
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
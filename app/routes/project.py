@@ -1,20 +1,32 @@
 from flask import Blueprint, request, jsonify
-from database import SessionLocal, Projeto, Cliente
+from database import obter_sessao, Projeto, Cliente
+from services.serializers import carregador
+from services.paginacao import parametros_paginacao, paginar, CursorInvalido
 from datetime import datetime
 
 project_bp = Blueprint('projects', __name__)
 
 @project_bp.route('/api/projects', methods=['GET'])
 def list_projects():
-    """Listar todos os projetos"""
-    db = SessionLocal()
+    """Listar projetos (paginação por cursor em created_at, id)"""
+    db = obter_sessao()
     try:
-        projects = db.query(Projeto).all()
+        projects, paginacao = paginar(
+            db.query(Projeto), Projeto, Projeto.created_at,
+            parametros_paginacao(request.args), carregar=carregador(Projeto)
+        )
         return jsonify({
             'success': True,
             'data': [project.to_dict() for project in projects],
-            'total': len(projects)
+            'total': paginacao.get('total'),
+            'count': len(projects),
+            'pagination': paginacao
         })
+    except CursorInvalido as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -26,7 +38,7 @@ def list_projects():
 @project_bp.route('/api/projects', methods=['POST'])
 def create_project():
     """Criar novo projeto"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         data = request.get_json()
         
@@ -127,7 +139,7 @@ def create_project():
 @project_bp.route('/api/projects/<int:project_id>', methods=['GET'])
 def get_project(project_id):
     """Obter projeto por ID"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         project = db.query(Projeto).filter(Projeto.id == project_id).first()
         
@@ -153,7 +165,7 @@ def get_project(project_id):
 @project_bp.route('/api/projects/<int:project_id>', methods=['PUT'])
 def update_project(project_id):
     """Atualizar projeto"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         project = db.query(Projeto).filter(Projeto.id == project_id).first()
         
@@ -254,7 +266,7 @@ def update_project(project_id):
 @project_bp.route('/api/projects/<int:project_id>', methods=['DELETE'])
 def delete_project(project_id):
     """Deletar projeto"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         project = db.query(Projeto).filter(Projeto.id == project_id).first()
         
@@ -284,7 +296,7 @@ def delete_project(project_id):
 @project_bp.route('/api/projects/<int:project_id>/progress', methods=['PATCH'])
 def update_progress(project_id):
     """Atualizar progresso do projeto"""
-    db = SessionLocal()
+    db = obter_sessao()
     try:
         project = db.query(Projeto).filter(Projeto.id == project_id).first()
         
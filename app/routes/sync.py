@@ -0,0 +1,59 @@
+# 📁 routes/sync.py - SINCRONIZAÇÃO INCREMENTAL (GET /api/sync?since=<versão>)
+from flask import Blueprint, request, jsonify
+from database import obter_sessao
+from middleware.auth_middleware import auth_required
+from services.paginacao import CursorInvalido
+from services.sincronizacao import alteracoes_desde, entidades_solicitadas, versao_atual
+
+sync_bp = Blueprint('sync', __name__)
+
+@sync_bp.route('/api/sync', methods=['GET'])
+@auth_required()
+def sincronizar():
+    """
+    Só o que mudou desde a versão informada (inserções, atualizações e exclusões)
+
+    ?since=V        última 'versao' recebida (0 ou ausente: carga inicial, sem lápides)
+    ?entidades=     clientes,projetos,contas,arquivos,pastas,funcionarios,notificacoes
+    ?limit=N        linhas de alteração por página; com tem_mais, repetir com ?cursor=next_cursor
+    """
+    db = obter_sessao()
+    try:
+        desde = request.args.get('since', 0, type=int)
+        if desde < 0:
+            raise ValueError('since deve ser >= 0')
+        resultado = alteracoes_desde(
+            db, desde,
+            entidades=entidades_solicitadas(request.args.get('entidades')),
+            limite=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify({'success': True, 'since': desde, **resultado})
+        
+    except (CursorInvalido, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    finally:
+        db.close()
+
+@sync_bp.route('/api/sync/versao', methods=['GET'])
+@auth_required()
+def versao_sync():
+    """Versão atual (para o cliente saber se precisa sincronizar)"""
+    db = obter_sessao()
+    try:
+        return jsonify({'success': True, 'versao': versao_atual(db)})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    finally:
+        db.close()
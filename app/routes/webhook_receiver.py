@@ -1,14 +1,20 @@
 # 📁 routes/webhook_receiver.py - SISTEMA SIMPLES DE WEBHOOKS PARA BOLETOS (100 linhas)
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, UTC, timedelta
 import hashlib
 import hmac
 import json
+import os
 import structlog
-from typing import Dict, Any, Optional
-from database import SessionLocal
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from typing import Dict, Any, Optional, List
+from database import SessionLocal, obter_sessao
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, Index, insert, func
+from sqlalchemy.dialects import postgresql, sqlite
 from database import Base
+from services import fila_webhooks
+from services.replica_leitura import somente_leitura
+from services.eventos import registrar_evento
+from middleware.auth_middleware import admin_required
 
 # Logger
 logger = structlog.get_logger()
@@ -16,9 +22,23 @@ logger = structlog.get_logger()
 # Criar blueprint
 webhook_bp = Blueprint('webhooks', __name__, url_prefix='/api/webhooks')
 
+# Modo de ingestão: 'sincrona' (grava antes de responder) ou 'fila' (202 + workers)
+MODO_INGESTAO = os.getenv('WEBHOOK_INGESTAO', 'sincrona').lower()
+EXIGIR_ASSINATURA = os.getenv('WEBHOOK_EXIGIR_ASSINATURA', 'false').lower() == 'true'
+BANCOS_SUPORTADOS = ['BRADESCO', 'ITAU', 'BANCO_BRASIL']
+LOTE_MAXIMO = int(os.getenv('WEBHOOK_LOTE_MAXIMO', '5000'))
+
+# Linhas por INSERT (PostgreSQL aceita até 65535 parâmetros; SQLite 32766)
+BLOCO_INSERT = 500
+
 # 📋 Modelo para boletos recebidos
 class BoletoRecebido(Base):
     __tablename__ = 'boletos_recebidos'
+    __table_args__ = (
+        # Estatísticas por banco: processado/valor no fim tornam o índice cobrindo o
+        # GROUP BY inteiro (varre só o índice, já na ordem de banco_origem)
+        Index('ix_boletos_recebidos_banco_urgente_status', 'banco_origem', 'urgente', 'status', 'processado', 'valor'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     banco_origem = Column(String(50), nullable=False)  # BRADESCO, ITAU, BANCO_BRASIL
@@ -30,7 +50,7 @@ class BoletoRecebido(Base):
     status = Column(String(30), default='pendente', nullable=False)
     urgente = Column(Boolean, default=False, nullable=False)
     dados_webhook = Column(Text, nullable=True)  # JSON original do webhook
-    data_recebimento = Column(DateTime, default=datetime.now(UTC), nullable=False)
+    data_recebimento = Column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
     processado = Column(Boolean, default=False, nullable=False)
     
     def to_dict(self):
@@ -49,6 +69,11 @@ class BoletoRecebido(Base):
             'processado': self.processado
         }
 
+# Histograma diário: índice na expressão date(data_recebimento) entrega as linhas
+# já na ordem do GROUP BY (sem ordenar em tabela temporária)
+DIA_RECEBIMENTO = func.date(BoletoRecebido.data_recebimento, type_=Date)
+Index('ix_boletos_recebidos_dia_banco', DIA_RECEBIMENTO, BoletoRecebido.banco_origem)
+
 # 🔐 Validador de assinaturas dos bancos
 class WebhookValidator:
     
@@ -59,20 +84,39 @@ class WebhookValidator:
         'BANCO_BRASIL': 'bb_webhook_secret_2024'
     }
     
+    # Campos do webhook de cada banco (mesma ordem de extract_boleto_data)
+    BANK_FIELDS = {
+        'BRADESCO': ('codigoBarras', 'valor', 'dataVencimento', 'beneficiario', 'conta'),
+        'ITAU': ('barCode', 'amount', 'dueDate', 'payeeName', 'accountNumber'),
+        'BANCO_BRASIL': ('codigo_barras', 'valor_titulo', 'data_vencimento', 'nome_beneficiario', 'numero_conta')
+    }
+    
+    @staticmethod
+    def sign_payload(bank_name: str, payload: str) -> Optional[str]:
+        """Assinatura HMAC-SHA256 que o banco enviaria para este corpo"""
+        secret = WebhookValidator.BANK_SECRETS.get(bank_name)
+        if not secret:
+            return None
+        return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def build_payload(bank_name: str, boleto_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Webhook no formato do banco a partir dos dados do boleto (inverso de extract_boleto_data)"""
+        campos = WebhookValidator.BANK_FIELDS.get(bank_name)
+        if not campos:
+            return None
+        valores = (boleto_data.get('codigo_barras'), boleto_data.get('valor'), boleto_data.get('data_vencimento'),
+                   boleto_data.get('beneficiario'), boleto_data.get('conta_origem'))
+        return dict(zip(campos, valores))
+    
     @staticmethod
     def validate_signature(bank_name: str, payload: str, signature: str) -> bool:
         """Validar assinatura do webhook"""
         try:
-            secret = WebhookValidator.BANK_SECRETS.get(bank_name)
-            if not secret:
+            expected_signature = WebhookValidator.sign_payload(bank_name, payload)
+            if not expected_signature:
                 return False
             
-            expected_signature = hmac.new(
-                secret.encode(),
-                payload.encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
             return hmac.compare_digest(signature, expected_signature)
             
         except Exception as e:
@@ -116,6 +160,209 @@ class WebhookValidator:
             logger.error("boleto_data_extraction_failed", bank_name=bank_name, error=str(e))
             return None
 
+# 🧾 Montagem da linha de boletos_recebidos a partir do webhook
+def montar_boleto(bank_name: str, webhook_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Colunas de BoletoRecebido (vencimento, urgência e JSON original) ou None se inválido"""
+    boleto_data = WebhookValidator.extract_boleto_data(bank_name, webhook_data)
+    # Campos obrigatórios em boletos_recebidos
+    if not boleto_data or not all(boleto_data.get(campo) for campo in ('codigo_barras', 'beneficiario', 'data_vencimento')):
+        return None
+    
+    # Processar data de vencimento
+    data_vencimento = None
+    if boleto_data['data_vencimento']:
+        try:
+            data_vencimento = datetime.fromisoformat(boleto_data['data_vencimento'].replace('Z', '+00:00'))
+        except:
+            data_vencimento = datetime.now(UTC)
+    
+    # Verificar se é urgente (vence em menos de 3 dias)
+    urgente = False
+    if data_vencimento:
+        if data_vencimento.tzinfo is None:
+            data_vencimento = data_vencimento.replace(tzinfo=UTC)
+        dias_para_vencimento = (data_vencimento - datetime.now(UTC)).days
+        urgente = dias_para_vencimento <= 3
+    
+    return {
+        'banco_origem': bank_name,
+        'codigo_barras': boleto_data['codigo_barras'],
+        'valor': boleto_data['valor'],
+        'data_vencimento': data_vencimento,
+        'beneficiario': boleto_data['beneficiario'],
+        'conta_origem': boleto_data.get('conta_origem'),
+        'urgente': urgente,
+        'dados_webhook': json.dumps(webhook_data),
+        'status': 'pendente',
+        'data_recebimento': datetime.now(UTC),
+        'processado': False
+    }
+
+def assinatura_valida(bank_name: str, corpo: str, webhook_data: Dict[str, Any], signature: Optional[str]) -> bool:
+    """HMAC do corpo bruto (ou do JSON com chaves ordenadas, formato antigo)"""
+    if not signature:
+        if EXIGIR_ASSINATURA:
+            return False
+        logger.warning("webhook_missing_signature", bank_name=bank_name)
+        return True
+    return (
+        WebhookValidator.validate_signature(bank_name, corpo, signature) or
+        WebhookValidator.validate_signature(bank_name, json.dumps(webhook_data, sort_keys=True), signature)
+    )
+
+# ===== UPSERT EM LOTE =====
+def upsert_boletos(db, linhas: List[Dict[str, Any]]) -> Dict[str, tuple]:
+    """
+    INSERT ... ON CONFLICT (codigo_barras) DO NOTHING em blocos, sem SELECT prévio
+
+    Idempotente: reenvios não alteram o boleto existente (status, processado).
+    Retorna {codigo_barras: (boleto_id, criado)}; o commit fica com o chamador.
+    """
+    tabela = BoletoRecebido.__table__
+    resultado = {}
+    dialeto = db.get_bind().dialect.name
+    
+    if dialeto in ('postgresql', 'sqlite'):
+        insert_dialeto = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        stmt = insert_dialeto(tabela).on_conflict_do_nothing(
+            index_elements=['codigo_barras']
+        ).returning(tabela.c.id, tabela.c.codigo_barras)
+        for inicio in range(0, len(linhas), BLOCO_INSERT):
+            for boleto_id, codigo in db.execute(stmt, linhas[inicio:inicio + BLOCO_INSERT]):
+                resultado[codigo] = (boleto_id, True)
+    else:
+        # Outros bancos: verificar e inserir na mesma transação
+        existentes = {
+            codigo for (codigo,) in db.query(BoletoRecebido.codigo_barras).filter(
+                BoletoRecebido.codigo_barras.in_([linha['codigo_barras'] for linha in linhas])
+            )
+        }
+        for linha in linhas:
+            if linha['codigo_barras'] not in existentes:
+                boleto_id = db.execute(insert(tabela).values(**linha)).inserted_primary_key[0]
+                resultado[linha['codigo_barras']] = (boleto_id, True)
+    
+    # Só os duplicados precisam de leitura (para informar o id existente)
+    duplicados = [linha['codigo_barras'] for linha in linhas if linha['codigo_barras'] not in resultado]
+    for inicio in range(0, len(duplicados), BLOCO_INSERT):
+        for boleto_id, codigo in db.query(BoletoRecebido.id, BoletoRecebido.codigo_barras).filter(
+            BoletoRecebido.codigo_barras.in_(duplicados[inicio:inicio + BLOCO_INSERT])
+        ):
+            resultado[codigo] = (boleto_id, False)
+    
+    return resultado
+
+def agendar_evento_boletos(db, linhas: List[Dict[str, Any]], gravados: Dict[str, tuple]):
+    """Evento 'boleto_recebido' (um por banco) publicado no commit, só com os boletos novos"""
+    por_banco = {}
+    for linha in linhas:
+        boleto_id, criado = gravados.get(linha['codigo_barras'], (None, False))
+        if not criado:
+            continue
+        resumo = por_banco.setdefault(linha['banco_origem'], {'banco': linha['banco_origem'], 'novos': 0, 'urgentes': 0, 'boleto_ids': []})
+        resumo['novos'] += 1
+        resumo['urgentes'] += bool(linha['urgente'])
+        if len(resumo['boleto_ids']) < 50:
+            resumo['boleto_ids'].append(boleto_id)
+    for resumo in por_banco.values():
+        registrar_evento(db, 'boleto_recebido', resumo)
+
+def gravar_eventos(bank_name: str, eventos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Extrair e gravar vários webhooks numa transação; um resultado por evento, na ordem recebida"""
+    resultados = []
+    linhas = {}
+    for indice, evento in enumerate(eventos):
+        linha = montar_boleto(bank_name, evento) if isinstance(evento, dict) else None
+        if not linha:
+            resultados.append({'indice': indice, 'status': 'invalido', 'error': 'Erro ao extrair dados do boleto'})
+            continue
+        codigo = linha['codigo_barras']
+        resultados.append({'indice': indice, 'codigo_barras': codigo, 'urgente': linha['urgente'],
+                           'status': 'duplicado' if codigo in linhas else None})
+        # Repetido no mesmo lote: vale o primeiro
+        linhas.setdefault(codigo, linha)
+    
+    if linhas:
+        db = SessionLocal()
+        try:
+            gravados = upsert_boletos(db, list(linhas.values()))
+            agendar_evento_boletos(db, list(linhas.values()), gravados)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        for item in resultados:
+            if item['status'] == 'invalido':
+                continue
+            boleto_id, criado = gravados[item['codigo_barras']]
+            item['boleto_id'] = boleto_id
+            if item['status'] is None:
+                item['status'] = 'criado' if criado else 'duplicado'
+    
+    return resultados
+
+# ===== PROCESSAMENTO DA FILA =====
+def processar_itens_fila(itens: List[Dict[str, Any]]) -> Dict[int, Optional[str]]:
+    """Worker da fila: extrair os boletos do lote e gravar os novos numa única transação.
+    Retorna {id_do_item: None (ok) | mensagem de erro}."""
+    resultados = {}
+    linhas = {}
+    itens_por_codigo = {}
+    for item in itens:
+        try:
+            linha = montar_boleto(item['banco'], json.loads(item['payload']))
+        except (TypeError, ValueError):
+            linha = None
+        if not linha:
+            resultados[item['id']] = 'Erro ao extrair dados do boleto'
+            continue
+        resultados[item['id']] = None
+        # Duplicados dentro do lote: vale o primeiro recebido
+        linhas.setdefault(linha['codigo_barras'], linha)
+        itens_por_codigo.setdefault(linha['codigo_barras'], []).append(item['id'])
+    
+    if not linhas:
+        return resultados
+    
+    db = SessionLocal()
+    try:
+        try:
+            gravados = upsert_boletos(db, list(linhas.values()))
+            novos = sum(criado for _, criado in gravados.values())
+            agendar_evento_boletos(db, list(linhas.values()), gravados)
+            db.commit()
+        except Exception as e:
+            # Lote rejeitado: gravar item a item para isolar o que falha
+            db.rollback()
+            logger.warning("webhook_queue_batch_rejected", itens=len(itens), error=str(e))
+            novos = 0
+            for codigo, linha in linhas.items():
+                try:
+                    gravados = upsert_boletos(db, [linha])
+                    novos += gravados[codigo][1]
+                    agendar_evento_boletos(db, [linha], gravados)
+                    db.commit()
+                except Exception as erro_item:
+                    db.rollback()
+                    for item_id in itens_por_codigo[codigo]:
+                        resultados[item_id] = str(erro_item)[:500]
+        
+        logger.info("webhook_queue_batch_processed", itens=len(itens), novos=novos,
+                    duplicados=len(linhas) - novos)
+        return resultados
+    
+    finally:
+        db.close()
+
+@webhook_bp.record_once
+def _iniciar_fila(state):
+    """No modo 'fila', os workers sobem junto com o blueprint (retomando o que ficou pendente)"""
+    if MODO_INGESTAO == 'fila':
+        fila_webhooks.iniciar_workers(processar_itens_fila)
+
 # 📨 Endpoint principal para receber webhooks
 @webhook_bp.route('/boletos/<bank_name>', methods=['POST'])
 def receive_boleto_webhook(bank_name):
@@ -124,7 +371,7 @@ def receive_boleto_webhook(bank_name):
     bank_name = bank_name.upper()
     
     # Validar banco suportado
-    if bank_name not in ['BRADESCO', 'ITAU', 'BANCO_BRASIL']:
+    if bank_name not in BANCOS_SUPORTADOS:
         logger.warning("unsupported_bank_webhook", bank_name=bank_name)
         return jsonify({
             'success': False,
@@ -142,6 +389,24 @@ def receive_boleto_webhook(bank_name):
         
         # Obter assinatura do header
         signature = request.headers.get('X-Webhook-Signature') or request.headers.get('Signature')
+        
+        # Modo fila: validar HMAC, gravar o payload bruto e responder na hora
+        if MODO_INGESTAO == 'fila':
+            corpo = request.get_data(as_text=True)
+            if not assinatura_valida(bank_name, corpo, webhook_data, signature):
+                logger.warning("webhook_invalid_signature", bank_name=bank_name)
+                return jsonify({
+                    'success': False,
+                    'error': 'Assinatura inválida'
+                }), 401
+            
+            item_id = fila_webhooks.enfileirar(bank_name, corpo)
+            return jsonify({
+                'success': True,
+                'message': 'Webhook recebido, processamento em fila',
+                'fila_id': item_id
+            }), 202
+        
         if not signature:
             logger.warning("webhook_missing_signature", bank_name=bank_name)
             # Em desenvolvimento, prosseguir sem assinatura
@@ -157,69 +422,40 @@ def receive_boleto_webhook(bank_name):
         #     }), 401
         
         # Extrair dados do boleto
-        boleto_data = WebhookValidator.extract_boleto_data(bank_name, webhook_data)
+        boleto_data = montar_boleto(bank_name, webhook_data)
         if not boleto_data:
             return jsonify({
                 'success': False,
                 'error': 'Erro ao extrair dados do boleto'
             }), 400
         
-        # Salvar no banco de dados
-        db = SessionLocal()
+        # Salvar no banco de dados (ON CONFLICT: sem corrida entre entregas simultâneas)
+        db = obter_sessao()
         try:
-            # Verificar se boleto já existe
-            existing_boleto = db.query(BoletoRecebido).filter(
-                BoletoRecebido.codigo_barras == boleto_data['codigo_barras']
-            ).first()
+            gravados = upsert_boletos(db, [boleto_data])
+            boleto_id, criado = gravados[boleto_data['codigo_barras']]
+            agendar_evento_boletos(db, [boleto_data], gravados)
+            db.commit()
             
-            if existing_boleto:
+            if not criado:
                 logger.info("boleto_already_exists", codigo_barras=boleto_data['codigo_barras'])
                 return jsonify({
                     'success': True,
                     'message': 'Boleto já processado',
-                    'boleto_id': existing_boleto.id
+                    'boleto_id': boleto_id
                 })
             
-            # Processar data de vencimento
-            data_vencimento = None
-            if boleto_data['data_vencimento']:
-                try:
-                    data_vencimento = datetime.fromisoformat(boleto_data['data_vencimento'].replace('Z', '+00:00'))
-                except:
-                    data_vencimento = datetime.now(UTC)
-            
-            # Verificar se é urgente (vence em menos de 3 dias)
-            urgente = False
-            if data_vencimento:
-                dias_para_vencimento = (data_vencimento - datetime.now(UTC)).days
-                urgente = dias_para_vencimento <= 3
-            
-            # Criar novo boleto
-            novo_boleto = BoletoRecebido(
-                banco_origem=bank_name,
-                codigo_barras=boleto_data['codigo_barras'],
-                valor=boleto_data['valor'],
-                data_vencimento=data_vencimento,
-                beneficiario=boleto_data['beneficiario'],
-                conta_origem=boleto_data.get('conta_origem'),
-                urgente=urgente,
-                dados_webhook=json.dumps(webhook_data),
-                status='pendente'
-            )
-            
-            db.add(novo_boleto)
-            db.commit()
-            
+            urgente = boleto_data['urgente']
             logger.info("boleto_received_successfully",
                        bank_name=bank_name,
-                       boleto_id=novo_boleto.id,
+                       boleto_id=boleto_id,
                        valor=boleto_data['valor'],
                        urgente=urgente)
             
             return jsonify({
                 'success': True,
                 'message': 'Boleto recebido e processado',
-                'boleto_id': novo_boleto.id,
+                'boleto_id': boleto_id,
                 'urgente': urgente
             })
             
@@ -236,12 +472,82 @@ def receive_boleto_webhook(bank_name):
             'error': 'Erro interno no processamento'
         }), 500
 
+# 📦 Endpoint para receber vários webhooks numa requisição (reenvios e replays)
+@webhook_bp.route('/boletos/<bank_name>/batch', methods=['POST'])
+def receive_boleto_webhook_batch(bank_name):
+    """Receber uma lista de eventos (JSON array ou {'eventos': [...]}) com resultado por item"""
+    
+    bank_name = bank_name.upper()
+    
+    if bank_name not in BANCOS_SUPORTADOS:
+        logger.warning("unsupported_bank_webhook", bank_name=bank_name)
+        return jsonify({
+            'success': False,
+            'error': 'Banco não suportado'
+        }), 400
+    
+    try:
+        dados = request.get_json(silent=True)
+        eventos = dados.get('eventos') if isinstance(dados, dict) else dados
+        if not isinstance(eventos, list) or not eventos:
+            return jsonify({
+                'success': False,
+                'error': 'Envie uma lista de eventos (JSON array ou {"eventos": [...]})'
+            }), 400
+        
+        if len(eventos) > LOTE_MAXIMO:
+            return jsonify({
+                'success': False,
+                'error': f'Máximo de {LOTE_MAXIMO} eventos por requisição'
+            }), 413
+        
+        # A assinatura cobre o corpo inteiro do lote
+        corpo = request.get_data(as_text=True)
+        signature = request.headers.get('X-Webhook-Signature') or request.headers.get('Signature')
+        if not assinatura_valida(bank_name, corpo, dados, signature):
+            logger.warning("webhook_invalid_signature", bank_name=bank_name, batch=True)
+            return jsonify({
+                'success': False,
+                'error': 'Assinatura inválida'
+            }), 401
+        
+        if MODO_INGESTAO == 'fila':
+            ids = fila_webhooks.enfileirar_varios(bank_name, [json.dumps(evento) for evento in eventos])
+            return jsonify({
+                'success': True,
+                'message': f'{len(ids)} webhooks recebidos, processamento em fila',
+                'fila_ids': ids
+            }), 202
+        
+        resultados = gravar_eventos(bank_name, eventos)
+        resumo = {status: sum(1 for item in resultados if item['status'] == status)
+                  for status in ('criado', 'duplicado', 'invalido')}
+        
+        logger.info("boleto_batch_received", bank_name=bank_name, total=len(eventos), **resumo)
+        
+        return jsonify({
+            'success': True,
+            'total': len(eventos),
+            'resumo': resumo,
+            'resultados': resultados
+        })
+    
+    except Exception as e:
+        logger.error("webhook_batch_processing_error",
+                    bank_name=bank_name,
+                    error=str(e))
+        
+        return jsonify({
+            'success': False,
+            'error': 'Erro interno no processamento'
+        }), 500
+
 # 📋 Endpoint para listar boletos recebidos
 @webhook_bp.route('/boletos', methods=['GET'])
 def list_received_boletos():
     """Listar todos os boletos recebidos via webhook"""
     try:
-        db = SessionLocal()
+        db = obter_sessao()
         try:
             # Parâmetros opcionais
             banco = request.args.get('banco')
@@ -281,91 +587,153 @@ def list_received_boletos():
 
 # 🧪 Endpoint para testar webhook (desenvolvimento)
 @webhook_bp.route('/test/<bank_name>', methods=['POST'])
+@admin_required
 def test_webhook(bank_name):
-    """Testar webhook com dados mock"""
+    """Testar webhook com dados mock (grava boletos de teste: só admin e fora de produção)"""
+    
+    if os.getenv('FLASK_ENV') != 'development':
+        return jsonify({
+            'success': False,
+            'error': 'Endpoint de teste disponível apenas em desenvolvimento'
+        }), 404
     
     bank_name = bank_name.upper()
     
     # Dados mock para teste
     mock_data = {
-        'BRADESCO': {
-            'codigoBarras': f'12345678901234567890123456789012345678901234{datetime.now().microsecond}',
-            'valor': 456.78,
-            'dataVencimento': (datetime.now(UTC) + timedelta(days=5)).isoformat(),
-            'beneficiario': 'Fornecedor Teste Bradesco LTDA',
-            'conta': '1234-5'
-        },
-        'ITAU': {
-            'barCode': f'98765432109876543210987654321098765432109876{datetime.now().microsecond}',
-            'amount': 234.56,
-            'dueDate': (datetime.now(UTC) + timedelta(days=7)).isoformat(),
-            'payeeName': 'Fornecedor Teste Itaú S.A.',
-            'accountNumber': '9876-5'
-        },
-        'BANCO_BRASIL': {
-            'codigo_barras': f'11111111111111111111111111111111111111111111{datetime.now().microsecond}',
-            'valor_titulo': 789.12,
-            'data_vencimento': (datetime.now(UTC) + timedelta(days=3)).isoformat(),
-            'nome_beneficiario': 'Fornecedor Teste BB LTDA',
-            'numero_conta': '11111-1'
-        }
+        'BRADESCO': ('12345678901234567890123456789012345678901234', 456.78, 5, 'Fornecedor Teste Bradesco LTDA', '1234-5'),
+        'ITAU': ('98765432109876543210987654321098765432109876', 234.56, 7, 'Fornecedor Teste Itaú S.A.', '9876-5'),
+        'BANCO_BRASIL': ('11111111111111111111111111111111111111111111', 789.12, 3, 'Fornecedor Teste BB LTDA', '11111-1')
     }
     
-    test_data = mock_data.get(bank_name)
-    if not test_data:
+    if bank_name not in mock_data:
         return jsonify({
             'success': False,
             'error': 'Banco não suportado para teste'
         }), 400
     
-    # Simular webhook request
-    with webhook_bp.test_request_context(
+    prefixo, valor, dias, beneficiario, conta = mock_data[bank_name]
+    test_data = WebhookValidator.build_payload(bank_name, {
+        'codigo_barras': f'{prefixo}{datetime.now().microsecond}',
+        'valor': valor,
+        'data_vencimento': (datetime.now(UTC) + timedelta(days=dias)).isoformat(),
+        'beneficiario': beneficiario,
+        'conta_origem': conta
+    })
+    corpo = json.dumps(test_data)
+    
+    # Simular webhook request (assinado como o banco faria)
+    with current_app.test_request_context(
         f'/api/webhooks/boletos/{bank_name}',
         method='POST',
-        json=test_data,
-        headers={'Content-Type': 'application/json'}
+        data=corpo,
+        headers={
+            'Content-Type': 'application/json',
+            'X-Webhook-Signature': WebhookValidator.sign_payload(bank_name, corpo)
+        }
     ):
         return receive_boleto_webhook(bank_name)
 
+# 📬 Endpoint para métricas da fila de ingestão
+@webhook_bp.route('/fila', methods=['GET'])
+def get_webhook_queue_metrics():
+    """Profundidade, lag e vazão da fila de webhooks"""
+    try:
+        return jsonify({
+            'success': True,
+            'modo': MODO_INGESTAO,
+            'fila': fila_webhooks.metricas()
+        })
+    
+    except Exception as e:
+        logger.error("webhook_queue_metrics_error", error=str(e))
+        return jsonify({
+            'success': False,
+            'error': 'Erro ao obter métricas da fila'
+        }), 500
+
+# ===== ESTATÍSTICAS =====
+def estatisticas_boletos(db, dias=30):
+    """
+    Estatísticas dos boletos recebidos em 2 round-trips, independente do número de bancos
+
+    1. GROUP BY nas colunas do índice ix_boletos_recebidos_banco_urgente_status
+       (varredura só do índice, na ordem dele; poucas dezenas de grupos somados aqui)
+    2. Histograma diário de recebimento dos últimos 'dias' (por banco), pelo
+       índice de expressão ix_boletos_recebidos_dia_banco
+    """
+    def vazio():
+        return {'total': 0, 'urgentes': 0, 'pendentes': 0, 'processados': 0, 'valor_total': 0.0, 'valor_medio': None}
+    
+    por_banco = {banco: vazio() for banco in BANCOS_SUPORTADOS}
+    # Somas sem arredondar: médias (por banco e geral) saem delas
+    somas = {}
+    
+    grupos = db.query(
+        BoletoRecebido.banco_origem,
+        BoletoRecebido.urgente,
+        BoletoRecebido.status,
+        BoletoRecebido.processado,
+        func.count(),
+        func.sum(BoletoRecebido.valor)
+    ).group_by(
+        BoletoRecebido.banco_origem, BoletoRecebido.urgente, BoletoRecebido.status, BoletoRecebido.processado
+    )
+    
+    for banco, urgente, status, processado, total, valor in grupos:
+        dados = por_banco.setdefault(banco, vazio())
+        dados['total'] += total
+        dados['urgentes'] += total if urgente else 0
+        dados['pendentes'] += total if status == 'pendente' else 0
+        dados['processados'] += total if processado else 0
+        somas[banco] = somas.get(banco, 0.0) + float(valor or 0)
+    
+    for banco, soma in somas.items():
+        dados = por_banco[banco]
+        dados['valor_total'] = round(soma, 2)
+        dados['valor_medio'] = round(soma / dados['total'], 2) if dados['total'] else None
+    
+    # Histograma diário (dias sem recebimento aparecem zerados); o filtro usa a
+    # mesma expressão do índice para ler só a faixa de dias
+    hoje = datetime.now(UTC).date()
+    inicio = hoje - timedelta(days=dias - 1)
+    histograma = {
+        (inicio + timedelta(days=i)).isoformat(): {'total': 0, 'por_banco': {}}
+        for i in range(dias)
+    }
+    for data, banco, total in db.query(DIA_RECEBIMENTO, BoletoRecebido.banco_origem, func.count()).filter(
+        DIA_RECEBIMENTO >= inicio
+    ).group_by(DIA_RECEBIMENTO, BoletoRecebido.banco_origem):
+        chave = data.isoformat() if hasattr(data, 'isoformat') else str(data)
+        if chave in histograma:
+            histograma[chave]['total'] += total
+            histograma[chave]['por_banco'][banco] = total
+    
+    total_geral = sum(dados['total'] for dados in por_banco.values())
+    
+    return {
+        'por_banco': por_banco,
+        'total_geral': total_geral,
+        'total_urgentes': sum(dados['urgentes'] for dados in por_banco.values()),
+        'total_pendentes': sum(dados['pendentes'] for dados in por_banco.values()),
+        'total_processados': sum(dados['processados'] for dados in por_banco.values()),
+        'valor_medio': round(sum(somas.values()) / total_geral, 2) if total_geral else None,
+        'histograma_diario': [{'dia': chave, **dados} for chave, dados in histograma.items()],
+        'ultima_atualizacao': datetime.now(UTC).isoformat()
+    }
+
 # 📊 Endpoint para estatísticas
 @webhook_bp.route('/stats', methods=['GET'])
+@somente_leitura
 def get_webhook_stats():
     """Obter estatísticas dos webhooks"""
     try:
-        db = SessionLocal()
+        dias = min(max(int(request.args.get('dias', 30)), 1), 366)
+        db = obter_sessao()
         try:
-            stats = {}
-            
-            # Total por banco
-            for banco in ['BRADESCO', 'ITAU', 'BANCO_BRASIL']:
-                total = db.query(BoletoRecebido).filter(
-                    BoletoRecebido.banco_origem == banco
-                ).count()
-                
-                urgentes = db.query(BoletoRecebido).filter(
-                    BoletoRecebido.banco_origem == banco,
-                    BoletoRecebido.urgente == True
-                ).count()
-                
-                stats[banco] = {
-                    'total': total,
-                    'urgentes': urgentes
-                }
-            
-            # Estatísticas gerais
-            total_geral = db.query(BoletoRecebido).count()
-            total_urgentes = db.query(BoletoRecebido).filter(
-                BoletoRecebido.urgente == True
-            ).count()
-            
             return jsonify({
                 'success': True,
-                'stats': {
-                    'por_banco': stats,
-                    'total_geral': total_geral,
-                    'total_urgentes': total_urgentes,
-                    'ultima_atualizacao': datetime.now(UTC).isoformat()
-                }
+                'stats': estatisticas_boletos(db, dias)
             })
             
         finally:
@@ -376,4 +744,4 @@ def get_webhook_stats():
         return jsonify({
             'success': False,
             'error': 'Erro ao obter estatísticas'
-        }), 500
\ No newline at end of file
+        }), 500
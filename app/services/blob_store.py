@@ -0,0 +1,311 @@
+# 📁 services/blob_store.py - ARMAZENAMENTO ENDEREÇADO POR CONTEÚDO (DEDUP)
+# Cada conteúdo físico (disco local ou S3) é registrado uma única vez em
+# arquivo_blobs, chaveado pelo SHA-256 calculado no upload, com contador de
+# referências. Vários Arquivo apontam para o mesmo blob; o objeto físico só é
+# removido quando a última referência é excluída (inclusive por cascade).
+# Upload instantâneo (só o SHA-256) exige que quem pede já possa ler o conteúdo
+# (mesmo autor ou mesmo projeto) ou prove que tem os bytes: o servidor sorteia
+# faixas do arquivo e o cliente devolve o SHA-256 delas (desafio assinado).
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+from datetime import datetime, UTC
+from sqlalchemy import event, update, delete, select, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import object_session
+from database import SessionLocal, engine, Arquivo, ArquivoBlob
+
+try:
+    from services.upload_stream import s3_manager
+except ImportError:
+    s3_manager = None
+
+CAMPOS_LOCALIZACAO = ('storage_type', 'caminho', 'aws_s3_key', 'aws_s3_bucket')
+
+# Prova de posse no upload por hash
+PROVA_FAIXAS = int(os.getenv('BLOB_PROVA_FAIXAS', '4'))
+PROVA_TAMANHO_FAIXA = int(os.getenv('BLOB_PROVA_TAMANHO_FAIXA', '4096'))
+PROVA_VALIDADE = int(os.getenv('BLOB_PROVA_VALIDADE', '300'))
+
+# ===== REMOÇÃO FÍSICA =====
+def remover_objeto_fisico(storage_type, caminho=None, aws_s3_key=None, aws_s3_bucket=None):
+    """Apagar o conteúdo no disco ou no S3 (melhor esforço)"""
+    try:
+        if storage_type == 's3' and aws_s3_key:
+            if s3_manager and s3_manager.s3_enabled:
+                s3_manager.s3_client.delete_object(Bucket=aws_s3_bucket or s3_manager.bucket_name, Key=aws_s3_key)
+                return True
+            return False
+        if caminho and os.path.exists(caminho):
+            os.remove(caminho)
+            return True
+    except Exception as e:
+        print(f"⚠️  Erro ao remover objeto físico {aws_s3_key or caminho}: {e}")
+    return False
+
+# ===== REFERÊNCIAS =====
+def _incrementar(db, sha256):
+    """+1 referência; False se o blob não existe (ou acabou de ser liberado)"""
+    resultado = db.execute(
+        update(ArquivoBlob)
+        .where(ArquivoBlob.sha256 == sha256, ArquivoBlob.referencias > 0)
+        .values(referencias=ArquivoBlob.referencias + 1)
+    )
+    return resultado.rowcount == 1
+
+def _inserir_se_novo(db, dados):
+    """INSERT ... ON CONFLICT DO NOTHING; True se este upload criou o blob"""
+    dialeto = db.bind.dialect.name
+    if dialeto in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        stmt = insert(ArquivoBlob).values(**dados, referencias=1).on_conflict_do_nothing(index_elements=['sha256'])
+        return db.execute(stmt).rowcount == 1
+
+    if db.get(ArquivoBlob, dados['sha256']):
+        return False
+    db.add(ArquivoBlob(**dados, referencias=1))
+    db.flush()
+    return True
+
+def localizacao(blob):
+    """Campos de Arquivo que apontam para o conteúdo do blob"""
+    return {campo: getattr(blob, campo) for campo in CAMPOS_LOCALIZACAO}
+
+def registrar_upload(db, resultado):
+    """
+    Registrar o conteúdo recém-enviado (saída de processar_upload)
+
+    Se o SHA-256 já existe, descarta a cópia nova e passa a apontar para o
+    blob existente. Retorna (resultado_ajustado, reaproveitado). A referência
+    entra na transação do chamador (commit junto com o Arquivo).
+    """
+    sha256 = resultado['hash_sha256']
+
+    if _incrementar(db, sha256):
+        blob = db.get(ArquivoBlob, sha256)
+        if (blob.caminho, blob.aws_s3_key) != (resultado.get('caminho'), resultado.get('aws_s3_key')):
+            remover_objeto_fisico(**{campo: resultado.get(campo) for campo in CAMPOS_LOCALIZACAO})
+        return {**resultado, **localizacao(blob)}, True
+
+    dados = {
+        'sha256': sha256,
+        'tamanho': resultado['tamanho'],
+        'tipo_mime': resultado.get('tipo_mime'),
+        **{campo: resultado.get(campo) for campo in CAMPOS_LOCALIZACAO}
+    }
+    if _inserir_se_novo(db, dados):
+        return resultado, False
+
+    # Outro upload do mesmo conteúdo venceu a corrida do INSERT
+    if _incrementar(db, sha256):
+        blob = db.get(ArquivoBlob, sha256)
+        remover_objeto_fisico(**{campo: resultado.get(campo) for campo in CAMPOS_LOCALIZACAO})
+        return {**resultado, **localizacao(blob)}, True
+
+    # Blob com 0 referências aguardando coleta: reassume com a cópia deste upload
+    reassumido = db.execute(
+        update(ArquivoBlob)
+        .where(ArquivoBlob.sha256 == sha256, ArquivoBlob.referencias <= 0)
+        .values(referencias=1, **{campo: valor for campo, valor in dados.items() if campo != 'sha256'})
+    ).rowcount
+    if reassumido or _inserir_se_novo(db, dados):
+        return resultado, False
+
+    raise RuntimeError(f'Não foi possível registrar o blob {sha256}')
+
+def referenciar_por_hash(db, sha256):
+    """
+    Upload instantâneo: +1 referência em um conteúdo já armazenado
+
+    Retorna o ArquivoBlob ou None (conteúdo desconhecido -> enviar o arquivo).
+    """
+    if not sha256 or len(sha256) != 64 or not _incrementar(db, sha256.lower()):
+        return None
+    return db.get(ArquivoBlob, sha256.lower())
+
+# ===== AUTORIZAÇÃO DO UPLOAD POR HASH =====
+def pode_ler_conteudo(db, sha256, username, projeto_id=None):
+    """True se o usuário já enxerga um Arquivo com este conteúdo (enviado por ele ou do mesmo projeto)"""
+    condicoes = []
+    if username:
+        condicoes.append(Arquivo.uploaded_by == username)
+    if projeto_id:
+        condicoes.append(Arquivo.projeto_id == projeto_id)
+    if not sha256 or not condicoes:
+        return False
+    return db.query(Arquivo.id).filter(Arquivo.hash_sha256 == sha256.lower(), or_(*condicoes)).first() is not None
+
+def _assinar(dados):
+    chave = (os.getenv('JWT_SECRET') or '').encode()
+    return hmac.new(chave, dados, hashlib.sha256).hexdigest()
+
+def criar_desafio(db, sha256, user_id):
+    """
+    Sortear faixas do conteúdo para o cliente provar que tem os bytes
+
+    Retorna {'desafio': token, 'faixas': [[inicio, fim), ...]} ou None se o hash é desconhecido.
+    """
+    blob = db.get(ArquivoBlob, (sha256 or '').lower())
+    if not blob or blob.referencias <= 0:
+        return None
+    tamanho = blob.tamanho or 0
+    if tamanho <= PROVA_FAIXAS * PROVA_TAMANHO_FAIXA:
+        faixas = [[0, tamanho]]
+    else:
+        inicios = sorted(secrets.randbelow(tamanho - PROVA_TAMANHO_FAIXA + 1) for _ in range(PROVA_FAIXAS))
+        faixas = [[inicio, inicio + PROVA_TAMANHO_FAIXA] for inicio in inicios]
+    dados = json.dumps({
+        'sha256': blob.sha256, 'user_id': user_id, 'faixas': faixas,
+        'expira': int(time.time()) + PROVA_VALIDADE
+    }, separators=(',', ':')).encode()
+    token = base64.urlsafe_b64encode(dados).decode().rstrip('=') + '.' + _assinar(dados)
+    return {'desafio': token, 'faixas': faixas}
+
+def _ler_faixas(blob, faixas):
+    """Bytes das faixas, na ordem, direto do disco ou do S3"""
+    partes = []
+    if blob.storage_type == 's3' and blob.aws_s3_key:
+        if not (s3_manager and s3_manager.s3_enabled):
+            return None
+        for inicio, fim in faixas:
+            if fim <= inicio:
+                continue
+            objeto = s3_manager.s3_client.get_object(
+                Bucket=blob.aws_s3_bucket or s3_manager.bucket_name, Key=blob.aws_s3_key,
+                Range=f'bytes={inicio}-{fim - 1}'
+            )
+            partes.append(objeto['Body'].read())
+        return b''.join(partes)
+    if not blob.caminho or not os.path.exists(blob.caminho):
+        return None
+    with open(blob.caminho, 'rb') as arquivo:
+        for inicio, fim in faixas:
+            arquivo.seek(inicio)
+            partes.append(arquivo.read(max(0, fim - inicio)))
+    return b''.join(partes)
+
+def verificar_prova(db, sha256, user_id, desafio, prova):
+    """True se 'prova' é o SHA-256 (hex) das faixas pedidas no desafio emitido para este usuário"""
+    try:
+        token, assinatura = desafio.rsplit('.', 1)
+        dados = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        if not hmac.compare_digest(_assinar(dados), assinatura):
+            return False
+        conteudo = json.loads(dados)
+    except Exception:
+        return False
+    if conteudo['sha256'] != (sha256 or '').lower() or conteudo['user_id'] != user_id or conteudo['expira'] < time.time():
+        return False
+
+    blob = db.get(ArquivoBlob, conteudo['sha256'])
+    if not blob:
+        return False
+    try:
+        bytes_faixas = _ler_faixas(blob, conteudo['faixas'])
+    except Exception as e:
+        print(f"⚠️  Não foi possível ler o blob {blob.sha256} para a prova de posse: {e}")
+        return False
+    if bytes_faixas is None:
+        return False
+    return hmac.compare_digest(hashlib.sha256(bytes_faixas).hexdigest(), str(prova or '').lower())
+
+def autorizar_upload_por_hash(db, sha256, user_id, username, projeto_id=None, desafio=None, prova=None):
+    """
+    Decidir se o usuário pode registrar o conteúdo só pelo SHA-256
+
+    Retorna None (pode) ou (corpo, status) da recusa: 409 com o desafio
+    (faixas a provar), 403 com prova inválida, 404 para conteúdo desconhecido.
+    """
+    if pode_ler_conteudo(db, sha256, username, projeto_id):
+        return None
+    if desafio:
+        if verificar_prova(db, sha256, user_id, desafio, prova):
+            return None
+        return {'success': False, 'upload_necessario': True, 'error': 'Prova de posse inválida'}, 403
+
+    novo_desafio = criar_desafio(db, sha256, user_id)
+    if not novo_desafio:
+        return {'success': False, 'upload_necessario': True, 'error': 'Conteúdo não encontrado'}, 404
+    return {
+        'success': False,
+        'prova_necessaria': True,
+        'error': 'Envie o SHA-256 das faixas indicadas para provar a posse do conteúdo',
+        **novo_desafio
+    }, 409
+
+def criar_arquivo_por_hash(db, sha256, nome_original, **campos):
+    """
+    Criar um Arquivo apontando para conteúdo já armazenado, sem transferência
+
+    Retorna o Arquivo (pendente de commit) ou None se o hash é desconhecido.
+    Não verifica permissão: chamar só depois de autorizar_upload_por_hash().
+    """
+    blob = referenciar_por_hash(db, sha256)
+    if not blob:
+        return None
+
+    arquivo = Arquivo(
+        nome_original=nome_original,
+        nome_arquivo=os.path.basename(blob.caminho or blob.aws_s3_key or blob.sha256),
+        tamanho=blob.tamanho,
+        tipo_mime=blob.tipo_mime,
+        hash_sha256=blob.sha256,
+        created_at=datetime.now(UTC),
+        **localizacao(blob),
+        **campos
+    )
+    db.add(arquivo)
+    db.flush()
+    return arquivo
+
+def e_compartilhado(db, arquivo):
+    """True se o conteúdo do Arquivo é gerenciado pelo blob store"""
+    return bool(arquivo.hash_sha256) and db.get(ArquivoBlob, arquivo.hash_sha256) is not None
+
+# ===== LIBERAÇÃO AUTOMÁTICA (DELETE OU CASCADE) =====
+@event.listens_for(Arquivo, 'after_delete')
+def _liberar_referencia(mapper, connection, arquivo):
+    if not arquivo.hash_sha256:
+        return
+    connection.execute(
+        update(ArquivoBlob)
+        .where(ArquivoBlob.sha256 == arquivo.hash_sha256, ArquivoBlob.referencias > 0)
+        .values(referencias=ArquivoBlob.referencias - 1)
+    )
+    sessao = object_session(arquivo)
+    if sessao is not None:
+        sessao.info.setdefault('blobs_liberados', set()).add(arquivo.hash_sha256)
+
+def coletar_blobs(hashes):
+    """Remover blobs sem referências (linha + objeto físico)"""
+    removidos = 0
+    for sha256 in hashes:
+        with engine.begin() as conn:
+            blob = conn.execute(
+                select(*[getattr(ArquivoBlob, campo) for campo in CAMPOS_LOCALIZACAO])
+                .where(ArquivoBlob.sha256 == sha256, ArquivoBlob.referencias <= 0)
+            ).mappings().first()
+            if not blob:
+                continue
+            # DELETE condicional: um upload concorrente pode ter reativado o blob
+            apagado = conn.execute(
+                delete(ArquivoBlob).where(ArquivoBlob.sha256 == sha256, ArquivoBlob.referencias <= 0)
+            ).rowcount
+        if apagado:
+            remover_objeto_fisico(**blob)
+            removidos += 1
+    return removidos
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _coletar_apos_commit(session):
+    hashes = session.info.pop('blobs_liberados', None)
+    if hashes:
+        coletar_blobs(hashes)
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _descartar_liberacoes(session):
+    session.info.pop('blobs_liberados', None)
@@ -0,0 +1,304 @@
+# 📁 services/busca_arquivos.py - BUSCA TEXTUAL DE ARQUIVOS COM RELEVÂNCIA
+# Índice de busca sobre nome do arquivo, tags, nome do projeto/pasta e descrição:
+#   - PostgreSQL: tabela arquivos_busca com tsvector ponderado (GIN) e, quando a
+#     extensão pg_trgm está disponível, índice de trigramas para trechos no meio
+#     da palavra ("lanta" encontra "planta_baixa.dwg")
+#   - SQLite: tabela virtual FTS5 (bm25, sem acentos)
+#   - Outros bancos / FTS indisponível: ILIKE como antes
+#
+# O índice é mantido na mesma transação das escritas (after_flush), inclusive
+# quando o projeto ou a pasta é renomeado. Resultados: relevância desc, id desc,
+# paginados por cursor (mesmo formato de services/paginacao.py).
+import os
+import re
+from sqlalchemy import event, text, bindparam, inspect
+from database import SessionLocal, engine, Arquivo, Projeto, Pasta
+from services.paginacao import codificar_cursor, decodificar_cursor_relevancia, paginar
+from services.serializers import carregar
+
+CONFIG_PG = os.getenv('BUSCA_CONFIG_PG', 'portuguese')
+
+# Pesos do bm25 (SQLite) na ordem das colunas: nome, tags, contexto, descrição
+PESOS_FTS5 = (10.0, 5.0, 3.0, 1.0)
+
+CAMPOS_INDEXADOS = ('nome_original', 'descricao', 'tags', 'projeto_id', 'pasta_id')
+
+# Modo do índice por dialeto: 'postgresql', 'postgresql+trgm', 'sqlite' ou None
+_modo = {}
+
+# ===== DDL =====
+DDL_POSTGRESQL = [
+    """CREATE TABLE IF NOT EXISTS arquivos_busca (
+        arquivo_id INTEGER PRIMARY KEY REFERENCES arquivos(id) ON DELETE CASCADE,
+        documento TEXT NOT NULL,
+        vetor TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_arquivos_busca_vetor ON arquivos_busca USING GIN (vetor)",
+]
+DDL_TRIGRAMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_arquivos_busca_documento_trgm ON arquivos_busca USING GIN (documento gin_trgm_ops)",
+]
+DDL_SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS arquivos_fts USING fts5(
+        nome, tags, contexto, descricao,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+]
+
+# ===== INDEXAÇÃO =====
+SQL_INDEXAR_PG = text(f"""
+    INSERT INTO arquivos_busca (arquivo_id, documento, vetor)
+    SELECT a.id,
+           lower(concat_ws(' ', a.nome_original, a.tags, p.nome, ps.nome, a.descricao)),
+           setweight(to_tsvector('{CONFIG_PG}', translate(coalesce(a.nome_original, ''), '._-/', '    ')), 'A') ||
+           setweight(to_tsvector('{CONFIG_PG}', coalesce(a.tags, '')), 'B') ||
+           setweight(to_tsvector('{CONFIG_PG}', concat_ws(' ', p.nome, ps.nome)), 'C') ||
+           setweight(to_tsvector('{CONFIG_PG}', coalesce(a.descricao, '')), 'D')
+    FROM arquivos a
+    LEFT JOIN projetos p ON p.id = a.projeto_id
+    LEFT JOIN pastas ps ON ps.id = a.pasta_id
+    WHERE a.id IN :ids
+    ON CONFLICT (arquivo_id) DO UPDATE SET documento = EXCLUDED.documento, vetor = EXCLUDED.vetor
+""").bindparams(bindparam('ids', expanding=True))
+
+SQL_REMOVER_PG = text("DELETE FROM arquivos_busca WHERE arquivo_id IN :ids").bindparams(bindparam('ids', expanding=True))
+
+SQL_INDEXAR_SQLITE = text("""
+    INSERT INTO arquivos_fts (rowid, nome, tags, contexto, descricao)
+    SELECT a.id,
+           coalesce(a.nome_original, ''),
+           coalesce(a.tags, ''),
+           trim(coalesce(p.nome, '') || ' ' || coalesce(ps.nome, '')),
+           coalesce(a.descricao, '')
+    FROM arquivos a
+    LEFT JOIN projetos p ON p.id = a.projeto_id
+    LEFT JOIN pastas ps ON ps.id = a.pasta_id
+    WHERE a.id IN :ids
+""").bindparams(bindparam('ids', expanding=True))
+
+SQL_REMOVER_SQLITE = text("DELETE FROM arquivos_fts WHERE rowid IN :ids").bindparams(bindparam('ids', expanding=True))
+
+def modo_indice(conn):
+    """Detectar (uma vez por dialeto) qual índice existe no banco"""
+    dialeto = conn.dialect.name
+    if dialeto not in _modo:
+        tabelas = set(inspect(conn).get_table_names())
+        if dialeto == 'postgresql' and 'arquivos_busca' in tabelas:
+            trigrama = conn.execute(text(
+                "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_arquivos_busca_documento_trgm'"
+            )).first()
+            _modo[dialeto] = 'postgresql+trgm' if trigrama else 'postgresql'
+        elif dialeto == 'sqlite' and 'arquivos_fts' in tabelas:
+            _modo[dialeto] = 'sqlite'
+        else:
+            _modo[dialeto] = None
+    return _modo[dialeto]
+
+def indexar(conn, ids):
+    """(Re)indexar os arquivos informados na transação de conn"""
+    ids = list(ids)
+    modo = modo_indice(conn)
+    if not ids or not modo:
+        return
+    for inicio in range(0, len(ids), 500):
+        lote = ids[inicio:inicio + 500]
+        if modo == 'sqlite':
+            conn.execute(SQL_REMOVER_SQLITE, {'ids': lote})
+            conn.execute(SQL_INDEXAR_SQLITE, {'ids': lote})
+        else:
+            conn.execute(SQL_INDEXAR_PG, {'ids': lote})
+
+def remover(conn, ids):
+    """Tirar arquivos excluídos do índice"""
+    ids = list(ids)
+    modo = modo_indice(conn)
+    if not ids or not modo:
+        return
+    conn.execute(SQL_REMOVER_SQLITE if modo == 'sqlite' else SQL_REMOVER_PG, {'ids': ids})
+
+def reindexar_tudo(conn):
+    """Reconstruir o índice inteiro; retorna a quantidade de arquivos indexados"""
+    ids = conn.execute(text("SELECT id FROM arquivos")).scalars().all()
+    if modo_indice(conn) == 'sqlite':
+        conn.execute(text("DELETE FROM arquivos_fts"))
+    indexar(conn, ids)
+    return len(ids)
+
+def preparar_indice(bind=None):
+    """Criar as estruturas de busca do dialeto e popular o índice se estiver vazio"""
+    bind = bind or engine
+    dialeto = bind.dialect.name
+    _modo.pop(dialeto, None)
+
+    try:
+        with bind.begin() as conn:
+            if dialeto == 'postgresql':
+                for ddl in DDL_POSTGRESQL:
+                    conn.execute(text(ddl))
+            elif dialeto == 'sqlite':
+                for ddl in DDL_SQLITE:
+                    conn.execute(text(ddl))
+            else:
+                return None
+
+        if dialeto == 'postgresql':
+            try:
+                with bind.begin() as conn:
+                    for ddl in DDL_TRIGRAMA:
+                        conn.execute(text(ddl))
+            except Exception as e:
+                print(f"⚠️  pg_trgm indisponível, busca parcial desativada: {e}")
+
+        with bind.begin() as conn:
+            modo = modo_indice(conn)
+            tabela = 'arquivos_fts' if modo == 'sqlite' else 'arquivos_busca'
+            vazio = conn.execute(text(f"SELECT 1 FROM {tabela} LIMIT 1")).first() is None
+            if vazio:
+                total = reindexar_tudo(conn)
+                if total:
+                    print(f"🔎 Índice de busca de arquivos criado ({total} arquivos)")
+        return modo
+    except Exception as e:
+        print(f"⚠️  Índice de busca de arquivos indisponível ({dialeto}): {e}")
+        _modo[dialeto] = None
+        return None
+
+# ===== MANUTENÇÃO AUTOMÁTICA =====
+def _alterou(objeto, campos):
+    estado = inspect(objeto)
+    return any(estado.attrs[campo].history.has_changes() for campo in campos)
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _atualizar_indice(session, flush_context):
+    conn = session.connection()
+    if not modo_indice(conn):
+        return
+
+    novos = {obj.id for obj in session.new if isinstance(obj, Arquivo)}
+    novos |= {obj.id for obj in session.dirty
+              if isinstance(obj, Arquivo) and _alterou(obj, CAMPOS_INDEXADOS)}
+    excluidos = {obj.id for obj in session.deleted if isinstance(obj, Arquivo)}
+
+    # Projeto/pasta renomeado: reindexar os arquivos vinculados
+    projetos = [obj.id for obj in session.dirty if isinstance(obj, Projeto) and _alterou(obj, ('nome',))]
+    pastas = [obj.id for obj in session.dirty if isinstance(obj, Pasta) and _alterou(obj, ('nome',))]
+    if projetos or pastas:
+        consulta = text("SELECT id FROM arquivos WHERE projeto_id IN :projetos OR pasta_id IN :pastas").bindparams(
+            bindparam('projetos', expanding=True), bindparam('pastas', expanding=True)
+        )
+        novos |= set(conn.execute(consulta, {'projetos': projetos or [-1], 'pastas': pastas or [-1]}).scalars())
+
+    remover(conn, excluidos)
+    indexar(conn, novos - excluidos)
+
+# ===== CONSULTA =====
+def termos_busca(q):
+    """Palavras da busca (sem operadores/aspas do usuário; '_' separa palavras)"""
+    return re.findall(r'[^\W_]+', q.lower())
+
+def _filtros_sql(filtros):
+    """Cláusulas de filtro sobre a tabela 'arquivos' (alias a)"""
+    clausulas, parametros = [], {}
+    for campo in ('pasta_id', 'projeto_id', 'tipo_documento'):
+        if filtros.get(campo) is not None:
+            clausulas.append(f"a.{campo} = :{campo}")
+            parametros[campo] = filtros[campo]
+    return clausulas, parametros
+
+def _consulta_ranqueada(modo, termos, q):
+    """SELECT (id, relevancia) dos arquivos que casam com a busca"""
+    if modo == 'sqlite':
+        pesos = ', '.join(str(peso) for peso in PESOS_FTS5)
+        sql = f"""
+            SELECT a.id AS id, -bm25(arquivos_fts, {pesos}) AS relevancia
+            FROM arquivos_fts JOIN arquivos a ON a.id = arquivos_fts.rowid
+            WHERE arquivos_fts MATCH :consulta
+        """
+        # Cada termo vira prefixo: "plan" encontra "planta"
+        return sql, {'consulta': ' '.join(f'"{termo}"*' for termo in termos)}
+
+    consulta = ' & '.join(f'{termo}:*' for termo in termos)
+    parametros = {'consulta': consulta}
+    if modo == 'postgresql+trgm':
+        sql = f"""
+            SELECT a.id AS id,
+                   CAST(ts_rank_cd(b.vetor, tsq) + 0.5 * word_similarity(:termo, b.documento) AS DOUBLE PRECISION) AS relevancia
+            FROM arquivos_busca b
+            JOIN arquivos a ON a.id = b.arquivo_id,
+                 to_tsquery('{CONFIG_PG}', :consulta) tsq
+            WHERE (b.vetor @@ tsq OR b.documento LIKE :padrao)
+        """
+        parametros.update({'termo': q.lower(), 'padrao': f"%{q.lower().replace('%', '').replace('_', '')}%"})
+    else:
+        sql = f"""
+            SELECT a.id AS id, CAST(ts_rank_cd(b.vetor, tsq) AS DOUBLE PRECISION) AS relevancia
+            FROM arquivos_busca b
+            JOIN arquivos a ON a.id = b.arquivo_id,
+                 to_tsquery('{CONFIG_PG}', :consulta) tsq
+            WHERE b.vetor @@ tsq
+        """
+    return sql, parametros
+
+def buscar(db, q, filtros, parametros):
+    """
+    Buscar arquivos por relevância
+
+    filtros: pasta_id/projeto_id/tipo_documento; parametros: parametros_paginacao().
+    Retorna (lista de (Arquivo, relevancia), dicionário 'pagination').
+    """
+    modo = modo_indice(db.connection())
+    termos = termos_busca(q)
+    limite = parametros['limit']
+
+    if not modo:
+        return _buscar_ilike(db, q, filtros, parametros)
+    if not termos:
+        return [], {'limit': limite, 'has_more': False, 'next_cursor': None}
+
+    sql, valores = _consulta_ranqueada(modo, termos, q)
+    clausulas, valores_filtro = _filtros_sql(filtros)
+    valores.update(valores_filtro)
+    for clausula in clausulas:
+        sql += f" AND {clausula}"
+
+    externo = f"SELECT id, relevancia FROM ({sql}) r"
+    if parametros['cursor']:
+        valores['cursor_relevancia'], valores['cursor_id'] = decodificar_cursor_relevancia(parametros['cursor'])
+        externo += (" WHERE relevancia < :cursor_relevancia"
+                    " OR (relevancia = :cursor_relevancia AND id < :cursor_id)")
+    externo += " ORDER BY relevancia DESC, id DESC LIMIT :limite"
+    valores['limite'] = limite + 1
+
+    linhas = db.execute(text(externo), valores).all()
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    paginacao = {
+        'limit': limite,
+        'has_more': tem_mais,
+        'next_cursor': codificar_cursor(linhas[-1].relevancia, linhas[-1].id) if tem_mais else None
+    }
+    if not linhas:
+        return [], paginacao
+
+    relevancias = {linha.id: linha.relevancia for linha in linhas}
+    arquivos = {a.id: a for a in carregar(db.query(Arquivo).filter(Arquivo.id.in_(relevancias)), Arquivo)}
+    resultados = [(arquivos[id_], relevancias[id_]) for id_ in relevancias if id_ in arquivos]
+    return resultados, paginacao
+
+def _buscar_ilike(db, q, filtros, parametros):
+    """Fallback sem índice textual: ILIKE, mais recentes primeiro"""
+    padrao = f'%{q}%'
+    query = db.query(Arquivo).filter(
+        Arquivo.nome_original.ilike(padrao) |
+        Arquivo.descricao.ilike(padrao) |
+        Arquivo.tags.ilike(padrao)
+    )
+    for campo in ('pasta_id', 'projeto_id', 'tipo_documento'):
+        if filtros.get(campo) is not None:
+            query = query.filter(getattr(Arquivo, campo) == filtros[campo])
+
+    arquivos, paginacao = paginar(query, Arquivo, Arquivo.created_at, parametros,
+                                  carregar=lambda q: carregar(q, Arquivo), contar_primeira_pagina=False)
+    return [(arquivo, None) for arquivo in arquivos], paginacao
@@ -0,0 +1,367 @@
+# 📁 services/busca_clientes.py - BUSCA APROXIMADA DE CLIENTES (SELETOR DE CLIENTES)
+# Cada digitação no seletor vira uma consulta indexada, nunca uma varredura:
+#   - Nome normalizado (minúsculo, sem acentos) em clientes.busca_nome:
+#     "Joao" encontra "João"
+#   - CPF/CNPJ só com dígitos em clientes.documento_digitos:
+#     "123.456" e "123456" encontram "123.456.789-00"
+#   - Tolerância a erros de digitação por trigramas:
+#       PostgreSQL: pg_trgm (word_similarity, índices GIN gin_trgm_ops)
+#       SQLite: FTS5 com tokenizer trigram gera candidatos; similaridade em Python
+#   - Buscas curtas (< 3 caracteres): prefixo nos clientes mais recentes (PK)
+#     e, se não encher a página, por faixa no índice B-tree
+# Resultados por relevância desc, id desc, com cursor (services/paginacao.py).
+import os
+import re
+import unicodedata
+from sqlalchemy import event, text, bindparam, inspect
+from database import SessionLocal, engine, Cliente
+from services.paginacao import codificar_cursor, decodificar_cursor_relevancia
+from services.serializers import carregar
+
+# Similaridade mínima para um nome entrar no resultado (mesmo padrão do pg_trgm)
+SIMILARIDADE_MINIMA = float(os.getenv('BUSCA_CLIENTES_SIMILARIDADE', '0.3'))
+
+# SQLite: candidatos lidos do FTS5 antes do ranking em Python
+CANDIDATOS_SQLITE = int(os.getenv('BUSCA_CLIENTES_CANDIDATOS', '500'))
+
+# Buscas curtas: quantos clientes mais recentes conferir antes de usar o índice do prefixo
+JANELA_CURTA = int(os.getenv('BUSCA_CLIENTES_JANELA_CURTA', '2000'))
+
+CAMPOS_INDEXADOS = ('nome', 'email', 'cpf_cnpj')
+
+# Modo do índice por dialeto: 'postgresql', 'sqlite' ou None
+_modo = {}
+
+# ===== NORMALIZAÇÃO =====
+def normalizar_texto(valor):
+    """Minúsculo, sem acentos e com espaços simples: 'João  da Silva' -> 'joao da silva'"""
+    if not valor:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', valor)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.lower().split())
+
+def somente_digitos(valor):
+    """CPF/CNPJ sem pontuação: '12.345.678/0001-90' -> '12345678000190'"""
+    return re.sub(r'\D', '', valor or '')
+
+def trigramas(texto):
+    """Trigramas no estilo pg_trgm (cada palavra com dois espaços antes e um depois)"""
+    conjunto = set()
+    for palavra in re.findall(r'[^\W_]+', texto):
+        preenchida = f'  {palavra} '
+        conjunto.update(preenchida[i:i + 3] for i in range(len(preenchida) - 2))
+    return conjunto
+
+def similaridade(termo, texto):
+    """Fração dos trigramas do termo presentes no texto (≈ word_similarity do pg_trgm)"""
+    do_termo = trigramas(termo)
+    if not do_termo:
+        return 0.0
+    return len(do_termo & trigramas(texto)) / len(do_termo)
+
+@event.listens_for(Cliente, 'before_insert')
+@event.listens_for(Cliente, 'before_update')
+def _normalizar_cliente(mapper, connection, cliente):
+    cliente.busca_nome = normalizar_texto(cliente.nome)[:200]
+    cliente.documento_digitos = somente_digitos(cliente.cpf_cnpj)[:20] or None
+
+# ===== ESTRUTURAS DE BUSCA =====
+DDL_POSTGRESQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_clientes_busca_nome_trgm ON clientes USING GIN (busca_nome gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_clientes_email_trgm ON clientes USING GIN (lower(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_clientes_documento_trgm ON clientes USING GIN (documento_digitos gin_trgm_ops)",
+]
+DDL_SQLITE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+        nome, email, documento,
+        tokenize = 'trigram'
+    )""",
+]
+
+SQL_INDEXAR_SQLITE = text("""
+    INSERT INTO clientes_fts (rowid, nome, email, documento)
+    SELECT id, coalesce(busca_nome, ''), lower(coalesce(email, '')), coalesce(documento_digitos, '')
+    FROM clientes WHERE id IN :ids
+""").bindparams(bindparam('ids', expanding=True))
+
+SQL_REMOVER_SQLITE = text("DELETE FROM clientes_fts WHERE rowid IN :ids").bindparams(bindparam('ids', expanding=True))
+
+def modo_indice(conn):
+    """Detectar (uma vez por dialeto) se as estruturas de busca existem"""
+    dialeto = conn.dialect.name
+    if dialeto not in _modo:
+        if dialeto == 'postgresql':
+            existe = conn.execute(text(
+                "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_clientes_busca_nome_trgm'"
+            )).first()
+            _modo[dialeto] = 'postgresql' if existe else None
+        elif dialeto == 'sqlite':
+            _modo[dialeto] = 'sqlite' if 'clientes_fts' in inspect(conn).get_table_names() else None
+        else:
+            _modo[dialeto] = None
+    return _modo[dialeto]
+
+def _indexar_sqlite(conn, ids):
+    ids = list(ids)
+    for inicio in range(0, len(ids), 500):
+        lote = ids[inicio:inicio + 500]
+        conn.execute(SQL_REMOVER_SQLITE, {'ids': lote})
+        conn.execute(SQL_INDEXAR_SQLITE, {'ids': lote})
+
+def normalizar_existentes(conn, lote=1000):
+    """Preencher busca_nome/documento_digitos de clientes antigos; retorna quantos"""
+    total = 0
+    while True:
+        linhas = conn.execute(text(
+            "SELECT id, nome, cpf_cnpj FROM clientes WHERE busca_nome IS NULL ORDER BY id LIMIT :lote"
+        ), {'lote': lote}).all()
+        if not linhas:
+            return total
+        conn.execute(
+            text("UPDATE clientes SET busca_nome = :busca_nome, documento_digitos = :documento_digitos WHERE id = :id"),
+            [{
+                'id': linha.id,
+                'busca_nome': normalizar_texto(linha.nome)[:200],
+                'documento_digitos': somente_digitos(linha.cpf_cnpj)[:20] or None
+            } for linha in linhas]
+        )
+        total += len(linhas)
+
+def preparar_indice(bind=None):
+    """Normalizar clientes antigos e criar os índices de busca do dialeto"""
+    bind = bind or engine
+    dialeto = bind.dialect.name
+    _modo.pop(dialeto, None)
+
+    try:
+        with bind.begin() as conn:
+            normalizados = normalizar_existentes(conn)
+            if normalizados:
+                print(f"🔎 {normalizados} clientes normalizados para busca")
+
+        with bind.begin() as conn:
+            if dialeto == 'postgresql':
+                for ddl in DDL_POSTGRESQL:
+                    conn.execute(text(ddl))
+            elif dialeto == 'sqlite':
+                for ddl in DDL_SQLITE:
+                    conn.execute(text(ddl))
+                if conn.execute(text("SELECT 1 FROM clientes_fts LIMIT 1")).first() is None:
+                    _indexar_sqlite(conn, conn.execute(text("SELECT id FROM clientes")).scalars().all())
+        with bind.connect() as conn:
+            return modo_indice(conn)
+    except Exception as e:
+        print(f"⚠️  Índice de busca de clientes indisponível ({dialeto}): {e}")
+        _modo[dialeto] = None
+        return None
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _atualizar_indice(session, flush_context):
+    conn = session.connection()
+    if modo_indice(conn) != 'sqlite':
+        return  # No PostgreSQL os índices GIN ficam na própria tabela clientes
+
+    def alterou(cliente):
+        estado = inspect(cliente)
+        return any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_INDEXADOS)
+
+    alterados = {obj.id for obj in session.new if isinstance(obj, Cliente)}
+    alterados |= {obj.id for obj in session.dirty if isinstance(obj, Cliente) and alterou(obj)}
+    excluidos = [obj.id for obj in session.deleted if isinstance(obj, Cliente)]
+
+    if excluidos:
+        conn.execute(SQL_REMOVER_SQLITE, {'ids': excluidos})
+    if alterados:
+        _indexar_sqlite(conn, alterados)
+
+# ===== CONSULTA =====
+def _faixa_prefixo(prefixo):
+    """(início, fim) para 'coluna >= início AND coluna < fim' (prefixo pelo B-tree)"""
+    return prefixo, prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+def _candidatos_curtos(db, termo, digitos, cursor, limite):
+    """Buscas com menos de 3 caracteres: prefixo do nome ou do documento, mais recentes primeiro (paginação no SQL)"""
+    coluna, prefixo = ('documento_digitos', digitos) if digitos and digitos == termo.replace(' ', '') else ('busca_nome', termo)
+    inicio, fim = _faixa_prefixo(prefixo)
+    parametros = {'inicio': inicio, 'fim': fim, 'limite': limite + 1, 'janela': JANELA_CURTA}
+    apos_cursor = ""
+    if cursor:
+        # Todas as linhas daqui têm relevância 1.0: o cursor se reduz ao id
+        relevancia_cursor, parametros['cursor_id'] = cursor
+        if relevancia_cursor < 1.0:
+            return []
+        if relevancia_cursor == 1.0:
+            apos_cursor = " AND id < :cursor_id"
+
+    # Prefixo curto costuma ser comum: percorrer a PK de trás para frente pelos
+    # JANELA_CURTA clientes mais recentes enche a página sem ler e ordenar a
+    # faixa inteira do índice ("+coluna" impede o SQLite de preferir o índice)
+    filtro = f"+{coluna}" if db.connection().dialect.name == 'sqlite' else coluna
+    linhas = db.execute(text(f"""
+        SELECT id FROM clientes
+        WHERE {filtro} >= :inicio AND {filtro} < :fim{apos_cursor}
+          AND id >= coalesce((SELECT id FROM clientes WHERE 1 = 1{apos_cursor} ORDER BY id DESC LIMIT 1 OFFSET :janela), 0)
+        ORDER BY id DESC LIMIT :limite
+    """), parametros).scalars().all()
+    if len(linhas) <= limite:
+        # Prefixo raro: a faixa do índice é pequena e a ordenação é barata
+        linhas = db.execute(text(
+            f"SELECT id FROM clientes WHERE {coluna} >= :inicio AND {coluna} < :fim{apos_cursor} ORDER BY id DESC LIMIT :limite"
+        ), parametros).scalars().all()
+    return [(id_, 1.0) for id_ in linhas]
+
+def _escapar_like(valor):
+    """'%' e '_' digitados na busca são literais, não curingas (usar com ESCAPE '\\')"""
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _candidatos_postgresql(db, termo, digitos, email, cursor, limite):
+    """Ranking e paginação inteiros no banco (índices GIN de trigramas)"""
+    condicoes = ["c.busca_nome LIKE :infixo ESCAPE '\\'", ":termo <% c.busca_nome", "lower(c.email) LIKE :infixo_email ESCAPE '\\'"]
+    parametros = {
+        'termo': termo,
+        'infixo': f'%{_escapar_like(termo)}%',
+        'infixo_email': f'%{_escapar_like(email)}%',
+        'limite': limite + 1
+    }
+    documento = "0"
+    if len(digitos) >= 3:
+        condicoes.append("c.documento_digitos LIKE :infixo_digitos ESCAPE '\\'")
+        parametros['infixo_digitos'] = f'%{digitos}%'
+        documento = "CASE WHEN c.documento_digitos LIKE :infixo_digitos ESCAPE '\\' THEN 1 ELSE 0 END"
+
+    sql = f"""
+        SELECT id, relevancia FROM (
+            SELECT c.id AS id,
+                   CAST(GREATEST(
+                       word_similarity(:termo, c.busca_nome),
+                       CASE WHEN lower(c.email) LIKE :infixo_email ESCAPE '\\' THEN 0.9 ELSE 0 END,
+                       {documento}
+                   ) AS DOUBLE PRECISION) AS relevancia
+            FROM clientes c
+            WHERE {' OR '.join(condicoes)}
+        ) r
+    """
+    if cursor:
+        parametros['cursor_relevancia'], parametros['cursor_id'] = cursor
+        sql += " WHERE relevancia < :cursor_relevancia OR (relevancia = :cursor_relevancia AND id < :cursor_id)"
+    sql += " ORDER BY relevancia DESC, id DESC LIMIT :limite"
+
+    # Limiar do operador <% só nesta transação
+    db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :limiar, true)"),
+               {'limiar': str(SIMILARIDADE_MINIMA)})
+    return [(linha.id, linha.relevancia) for linha in db.execute(text(sql), parametros)]
+
+SQL_CANDIDATOS_SQLITE = text("""
+    SELECT rowid AS id, nome, email, documento FROM clientes_fts
+    WHERE clientes_fts MATCH :consulta
+    ORDER BY bm25(clientes_fts) LIMIT :limite
+""")
+
+def _ranquear(linhas, termo, digitos, email):
+    """Similaridade por trigramas (nome), email contido ou documento contido"""
+    resultados = {}
+    for linha in linhas:
+        relevancia = similaridade(termo, linha.nome)
+        if email and email in linha.email:
+            relevancia = max(relevancia, 0.9)
+        if len(digitos) >= 3 and digitos in linha.documento:
+            relevancia = 1.0
+        if relevancia >= SIMILARIDADE_MINIMA:
+            resultados[linha.id] = round(relevancia, 6)
+    return resultados
+
+def _candidatos_sqlite(db, termo, digitos, email, limite):
+    """
+    Candidatos pelo FTS5 trigram e ranking em Python, em duas etapas:
+      1. cada palavra como trecho exato (interseção seletiva, cobre acento e prefixo)
+      2. se faltar resultado: cada palavra como OU dos seus trigramas, palavras
+         combinadas com E (tolera erro de digitação sem varrer nomes comuns)
+      3. ainda faltando: só a palavra mais longa (erro em palavra curta, "jao silva")
+    """
+    palavras = [p for p in re.findall(r'[^\W_]+', termo) if len(p) >= 3]
+
+    # Só dígitos e pontuação: busca apenas no documento
+    if len(digitos) >= 3 and not re.search(r'[a-z]', termo):
+        linhas = db.execute(SQL_CANDIDATOS_SQLITE, {
+            'consulta': f'documento : "{digitos}"', 'limite': CANDIDATOS_SQLITE
+        }).all()
+        return list(_ranquear(linhas, termo, digitos, email).items())
+    if not palavras:
+        return []
+
+    exata = ' AND '.join(f'"{palavra}"' for palavra in palavras)
+    linhas = db.execute(SQL_CANDIDATOS_SQLITE, {
+        'consulta': f'{{nome email}} : ({exata})', 'limite': CANDIDATOS_SQLITE
+    }).all()
+    resultados = _ranquear(linhas, termo, digitos, email)
+
+    def grupo(palavra):
+        return '(' + ' OR '.join(f'"{t}"' for t in sorted({palavra[i:i + 3] for i in range(len(palavra) - 2)})) + ')'
+
+    etapas = [' AND '.join(grupo(palavra) for palavra in palavras)]
+    if len(palavras) > 1:
+        etapas.append(grupo(max(palavras, key=len)))
+
+    for consulta in etapas:
+        if len(resultados) > limite:
+            break
+        linhas = db.execute(SQL_CANDIDATOS_SQLITE, {
+            'consulta': f'nome : ({consulta})', 'limite': CANDIDATOS_SQLITE
+        }).all()
+        for id_, relevancia in _ranquear(linhas, termo, digitos, email).items():
+            resultados.setdefault(id_, relevancia)
+
+    return list(resultados.items())
+
+def buscar(db, q, parametros):
+    """
+    Buscar clientes por nome (aproximado), email ou CPF/CNPJ
+
+    Retorna (lista de (Cliente, relevancia), dicionário 'pagination').
+    """
+    termo = normalizar_texto(q)
+    digitos = somente_digitos(q)
+    email = q.strip().lower()
+    limite = parametros['limit']
+    cursor = decodificar_cursor_relevancia(parametros['cursor']) if parametros['cursor'] else None
+    modo = modo_indice(db.connection())
+
+    if len(termo.replace(' ', '')) < 3:
+        candidatos = _candidatos_curtos(db, termo, digitos, cursor, limite) if termo else []
+        cursor = None  # já aplicado no SQL
+    elif modo == 'postgresql':
+        candidatos = _candidatos_postgresql(db, termo, digitos, email, cursor, limite)
+        cursor = None  # já aplicado no SQL
+    elif modo == 'sqlite':
+        candidatos = _candidatos_sqlite(db, termo, digitos, email, limite)
+    else:
+        return _buscar_ilike(db, q, limite), {'limit': limite, 'has_more': False, 'next_cursor': None}
+
+    candidatos.sort(key=lambda item: (item[1], item[0]), reverse=True)
+    if cursor:
+        relevancia_cursor, id_cursor = cursor
+        candidatos = [c for c in candidatos if (c[1], c[0]) < (relevancia_cursor, id_cursor)]
+
+    tem_mais = len(candidatos) > limite
+    pagina = candidatos[:limite]
+    paginacao = {
+        'limit': limite,
+        'has_more': tem_mais,
+        'next_cursor': codificar_cursor(pagina[-1][1], pagina[-1][0]) if tem_mais else None
+    }
+    if not pagina:
+        return [], paginacao
+
+    relevancias = dict(pagina)
+    clientes = {c.id: c for c in carregar(db.query(Cliente).filter(Cliente.id.in_(relevancias)), Cliente)}
+    return [(clientes[id_], relevancia) for id_, relevancia in pagina if id_ in clientes], paginacao
+
+def _buscar_ilike(db, q, limite):
+    """Fallback sem índice: ILIKE nos campos originais"""
+    padrao = f'%{_escapar_like(q)}%'
+    query = db.query(Cliente).filter(
+        Cliente.nome.ilike(padrao, escape='\\') | Cliente.email.ilike(padrao, escape='\\') | Cliente.cpf_cnpj.ilike(padrao, escape='\\')
+    ).order_by(Cliente.id.desc()).limit(limite)
+    return [(cliente, None) for cliente in carregar(query, Cliente)]
@@ -0,0 +1,196 @@
+# 📁 services/cache.py - CACHE EM PROCESSO (LRU + TTL) COM INVALIDAÇÃO VIA REDIS
+# Blocos reutilizados pelos caches da API:
+#   - CacheLRU: dicionário limitado, thread-safe, com expiração por entrada
+#   - redis_cliente(): o cliente do SimpleSecurityManager quando é um Redis real
+#     (o MockRedisClient de desenvolvimento não compartilha nada entre processos)
+#   - publicar()/assinar(): pub/sub para invalidar os LRUs dos outros workers
+# Sem Redis tudo continua funcionando, só que restrito ao processo atual.
+# O security_manager é resolvido na primeira chamada: middleware/security.py
+# também usa estes caches e ainda está sendo importado quando eles são criados.
+import json
+import time
+import threading
+from collections import OrderedDict
+
+PREFIXO_CANAL = 'arconset:invalidacao:'
+
+_AUSENTE = object()
+
+# ===== LRU EM PROCESSO =====
+class CacheLRU:
+    """LRU limitado por quantidade de entradas, com TTL (segundos) por entrada"""
+
+    def __init__(self, tamanho_maximo=1024, ttl=60):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.descartados = 0
+
+    def obter(self, chave, padrao=None):
+        agora = time.monotonic()
+        with self._trava:
+            item = self._dados.get(chave, _AUSENTE)
+            if item is _AUSENTE or item[1] <= agora:
+                if item is not _AUSENTE:
+                    del self._dados[chave]
+                    self.expirados += 1
+                self.falhas += 1
+                return padrao
+            self._dados.move_to_end(chave)
+            self.acertos += 1
+            return item[0]
+
+    def definir(self, chave, valor, ttl=None):
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._trava:
+            self._dados[chave] = (valor, expira_em)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.tamanho_maximo:
+                self._dados.popitem(last=False)
+                self.descartados += 1
+
+    def remover(self, chave):
+        with self._trava:
+            return self._dados.pop(chave, _AUSENTE) is not _AUSENTE
+
+    def remover_se(self, condicao):
+        """Remover as entradas cuja chave satisfaz condicao(chave); retorna quantas"""
+        with self._trava:
+            chaves = [chave for chave in self._dados if condicao(chave)]
+            for chave in chaves:
+                del self._dados[chave]
+            return len(chaves)
+
+    def remover_onde(self, condicao):
+        """Remover as entradas em que condicao(chave, valor) é verdadeira; retorna quantas"""
+        with self._trava:
+            chaves = [chave for chave, (valor, _) in self._dados.items() if condicao(chave, valor)]
+            for chave in chaves:
+                del self._dados[chave]
+            return len(chaves)
+
+    def chaves(self):
+        with self._trava:
+            return set(self._dados)
+
+    def limpar(self):
+        with self._trava:
+            self._dados.clear()
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {
+            'entradas': len(self._dados),
+            'tamanho_maximo': self.tamanho_maximo,
+            'ttl_segundos': self.ttl,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'expirados': self.expirados,
+            'descartados': self.descartados,
+            'taxa_acerto': round(self.acertos / total, 4) if total else None
+        }
+
+# ===== REDIS =====
+def redis_cliente():
+    """Cliente Redis compartilhado ou None (sem Redis ou usando o mock)"""
+    try:
+        from middleware.security import security_manager
+    except ImportError:
+        return None
+    cliente = getattr(security_manager, 'redis_client', None)
+    if cliente is None or not hasattr(cliente, 'publish'):
+        return None
+    if _assinaturas and _pubsub['thread'] is None:
+        _iniciar_pubsub(cliente)
+    return cliente
+
+def redis_obter_json(chave):
+    cliente = redis_cliente()
+    if not cliente:
+        return None
+    try:
+        bruto = cliente.get(chave)
+        return json.loads(bruto) if bruto else None
+    except Exception as e:
+        print(f"⚠️  Redis indisponível (get {chave}): {e}")
+        return None
+
+def redis_definir_json(chave, valor, ttl):
+    cliente = redis_cliente()
+    if not cliente:
+        return False
+    try:
+        cliente.setex(chave, max(1, int(ttl)), json.dumps(valor, default=str))
+        return True
+    except Exception as e:
+        print(f"⚠️  Redis indisponível (set {chave}): {e}")
+        return False
+
+def redis_remover(*chaves):
+    cliente = redis_cliente()
+    if not cliente or not chaves:
+        return 0
+    try:
+        return cliente.delete(*chaves)
+    except Exception as e:
+        print(f"⚠️  Redis indisponível (delete): {e}")
+        return 0
+
+# ===== PUB/SUB DE INVALIDAÇÃO =====
+_assinaturas = {}
+_trava_assinaturas = threading.Lock()
+_pubsub = {'objeto': None, 'thread': None}
+
+def publicar(canal, mensagem):
+    """Avisar os outros processos (a invalidação local é feita por quem chama)"""
+    cliente = redis_cliente()
+    if not cliente:
+        return False
+    try:
+        cliente.publish(PREFIXO_CANAL + canal, json.dumps(mensagem, default=str))
+        return True
+    except Exception as e:
+        print(f"⚠️  Falha ao publicar invalidação em {canal}: {e}")
+        return False
+
+def _despachar(mensagem):
+    canal = mensagem['channel']
+    if isinstance(canal, bytes):
+        canal = canal.decode()
+    callbacks = _assinaturas.get(canal[len(PREFIXO_CANAL):], [])
+    try:
+        dados = json.loads(mensagem['data'])
+    except (TypeError, ValueError):
+        return
+    for callback in callbacks:
+        try:
+            callback(dados)
+        except Exception as e:
+            print(f"⚠️  Erro ao aplicar invalidação de {canal}: {e}")
+
+def _iniciar_pubsub(cliente):
+    # Uma única assinatura por padrão cobre todos os canais de invalidação
+    with _trava_assinaturas:
+        if _pubsub['thread'] is not None:
+            return True
+        try:
+            _pubsub['objeto'] = cliente.pubsub(ignore_subscribe_messages=True)
+            _pubsub['objeto'].psubscribe(**{PREFIXO_CANAL + '*': _despachar})
+            _pubsub['thread'] = _pubsub['objeto'].run_in_thread(sleep_time=1.0, daemon=True)
+            return True
+        except Exception as e:
+            # Não tentar de novo a cada chamada; o TTL dos caches limita a defasagem
+            _pubsub['thread'] = False
+            print(f"⚠️  Pub/sub de invalidação indisponível: {e}")
+            return False
+
+def assinar(canal, callback):
+    """Registrar callback(mensagem) para invalidações publicadas por outros processos
+    (a assinatura no Redis começa assim que houver um cliente disponível)"""
+    with _trava_assinaturas:
+        _assinaturas.setdefault(canal, []).append(callback)
+    return redis_cliente() is not None and bool(_pubsub['thread'])
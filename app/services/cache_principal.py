@@ -0,0 +1,192 @@
+# 📁 services/cache_principal.py - CACHE DO USUÁRIO AUTENTICADO (PRINCIPAL)
+# auth_required precisava de um SELECT em users a cada requisição só para ler
+# is_active e role. Agora: LRU em processo -> Redis -> banco, com TTL curto.
+#   - Alteração de role/is_active/dados do usuário (após o commit) e
+#     revoke_user_tokens() invalidam na hora: LRU local, chave no Redis e
+#     aviso via pub/sub para os LRUs dos demais workers
+#   - Revogação: contador por usuário; o token leva o valor do momento em que
+#     foi emitido (claim 'rev') e deixa de valer quando o contador avança.
+#     Timestamp não serve: 'iat' tem resolução de 1s e não separa um token
+#     antigo de um login feito logo depois da revogação
+#   - O contador é lido a cada falha do LRU (não fica no Redis junto do
+#     principal) e uma invalidação durante a carga impede que ela vá para o
+#     LRU: revogação concorrente com a carga não sobrevive até o TTL
+#   - UPDATE/DELETE em massa de User (query(User).update(...)) não dizem quais
+#     linhas mudaram: descartam o cache de todos os principais
+# PRINCIPAL_CACHE_TTL=0 desativa o cache (sempre consulta o banco).
+import os
+import threading
+from sqlalchemy import event, inspect
+from database import SessionLocal, sessao_compartilhada
+from models.user import User
+from services.cache import CacheLRU, redis_obter_json, redis_definir_json, redis_remover, publicar, assinar, redis_cliente
+
+TTL_SEGUNDOS = int(os.getenv('PRINCIPAL_CACHE_TTL', '60'))
+TAMANHO_MAXIMO = int(os.getenv('PRINCIPAL_CACHE_TAMANHO', '2048'))
+
+# Revogações duram o prazo máximo de um token
+TTL_REVOGACAO = int(os.getenv('JWT_EXPIRATION_HOURS', '24')) * 3600
+
+CANAL = 'principal'
+CAMPOS_CACHEADOS = ('username', 'email', 'full_name', 'role', 'is_active', 'is_verified')
+PREFIXO_REDIS = 'principal:'
+
+_cache = CacheLRU(tamanho_maximo=TAMANHO_MAXIMO, ttl=TTL_SEGUNDOS)
+
+# Revogações deste processo (usadas quando não há Redis)
+_revogacoes_locais = {}
+
+# Invalidações neste processo: (todos, por usuário); carga só entra no LRU sem invalidação no meio
+_trava = threading.Lock()
+_geracao_todos = [0]
+_geracoes = {}
+
+def _geracao(user_id):
+    return _geracao_todos[0], _geracoes.get(str(user_id), 0)
+
+def _descartar_local(user_ids=(), todos=False):
+    with _trava:
+        if todos:
+            _geracao_todos[0] += 1
+            _cache.limpar()
+        for user_id in user_ids:
+            _geracoes[str(user_id)] = _geracoes.get(str(user_id), 0) + 1
+            _cache.remover(user_id)
+
+def _chave_redis(user_id):
+    return f'{PREFIXO_REDIS}{user_id}'
+
+def _chave_revogacao(user_id):
+    return f'{PREFIXO_REDIS}revogacao:{user_id}'
+
+class Principal:
+    """Dados do usuário autenticado usados pelas rotas (substitui a instância User em g.current_user)"""
+
+    __slots__ = ('id',) + CAMPOS_CACHEADOS + ('revogacao',)
+
+    def __init__(self, dados):
+        for campo in self.__slots__:
+            setattr(self, campo, dados.get(campo))
+
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def token_revogado(self, payload):
+        """True se o token foi emitido antes da última revogação (claim 'rev' menor que o contador)"""
+        return (payload.get('rev') or 0) < (self.revogacao or 0)
+
+# ===== LEITURA =====
+def _carregar_do_banco(user_id):
+    with sessao_compartilhada() as db:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        return {'id': user.id, **{campo: getattr(user, campo) for campo in CAMPOS_CACHEADOS}}
+
+def revogacao_atual(user_id):
+    """Contador de revogações do usuário; vai no claim 'rev' dos tokens emitidos agora"""
+    if redis_cliente():
+        return redis_obter_json(_chave_revogacao(user_id)) or 0
+    return _revogacoes_locais.get(user_id, 0)
+
+def obter_principal(user_id):
+    """Principal do usuário (ou None se não existe), sem tocar no banco quando em cache"""
+    if TTL_SEGUNDOS <= 0:
+        dados = _carregar_do_banco(user_id)
+        return Principal({**dados, 'revogacao': revogacao_atual(user_id)}) if dados else None
+
+    principal = _cache.obter(user_id)
+    if principal is not None:
+        return principal
+
+    geracao = _geracao(user_id)
+    dados = redis_obter_json(_chave_redis(user_id))
+    if dados is None:
+        dados = _carregar_do_banco(user_id)
+        if dados is None:
+            return None
+        redis_definir_json(_chave_redis(user_id), dados, TTL_SEGUNDOS)
+
+    principal = Principal({**dados, 'revogacao': revogacao_atual(user_id)})
+    with _trava:
+        if _geracao(user_id) == geracao:
+            _cache.definir(user_id, principal)
+    return principal
+
+# ===== INVALIDAÇÃO =====
+def invalidar_principal(*user_ids, avisar=True):
+    """Descartar o principal em cache neste processo, no Redis e (via pub/sub) nos demais"""
+    _descartar_local(user_ids)
+    redis_remover(*[_chave_redis(user_id) for user_id in user_ids])
+    if avisar and user_ids:
+        publicar(CANAL, {'user_ids': list(user_ids)})
+
+def invalidar_todos(avisar=True):
+    """Descartar todos os principais em cache (escrita em massa sem os ids das linhas)"""
+    _descartar_local(todos=True)
+    cliente = redis_cliente()
+    if cliente:
+        try:
+            chaves = [chave for chave in cliente.scan_iter(match=f'{PREFIXO_REDIS}*', count=500)
+                      if not chave.startswith(_chave_revogacao(''))]
+            redis_remover(*chaves)
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (invalidação de principais): {e}")
+    if avisar:
+        publicar(CANAL, {'todos': True})
+
+def revogar_tokens(user_id):
+    """Invalidar todos os tokens já emitidos para o usuário; tokens emitidos depois continuam valendo"""
+    revogacao = _revogacoes_locais.get(user_id, 0) + 1
+    cliente = redis_cliente()
+    if cliente:
+        try:
+            # Sem prazo renovado o contador voltaria a 0 enquanto tokens com 'rev' antigo ainda valem
+            chave = _chave_revogacao(user_id)
+            revogacao = cliente.incr(chave)
+            cliente.expire(chave, TTL_REVOGACAO)
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (revogação): {e}")
+    _revogacoes_locais[user_id] = revogacao
+    invalidar_principal(user_id)
+    return revogacao
+
+def estatisticas():
+    return {**_cache.estatisticas(), 'redis': redis_cliente() is not None}
+
+def _receber_invalidacao(mensagem):
+    _descartar_local(mensagem.get('user_ids', []), todos=bool(mensagem.get('todos')))
+
+assinar(CANAL, _receber_invalidacao)
+
+@event.listens_for(SessionLocal, 'do_orm_execute')
+def _marcar_escrita_em_massa(estado):
+    if (estado.is_update or estado.is_delete) and any(mapper.class_ is User for mapper in estado.all_mappers):
+        estado.session.info['principais_todos'] = True
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _marcar_usuarios_alterados(session, flush_context):
+    alterados = session.info.setdefault('principais_alterados', set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            alterados.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            estado = inspect(obj)
+            if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_CACHEADOS):
+                alterados.add(obj.id)
+    if not alterados:
+        session.info.pop('principais_alterados', None)
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _invalidar_apos_commit(session):
+    alterados = session.info.pop('principais_alterados', None)
+    if session.info.pop('principais_todos', None):
+        invalidar_todos()
+    elif alterados:
+        invalidar_principal(*alterados)
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _descartar_alteracoes(session):
+    session.info.pop('principais_alterados', None)
+    session.info.pop('principais_todos', None)
@@ -0,0 +1,252 @@
+# 📁 services/cache_resultados.py - CACHE DE RESULTADOS INVALIDADO POR ESCRITA (TAGS)
+# Clientes, funcionários e pastas mudam pouco e são lidos o tempo todo, mas
+# cada listagem refazia as mesmas queries. Aqui o resultado pronto (dict da
+# resposta) fica em dois níveis:
+#   - LRU em processo (RESULTADOS_CACHE_TAMANHO entradas, TTL por entrada)
+#   - Redis, compartilhado entre os workers (mesmo TTL)
+# Cada entrada leva tags dos dados que leu: 'Cliente' (qualquer linha do
+# modelo) e 'Cliente:42' (a linha 42 ou algo que aponta para ela, como os
+# projetos do cliente, que entram na contagem total_projetos).
+# Os listeners do SessionLocal juntam as tags das linhas gravadas no flush e,
+# no commit, removem as entradas marcadas neste processo, no Redis e (via
+# pub/sub) nos LRUs dos outros workers. Um contador de geração impede que um
+# cálculo iniciado antes da escrita grave um resultado já defasado.
+# Escritas fora do ORM (UPDATE/DELETE em massa via Core) não invalidam: só o TTL.
+import os
+import json
+import uuid
+import hashlib
+import threading
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import MANYTOONE
+from database import SessionLocal, Cliente, Projeto, Funcionario, EquipeProjeto, Pasta, Arquivo
+from services.cache import CacheLRU, redis_cliente, publicar, assinar
+
+ATIVO = os.getenv('RESULTADOS_CACHE', '1') != '0'
+TTL_SEGUNDOS = int(os.getenv('RESULTADOS_CACHE_TTL', '300'))
+TAMANHO_MAXIMO = int(os.getenv('RESULTADOS_CACHE_TAMANHO', '512'))
+# Resultados maiores que isso (JSON) não são guardados em nenhum dos níveis
+BYTES_MAXIMO = int(os.getenv('RESULTADOS_CACHE_MAX_BYTES', str(1024 * 1024)))
+
+# Modelos cujas escritas invalidam resultados; ao cachear uma leitura nova,
+# incluir aqui os modelos que ela lê
+MODELOS_RASTREADOS = (Cliente, Projeto, Funcionario, EquipeProjeto, Pasta, Arquivo)
+
+CANAL = 'resultados'
+ORIGEM = uuid.uuid4().hex
+PREFIXO_REDIS = 'arconset:resultado:'
+CHAVE_GERACAO = PREFIXO_REDIS + 'geracao'
+
+# Grava só se ninguém invalidou desde a leitura da geração; registra a chave nas tags
+_GRAVAR = """
+if (redis.call('get', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[2], ARGV[3], 'EX', ARGV[2])
+for i = 3, #KEYS do
+    redis.call('sadd', KEYS[i], KEYS[2])
+    if redis.call('ttl', KEYS[i]) < tonumber(ARGV[2]) then
+        redis.call('expire', KEYS[i], ARGV[2])
+    end
+end
+return 1
+"""
+
+# Remove as entradas de cada tag e avança a geração
+_INVALIDAR = """
+local removidas = 0
+for i = 2, #KEYS do
+    local chaves = redis.call('smembers', KEYS[i])
+    for _, chave in ipairs(chaves) do
+        removidas = removidas + redis.call('del', chave)
+    end
+    redis.call('del', KEYS[i])
+end
+redis.call('incr', KEYS[1])
+return removidas
+"""
+
+_local = CacheLRU(tamanho_maximo=max(1, TAMANHO_MAXIMO), ttl=TTL_SEGUNDOS)
+_trava = threading.Lock()
+_geracao = [0]
+_contadores = {}
+
+def _contar(nome, resultado, quantidade=1):
+    with _trava:
+        por_nome = _contadores.setdefault(nome, {})
+        por_nome[resultado] = por_nome.get(resultado, 0) + quantidade
+
+def estatisticas():
+    """{'funcoes': {nome: {'acerto_local': n, 'acerto_redis': n, 'falha': n, 'invalidado': n, ...}}, 'local': {...}}"""
+    with _trava:
+        funcoes = {nome: dict(valores) for nome, valores in _contadores.items()}
+    return {'funcoes': funcoes, 'local': _local.estatisticas(), 'redis': redis_cliente() is not None}
+
+def zerar():
+    """Esvaziar o nível local e os contadores (benchmarks)"""
+    _local.limpar()
+    with _trava:
+        _contadores.clear()
+
+# ===== TAGS =====
+def tags_linhas(modelo, itens):
+    """Tags de uma listagem: o modelo inteiro e cada linha devolvida (itens com 'id')"""
+    nome = modelo.__name__
+    return [nome] + [f"{nome}:{item['id']}" for item in itens]
+
+def _tags_objeto(obj):
+    """Tags afetadas pela escrita de obj: o modelo, a linha e as linhas para onde aponta (antes e depois)"""
+    estado = inspect(obj)
+    mapper = estado.mapper
+    nome = mapper.class_.__name__
+    tags = {nome}
+    chave_primaria = estado.dict.get(mapper.primary_key[0].key)
+    if chave_primaria is not None:
+        tags.add(f'{nome}:{chave_primaria}')
+    for relacao in mapper.relationships:
+        if relacao.direction is not MANYTOONE:
+            continue
+        alvo = relacao.mapper.class_.__name__
+        for coluna in relacao.local_columns:
+            atributo = mapper.get_property_by_column(coluna).key
+            historico = estado.attrs[atributo].history
+            for valor in {*historico.added, *historico.deleted, estado.dict.get(atributo)}:
+                if valor is not None:
+                    tags.add(f'{alvo}:{valor}')
+    return tags
+
+# ===== LEITURA =====
+def _chave(nome, parametros):
+    partes = [nome]
+    if parametros:
+        itens = parametros.items(multi=True) if hasattr(parametros, 'getlist') else parametros.items()
+        partes += [f'{chave}={valor}' for chave, valor in sorted(itens)]
+    return '|'.join(partes)
+
+def _chave_redis(chave):
+    return PREFIXO_REDIS + hashlib.sha1(chave.encode()).hexdigest()
+
+def _guardar_local(nome, chave, valor, tags, geracao, ttl):
+    # Invalidação durante a leitura/cálculo: o resultado pode ser anterior a ela
+    with _trava:
+        if _geracao[0] != geracao:
+            return False
+        _local.definir(chave, (nome, valor, frozenset(tags)), ttl)
+    return True
+
+def em_cache(nome, parametros, calcular, tags, ttl=None):
+    """
+    Resultado de calcular() guardado por (nome, parametros) até o TTL ou até
+    uma escrita em alguma das tags
+
+    tags: lista ou função(resultado) -> lista (ex.: lambda dados: tags_linhas(Cliente, dados['data']))
+    O resultado precisa ser serializável em JSON e não deve ser alterado por quem o recebe.
+    Exceções de calcular() não são guardadas.
+    """
+    ttl = TTL_SEGUNDOS if ttl is None else ttl
+    if not ATIVO or ttl <= 0:
+        return calcular()
+
+    chave = _chave(nome, parametros)
+    geracao = _geracao[0]
+    item = _local.obter(chave)
+    if item is not None:
+        _contar(nome, 'acerto_local')
+        return item[1]
+
+    cliente = redis_cliente()
+    geracao_redis = None
+    if cliente is not None:
+        try:
+            bruto, geracao_redis = cliente.mget([_chave_redis(chave), CHAVE_GERACAO])
+            geracao_redis = geracao_redis or '0'
+            if bruto:
+                dados = json.loads(bruto)
+                _guardar_local(nome, chave, dados['valor'], dados['tags'], geracao, ttl)
+                _contar(nome, 'acerto_redis')
+                return dados['valor']
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (cache de resultados): {e}")
+            cliente = None
+
+    _contar(nome, 'falha')
+    valor = calcular()
+    lista_tags = list(tags(valor) if callable(tags) else tags)
+    serializado = json.dumps({'valor': valor, 'tags': lista_tags}, default=str)
+    if len(serializado) > BYTES_MAXIMO:
+        _contar(nome, 'grande_demais')
+        return valor
+
+    if not _guardar_local(nome, chave, valor, lista_tags, geracao, ttl):
+        _contar(nome, 'descartado_geracao')
+    if cliente is not None:
+        try:
+            cliente.eval(
+                _GRAVAR, 2 + len(lista_tags), CHAVE_GERACAO, _chave_redis(chave),
+                *[PREFIXO_REDIS + 'tag:' + tag for tag in lista_tags],
+                geracao_redis, max(1, int(ttl)), serializado
+            )
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (cache de resultados): {e}")
+    return valor
+
+# ===== INVALIDAÇÃO =====
+def _invalidar_local(tags):
+    with _trava:
+        _geracao[0] += 1
+    removidas = {}
+
+    def marcada(chave, item):
+        if item[2].isdisjoint(tags):
+            return False
+        removidas[item[0]] = removidas.get(item[0], 0) + 1
+        return True
+
+    _local.remover_onde(marcada)
+    for nome, quantidade in removidas.items():
+        _contar(nome, 'invalidado', quantidade)
+
+def invalidar(*tags, avisar=True):
+    """Remover as entradas com qualquer uma das tags neste processo, no Redis e (via pub/sub) nos demais"""
+    tags = set(tags)
+    if not tags:
+        return
+    _invalidar_local(tags)
+    cliente = redis_cliente()
+    if cliente is not None:
+        try:
+            cliente.eval(_INVALIDAR, 1 + len(tags), CHAVE_GERACAO, *[PREFIXO_REDIS + 'tag:' + tag for tag in tags])
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (invalidação de resultados): {e}")
+    if avisar:
+        publicar(CANAL, {'tags': sorted(tags), 'origem': ORIGEM})
+
+def _receber_invalidacao(mensagem):
+    if mensagem.get('origem') != ORIGEM:
+        _invalidar_local(set(mensagem.get('tags', [])))
+
+assinar(CANAL, _receber_invalidacao)
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _marcar_tags(session, flush_context):
+    tags = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, MODELOS_RASTREADOS) and (obj not in session.dirty or session.is_modified(obj, include_collections=False)):
+            tags |= _tags_objeto(obj)
+    if tags:
+        session.info.setdefault('resultados_tags', set()).update(tags)
+        # A própria transação já enxerga o flush: não servir o resultado antigo neste processo
+        _invalidar_local(tags)
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _invalidar_apos_commit(session):
+    tags = session.info.pop('resultados_tags', None)
+    if tags:
+        invalidar(*tags)
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _invalidar_apos_rollback(session):
+    # Algo calculado depois do flush pode ter guardado dados que não existem mais
+    tags = session.info.pop('resultados_tags', None)
+    if tags:
+        invalidar(*tags)
@@ -0,0 +1,126 @@
+# 📁 services/cache_tokens.py - CACHE DE TOKENS JWT JÁ VERIFICADOS
+# Uma rajada do dashboard manda o mesmo token dezenas de vezes por segundo e
+# cada chamada refazia jwt.decode (HMAC) e, em security.py, um EXISTS no Redis.
+#   - Chave: sha256 do token (o token em si nunca fica em memória como chave)
+#   - Expiração: exatamente no 'exp' do token
+#   - Revogação: invalidar_usuario()/invalidar_token() limpam este processo e
+#     avisam os demais workers via pub/sub do Redis
+#   - Corrida verificação x revogação: quem verifica lê a geração do usuário
+#     antes de checar a revogação e a guarda com o payload; invalidar_usuario()
+#     avança a geração, então um payload guardado depois dela não é servido
+# JWT_CACHE_TAMANHO=0 desativa o cache.
+import os
+import time
+import hashlib
+import threading
+from services.cache import CacheLRU, publicar, assinar
+
+TAMANHO_MAXIMO = int(os.getenv('JWT_CACHE_TAMANHO', '4096'))
+
+CANAL = 'tokens'
+
+_instancias = []
+
+# Invalidações por usuário neste processo (str(user_id) -> contador)
+_geracoes = {}
+_trava_geracoes = threading.Lock()
+
+def hash_token(token):
+    return hashlib.sha256(token.encode() if isinstance(token, str) else token).hexdigest()
+
+class CacheTokens:
+    """Payloads de tokens verificados, indexados também por usuário para a revogação"""
+
+    def __init__(self, nome, tamanho_maximo=TAMANHO_MAXIMO):
+        self.nome = nome
+        self.ativo = tamanho_maximo > 0
+        self._cache = CacheLRU(tamanho_maximo=max(1, tamanho_maximo), ttl=0)
+        self._por_usuario = {}
+        self._trava = threading.Lock()
+        _instancias.append(self)
+
+    def geracao(self, user_id):
+        """Ler ANTES de checar a revogação e passar para definir()"""
+        return _geracoes.get(str(user_id), 0)
+
+    def obter(self, token):
+        """Payload já verificado ou None (expirado, revogado ou nunca visto)"""
+        if not self.ativo or not token:
+            return None
+        chave = hash_token(token)
+        item = self._cache.obter(chave)
+        if item is None:
+            return None
+        payload, geracao = item
+        # Guardado por uma verificação anterior a uma revogação
+        if geracao != self.geracao(payload.get('user_id')):
+            self._cache.remover(chave)
+            return None
+        # Cópia: quem chama pode alterar o dicionário
+        return dict(payload)
+
+    def definir(self, token, payload, geracao):
+        """Guardar o payload até o 'exp' do token (sem 'exp' não é guardado)"""
+        exp = payload.get('exp') if self.ativo else None
+        if not exp:
+            return
+        restante = exp - time.time()
+        if restante <= 0:
+            return
+        chave = hash_token(token)
+        self._cache.definir(chave, (dict(payload), geracao), ttl=restante)
+        user_id = payload.get('user_id')
+        if user_id is not None:
+            with self._trava:
+                chaves = self._por_usuario.setdefault(str(user_id), set())
+                # Descartar chaves que o LRU já removeu ou expirou
+                if len(chaves) >= 32:
+                    chaves.intersection_update(self._cache.chaves())
+                chaves.add(chave)
+
+    def remover_usuario(self, user_id):
+        with self._trava:
+            chaves = self._por_usuario.pop(str(user_id), set())
+        for chave in chaves:
+            self._cache.remover(chave)
+        return len(chaves)
+
+    def remover_hash(self, chave):
+        return self._cache.remover(chave)
+
+    def limpar(self):
+        with self._trava:
+            self._por_usuario.clear()
+        self._cache.limpar()
+
+    def estatisticas(self):
+        return {**self._cache.estatisticas(), 'usuarios': len(self._por_usuario), 'ativo': self.ativo}
+
+# ===== INVALIDAÇÃO =====
+def _aplicar(mensagem):
+    with _trava_geracoes:
+        for user_id in mensagem.get('user_ids', []):
+            _geracoes[str(user_id)] = _geracoes.get(str(user_id), 0) + 1
+    for user_id in mensagem.get('user_ids', []):
+        for instancia in _instancias:
+            instancia.remover_usuario(user_id)
+    for chave in mensagem.get('hashes', []):
+        for instancia in _instancias:
+            instancia.remover_hash(chave)
+
+def invalidar_usuario(*user_ids):
+    """Descartar os tokens verificados do(s) usuário(s) em todos os processos"""
+    mensagem = {'user_ids': [str(user_id) for user_id in user_ids]}
+    _aplicar(mensagem)
+    publicar(CANAL, mensagem)
+
+def invalidar_token(token):
+    """Descartar um token específico em todos os processos"""
+    mensagem = {'hashes': [hash_token(token)]}
+    _aplicar(mensagem)
+    publicar(CANAL, mensagem)
+
+def estatisticas():
+    return {instancia.nome: instancia.estatisticas() for instancia in _instancias}
+
+assinar(CANAL, _aplicar)
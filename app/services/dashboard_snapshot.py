@@ -0,0 +1,232 @@
+# 📁 services/dashboard_snapshot.py - SNAPSHOT MATERIALIZADO DO DASHBOARD
+# Receita, atrasos e prazos usados por /api/dashboard-data, /api/dashboard/resumo-executivo
+# e /api/dashboard/alertas ficam na tabela dashboard_snapshot. A leitura vira um
+# lookup por chave primária; o snapshot é recalculado (uma única consulta agregada)
+# logo após commits que alteram Projeto, Conta, Arquivo, Funcionario e afins.
+# Só o worker de fundo e a inicialização gravam a linha: as rotas GET apenas leem.
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, func, select, insert, and_, distinct
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from database import (
+    SessionLocal, DashboardSnapshot, Projeto, Conta, Arquivo, Cliente,
+    Funcionario, EquipeProjeto
+)
+from services.dashboard_stats import usa_filter, contar_se, somar_se, unir_agregados
+
+SNAPSHOT_ID = 1
+
+# Modelos cujas escritas invalidam o snapshot
+MODELOS_MONITORADOS = (Projeto, Conta, Arquivo, Funcionario, EquipeProjeto, Cliente)
+
+# Janela para agrupar rajadas de escrita em um único recálculo
+DEBOUNCE_SEGUNDOS = float(os.getenv('DASHBOARD_SNAPSHOT_DEBOUNCE', '0.5'))
+
+# ===== CÁLCULO =====
+def _dias_entre(inicio, fim, dialeto):
+    """Diferença em dias entre duas colunas Date"""
+    if dialeto == 'postgresql':
+        return fim - inicio
+    return func.julianday(fim) - func.julianday(inicio)
+
+def calcular_snapshot(db, hoje=None):
+    """Calcular todos os agregados do snapshot em um único SELECT"""
+    hoje = hoje or datetime.now().date()
+    mes_atual = hoje.replace(day=1)
+    mes_anterior = (mes_atual - timedelta(days=1)).replace(day=1)
+    filtro_nativo = usa_filter(db)
+    finalizado = Projeto.status == 'Finalizado'
+    em_andamento = Projeto.status == 'Em Andamento'
+
+    projetos = select(
+        func.count(Projeto.id).label('total_projetos'),
+        somar_se(Projeto.valor_total, finalizado, filtro_nativo).label('receita_total'),
+        somar_se(Projeto.valor_total, and_(finalizado, Projeto.data_conclusao >= mes_atual), filtro_nativo).label('receita_mes_atual'),
+        somar_se(Projeto.valor_total, and_(
+            finalizado,
+            Projeto.data_conclusao >= mes_anterior,
+            Projeto.data_conclusao < mes_atual
+        ), filtro_nativo).label('receita_mes_anterior'),
+        contar_se(and_(Projeto.data_prazo < hoje, em_andamento), filtro_nativo).label('projetos_em_atraso'),
+        contar_se(and_(
+            Projeto.data_prazo <= hoje + timedelta(days=7),
+            Projeto.data_prazo >= hoje,
+            em_andamento
+        ), filtro_nativo).label('projetos_prazo_proximo'),
+        contar_se(and_(Projeto.data_prazo.isnot(None), finalizado), filtro_nativo).label('projetos_finalizados_com_prazo'),
+        somar_se(
+            _dias_entre(Projeto.data_inicio, Projeto.data_conclusao, db.bind.dialect.name),
+            and_(Projeto.data_prazo.isnot(None), finalizado,
+                 Projeto.data_inicio.isnot(None), Projeto.data_conclusao.isnot(None)),
+            filtro_nativo
+        ).label('dias_conclusao_total')
+    ).subquery('p')
+
+    contas = select(
+        func.count(Conta.id).label('total_contas'),
+        contar_se(and_(Conta.data_vencimento < hoje, Conta.status == 'Pendente'), filtro_nativo).label('contas_atrasadas'),
+        somar_se(Conta.valor, and_(Conta.status == 'Paga', Conta.data_pagamento >= mes_atual), filtro_nativo).label('gastos_mes_atual')
+    ).subquery('c')
+
+    clientes = select(func.count(Cliente.id).label('total_clientes')).subquery('cl')
+    arquivos = select(func.count(Arquivo.id).label('total_arquivos')).subquery('a')
+
+    funcionarios = select(
+        contar_se(Funcionario.status == 'Ativo', filtro_nativo).label('funcionarios_ativos')
+    ).subquery('f')
+
+    equipes = select(
+        func.count(distinct(EquipeProjeto.funcionario_id)).label('funcionarios_em_projetos')
+    ).where(EquipeProjeto.ativo == True).subquery('e')
+
+    linha = db.execute(unir_agregados(projetos, contas, clientes, arquivos, funcionarios, equipes)).mappings().one()
+
+    return {
+        'total_projetos': linha['total_projetos'],
+        'total_clientes': linha['total_clientes'],
+        'total_contas': linha['total_contas'],
+        'total_arquivos': linha['total_arquivos'],
+        'receita_total': float(linha['receita_total'] or 0),
+        'receita_mes_atual': float(linha['receita_mes_atual'] or 0),
+        'receita_mes_anterior': float(linha['receita_mes_anterior'] or 0),
+        'gastos_mes_atual': float(linha['gastos_mes_atual'] or 0),
+        'projetos_em_atraso': int(linha['projetos_em_atraso'] or 0),
+        'projetos_prazo_proximo': int(linha['projetos_prazo_proximo'] or 0),
+        'projetos_finalizados_com_prazo': int(linha['projetos_finalizados_com_prazo'] or 0),
+        'dias_conclusao_total': float(linha['dias_conclusao_total'] or 0),
+        'contas_atrasadas': int(linha['contas_atrasadas'] or 0),
+        'funcionarios_ativos': int(linha['funcionarios_ativos'] or 0),
+        'funcionarios_em_projetos': int(linha['funcionarios_em_projetos'] or 0)
+    }
+
+# ===== LEITURA / ESCRITA =====
+def _criar_linha(conn, dados, hoje):
+    """INSERT da linha única que não falha se outro processo já a criou"""
+    tabela = DashboardSnapshot.__table__
+    valores = {
+        'id': SNAPSHOT_ID,
+        'referencia': hoje,
+        'dados': json.dumps(dados),
+        'atualizado_em': datetime.now(timezone.utc)
+    }
+    dialeto = conn.dialect.name
+    if dialeto in ('postgresql', 'sqlite'):
+        insert_dialeto = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        conn.execute(insert_dialeto(tabela).values(**valores).on_conflict_do_nothing(index_elements=['id']))
+        return
+    if conn.execute(select(tabela.c.id).where(tabela.c.id == SNAPSHOT_ID)).first() is not None:
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(insert(tabela).values(**valores))
+    except IntegrityError:
+        pass
+
+def atualizar_snapshot(db, hoje=None):
+    """Recalcular e gravar o snapshot (usado pelo worker de fundo, não pelas rotas)"""
+    hoje = hoje or datetime.now().date()
+    dados = calcular_snapshot(db, hoje)
+
+    snapshot = db.get(DashboardSnapshot, SNAPSHOT_ID)
+    if not snapshot:
+        # A linha nasce em preparar_snapshot(); aqui só se a inicialização não conseguiu criá-la
+        _criar_linha(db.connection(), dados, hoje)
+        snapshot = db.get(DashboardSnapshot, SNAPSHOT_ID)
+
+    # Pela sessão (e não via Core) para o flush gerar o evento dashboard_atualizado
+    snapshot.referencia = hoje
+    snapshot.dados = json.dumps(dados)
+    snapshot.atualizado_em = datetime.now(timezone.utc)
+    db.commit()
+    return snapshot
+
+def preparar_snapshot(bind=None):
+    """Criar a linha do snapshot na inicialização (INSERT ... ON CONFLICT DO NOTHING)"""
+    db = SessionLocal(bind=bind) if bind is not None else SessionLocal()
+    try:
+        hoje = datetime.now().date()
+        _criar_linha(db.connection(), calcular_snapshot(db, hoje), hoje)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Snapshot do dashboard não criado na inicialização: {e}")
+        return False
+    finally:
+        db.close()
+
+def obter_snapshot(db):
+    """
+    Ler o snapshot por chave primária (sem gravar nada)
+
+    Retorna (dados, snapshot). Se ainda não existir ou for de outro dia
+    (atrasos e prazos dependem da data de referência), calcula na hora sem
+    persistir e agenda a gravação no worker de fundo.
+    """
+    hoje = datetime.now().date()
+    snapshot = db.get(DashboardSnapshot, SNAPSHOT_ID)
+
+    if not snapshot or snapshot.referencia != hoje:
+        agendar_atualizacao()
+        # Instância transitória (não adicionada à sessão) só para to_dict()
+        snapshot = DashboardSnapshot(
+            id=SNAPSHOT_ID, referencia=hoje,
+            dados=json.dumps(calcular_snapshot(db, hoje)),
+            atualizado_em=datetime.now(timezone.utc)
+        )
+
+    return json.loads(snapshot.dados), snapshot
+
+# ===== ATUALIZAÇÃO AUTOMÁTICA APÓS ESCRITAS =====
+_sinal_atualizacao = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+def _loop_atualizacao():
+    """Thread de fundo: agrupa rajadas de commits e recalcula uma vez"""
+    while True:
+        _sinal_atualizacao.wait()
+        # Esperar a rajada terminar antes de recalcular
+        time.sleep(DEBOUNCE_SEGUNDOS)
+        _sinal_atualizacao.clear()
+
+        db = SessionLocal()
+        try:
+            atualizar_snapshot(db)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️  Erro ao atualizar dashboard_snapshot: {e}")
+        finally:
+            db.close()
+
+def agendar_atualizacao():
+    """Sinalizar que o snapshot ficou desatualizado"""
+    global _worker
+
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_loop_atualizacao, name='dashboard-snapshot', daemon=True)
+                _worker.start()
+
+    _sinal_atualizacao.set()
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _marcar_snapshot_desatualizado(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, MODELOS_MONITORADOS):
+            session.info['dashboard_snapshot_desatualizado'] = True
+            return
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _atualizar_apos_commit(session):
+    if session.info.pop('dashboard_snapshot_desatualizado', False):
+        agendar_atualizacao()
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _descartar_marcacao(session):
+    session.info.pop('dashboard_snapshot_desatualizado', None)
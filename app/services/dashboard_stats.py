@@ -0,0 +1,129 @@
+# 📁 services/dashboard_stats.py - MOTOR DE ESTATÍSTICAS DO DASHBOARD
+# Calcula todos os números de /api/dashboard/stats com agregação condicional
+# em 2 round-trips (antes eram ~15 count()/sum() separados).
+from datetime import datetime
+from sqlalchemy import func, case, select, and_, true
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from database import Projeto, Conta, Arquivo, Cliente, Funcionario
+
+# ===== AGREGAÇÃO CONDICIONAL (PostgreSQL FILTER / fallback CASE) =====
+def usa_filter(db):
+    """PostgreSQL suporta COUNT(*) FILTER (WHERE ...); nos demais usamos CASE"""
+    return db.bind.dialect.name == 'postgresql'
+
+def contar_se(condicao, filtro_nativo):
+    """COUNT condicional"""
+    if filtro_nativo:
+        return func.count().filter(condicao)
+    return func.coalesce(func.sum(case((condicao, 1), else_=0)), 0)
+
+def somar_se(expressao, condicao, filtro_nativo):
+    """SUM condicional (NULL quando nenhuma linha atende, igual ao SUM com WHERE)"""
+    if filtro_nativo:
+        return func.sum(expressao).filter(condicao)
+    return func.sum(case((condicao, expressao)))
+
+def media_se(expressao, condicao, filtro_nativo):
+    """AVG condicional"""
+    if filtro_nativo:
+        return func.avg(expressao).filter(condicao)
+    return func.avg(case((condicao, expressao)))
+
+def unir_agregados(*subconsultas):
+    """Juntar subconsultas de uma linha em um único SELECT (um round-trip)"""
+    origem = subconsultas[0]
+    for sub in subconsultas[1:]:
+        origem = origem.join(sub, true())
+
+    colunas = [col for sub in subconsultas for col in sub.c]
+    return select(*colunas).select_from(origem)
+
+# ===== CONSULTAS =====
+def _agregados_por_tabela(hoje, filtro_nativo, incluir_arquivos=True):
+    """Uma subconsulta de uma linha por tabela, unidas em um único SELECT"""
+    projetos = select(
+        func.count(Projeto.id).label('total_projetos'),
+        contar_se(Projeto.status == 'Em Andamento', filtro_nativo).label('projetos_ativos'),
+        contar_se(Projeto.status == 'Finalizado', filtro_nativo).label('projetos_finalizados'),
+        media_se(Projeto.progresso, Projeto.status == 'Em Andamento', filtro_nativo).label('progresso_medio'),
+        somar_se(Projeto.valor_total, Projeto.status == 'Em Andamento', filtro_nativo).label('valor_projetos_ativos')
+    ).subquery('p')
+
+    contas = select(
+        func.count(Conta.id).label('total_contas'),
+        contar_se(Conta.status == 'Pendente', filtro_nativo).label('contas_pendentes'),
+        contar_se(and_(Conta.data_vencimento < hoje, Conta.status == 'Pendente'), filtro_nativo).label('contas_atrasadas'),
+        somar_se(Conta.valor, Conta.status == 'Pendente', filtro_nativo).label('valor_pendente')
+    ).subquery('c')
+
+    clientes = select(func.count(Cliente.id).label('total_clientes')).subquery('cl')
+
+    funcionarios = select(
+        contar_se(Funcionario.status == 'Ativo', filtro_nativo).label('funcionarios_ativos')
+    ).subquery('f')
+
+    subconsultas = [projetos, contas, clientes, funcionarios]
+
+    if incluir_arquivos:
+        arquivos = select(
+            func.count(Arquivo.id).label('total_arquivos'),
+            contar_se(func.date(Arquivo.created_at) == hoje, filtro_nativo).label('arquivos_hoje')
+        ).subquery('a')
+        subconsultas.append(arquivos)
+
+    return unir_agregados(*subconsultas)
+
+def calcular_estatisticas_dashboard(db, hoje=None):
+    """
+    Calcular o payload 'data' de /api/dashboard/stats
+
+    Retorna exatamente o mesmo formato da implementação anterior.
+    """
+    hoje = hoje or datetime.now().date()
+    filtro_nativo = usa_filter(db)
+
+    # 1º round-trip: todos os contadores/somas
+    try:
+        linha = db.execute(_agregados_por_tabela(hoje, filtro_nativo)).mappings().one()
+    except (OperationalError, ProgrammingError) as e:
+        # Tabela arquivos desatualizada não deve derrubar o dashboard inteiro
+        print(f"⚠️  Erro na consulta de arquivos: {e}")
+        db.rollback()
+        linha = dict(db.execute(_agregados_por_tabela(hoje, filtro_nativo, incluir_arquivos=False)).mappings().one())
+        linha.update({'total_arquivos': 0, 'arquivos_hoje': 0})
+
+    # 2º round-trip: projetos por status
+    projetos_por_status = db.query(
+        Projeto.status,
+        func.count(Projeto.id).label('quantidade')
+    ).group_by(Projeto.status).all()
+
+    return {
+        'projetos': {
+            'total': linha['total_projetos'],
+            'ativos': int(linha['projetos_ativos'] or 0),
+            'finalizados': int(linha['projetos_finalizados'] or 0),
+            'progresso_medio': round(float(linha['progresso_medio'] or 0), 1)
+        },
+        'financeiro': {
+            'contas_pendentes': int(linha['contas_pendentes'] or 0),
+            'contas_atrasadas': int(linha['contas_atrasadas'] or 0),
+            'valor_pendente': float(linha['valor_pendente'] or 0),
+            'valor_projetos_ativos': float(linha['valor_projetos_ativos'] or 0)
+        },
+        'arquivos': {
+            'total': linha['total_arquivos'],
+            'hoje': int(linha['arquivos_hoje'] or 0)
+        },
+        'geral': {
+            'clientes': linha['total_clientes'],
+            'funcionarios_ativos': int(linha['funcionarios_ativos'] or 0)
+        },
+        'projetos_por_status': [
+            {
+                'status': item.status,
+                'quantidade': item.quantidade
+            }
+            for item in projetos_por_status
+        ]
+    }
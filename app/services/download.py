@@ -0,0 +1,163 @@
+# 📁 services/download.py - MOTOR ÚNICO DE DOWNLOAD/VISUALIZAÇÃO
+# Serve um Arquivo a partir de qualquer backend (storage_type database/s3/local)
+# com suporte a:
+#   - Range (206 Partial Content / 416) para retomar downloads em rede móvel
+#   - ETag forte a partir do hash_sha256 gravado no upload
+#   - If-None-Match / If-Modified-Since -> 304 sem tocar no storage
+#   - Cache-Control privado (arquivos exigem autenticação)
+import io
+import os
+from urllib.parse import quote
+from flask import request, send_file, Response, jsonify
+from werkzeug.http import is_resource_modified, http_date
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+from services.upload_stream import s3_manager, s3_disponivel, TAMANHO_BLOCO
+
+CACHE_MAX_AGE = int(os.getenv('DOWNLOAD_CACHE_MAX_AGE', '3600'))
+
+class ArquivoIndisponivel(Exception):
+    """Conteúdo do arquivo não encontrado em nenhum backend"""
+
+    def __init__(self, mensagem, status=404):
+        self.status = status
+        super().__init__(mensagem)
+
+# ===== METADADOS HTTP =====
+def etag_arquivo(arquivo):
+    """ETag pelo SHA-256 do conteúdo; registros antigos usam id/tamanho/data"""
+    if arquivo.hash_sha256:
+        return arquivo.hash_sha256
+    referencia = arquivo.updated_at or arquivo.created_at
+    marca = int(referencia.timestamp()) if referencia else 0
+    return f'{arquivo.id}-{arquivo.tamanho or 0}-{marca}'
+
+def ultima_modificacao(arquivo):
+    return arquivo.updated_at or arquivo.created_at
+
+def _aplicar_cache(resposta):
+    if resposta.status_code in (200, 206):
+        resposta.headers['Accept-Ranges'] = 'bytes'
+    resposta.cache_control.no_cache = None
+    resposta.cache_control.public = False
+    resposta.cache_control.private = True
+    resposta.cache_control.max_age = CACHE_MAX_AGE
+    resposta.expires = None
+    return resposta
+
+def _content_disposition(nome, como_anexo):
+    tipo = 'attachment' if como_anexo else 'inline'
+    try:
+        nome.encode('ascii')
+        return f'{tipo}; filename="{nome}"'
+    except UnicodeEncodeError:
+        return f"{tipo}; filename*=UTF-8''{quote(nome)}"
+
+# ===== ORIGEM DO CONTEÚDO =====
+def resolver_origem(arquivo):
+    """Escolher o backend do conteúdo: ('s3'|'database'|'local', referência)"""
+    if arquivo.storage_type == 's3' and arquivo.aws_s3_key:
+        if not s3_disponivel():
+            raise ArquivoIndisponivel('Armazenamento S3 indisponível', status=503)
+        return 's3', arquivo.aws_s3_key
+
+    if arquivo.arquivo_blob is not None:
+        return 'database', arquivo.arquivo_blob
+
+    if arquivo.caminho and os.path.exists(arquivo.caminho):
+        return 'local', arquivo.caminho
+
+    raise ArquivoIndisponivel('Arquivo físico não encontrado')
+
+# ===== RESPOSTAS =====
+def _resposta_416(tamanho):
+    resposta = Response(status=416)
+    resposta.headers['Content-Range'] = f'bytes */{tamanho}'
+    return resposta
+
+def _resposta_s3(arquivo, chave, etag, como_anexo):
+    """Proxy em streaming do S3 repassando o Range (sem baixar o objeto inteiro)"""
+    s3 = s3_manager.s3_client
+    bucket = arquivo.aws_s3_bucket or s3_manager.bucket_name
+    tamanho = arquivo.tamanho or s3.head_object(Bucket=bucket, Key=chave)['ContentLength']
+
+    parametros = {'Bucket': bucket, 'Key': chave}
+    status = 200
+    intervalo = None
+
+    # If-Range com ETag diferente: ignora o Range e devolve o arquivo inteiro
+    if_range = request.headers.get('If-Range')
+    if request.range and (not if_range or if_range.strip('"') == etag):
+        intervalo = request.range.range_for_length(tamanho)
+        if intervalo is None:
+            return _resposta_416(tamanho)
+        parametros['Range'] = f'bytes={intervalo[0]}-{intervalo[1] - 1}'
+        status = 206
+
+    objeto = s3.get_object(**parametros)
+    corpo = objeto['Body']
+
+    def gerar():
+        try:
+            for bloco in corpo.iter_chunks(TAMANHO_BLOCO):
+                yield bloco
+        finally:
+            corpo.close()
+
+    resposta = Response(gerar(), status=status, mimetype=arquivo.tipo_mime or 'application/octet-stream',
+                        direct_passthrough=True)
+    resposta.headers['Content-Disposition'] = _content_disposition(arquivo.nome_original, como_anexo)
+    if intervalo:
+        resposta.content_length = intervalo[1] - intervalo[0]
+        resposta.headers['Content-Range'] = f'bytes {intervalo[0]}-{intervalo[1] - 1}/{tamanho}'
+    else:
+        resposta.content_length = tamanho
+    return resposta
+
+def servir_arquivo(arquivo, como_anexo=True):
+    """
+    Montar a resposta HTTP de download (como_anexo=True) ou visualização
+
+    Levanta ArquivoIndisponivel quando não há conteúdo em nenhum backend.
+    """
+    etag = etag_arquivo(arquivo)
+    modificado_em = ultima_modificacao(arquivo)
+
+    # 304 antes de abrir disco, blob ou S3
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modificado_em):
+        resposta = Response(status=304)
+        resposta.set_etag(etag)
+        if modificado_em:
+            resposta.headers['Last-Modified'] = http_date(modificado_em)
+        return _aplicar_cache(resposta)
+
+    origem, referencia = resolver_origem(arquivo)
+    opcoes = {
+        'mimetype': arquivo.tipo_mime or 'application/octet-stream',
+        'as_attachment': como_anexo,
+        'download_name': arquivo.nome_original,
+        'etag': etag,
+        'last_modified': modificado_em,
+        'conditional': True
+    }
+
+    if origem == 's3':
+        resposta = _resposta_s3(arquivo, referencia, etag, como_anexo)
+        resposta.set_etag(etag)
+        if modificado_em:
+            resposta.headers['Last-Modified'] = http_date(modificado_em)
+    else:
+        try:
+            conteudo = io.BytesIO(referencia) if origem == 'database' else referencia
+            resposta = send_file(conteudo, **opcoes)
+        except RequestedRangeNotSatisfiable as e:
+            return _resposta_416(e.length)
+
+    return _aplicar_cache(resposta)
+
+def resposta_indisponivel(erro):
+    """JSON de erro padrão das rotas de arquivo"""
+    return jsonify({
+        'success': False,
+        'error': str(erro)
+    }), erro.status
@@ -0,0 +1,394 @@
+# 📁 services/eventos.py - CANAL DE EVENTOS (SERVER-SENT EVENTS) PARA O DASHBOARD
+# O dashboard recarregava /api/dashboard-data inteiro por setInterval em cada aba,
+# mesmo sem nada novo. Agora as escritas publicam eventos tipados e o frontend
+# busca só a seção afetada:
+#   - notificacao_nova  (Notificacao criada)          -> notificações
+#   - conta_paga        (Conta com status 'Paga')     -> contas
+#   - boleto_recebido   (webhook gravou boletos novos)-> monitor bancário
+#   - arquivo_enviado   (Arquivo criado)              -> arquivos
+#   - dashboard_atualizado (snapshot recalculado; os números vão no evento)
+# Os eventos são coletados no after_flush e só saem no after_commit (rollback
+# descarta). Cada processo entrega aos seus clientes e repassa aos outros pelo
+# pub/sub do Redis (services/cache.py).
+# GET /api/events mantém a conexão aberta sem nenhuma consulta ao banco: aba
+# ociosa custa só o heartbeat. Reconexão com Last-Event-ID (ou ?ultimo_id=)
+# reenvia o que ficou no histórico; fora dele, o cliente recebe 'resync' e
+# recarrega tudo uma vez.
+# Autenticação: EventSource não envia headers, e um JWT na query string vai
+# parar nos logs de acesso e de proxy. O navegador troca o JWT (header) por um
+# ticket em POST /api/events/ticket: aleatório, vale EVENTOS_TICKET_SEGUNDOS e
+# é consumido na abertura do stream. Clientes que enviam headers podem usar
+# Authorization direto.
+# Cada stream ocupa uma thread do servidor por até EVENTOS_DURACAO_MAXIMA:
+# exige worker com threads ou assíncrono (app/gunicorn.conf.py usa gthread e
+# limita EVENTOS_MAX_CONEXOES abaixo do número de threads). Num worker sync o
+# stream responde 503 e o frontend continua no polling.
+import os
+import json
+import time
+import uuid
+import queue
+import hashlib
+import secrets
+import threading
+from collections import deque
+from datetime import UTC, datetime
+from flask import Response, request, jsonify
+from sqlalchemy import event, inspect
+from database import SessionLocal, Notificacao, Conta, Arquivo, DashboardSnapshot
+from services.cache import publicar, assinar, redis_cliente
+
+HEARTBEAT_SEGUNDOS = float(os.getenv('EVENTOS_HEARTBEAT', '15'))
+DURACAO_MAXIMA = float(os.getenv('EVENTOS_DURACAO_MAXIMA', '3600'))
+MAX_CONEXOES = int(os.getenv('EVENTOS_MAX_CONEXOES', '200'))
+TAMANHO_HISTORICO = int(os.getenv('EVENTOS_HISTORICO', '500'))
+TAMANHO_FILA = int(os.getenv('EVENTOS_FILA', '100'))
+RECONEXAO_MS = int(os.getenv('EVENTOS_RECONEXAO_MS', '5000'))
+TICKET_SEGUNDOS = int(os.getenv('EVENTOS_TICKET_SEGUNDOS', '30'))
+# Acima disso, os eventos de um tipo no mesmo commit viram um só (importações em massa)
+LIMITE_POR_COMMIT = int(os.getenv('EVENTOS_LIMITE_POR_COMMIT', '10'))
+
+CANAL = 'eventos'
+# Identifica este processo: ids de evento e mensagens do pub/sub
+ORIGEM = uuid.uuid4().hex[:12]
+
+TIPOS = ('notificacao_nova', 'conta_paga', 'boleto_recebido', 'arquivo_enviado', 'dashboard_atualizado')
+
+# ===== BARRAMENTO LOCAL =====
+class Assinante:
+    """Uma conexão SSE: fila limitada; se encher, o cliente recebe 'resync'"""
+
+    def __init__(self, tamanho_fila):
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.perdeu_eventos = False
+
+class Barramento:
+    """Entrega em memória para as conexões deste processo, com histórico para Last-Event-ID"""
+
+    def __init__(self, tamanho_historico=TAMANHO_HISTORICO, tamanho_fila=TAMANHO_FILA):
+        self._trava = threading.Lock()
+        self._assinantes = set()
+        self._historico = deque(maxlen=tamanho_historico)
+        self._sequencia = 0
+        self._tamanho_fila = tamanho_fila
+        self._contadores = {'publicados': 0, 'entregues': 0, 'descartados': 0, 'recebidos_redis': 0, 'conexoes_total': 0}
+
+    def publicar(self, tipo, dados, via_redis=False):
+        with self._trava:
+            self._sequencia += 1
+            evento_id = f'{ORIGEM}-{self._sequencia}'
+            # Quadro SSE montado uma vez e reaproveitado por todas as conexões
+            quadro = f'id: {evento_id}\nevent: {tipo}\ndata: {json.dumps(dados, default=str, ensure_ascii=False)}\n\n'
+            self._historico.append((self._sequencia, quadro))
+            assinantes = list(self._assinantes)
+            self._contadores['recebidos_redis' if via_redis else 'publicados'] += 1
+
+        entregues = 0
+        for assinante in assinantes:
+            try:
+                assinante.fila.put_nowait(quadro)
+                entregues += 1
+            except queue.Full:
+                assinante.perdeu_eventos = True
+        with self._trava:
+            self._contadores['entregues'] += entregues
+            self._contadores['descartados'] += len(assinantes) - entregues
+        return evento_id
+
+    def assinar(self, ultimo_id=None):
+        """Registrar uma conexão; retorna (assinante, quadros a reenviar, precisa_resync)"""
+        with self._trava:
+            if len(self._assinantes) >= MAX_CONEXOES:
+                return None, [], False
+            assinante = Assinante(self._tamanho_fila)
+            self._assinantes.add(assinante)
+            self._contadores['conexoes_total'] += 1
+            pendentes, resync = self._reenviar(ultimo_id)
+        return assinante, pendentes, resync
+
+    def _reenviar(self, ultimo_id):
+        if not ultimo_id:
+            return [], False
+        origem, _, sequencia = ultimo_id.rpartition('-')
+        # Id de outro processo (ou de antes de um restart): não há como saber o que faltou
+        if origem != ORIGEM or not sequencia.isdigit():
+            return [], True
+        sequencia = int(sequencia)
+        if sequencia >= self._sequencia:
+            return [], False
+        if not self._historico or self._historico[0][0] > sequencia + 1:
+            return [], True
+        return [quadro for numero, quadro in self._historico if numero > sequencia], False
+
+    def cancelar(self, assinante):
+        with self._trava:
+            self._assinantes.discard(assinante)
+
+    def estatisticas(self):
+        with self._trava:
+            return {
+                **self._contadores,
+                'conexoes': len(self._assinantes),
+                'max_conexoes': MAX_CONEXOES,
+                'historico': len(self._historico),
+                'ultimo_id': f'{ORIGEM}-{self._sequencia}'
+            }
+
+barramento = Barramento()
+
+def emitir(tipo, dados):
+    """Publicar já (fora de transação): conexões deste processo e demais processos"""
+    barramento.publicar(tipo, dados)
+    publicar(CANAL, {'origem': ORIGEM, 'tipo': tipo, 'dados': dados})
+
+def _receber_de_outro_processo(mensagem):
+    # Quem publicou já entregou às próprias conexões
+    if mensagem.get('origem') == ORIGEM or mensagem.get('tipo') not in TIPOS:
+        return
+    barramento.publicar(mensagem['tipo'], mensagem.get('dados') or {}, via_redis=True)
+
+assinar(CANAL, _receber_de_outro_processo)
+
+# ===== EVENTOS A PARTIR DAS ESCRITAS =====
+def registrar_evento(session, tipo, dados):
+    """Agendar um evento para o commit da sessão (escritas via Core, sem objetos no flush)"""
+    session.info.setdefault('eventos_pendentes', []).append((tipo, dados))
+
+def _data_iso(valor):
+    return valor.isoformat() if valor else None
+
+def _evento_conta(conta):
+    return {
+        'id': conta.id, 'valor': float(conta.valor) if conta.valor is not None else None,
+        'projeto_id': conta.projeto_id, 'data_pagamento': _data_iso(conta.data_pagamento)
+    }
+
+def _evento_snapshot(snapshot):
+    """Números do card de estatísticas direto do snapshot (o frontend não precisa buscar)"""
+    try:
+        dados = json.loads(snapshot.dados or '{}')
+    except (TypeError, ValueError):
+        return None
+    return {
+        'stats': {
+            'totalProjects': dados.get('total_projetos', 0),
+            'totalClients': dados.get('total_clientes', 0),
+            'totalBills': dados.get('total_contas', 0),
+            'totalFiles': dados.get('total_arquivos', 0),
+            'revenue': dados.get('receita_total', 0)
+        },
+        'atualizado_em': _data_iso(snapshot.atualizado_em)
+    }
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _coletar_eventos(session, flush_context):
+    # Os dados saem daqui: depois do commit os atributos expiram (ler geraria SELECT)
+    pendentes = session.info.setdefault('eventos_pendentes', [])
+    for obj in session.new:
+        if isinstance(obj, Notificacao):
+            pendentes.append(('notificacao_nova', {
+                'id': obj.id, 'titulo': obj.titulo, 'tipo': obj.tipo,
+                'projeto_id': obj.projeto_id, 'conta_id': obj.conta_id
+            }))
+        elif isinstance(obj, Arquivo):
+            pendentes.append(('arquivo_enviado', {
+                'id': obj.id, 'nome_original': obj.nome_original,
+                'pasta_id': obj.pasta_id, 'projeto_id': obj.projeto_id
+            }))
+        elif isinstance(obj, Conta) and obj.status == 'Paga':
+            pendentes.append(('conta_paga', _evento_conta(obj)))
+        elif isinstance(obj, DashboardSnapshot):
+            dados = _evento_snapshot(obj)
+            if dados:
+                pendentes.append(('dashboard_atualizado', dados))
+    for obj in session.dirty:
+        if isinstance(obj, Conta):
+            if 'Paga' in inspect(obj).attrs.status.history.added:
+                pendentes.append(('conta_paga', _evento_conta(obj)))
+        elif isinstance(obj, DashboardSnapshot):
+            dados = _evento_snapshot(obj)
+            if dados:
+                pendentes.append(('dashboard_atualizado', dados))
+    if not pendentes:
+        session.info.pop('eventos_pendentes', None)
+
+def _agrupar(pendentes):
+    """Um evento por escrita; em lotes grandes, um resumo por tipo (o cliente recarrega a seção)"""
+    por_tipo = {}
+    for tipo, dados in pendentes:
+        por_tipo.setdefault(tipo, []).append(dados)
+    for tipo, lista in por_tipo.items():
+        if tipo == 'dashboard_atualizado':
+            yield tipo, lista[-1]
+        elif len(lista) > LIMITE_POR_COMMIT:
+            yield tipo, {'lote': True, 'quantidade': len(lista), 'ids': [dados.get('id') for dados in lista[:50]]}
+        else:
+            for dados in lista:
+                yield tipo, dados
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _publicar_apos_commit(session):
+    for tipo, dados in _agrupar(session.info.pop('eventos_pendentes', None) or ()):
+        try:
+            emitir(tipo, dados)
+        except Exception as e:
+            print(f"⚠️  Erro ao publicar evento {tipo}: {e}")
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _descartar_eventos(session):
+    session.info.pop('eventos_pendentes', None)
+
+# ===== AUTENTICAÇÃO DO STREAM =====
+PREFIXO_TICKET = 'eventos:ticket:'
+# Tickets deste processo (usados quando não há Redis): {chave: (dados, expira_em)}
+_tickets_locais = {}
+_trava_tickets = threading.Lock()
+
+def _chave_ticket(ticket):
+    # Só o hash fica guardado: quem lê o Redis não consegue abrir streams
+    return PREFIXO_TICKET + hashlib.sha256(ticket.encode()).hexdigest()
+
+def emitir_ticket(payload):
+    """Ticket de uso único para abrir o stream com os dados do JWT que o pediu"""
+    ticket = secrets.token_urlsafe(32)
+    dados = {'user_id': payload['user_id'], 'rev': payload.get('rev'), 'exp': payload.get('exp')}
+    cliente = redis_cliente()
+    if cliente:
+        try:
+            cliente.setex(_chave_ticket(ticket), TICKET_SEGUNDOS, json.dumps(dados))
+            return ticket
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (ticket de eventos): {e}")
+    agora = time.monotonic()
+    with _trava_tickets:
+        for chave in [chave for chave, (_, expira_em) in _tickets_locais.items() if expira_em <= agora]:
+            del _tickets_locais[chave]
+        _tickets_locais[_chave_ticket(ticket)] = (dados, agora + TICKET_SEGUNDOS)
+    return ticket
+
+def _consumir_ticket(ticket):
+    """Dados do ticket (e ele deixa de valer) ou None se expirado, usado ou desconhecido"""
+    chave = _chave_ticket(ticket)
+    cliente = redis_cliente()
+    if cliente:
+        try:
+            # MULTI/EXEC: dois streams com o mesmo ticket não leem os dois
+            bruto, _ = cliente.pipeline().get(chave).delete(chave).execute()
+            if bruto:
+                return json.loads(bruto)
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (ticket de eventos): {e}")
+    with _trava_tickets:
+        dados, expira_em = _tickets_locais.pop(chave, (None, 0))
+    return dados if expira_em > time.monotonic() else None
+
+def _autenticar_jwt():
+    """JWT do header Authorization; retorna (payload, resposta_de_erro)"""
+    from middleware.auth_middleware import verify_jwt_token
+
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header[7:].strip() if auth_header.startswith('Bearer ') else ''
+    payload = verify_jwt_token(token) if token else None
+    if not payload or not payload.get('user_id'):
+        return None, (jsonify({'success': False, 'error': 'Token inválido ou expirado', 'code': 'INVALID_TOKEN'}), 401)
+    return _conferir_usuario(payload)
+
+def _autenticar_stream():
+    """?ticket= (navegador) ou Authorization; retorna (payload, resposta_de_erro)"""
+    ticket = request.args.get('ticket', '').strip()
+    if not ticket:
+        return _autenticar_jwt()
+    payload = _consumir_ticket(ticket)
+    if not payload or not payload.get('user_id'):
+        return None, (jsonify({'success': False, 'error': 'Ticket inválido, expirado ou já usado', 'code': 'INVALID_TICKET'}), 401)
+    return _conferir_usuario(payload)
+
+def _conferir_usuario(payload):
+    """Mesmas verificações do auth_required sobre o principal em cache"""
+    from services.cache_principal import obter_principal
+
+    user = obter_principal(payload['user_id'])
+    if not user or not user.is_active or user.token_revogado(payload):
+        return None, (jsonify({'success': False, 'error': 'Usuário sem acesso', 'code': 'USER_NOT_ALLOWED'}), 401)
+    return payload, None
+
+# ===== STREAM SSE =====
+def _stream(assinante, pendentes, resync, encerrar_em):
+    """Gerador da resposta: só lê a fila em memória (nenhuma consulta ao banco)"""
+    try:
+        yield f'retry: {RECONEXAO_MS}\n\n'
+        if resync:
+            yield f'event: resync\ndata: {{"motivo": "historico"}}\n\n'
+        for quadro in pendentes:
+            yield quadro
+        while True:
+            restante = encerrar_em - time.monotonic()
+            if restante <= 0:
+                # Fim do stream: o cliente reconecta com um ticket novo e o acesso é conferido de novo
+                return
+            try:
+                quadro = assinante.fila.get(timeout=min(HEARTBEAT_SEGUNDOS, restante))
+            except queue.Empty:
+                # Comentário SSE: mantém proxies e o navegador com a conexão viva
+                yield ': ping\n\n'
+                continue
+            if assinante.perdeu_eventos:
+                assinante.perdeu_eventos = False
+                yield 'event: resync\ndata: {"motivo": "fila_cheia"}\n\n'
+            yield quadro
+    finally:
+        barramento.cancelar(assinante)
+
+def estatisticas():
+    return barramento.estatisticas()
+
+def registrar_eventos(app):
+    """Rotas /api/events (stream), /api/events/ticket e /api/events/status (admin)"""
+    from middleware.auth_middleware import admin_required
+
+    @app.route('/api/events/ticket', methods=['POST'])
+    def ticket_eventos():
+        """Trocar o JWT (header) por um ticket de uso único para o EventSource"""
+        payload, erro = _autenticar_jwt()
+        if erro:
+            return erro
+        return jsonify({'success': True, 'ticket': emitir_ticket(payload), 'expira_em_segundos': TICKET_SEGUNDOS})
+
+    @app.route('/api/events', methods=['GET'])
+    def stream_eventos():
+        """Server-Sent Events com as mudanças (notificações, contas, boletos, arquivos)"""
+        # Worker sync: o stream prenderia o único fluxo do processo por até DURACAO_MAXIMA
+        if not request.environ.get('wsgi.multithread'):
+            resposta = jsonify({'success': False, 'error': 'Canal de eventos exige worker gthread ou assíncrono'})
+            resposta.headers['Retry-After'] = str(RECONEXAO_MS // 1000)
+            return resposta, 503
+
+        payload, erro = _autenticar_stream()
+        if erro:
+            return erro
+
+        assinante, pendentes, resync = barramento.assinar(request.headers.get('Last-Event-ID') or request.args.get('ultimo_id'))
+        if assinante is None:
+            resposta = jsonify({'success': False, 'error': 'Limite de conexões de eventos atingido'})
+            resposta.headers['Retry-After'] = str(RECONEXAO_MS // 1000)
+            return resposta, 503
+
+        encerrar_em = time.monotonic() + DURACAO_MAXIMA
+        if payload.get('exp'):
+            encerrar_em = min(encerrar_em, time.monotonic() + payload['exp'] - datetime.now(UTC).timestamp())
+
+        # Sem stream_with_context: o contexto da requisição (e a sessão do banco)
+        # é encerrado antes do streaming; a conexão volta ao pool na hora
+        resposta = Response(_stream(assinante, pendentes, resync, encerrar_em), mimetype='text/event-stream')
+        resposta.headers['Cache-Control'] = 'no-cache'
+        resposta.headers['X-Accel-Buffering'] = 'no'
+        return resposta
+
+    @app.route('/api/events/status', methods=['GET'])
+    @admin_required
+    def status_eventos():
+        """Conexões abertas e contadores do canal de eventos"""
+        try:
+            return jsonify({'success': True, 'data': estatisticas()})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,237 @@
+# 📁 services/fila_webhooks.py - FILA DURÁVEL PARA INGESTÃO DE WEBHOOKS
+# No fim do mês os bancos mandam rajadas de webhooks e o receptor fazia
+# parse + SELECT + INSERT + COMMIT com o banco esperando a resposta HTTP
+# (timeouts e reenvios). Agora o receptor só grava o payload bruto aqui e
+# responde 202; um pool de workers processa em lotes.
+#   - Fila: SQLite em modo WAL (arquivo local, sobrevive a reinícios)
+#   - Reserva com prazo: item de um worker que morreu volta para a fila
+#   - Após WEBHOOK_FILA_TENTATIVAS falhas o item fica como 'falhou' (dead letter)
+#   - Métricas: profundidade, lag (idade do item mais antigo) e vazão
+import os
+import time
+import sqlite3
+import threading
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'fila_webhooks.db')
+
+CAMINHO = os.getenv('WEBHOOK_FILA_DB', CAMINHO_PADRAO)
+WORKERS = int(os.getenv('WEBHOOK_WORKERS', '2'))
+TAMANHO_LOTE = int(os.getenv('WEBHOOK_LOTE', '200'))
+PRAZO_RESERVA = int(os.getenv('WEBHOOK_FILA_PRAZO', '60'))
+MAX_TENTATIVAS = int(os.getenv('WEBHOOK_FILA_TENTATIVAS', '5'))
+# Espera antes de reservar um lote incompleto: junta a rajada em menos commits
+ESPERA_LOTE = int(os.getenv('WEBHOOK_FILA_ESPERA_MS', '25')) / 1000
+
+_local = threading.local()
+# Escritas serializadas no processo: evita o busy-wait do SQLite entre threads
+_trava_escrita = threading.Lock()
+_trava_inicio = threading.Lock()
+_novos = threading.Event()
+_estado = {'workers': [], 'parar': threading.Event(), 'processador': None}
+_contadores = {'enfileirados': 0, 'processados': 0, 'falhas': 0, 'lotes': 0, 'ultimo_lag_ms': None}
+_trava_contadores = threading.Lock()
+
+def _conexao():
+    """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'caminho', None) != CAMINHO:
+        os.makedirs(os.path.dirname(CAMINHO) or '.', exist_ok=True)
+        conn = sqlite3.connect(CAMINHO, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fila_webhooks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                banco TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                recebido_em REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pendente',
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                reservado_ate REAL,
+                erro TEXT
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_fila_webhooks_status ON fila_webhooks (status, id)')
+        _local.conn = conn
+        _local.caminho = CAMINHO
+    return conn
+
+def _contar(**valores):
+    with _trava_contadores:
+        for chave, valor in valores.items():
+            if chave == 'ultimo_lag_ms':
+                _contadores[chave] = valor
+            else:
+                _contadores[chave] += valor
+
+# ===== PRODUTOR =====
+def enfileirar(banco, payload):
+    """Gravar o payload bruto (texto) na fila; retorna o id do item"""
+    conn = _conexao()
+    with _trava_escrita:
+        cursor = conn.execute(
+            'INSERT INTO fila_webhooks (banco, payload, recebido_em) VALUES (?, ?, ?)',
+            (banco, payload, time.time())
+        )
+    _contar(enfileirados=1)
+    _novos.set()
+    return cursor.lastrowid
+
+def enfileirar_varios(banco, payloads):
+    """Gravar vários payloads numa única transação; retorna os ids na ordem"""
+    conn = _conexao()
+    agora = time.time()
+    ids = []
+    with _trava_escrita:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for payload in payloads:
+                ids.append(conn.execute(
+                    'INSERT INTO fila_webhooks (banco, payload, recebido_em) VALUES (?, ?, ?)',
+                    (banco, payload, agora)
+                ).lastrowid)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    _contar(enfileirados=len(ids))
+    _novos.set()
+    return ids
+
+# ===== CONSUMIDOR =====
+def reservar(limite=TAMANHO_LOTE):
+    """Reservar até 'limite' itens pendentes (ou com reserva vencida) para este worker"""
+    conn = _conexao()
+    agora = time.time()
+    with _trava_escrita:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            itens = conn.execute("""
+                SELECT id, banco, payload, recebido_em, tentativas FROM fila_webhooks
+                WHERE status = 'pendente' OR (status = 'reservado' AND reservado_ate < ?)
+                ORDER BY id LIMIT ?
+            """, (agora, limite)).fetchall()
+            if itens:
+                conn.executemany(
+                    "UPDATE fila_webhooks SET status = 'reservado', reservado_ate = ?, tentativas = tentativas + 1 WHERE id = ?",
+                    [(agora + PRAZO_RESERVA, item[0]) for item in itens]
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    return [
+        {'id': item[0], 'banco': item[1], 'payload': item[2], 'recebido_em': item[3], 'tentativas': item[4] + 1}
+        for item in itens
+    ]
+
+def confirmar(ids):
+    """Remover itens processados com sucesso"""
+    if ids:
+        conn = _conexao()
+        with _trava_escrita:
+            conn.executemany('DELETE FROM fila_webhooks WHERE id = ?', [(item_id,) for item_id in ids])
+
+def falhar(itens, erro):
+    """Devolver itens à fila ou, esgotadas as tentativas, marcar como 'falhou'"""
+    if itens:
+        conn = _conexao()
+        with _trava_escrita:
+            conn.executemany(
+                "UPDATE fila_webhooks SET status = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END, "
+                "reservado_ate = NULL, erro = ? WHERE id = ?",
+                [(MAX_TENTATIVAS, str(erro)[:500], item['id']) for item in itens]
+            )
+
+def processar_lote(processador, limite=TAMANHO_LOTE):
+    """Reservar um lote e entregá-lo ao processador(itens) -> {id: None | 'mensagem de erro'}.
+    Retorna quantos itens foram reservados."""
+    itens = reservar(limite)
+    if not itens:
+        return 0
+    try:
+        resultados = processador(itens) or {}
+    except Exception as e:
+        print(f"❌ Erro ao processar lote da fila de webhooks: {e}")
+        falhar(itens, e)
+        _contar(falhas=len(itens), lotes=1)
+        return len(itens)
+
+    com_erro = [item for item in itens if resultados.get(item['id'])]
+    for item in com_erro:
+        falhar([item], resultados[item['id']])
+    confirmar([item['id'] for item in itens if not resultados.get(item['id'])])
+
+    lag_ms = round((time.time() - min(item['recebido_em'] for item in itens)) * 1000, 1)
+    _contar(processados=len(itens) - len(com_erro), falhas=len(com_erro), lotes=1, ultimo_lag_ms=lag_ms)
+    return len(itens)
+
+def drenar(processador, limite=TAMANHO_LOTE):
+    """Processar tudo o que está pendente na thread atual (scripts e testes)"""
+    total = 0
+    while True:
+        processados = processar_lote(processador, limite)
+        if not processados:
+            return total
+        total += processados
+
+# ===== POOL DE WORKERS =====
+def _loop_worker(processador):
+    while not _estado['parar'].is_set():
+        try:
+            processados = processar_lote(processador)
+        except Exception as e:
+            print(f"⚠️  Worker da fila de webhooks: {e}")
+            processados = 0
+        if processados >= TAMANHO_LOTE:
+            continue
+        if not processados:
+            # Fila vazia: acordar com um novo item ou, no máximo, a cada segundo
+            _novos.wait(1.0)
+            _novos.clear()
+        if ESPERA_LOTE:
+            _estado['parar'].wait(ESPERA_LOTE)
+
+def iniciar_workers(processador, quantidade=WORKERS):
+    """Iniciar o pool (idempotente); itens que ficaram na fila são retomados"""
+    with _trava_inicio:
+        vivos = [worker for worker in _estado['workers'] if worker.is_alive()]
+        if vivos:
+            return len(vivos)
+        _estado['parar'].clear()
+        _estado['processador'] = processador
+        _estado['workers'] = [
+            threading.Thread(target=_loop_worker, args=(processador,), name=f'webhook-worker-{i}', daemon=True)
+            for i in range(quantidade)
+        ]
+        for worker in _estado['workers']:
+            worker.start()
+        print(f"✅ Fila de webhooks: {quantidade} workers ({CAMINHO})")
+        return quantidade
+
+def parar_workers(timeout=5):
+    _estado['parar'].set()
+    _novos.set()
+    for worker in _estado['workers']:
+        worker.join(timeout)
+    _estado['workers'] = []
+
+# ===== MÉTRICAS =====
+def metricas():
+    """Profundidade, lag e contadores da fila"""
+    conn = _conexao()
+    agora = time.time()
+    linhas = conn.execute('SELECT status, COUNT(*), MIN(recebido_em) FROM fila_webhooks GROUP BY status').fetchall()
+    por_status = {status: total for status, total, _ in linhas}
+    mais_antigo = min((minimo for status, _, minimo in linhas if status != 'falhou' and minimo), default=None)
+    with _trava_contadores:
+        contadores = dict(_contadores)
+    return {
+        'profundidade': por_status.get('pendente', 0) + por_status.get('reservado', 0),
+        'pendentes': por_status.get('pendente', 0),
+        'em_processamento': por_status.get('reservado', 0),
+        'falhas_definitivas': por_status.get('falhou', 0),
+        'lag_segundos': round(agora - mais_antigo, 3) if mais_antigo else 0,
+        'workers_ativos': sum(1 for worker in _estado['workers'] if worker.is_alive()),
+        **contadores
+    }
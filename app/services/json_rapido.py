@@ -0,0 +1,72 @@
+# 📁 services/json_rapido.py - PROVEDOR JSON DO FLASK COM ORJSON
+# As rotas montam dicts grandes (to_dict()) e passam para jsonify, que usava o
+# json da stdlib (ordenando chaves e escapando acentos). Com orjson:
+#   - datetime/date/time/UUID/dataclass nativos (ISO 8601), Decimal -> float
+#   - resposta montada direto dos bytes (sem str intermediária)
+#   - chaves na ordem do to_dict(), UTF-8 sem escapes \uXXXX
+# Sem orjson instalado (ou com JSON_PROVIDER=stdlib) fica o provedor padrão.
+import os
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+def _padrao(obj):
+    """Tipos que o orjson não serializa sozinho"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider com dumps/loads/response via orjson"""
+
+    sort_keys = False
+
+    def _opcoes(self, indentar=False):
+        opcoes = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def dumps_bytes(self, obj, indentar=False):
+        try:
+            return orjson.dumps(obj, default=_padrao, option=self._opcoes(indentar))
+        except TypeError:
+            # Ex.: inteiros acima de 64 bits; a stdlib resolve (mais devagar)
+            return super().dumps(obj, indent=2 if indentar else None).encode()
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, indentar=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indentar) + b'\n', mimetype=self.mimetype)
+
+def registrar_json(app):
+    """Trocar o provedor JSON do app pelo orjson (quando disponível)"""
+    if os.getenv('JSON_PROVIDER', 'orjson') == 'stdlib':
+        print("⚠️  JSON_PROVIDER=stdlib - usando json da biblioteca padrão")
+        return False
+    if not HAS_ORJSON:
+        print("⚠️  orjson não instalado - usando json da biblioteca padrão")
+        print("💡 Execute: pip install orjson")
+        return False
+    app.json_provider_class = OrjsonProvider
+    app.json = OrjsonProvider(app)
+    print("✅ Respostas JSON via orjson")
+    return True
@@ -0,0 +1,178 @@
+# 📁 services/paginacao.py - PAGINAÇÃO POR CURSOR (KEYSET)
+# Substitui OFFSET/LIMIT e respostas com a tabela inteira. Cada página é um
+# WHERE (coluna, id) < (valor, id) sobre os índices (created_at, id) ou
+# (data_vencimento, id), com custo constante independente da profundidade.
+#
+# Parâmetros aceitos pelas rotas:
+#   ?limit=N            tamanho da página (padrão/limite via env)
+#   ?cursor=TOKEN       next_cursor devolvido pela página anterior
+#   ?total=exato|estimado|nenhum   contagem; sem cursor (primeira página) o padrão
+#                       é exato, como antes; nas páginas seguintes só se pedida
+#   ?offset=N           modo legado; mantém o comportamento antigo com total exato
+# As rotas devolvem 'total' (pagination.total, o total da listagem; None quando
+# não contado) e 'count' (linhas desta página).
+import os
+import json
+import base64
+from datetime import date, datetime
+from sqlalchemy import select, func, literal, tuple_
+
+LIMITE_PADRAO = int(os.getenv('PAGINACAO_LIMITE_PADRAO', '100'))
+LIMITE_MAXIMO = int(os.getenv('PAGINACAO_LIMITE_MAXIMO', '500'))
+
+# Acima disso o total "estimado" no SQLite para de contar
+TETO_ESTIMATIVA = int(os.getenv('PAGINACAO_TETO_ESTIMATIVA', '10000'))
+
+class CursorInvalido(ValueError):
+    """Token de cursor malformado ou de outra listagem"""
+
+# ===== CURSOR OPACO =====
+def codificar_cursor(valor, id_):
+    """Gerar o token opaco a partir da última linha da página"""
+    if isinstance(valor, (date, datetime)):
+        valor = valor.isoformat()
+    bruto = json.dumps([valor, id_], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+def decodificar_cursor(token, coluna):
+    """Ler (valor, id) do token, convertendo o valor para o tipo da coluna"""
+    try:
+        bruto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        valor, id_ = json.loads(bruto)
+        id_ = int(id_)
+
+        if valor is not None:
+            tipo = coluna.type.python_type
+            if tipo is datetime:
+                valor = datetime.fromisoformat(valor)
+            elif tipo is date:
+                valor = date.fromisoformat(valor)
+        return valor, id_
+    except Exception:
+        raise CursorInvalido('Cursor inválido')
+
+def decodificar_cursor_relevancia(token):
+    """Ler (relevancia, id) de um cursor de busca ordenada por relevância"""
+    try:
+        bruto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        valor, id_ = json.loads(bruto)
+        return float(valor), int(id_)
+    except Exception:
+        raise CursorInvalido('Cursor inválido')
+
+# ===== PARÂMETROS =====
+def parametros_paginacao(args, limite_padrao=None):
+    """Extrair limit/cursor/offset/total de request.args"""
+    limite = args.get('limit', type=int) or args.get('per_page', type=int) or limite_padrao or LIMITE_PADRAO
+    offset = args.get('offset', type=int)
+
+    # ?page= (legado) vira offset
+    pagina = args.get('page', type=int)
+    if offset is None and pagina:
+        offset = (max(pagina, 1) - 1) * limite
+
+    total = (args.get('total') or '').lower()
+    if total in ('1', 'true', 'exact'):
+        total = 'exato'
+    elif total == 'estimated':
+        total = 'estimado'
+    elif total in ('0', 'false', 'none'):
+        total = 'nenhum'
+
+    return {
+        'limit': max(1, min(limite, LIMITE_MAXIMO)),
+        'cursor': args.get('cursor') or None,
+        'offset': offset,
+        'total': total if total in ('exato', 'estimado', 'nenhum') else None
+    }
+
+# ===== CONTAGEM =====
+def contar_total(query, modo):
+    """
+    Total opcional da listagem filtrada
+
+    'exato' faz COUNT(*). 'estimado' usa o planejador no PostgreSQL
+    (EXPLAIN, sem varrer a tabela) e uma contagem limitada nos demais.
+    Retorna (total, estimado).
+    """
+    query = query.order_by(None)
+
+    if modo == 'exato':
+        return query.count(), False
+
+    db = query.session
+    if db.bind.dialect.name == 'postgresql':
+        compilado = query.statement.compile(dialect=db.bind.dialect)
+        plano = db.connection().exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compilado}', compilado.params
+        ).scalar()
+        if isinstance(plano, str):
+            plano = json.loads(plano)
+        return int(plano[0]['Plan']['Plan Rows']), True
+
+    entidade = query.column_descriptions[0]['entity']
+    limitada = query.with_entities(*entidade.__mapper__.primary_key).limit(TETO_ESTIMATIVA).subquery()
+    total = db.execute(select(func.count()).select_from(limitada)).scalar()
+    return total, total >= TETO_ESTIMATIVA
+
+# ===== PAGINAÇÃO =====
+def paginar(query, modelo, coluna, parametros, crescente=False, carregar=None, contar_primeira_pagina=True):
+    """
+    Paginar query (já filtrada) por (coluna, id)
+
+    carregar: função query -> instâncias (ex.: serializers.carregar);
+    por padrão query.all(). Retorna (itens, dicionário 'pagination').
+    contar_primeira_pagina: sem cursor e sem ?total, conta o total exato
+    (clientes antigos leem 'total' da primeira página como o tamanho da listagem).
+    """
+    carregar = carregar or (lambda q: q.all())
+    limite = parametros['limit']
+    paginacao = {'limit': limite}
+
+    modo_total = parametros['total']
+    if modo_total is None and not parametros['cursor'] and contar_primeira_pagina:
+        modo_total = 'exato'
+    if modo_total in ('exato', 'estimado'):
+        paginacao['total'], paginacao['total_estimado'] = contar_total(query, modo_total)
+
+    if crescente:
+        ordenada = query.order_by(coluna.asc(), modelo.id.asc())
+    else:
+        ordenada = query.order_by(coluna.desc(), modelo.id.desc())
+
+    # Modo legado: OFFSET com total exato, igual ao comportamento anterior
+    if parametros['offset'] is not None and not parametros['cursor']:
+        offset = max(parametros['offset'], 0)
+        if 'total' not in paginacao:
+            paginacao['total'], paginacao['total_estimado'] = contar_total(query, 'exato')
+        itens = carregar(ordenada.offset(offset).limit(limite))
+        paginacao.update({
+            'offset': offset,
+            'has_more': (offset + limite) < paginacao['total'],
+            'next_cursor': None
+        })
+        return itens, paginacao
+
+    if parametros['cursor']:
+        valor, id_ = decodificar_cursor(parametros['cursor'], coluna)
+        # Valor lido do próprio banco pela PK: evita divergência de formato
+        # (ex.: timestamps do SQLite); o valor do token cobre linha excluída
+        referencia = func.coalesce(
+            select(coluna).where(modelo.id == id_).scalar_subquery(),
+            literal(valor, type_=coluna.type)
+        )
+        chave = tuple_(coluna, modelo.id)
+        limite_chave = tuple_(referencia, literal(id_))
+        ordenada = ordenada.filter(chave > limite_chave if crescente else chave < limite_chave)
+
+    itens = carregar(ordenada.limit(limite + 1))
+    tem_mais = len(itens) > limite
+    itens = itens[:limite]
+
+    if not parametros['cursor']:
+        paginacao['offset'] = 0
+    paginacao.update({
+        'has_more': tem_mais,
+        'next_cursor': codificar_cursor(getattr(itens[-1], coluna.key), itens[-1].id) if tem_mais else None
+    })
+    return itens, paginacao
@@ -0,0 +1,144 @@
+# 📁 services/perfil_sql.py - LOG DE QUERIES LENTAS E DETECTOR DE N+1
+# Relacionamentos lazy (Pasta.arquivos, Cliente.projetos,
+# Funcionario.equipe_projeto...) geram N+1 sem nenhum aviso. Este módulo
+# observa cada statement pelo acumulador de services/statements_requisicao.py
+# (o mesmo par de eventos do engine usado pelas métricas):
+#   - Query acima de SQL_LENTA_MS: log (structlog) com rota, duração e a pilha
+#     da aplicação que originou a query
+#   - Na mesma requisição, o mesmo formato de statement repetido
+#     SQL_N1_LIMITE vezes ou mais: log 'sql_n_mais_1' com rota e pilha
+#   - Relatório agregado em GET /api/admin/perfil-sql (DELETE zera)
+# A pilha só é capturada em query lenta ou na primeira repetição de um formato,
+# então o custo por statement fica em uma busca num dicionário.
+# SQL_PERFIL=0 desliga tudo.
+import os
+import re
+import time
+import threading
+import traceback
+from collections import deque
+from functools import lru_cache
+import structlog
+from flask import request, jsonify
+from services.statements_requisicao import registrar_statements, observar_statements, ao_fim_da_requisicao
+
+logger = structlog.get_logger(__name__)
+
+ATIVO = os.getenv('SQL_PERFIL', '1') != '0'
+LIMITE_LENTA_MS = float(os.getenv('SQL_LENTA_MS', '200'))
+LIMITE_N_MAIS_1 = int(os.getenv('SQL_N1_LIMITE', '10'))
+PROFUNDIDADE_PILHA = int(os.getenv('SQL_PERFIL_PILHA', '8'))
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Frames da instrumentação (este módulo e o par de eventos compartilhado) não entram na pilha
+ARQUIVOS_INSTRUMENTACAO = {os.path.abspath(__file__), os.path.join(APP_DIR, 'services', 'statements_requisicao.py')}
+
+_trava = threading.Lock()
+_lentas = deque(maxlen=int(os.getenv('SQL_LENTA_HISTORICO', '200')))
+_n_mais_1 = {}
+
+# ===== FORMATO DO STATEMENT =====
+_LISTA_PARAMETROS = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)')
+_NUMEROS = re.compile(r'\b\d+\b')
+_ESPACOS = re.compile(r'\s+')
+
+@lru_cache(maxsize=4096)
+def formato_statement(statement):
+    """Statement sem variações de listas IN (...) e literais numéricos"""
+    formato = _LISTA_PARAMETROS.sub('(?...)', statement)
+    formato = _NUMEROS.sub('N', formato)
+    return _ESPACOS.sub(' ', formato).strip()
+
+def pilha_aplicacao():
+    """Frames do código da aplicação (sem bibliotecas e sem a instrumentação)"""
+    frames = [
+        f'{os.path.relpath(frame.filename, APP_DIR)}:{frame.lineno} {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(APP_DIR) and os.path.abspath(frame.filename) not in ARQUIVOS_INSTRUMENTACAO
+    ]
+    return frames[-PROFUNDIDADE_PILHA:]
+
+def _rota():
+    try:
+        regra = request.url_rule
+        return f'{request.method} {regra.rule if regra is not None else request.path}'
+    except RuntimeError:
+        return f'thread {threading.current_thread().name}'
+
+# ===== FIM DA REQUISIÇÃO =====
+def _fim_requisicao(acumulador, response):
+    rota = None
+    for formato, (repeticoes, pilha) in acumulador.formatos.items():
+        if repeticoes < LIMITE_N_MAIS_1:
+            continue
+        rota = rota or _rota()
+        logger.warning("sql_n_mais_1", rota=rota, repeticoes=repeticoes, statement=formato[:300], pilha=pilha)
+        with _trava:
+            registro = _n_mais_1.setdefault((rota, formato), {
+                'rota': rota, 'statement': formato, 'requisicoes': 0,
+                'repeticoes_total': 0, 'repeticoes_max': 0, 'pilha': pilha
+            })
+            registro['requisicoes'] += 1
+            registro['repeticoes_total'] += repeticoes
+            registro['repeticoes_max'] = max(registro['repeticoes_max'], repeticoes)
+            registro['ultima'] = time.time()
+    return response
+
+# ===== CADA STATEMENT =====
+def _observar(acumulador, nome, statement, duracao):
+    if acumulador is not None:
+        formato = formato_statement(statement)
+        contagem = acumulador.formatos.get(formato)
+        if contagem is None:
+            acumulador.formatos[formato] = [1, None]
+        else:
+            contagem[0] += 1
+            if contagem[1] is None:
+                contagem[1] = pilha_aplicacao()
+
+    duracao_ms = duracao * 1000
+    if duracao_ms >= LIMITE_LENTA_MS:
+        registro = {
+            'rota': _rota(), 'engine': nome, 'duracao_ms': round(duracao_ms, 1),
+            'statement': statement[:1000], 'pilha': pilha_aplicacao(), 'momento': time.time()
+        }
+        logger.warning("sql_lenta", rota=registro['rota'], engine=nome, duracao_ms=registro['duracao_ms'],
+                       statement=statement[:300], pilha=registro['pilha'])
+        with _trava:
+            _lentas.append(registro)
+
+# ===== RELATÓRIO =====
+def relatorio():
+    with _trava:
+        suspeitas = sorted(_n_mais_1.values(), key=lambda item: item['repeticoes_total'], reverse=True)
+        lentas = sorted(_lentas, key=lambda item: item['duracao_ms'], reverse=True)
+    return {
+        'configuracao': {'ativo': ATIVO, 'lenta_ms': LIMITE_LENTA_MS, 'n_mais_1_limite': LIMITE_N_MAIS_1},
+        'n_mais_1': [dict(item) for item in suspeitas],
+        'queries_lentas': [dict(item) for item in lentas]
+    }
+
+def zerar():
+    with _trava:
+        _lentas.clear()
+        _n_mais_1.clear()
+
+def registrar_perfil_sql(app):
+    """Ligar os hooks de requisição, os eventos dos engines e o relatório de administração"""
+    from middleware.auth_middleware import admin_required
+
+    if ATIVO:
+        registrar_statements(app)
+        observar_statements(_observar)
+        ao_fim_da_requisicao(_fim_requisicao)
+
+    @app.route('/api/admin/perfil-sql', methods=['GET', 'DELETE'])
+    @admin_required
+    def perfil_sql():
+        """Queries lentas e suspeitas de N+1 (DELETE zera o relatório)"""
+        try:
+            if request.method == 'DELETE':
+                zerar()
+            return jsonify({'success': True, 'data': relatorio()})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
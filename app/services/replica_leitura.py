@@ -0,0 +1,132 @@
+# 📁 services/replica_leitura.py - ROTEAMENTO DE LEITURAS PESADAS PARA A RÉPLICA
+# Agregações do dashboard, relatório financeiro e estatísticas (arquivos e
+# webhooks) disputavam o primário do RDS com as escritas. Com DATABASE_READ_URL
+# definida, rotas marcadas com @somente_leitura leem da réplica:
+#   - Lag: medido a cada DB_REPLICA_VERIFICACAO segundos; acima de
+#     DB_REPLICA_LAG_MAXIMO (ou réplica fora do ar) a leitura volta ao primário
+#   - Read-your-writes: depois de um commit, o mesmo usuário (ou IP) lê do
+#     primário por DB_REPLICA_JANELA segundos (padrão = lag máximo aceito)
+#   - Header 'X-Consistencia: forte' força o primário numa requisição
+# Sem DATABASE_READ_URL o decorator não faz nada (tudo no primário).
+# A réplica só é usada em apps com registrar_sessao_requisicao (database.py).
+import os
+import time
+import threading
+from functools import wraps
+from flask import g, request, has_request_context
+from sqlalchemy import event, text
+import database
+from database import SessionLocal
+from services.cache import CacheLRU, redis_obter_json, redis_definir_json
+
+LAG_MAXIMO = float(os.getenv('DB_REPLICA_LAG_MAXIMO', '5'))
+INTERVALO_VERIFICACAO = float(os.getenv('DB_REPLICA_VERIFICACAO', '2'))
+JANELA_ESCRITA = float(os.getenv('DB_REPLICA_JANELA', str(LAG_MAXIMO)))
+
+_escritas_recentes = CacheLRU(tamanho_maximo=10_000, ttl=JANELA_ESCRITA)
+_estado = {'verificado_em': 0.0, 'lag_segundos': None, 'saudavel': False, 'erro': None}
+_trava_verificacao = threading.Lock()
+_contadores = {'replica': 0, 'primario_lag': 0, 'primario_indisponivel': 0, 'primario_escrita_recente': 0, 'primario_forcado': 0}
+_trava_contadores = threading.Lock()
+
+def _contar(chave):
+    with _trava_contadores:
+        _contadores[chave] += 1
+
+# ===== LAG DA RÉPLICA =====
+def medir_lag():
+    """Atraso (segundos) da réplica em relação ao primário"""
+    with database.engine_leitura.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            # NULL quando a URL aponta para um primário (sem replay): sem atraso
+            lag = conn.execute(text(
+                'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+            )).scalar()
+            return max(0.0, float(lag)) if lag is not None else 0.0
+        # Outros bancos (ex.: dois arquivos SQLite em desenvolvimento): só checa a conexão
+        conn.execute(text('SELECT 1'))
+        return 0.0
+
+def estado_replica():
+    """Estado da réplica, reavaliado no máximo a cada INTERVALO_VERIFICACAO"""
+    if database.engine_leitura is None:
+        return False
+    agora = time.monotonic()
+    if agora - _estado['verificado_em'] >= INTERVALO_VERIFICACAO and _trava_verificacao.acquire(blocking=False):
+        # Uma thread mede; as outras seguem com o último resultado
+        try:
+            try:
+                lag = medir_lag()
+                _estado.update(lag_segundos=round(lag, 3), saudavel=lag <= LAG_MAXIMO, erro=None)
+            except Exception as e:
+                print(f"⚠️  Réplica de leitura indisponível: {e}")
+                _estado.update(lag_segundos=None, saudavel=False, erro=str(e))
+            _estado['verificado_em'] = time.monotonic()
+        finally:
+            _trava_verificacao.release()
+    return _estado['saudavel']
+
+# ===== READ-YOUR-WRITES =====
+def _chave_cliente():
+    user_id = g.get('user_id')
+    return f'usuario:{user_id}' if user_id else f'ip:{request.remote_addr}'
+
+def marcar_escrita(chave=None):
+    """Registrar que o cliente acabou de escrever (lê do primário durante a janela)"""
+    if not JANELA_ESCRITA:
+        return
+    chave = chave or _chave_cliente()
+    _escritas_recentes.definir(chave, time.time())
+    redis_definir_json(f'replica:escrita:{chave}', time.time(), JANELA_ESCRITA)
+
+def escreveu_recentemente(chave=None):
+    chave = chave or _chave_cliente()
+    momento = _escritas_recentes.obter(chave)
+    if momento is None:
+        momento = redis_obter_json(f'replica:escrita:{chave}')
+    return momento is not None and time.time() - momento < JANELA_ESCRITA
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _marcar_sessao_com_escrita(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info['replica_escrita'] = True
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _registrar_escrita_apos_commit(session):
+    if session.info.pop('replica_escrita', False) and database.engine_leitura is not None and has_request_context():
+        marcar_escrita()
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _descartar_escrita(session):
+    session.info.pop('replica_escrita', None)
+
+# ===== DECORATOR =====
+def somente_leitura(f):
+    """Rota só de leitura: usa a réplica quando ela está em dia e o cliente não acabou de escrever"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if database.engine_leitura is not None:
+            if request.headers.get('X-Consistencia', '').lower() == 'forte':
+                _contar('primario_forcado')
+            elif escreveu_recentemente():
+                _contar('primario_escrita_recente')
+            elif not estado_replica():
+                _contar('primario_lag' if _estado['lag_segundos'] is not None else 'primario_indisponivel')
+            else:
+                g._usar_replica = True
+                _contar('replica')
+        return f(*args, **kwargs)
+    return decorated
+
+def estatisticas():
+    with _trava_contadores:
+        contadores = dict(_contadores)
+    return {
+        'configurada': database.engine_leitura is not None,
+        'lag_segundos': _estado['lag_segundos'],
+        'lag_maximo': LAG_MAXIMO,
+        'saudavel': _estado['saudavel'],
+        'erro': _estado['erro'],
+        'janela_escrita_s': JANELA_ESCRITA,
+        **contadores
+    }
@@ -0,0 +1,139 @@
+# 📁 services/serializers.py - CAMADA DE SERIALIZAÇÃO SEM N+1
+# Cada to_dict() acessa relacionamentos lazy (cliente, projetos, arquivos,
+# equipe_projeto...). Em listagens isso vira um SELECT extra por linha.
+# Aqui fica, por modelo, o plano de carregamento que o to_dict() precisa:
+#   - opções selectinload/joinedload para os relacionamentos lidos
+#   - subconsultas COUNT correlacionadas para os totais (sem carregar coleções)
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload, selectinload, aliased
+from database import Projeto, Cliente, Pasta, Funcionario, EquipeProjeto, Arquivo, Conta
+
+def _contar(coluna_id, *condicoes):
+    """Subconsulta COUNT correlacionada"""
+    return select(func.count(coluna_id)).where(*condicoes).scalar_subquery()
+
+def _plano_projeto():
+    return {
+        'opcoes': [
+            joinedload(Projeto.cliente),
+            selectinload(Projeto.equipe_projeto).joinedload(EquipeProjeto.funcionario)
+        ],
+        'contagens': {
+            'total_arquivos': _contar(Arquivo.id, Arquivo.projeto_id == Projeto.id)
+        }
+    }
+
+def _plano_cliente():
+    return {
+        'opcoes': [],
+        'contagens': {
+            'total_projetos': _contar(Projeto.id, Projeto.cliente_id == Cliente.id)
+        }
+    }
+
+def _plano_pasta():
+    subpasta = aliased(Pasta)
+    return {
+        'opcoes': [
+            joinedload(Pasta.pasta_pai),
+            joinedload(Pasta.projeto)
+        ],
+        'contagens': {
+            'total_arquivos': _contar(Arquivo.id, Arquivo.pasta_id == Pasta.id),
+            'total_subpastas': _contar(subpasta.id, subpasta.pasta_pai_id == Pasta.id)
+        }
+    }
+
+def _plano_funcionario():
+    return {
+        'opcoes': [],
+        'contagens': {
+            'projetos_ativos': select(func.count(EquipeProjeto.id)).join(
+                Projeto, Projeto.id == EquipeProjeto.projeto_id
+            ).where(
+                EquipeProjeto.funcionario_id == Funcionario.id,
+                EquipeProjeto.ativo == True,
+                Projeto.status == 'Em Andamento'
+            ).scalar_subquery()
+        }
+    }
+
+def _plano_arquivo():
+    return {
+        'opcoes': [
+            joinedload(Arquivo.pasta),
+            joinedload(Arquivo.projeto)
+        ],
+        'contagens': {}
+    }
+
+def _plano_conta():
+    return {
+        'opcoes': [joinedload(Conta.projeto)],
+        'contagens': {}
+    }
+
+def _plano_equipe_projeto():
+    return {
+        'opcoes': [joinedload(EquipeProjeto.funcionario)],
+        'contagens': {}
+    }
+
+PLANOS = {
+    Projeto: _plano_projeto,
+    Cliente: _plano_cliente,
+    Pasta: _plano_pasta,
+    Funcionario: _plano_funcionario,
+    Arquivo: _plano_arquivo,
+    Conta: _plano_conta,
+    EquipeProjeto: _plano_equipe_projeto
+}
+
+def planejar(query, modelo):
+    """
+    Aplicar o plano de carregamento do modelo a uma query
+
+    Retorna (query, nomes_das_contagens). As contagens viram colunas extras
+    no resultado; use carregar() para executar e anexá-las às instâncias.
+    """
+    plano = PLANOS[modelo]()
+    query = query.options(*plano['opcoes'])
+
+    nomes = list(plano['contagens'])
+    if nomes:
+        query = query.add_columns(*[expr.label(nome) for nome, expr in plano['contagens'].items()])
+
+    return query, nomes
+
+def anexar_contagens(linhas, nomes):
+    """Converter linhas (instancia, contagem...) em instâncias com _contagens"""
+    if not nomes:
+        return list(linhas)
+
+    instancias = []
+    for linha in linhas:
+        instancia = linha[0]
+        instancia._contagens = dict(zip(nomes, linha[1:]))
+        instancias.append(instancia)
+    return instancias
+
+def carregar(query, modelo):
+    """Executar a query com o plano do modelo e devolver as instâncias"""
+    query, nomes = planejar(query, modelo)
+    return anexar_contagens(query.all(), nomes)
+
+def carregador(modelo):
+    """carregar() parcial, para services.paginacao.paginar(carregar=...)"""
+    return lambda query: carregar(query, modelo)
+
+def serializar(query, modelo):
+    """Atalho: carregar() + to_dict() de cada instância"""
+    return [instancia.to_dict() for instancia in carregar(query, modelo)]
+
+def opcoes_serializacao(args):
+    """?compact=1 e ?fields=id,nome_original,... -> kwargs de Arquivo.to_dict()"""
+    campos = tuple(campo.strip() for campo in args.get('fields', '').split(',') if campo.strip())
+    return {
+        'compacto': args.get('compact', '').lower() in ('1', 'true', 'sim'),
+        'campos': campos or None
+    }
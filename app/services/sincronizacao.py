@@ -0,0 +1,244 @@
+# 📁 services/sincronizacao.py - SINCRONIZAÇÃO INCREMENTAL (DELTA SYNC)
+# Dashboard, listas e o modo offline dos técnicos baixavam coleções inteiras
+# (to_dict() de tudo) a cada atualização. Aqui cada linha de Projeto, Cliente,
+# Conta, Arquivo, Pasta, Funcionario e Notificacao tem uma versão em
+# sync_alteracoes, gravada na mesma transação da escrita:
+#   - after_flush só junta as chaves (entidade, id) alteradas
+#   - before_commit incrementa sync_contador uma vez por transação e grava as
+#     chaves com essa versão. O lock da linha do contador ordena as versões
+#     pelo commit e fica preso só durante o commit, não a transação inteira
+#   - Exclusão vira lápide (excluido=True) com versão nova
+#   - GET /api/sync?since=V devolve só o que mudou depois de V
+# Só leituras com versão <= contador lido no início são devolvidas: versões
+# de transações ainda abertas ficam para a próxima sincronização.
+# Escritas fora do ORM (UPDATE/DELETE em massa via Core) não são rastreadas.
+import os
+import json
+import base64
+from sqlalchemy import event, select, update, insert, delete, tuple_, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from database import (
+    engine, SessionLocal, SyncAlteracao, SyncContador,
+    Projeto, Cliente, Conta, Arquivo, Pasta, Funcionario, Notificacao
+)
+from services.serializers import PLANOS, carregar
+from services.paginacao import CursorInvalido
+
+LIMITE_PADRAO = int(os.getenv('SYNC_LIMITE_PADRAO', '500'))
+LIMITE_MAXIMO = int(os.getenv('SYNC_LIMITE_MAXIMO', '2000'))
+CONTADOR_ID = 1
+
+# Nome da entidade na API -> modelo
+MODELOS_SYNC = {
+    'projetos': Projeto,
+    'clientes': Cliente,
+    'contas': Conta,
+    'arquivos': Arquivo,
+    'pastas': Pasta,
+    'funcionarios': Funcionario,
+    'notificacoes': Notificacao
+}
+_ENTIDADE_POR_MODELO = {modelo: entidade for entidade, modelo in MODELOS_SYNC.items()}
+
+# ===== VERSÕES =====
+def proxima_versao(conn):
+    """Incrementar o contador (lock da linha até o commit) e devolver a nova versão"""
+    tabela = SyncContador.__table__
+    alteradas = conn.execute(
+        update(tabela).where(tabela.c.id == CONTADOR_ID).values(versao=tabela.c.versao + 1)
+    ).rowcount
+    if not alteradas:
+        conn.execute(insert(tabela).values(id=CONTADOR_ID, versao=1))
+    return conn.execute(select(tabela.c.versao).where(tabela.c.id == CONTADOR_ID)).scalar_one()
+
+def versao_atual(db):
+    return db.execute(select(SyncContador.versao).where(SyncContador.id == CONTADOR_ID)).scalar() or 0
+
+def gravar_alteracoes(conn, alteracoes, versao):
+    """Upsert de {(entidade, id): excluido} em sync_alteracoes com a versão da transação"""
+    tabela = SyncAlteracao.__table__
+    linhas = [
+        {'entidade': entidade, 'entidade_id': entidade_id, 'versao': versao, 'excluido': excluido}
+        for (entidade, entidade_id), excluido in alteracoes.items()
+    ]
+    dialeto = conn.dialect.name
+    if dialeto in ('postgresql', 'sqlite'):
+        insert_dialeto = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        stmt = insert_dialeto(tabela)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['entidade', 'entidade_id'],
+            set_={'versao': stmt.excluded.versao, 'excluido': stmt.excluded.excluido, 'alterado_em': func.now()}
+        )
+        conn.execute(stmt, linhas)
+    else:
+        for linha in linhas:
+            conn.execute(delete(tabela).where(
+                tabela.c.entidade == linha['entidade'], tabela.c.entidade_id == linha['entidade_id']
+            ))
+        conn.execute(insert(tabela), linhas)
+
+@event.listens_for(SessionLocal, 'after_flush')
+def _registrar_alteracoes(session, flush_context):
+    alteracoes = {}
+    for obj in session.new:
+        entidade = _ENTIDADE_POR_MODELO.get(type(obj))
+        if entidade:
+            alteracoes[(entidade, obj.id)] = False
+    for obj in session.dirty:
+        entidade = _ENTIDADE_POR_MODELO.get(type(obj))
+        if entidade and session.is_modified(obj, include_collections=False):
+            alteracoes[(entidade, obj.id)] = False
+    for obj in session.deleted:
+        entidade = _ENTIDADE_POR_MODELO.get(type(obj))
+        if entidade:
+            alteracoes[(entidade, obj.id)] = True
+    if not alteracoes:
+        return
+
+    versao = session.info.get('sync_versao')
+    if versao is not None:
+        # Flush depois do before_commit (outro listener gravou algo): o contador já está travado
+        gravar_alteracoes(session.connection(), alteracoes, versao)
+        return
+    # Só as chaves: a versão sai no before_commit
+    session.info.setdefault('sync_alteracoes', {}).update(alteracoes)
+
+@event.listens_for(SessionLocal, 'before_commit')
+def _gravar_versao(session):
+    # O commit só faz o flush final depois deste evento
+    session.flush()
+    alteracoes = session.info.pop('sync_alteracoes', None)
+    if not alteracoes:
+        return
+    conn = session.connection()
+    # Uma versão por transação, mesmo com vários flushes
+    versao = session.info['sync_versao'] = proxima_versao(conn)
+    gravar_alteracoes(conn, alteracoes, versao)
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _liberar_versao(session):
+    session.info.pop('sync_versao', None)
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _descartar_versao(session):
+    session.info.pop('sync_versao', None)
+    session.info.pop('sync_alteracoes', None)
+
+def preparar_sync(bind=None):
+    """Criar o contador e, na primeira execução, registrar as linhas existentes numa versão inicial"""
+    bind = bind or engine
+    try:
+        with bind.begin() as conn:
+            if conn.execute(select(SyncAlteracao.entidade).limit(1)).first() is not None:
+                return 0
+            versao = proxima_versao(conn)
+            tabela = SyncAlteracao.__table__
+            total = 0
+            for entidade, modelo in MODELOS_SYNC.items():
+                total += conn.execute(insert(tabela).from_select(
+                    ['entidade', 'entidade_id', 'versao', 'excluido'],
+                    select(literal(entidade), modelo.id, literal(versao), literal(False))
+                )).rowcount or 0
+            if total:
+                print(f"🔄 Sincronização incremental iniciada ({total} linhas na versão {versao})")
+            return total
+    except Exception as e:
+        print(f"⚠️  Sincronização incremental indisponível: {e}")
+        return None
+
+# ===== CONSULTA =====
+def _codificar_cursor(versao, entidade, entidade_id):
+    bruto = json.dumps([versao, entidade, entidade_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip('=')
+
+def _decodificar_cursor(token):
+    try:
+        bruto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        versao, entidade, entidade_id = json.loads(bruto)
+        return int(versao), str(entidade), int(entidade_id)
+    except Exception:
+        raise CursorInvalido('Cursor inválido')
+
+def entidades_solicitadas(valor):
+    """?entidades=clientes,contas (padrão: todas)"""
+    if not valor:
+        return list(MODELOS_SYNC)
+    entidades = [entidade.strip() for entidade in valor.split(',') if entidade.strip()]
+    desconhecidas = [entidade for entidade in entidades if entidade not in MODELOS_SYNC]
+    if desconhecidas:
+        raise ValueError(f"Entidades desconhecidas: {', '.join(desconhecidas)}")
+    return entidades
+
+def _serializar(modelo, instancia):
+    # Sync é API nova: arquivos sem os aliases legados
+    if modelo is Arquivo:
+        return instancia.to_dict(compacto=True)
+    return instancia.to_dict()
+
+def _carregar_linhas(db, modelo, ids):
+    instancias = []
+    for inicio in range(0, len(ids), 500):
+        query = db.query(modelo).filter(modelo.id.in_(ids[inicio:inicio + 500]))
+        instancias += carregar(query, modelo) if modelo in PLANOS else query.all()
+    return instancias
+
+def alteracoes_desde(db, desde, entidades=None, limite=None, cursor=None):
+    """
+    Inserções/atualizações e exclusões com versão > desde
+
+    Retorna {'versao', 'tem_mais', 'next_cursor', 'reiniciado', 'alteracoes': {entidade: {...}}}.
+    Com tem_mais, repetir com o mesmo since e o next_cursor; 'versao' só vale na última página.
+    """
+    entidades = entidades or list(MODELOS_SYNC)
+    limite = min(max(1, limite or LIMITE_PADRAO), LIMITE_MAXIMO)
+    atual = versao_atual(db)
+
+    # Versão acima da atual: banco restaurado/recriado; o cliente precisa recomeçar do zero
+    reiniciado = desde > atual
+    if reiniciado:
+        desde = 0
+
+    query = db.query(SyncAlteracao.entidade, SyncAlteracao.entidade_id, SyncAlteracao.versao, SyncAlteracao.excluido).filter(
+        SyncAlteracao.versao > desde,
+        SyncAlteracao.versao <= atual,
+        SyncAlteracao.entidade.in_(entidades)
+    )
+    # Primeira sincronização: lápides não interessam
+    if desde == 0:
+        query = query.filter(SyncAlteracao.excluido == False)
+    if cursor:
+        query = query.filter(
+            tuple_(SyncAlteracao.versao, SyncAlteracao.entidade, SyncAlteracao.entidade_id) > tuple_(*_decodificar_cursor(cursor))
+        )
+    linhas = query.order_by(SyncAlteracao.versao, SyncAlteracao.entidade, SyncAlteracao.entidade_id).limit(limite + 1).all()
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    alteracoes = {entidade: {'alterados': [], 'excluidos': []} for entidade in entidades}
+    versoes = {}
+    for entidade, entidade_id, versao, excluido in linhas:
+        if excluido:
+            alteracoes[entidade]['excluidos'].append(entidade_id)
+        else:
+            versoes.setdefault(entidade, {})[entidade_id] = versao
+
+    for entidade, por_id in versoes.items():
+        modelo = MODELOS_SYNC[entidade]
+        encontrados = set()
+        for instancia in _carregar_linhas(db, modelo, list(por_id)):
+            dados = _serializar(modelo, instancia)
+            dados['_versao'] = por_id[instancia.id]
+            alteracoes[entidade]['alterados'].append(dados)
+            encontrados.add(instancia.id)
+        # Excluída entre a leitura do log e a das linhas: já informar (a lápide vem depois, com versão maior)
+        alteracoes[entidade]['excluidos'] += [entidade_id for entidade_id in por_id if entidade_id not in encontrados]
+
+    ultima = linhas[-1] if linhas else None
+    return {
+        'versao': None if tem_mais else atual,
+        'tem_mais': tem_mais,
+        'next_cursor': _codificar_cursor(ultima[2], ultima[0], ultima[1]) if tem_mais else None,
+        'reiniciado': reiniciado,
+        'total': len(linhas),
+        'alteracoes': alteracoes
+    }
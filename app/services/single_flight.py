@@ -0,0 +1,208 @@
+# 📁 services/single_flight.py - COALESCÊNCIA DE LEITURAS CARAS IDÊNTICAS (SINGLE-FLIGHT)
+# Às 8h, 30 pessoas abrem o dashboard e dashboard_data_consolidado,
+# resumo_executivo e relatorio_financeiro rodam as mesmas agregações 30 vezes
+# ao mesmo tempo. Com @coalescer:
+#   - No processo: só uma execução por chave em andamento; quem chega durante
+#     a execução espera e recebe o mesmo resultado
+#   - Entre workers do gunicorn: trava no Redis (SET NX PX). Quem não pegou a
+#     trava espera o resultado publicado pelo dono (SINGLE_FLIGHT_RESULTADO_TTL)
+#     e, se o dono sumir ou demorar demais, calcula sozinho
+#   - Contadores por rota: líder, coalescidas (local/redis), esperas esgotadas
+# Não é cache: o resultado só é compartilhado enquanto a execução está em voo
+# (mais o TTL curto do resultado no Redis, para quem chegou no fim).
+# 'X-Consistencia: forte' e clientes com escrita recente (réplica) não coalescem.
+import os
+import time
+import uuid
+import hashlib
+import threading
+from functools import wraps
+from flask import request, make_response, current_app
+import database
+from services.cache import redis_cliente, redis_obter_json, redis_definir_json
+
+ATIVO = os.getenv('SINGLE_FLIGHT', '1') != '0'
+ESPERA_MAXIMA = float(os.getenv('SINGLE_FLIGHT_ESPERA', '15'))
+TTL_TRAVA = float(os.getenv('SINGLE_FLIGHT_TRAVA_TTL', '30'))
+TTL_RESULTADO = float(os.getenv('SINGLE_FLIGHT_RESULTADO_TTL', '1'))
+INTERVALO_REDIS = float(os.getenv('SINGLE_FLIGHT_INTERVALO', '0.025'))
+
+PREFIXO_REDIS = 'arconset:single_flight:'
+# Cabeçalhos que não fazem sentido repetir na resposta de outra requisição
+CABECALHOS_IGNORADOS = {'content-length', 'set-cookie'}
+
+# Libera a trava só se ainda for do mesmo dono (pode ter expirado e sido pega por outro)
+_LIBERAR_TRAVA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class _Voo:
+    """Execução em andamento de uma chave neste processo"""
+
+    def __init__(self):
+        self.concluido = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+_voos = {}
+_trava = threading.Lock()
+_contadores = {}
+
+def _contar(nome, resultado):
+    with _trava:
+        por_nome = _contadores.setdefault(nome, {})
+        por_nome[resultado] = por_nome.get(resultado, 0) + 1
+
+def estatisticas():
+    """{nome: {'lider': n, 'coalescido_local': n, 'coalescido_redis': n, ...}}"""
+    with _trava:
+        return {nome: dict(valores) for nome, valores in _contadores.items()}
+
+def zerar():
+    with _trava:
+        _contadores.clear()
+
+# ===== COORDENAÇÃO ENTRE WORKERS =====
+def _chave_redis(chave):
+    return PREFIXO_REDIS + hashlib.sha1(chave.encode()).hexdigest()
+
+def _executar_distribuido(nome, chave, funcao, compartilhavel):
+    """Dono da trava no Redis calcula e publica; os outros workers esperam o resultado"""
+    cliente = redis_cliente()
+    if cliente is None:
+        return funcao(), 'lider'
+
+    base = _chave_redis(chave)
+    chave_resultado = base + ':resultado'
+    chave_trava = base + ':trava'
+    dono = uuid.uuid4().hex
+    limite = time.monotonic() + ESPERA_MAXIMA
+
+    while True:
+        pronto = redis_obter_json(chave_resultado)
+        if pronto is not None:
+            return pronto, 'coalescido_redis'
+        try:
+            travou = cliente.set(chave_trava, dono, nx=True, px=int(TTL_TRAVA * 1000))
+            trava_existe = travou or cliente.exists(chave_trava)
+        except Exception as e:
+            print(f"⚠️  Redis indisponível (single-flight): {e}")
+            return funcao(), 'lider'
+
+        if travou:
+            try:
+                resultado = funcao()
+                if TTL_RESULTADO and compartilhavel(resultado):
+                    redis_definir_json(chave_resultado, resultado, max(1, int(round(TTL_RESULTADO))))
+                return resultado, 'lider'
+            finally:
+                try:
+                    cliente.eval(_LIBERAR_TRAVA, 1, chave_trava, dono)
+                except Exception:
+                    pass
+
+        if not trava_existe:
+            # Dono terminou sem publicar (erro/resposta não compartilhável): tentar a trava de novo
+            continue
+        if time.monotonic() >= limite:
+            return funcao(), 'espera_esgotada'
+        time.sleep(INTERVALO_REDIS)
+
+# ===== API =====
+def executar(nome, chave, funcao, compartilhavel=lambda resultado: True):
+    """
+    Executar funcao() uma única vez por chave em voo; chamadas concorrentes recebem o mesmo resultado
+
+    O resultado precisa ser serializável em JSON para ser repassado entre workers.
+    Exceções do líder são propagadas para quem esperava no mesmo processo.
+    """
+    with _trava:
+        voo = _voos.get(chave)
+        lider = voo is None
+        if lider:
+            voo = _voos[chave] = _Voo()
+
+    if not lider:
+        if not voo.concluido.wait(ESPERA_MAXIMA):
+            _contar(nome, 'espera_esgotada')
+            return funcao()
+        _contar(nome, 'coalescido_local')
+        if voo.erro is not None:
+            raise voo.erro
+        return voo.resultado
+
+    try:
+        voo.resultado, papel = _executar_distribuido(nome, chave, funcao, compartilhavel)
+        _contar(nome, papel)
+        return voo.resultado
+    except Exception as e:
+        voo.erro = e
+        raise
+    finally:
+        with _trava:
+            _voos.pop(chave, None)
+        voo.concluido.set()
+
+def _chave_requisicao(nome, variar_por):
+    partes = [nome, request.method, request.path]
+    partes += [f'{chave}={valor}' for chave, valor in sorted(request.args.items(multi=True))]
+    if variar_por:
+        partes.append(str(variar_por()))
+    return '|'.join(partes)
+
+def _ignorar_coalescencia():
+    if request.headers.get('X-Consistencia', '').lower() == 'forte':
+        return True
+    if database.engine_leitura is not None:
+        from services.replica_leitura import escreveu_recentemente
+        return escreveu_recentemente()
+    return False
+
+def _capturar(resposta):
+    """Response -> dict (corpo, status e cabeçalhos) para repassar a outras requisições"""
+    corpo = resposta.get_data()
+    try:
+        corpo = corpo.decode('utf-8')
+    except UnicodeDecodeError:
+        # Binário: repassado só dentro do processo (o Redis recebe JSON)
+        pass
+    return {
+        'corpo': corpo,
+        'status': resposta.status_code,
+        'cabecalhos': [[chave, valor] for chave, valor in resposta.headers.items() if chave.lower() not in CABECALHOS_IGNORADOS]
+    }
+
+def coalescer(f=None, *, variar_por=None):
+    """
+    Decorator de rota GET: requisições idênticas simultâneas (mesma rota e query string)
+    compartilham uma única execução
+
+    variar_por: função chamada na requisição cujo valor entra na chave (ex.: papel do usuário)
+    Uso: @coalescer ou @coalescer(variar_por=lambda: g.user_role), abaixo do @route.
+    """
+    def decorator(funcao):
+        nome = funcao.__name__
+
+        @wraps(funcao)
+        def decorated(*args, **kwargs):
+            if not ATIVO or request.method != 'GET' or _ignorar_coalescencia():
+                if ATIVO:
+                    _contar(nome, 'ignorado')
+                return funcao(*args, **kwargs)
+
+            # Só respostas 2xx em texto vão para o Redis; erros ficam com quem esperava neste processo
+            dados = executar(
+                nome, _chave_requisicao(nome, variar_por),
+                lambda: _capturar(make_response(funcao(*args, **kwargs))),
+                compartilhavel=lambda dados: isinstance(dados['corpo'], str) and 200 <= dados['status'] < 300
+            )
+            resposta = current_app.response_class(dados['corpo'], status=dados['status'])
+            for chave, valor in dados['cabecalhos']:
+                resposta.headers[chave] = valor
+            return resposta
+        return decorated
+
+    return decorator(f) if f is not None else decorator
@@ -0,0 +1,105 @@
+# 📁 services/statements_requisicao.py - STATEMENTS SQL POR REQUISIÇÃO (UM PAR DE EVENTOS PARA TODOS)
+# Métricas (services/metricas.py) e perfil SQL (services/perfil_sql.py)
+# precisam do mesmo dado: cada statement executado, sua duração e a
+# requisição a que pertence. Cada par before/after_cursor_execute custa
+# ~7 µs por statement só no despacho do SQLAlchemy, então existe um único par
+# por engine e um único acumulador por requisição:
+#   - before_request cria o Acumulador (ContextVar, mais barato que flask.g)
+#   - after_cursor_execute mede a duração uma vez, soma statements/tempo no
+#     acumulador e chama os observadores (ex.: detector de N+1, query lenta)
+#   - after_request entrega o acumulador às funções de fim de requisição
+# Statements fora de requisição (workers, threads) vão para um contador por
+# engine que as métricas drenam na exposição.
+import time
+import threading
+from contextvars import ContextVar
+from sqlalchemy import event
+from database import engine, engine_leitura
+
+_trava = threading.Lock()
+_engines_instrumentados = set()
+_requisicao_atual = ContextVar('statements_requisicao', default=None)
+# função(acumulador ou None, engine, statement, duracao_segundos)
+_observadores = []
+# função(acumulador, response) -> response
+_fim_requisicao = []
+_fora_de_requisicao = {}
+
+class Acumulador:
+    """Statements da requisição atual; 'formatos' é do detector de N+1 ({formato: [repetições, pilha]})"""
+
+    __slots__ = ('inicio', 'statements', 'segundos_banco', 'por_engine', 'formatos')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.statements = 0
+        self.segundos_banco = 0.0
+        self.por_engine = {}
+        self.formatos = {}
+
+def observar_statements(funcao):
+    """Chamar funcao(acumulador, engine, statement, duracao) a cada statement (acumulador None fora de requisição)"""
+    if funcao not in _observadores:
+        _observadores.append(funcao)
+
+def ao_fim_da_requisicao(funcao):
+    """Chamar funcao(acumulador, response) no after_request, na ordem de registro"""
+    if funcao not in _fim_requisicao:
+        _fim_requisicao.append(funcao)
+
+def drenar_fora_de_requisicao():
+    """{engine: statements} executados fora de requisição desde a última chamada"""
+    with _trava:
+        contagens = dict(_fora_de_requisicao)
+        _fora_de_requisicao.clear()
+    return contagens
+
+# ===== HOOKS DO FLASK =====
+def _inicio_requisicao():
+    _requisicao_atual.set(Acumulador())
+
+def _fim_da_requisicao(response):
+    acumulador = _requisicao_atual.get()
+    if acumulador is None:
+        return response
+    _requisicao_atual.set(None)
+    for funcao in _fim_requisicao:
+        response = funcao(acumulador, response)
+    return response
+
+# ===== EVENTOS DO ENGINE =====
+def _instrumentar_engine(engine_alvo, nome):
+    # create_app() pode ser chamado mais de uma vez no mesmo processo
+    if id(engine_alvo) in _engines_instrumentados:
+        return
+    _engines_instrumentados.add(id(engine_alvo))
+
+    @event.listens_for(engine_alvo, 'before_cursor_execute')
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._statement_inicio = time.perf_counter()
+
+    @event.listens_for(engine_alvo, 'after_cursor_execute')
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, '_statement_inicio', None)
+        duracao = time.perf_counter() - inicio if inicio is not None else 0.0
+        acumulador = _requisicao_atual.get()
+        if acumulador is None:
+            with _trava:
+                _fora_de_requisicao[nome] = _fora_de_requisicao.get(nome, 0) + 1
+        else:
+            acumulador.statements += 1
+            acumulador.segundos_banco += duracao
+            acumulador.por_engine[nome] = acumulador.por_engine.get(nome, 0) + 1
+        for observador in _observadores:
+            observador(acumulador, nome, statement, duracao)
+
+def registrar_statements(app):
+    """Ligar os hooks de requisição (uma vez por app) e os eventos dos engines (uma vez por processo)"""
+    if 'statements_requisicao' not in app.extensions:
+        app.extensions['statements_requisicao'] = True
+        app.before_request(_inicio_requisicao)
+        app.after_request(_fim_da_requisicao)
+    _instrumentar_engine(engine, 'primario')
+    if engine_leitura is not None:
+        _instrumentar_engine(engine_leitura, 'replica')
@@ -0,0 +1,258 @@
+# 📁 services/upload_stream.py - PIPELINE DE UPLOAD EM STREAMING
+# Lê o upload em blocos uma única vez: cada bloco atualiza tamanho e SHA-256,
+# o primeiro bloco define o MIME (assinatura do conteúdo) e o bloco segue
+# direto para o destino (disco local ou S3 multipart). Memória por upload
+# fica limitada a um bloco (local) ou a uma parte do multipart (S3).
+import os
+import sys
+import uuid
+import hashlib
+import mimetypes
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import magic
+    HAS_MAGIC = True
+except ImportError:
+    HAS_MAGIC = False
+
+TAMANHO_BLOCO = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))  # 1MB
+# S3 exige partes de no mínimo 5MB (exceto a última)
+TAMANHO_PARTE_S3 = max(int(os.getenv('UPLOAD_S3_PART_SIZE', 8 * 1024 * 1024)), 5 * 1024 * 1024)
+
+class ArquivoMuitoGrande(Exception):
+    """Upload ultrapassou o tamanho máximo durante o streaming"""
+
+    def __init__(self, tamanho_maximo):
+        self.tamanho_maximo = tamanho_maximo
+        super().__init__(f'Arquivo muito grande. Máximo: {tamanho_maximo // (1024 * 1024)}MB')
+
+# ===== DETECÇÃO DE MIME =====
+ASSINATURAS = [
+    (b'%PDF', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'AC10', 'image/vnd.dwg'),
+    (b'Rar!\x1a\x07', 'application/vnd.rar'),
+    (b"7z\xbc\xaf'\x1c", 'application/x-7z-compressed'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+# Tipos genéricos cujo tipo real vem da extensão (docx/xlsx em zip, doc em OLE, csv em texto)
+GENERICOS = {'application/zip', 'application/x-ole-storage', 'text/plain'}
+
+def detectar_mime(cabecalho, nome_arquivo, content_type=None):
+    """MIME pelo conteúdo (python-magic ou assinaturas), depois extensão e header do cliente"""
+    pela_extensao = mimetypes.guess_type(nome_arquivo)[0]
+
+    detectado = None
+    if cabecalho:
+        if HAS_MAGIC:
+            try:
+                detectado = magic.from_buffer(cabecalho, mime=True)
+            except Exception:
+                detectado = None
+        if not detectado or detectado in ('application/octet-stream', 'text/plain'):
+            detectado = next((mime for assinatura, mime in ASSINATURAS if cabecalho.startswith(assinatura)), detectado)
+
+    if detectado in GENERICOS and pela_extensao:
+        return pela_extensao
+    if detectado and detectado != 'application/octet-stream':
+        return detectado
+    return pela_extensao or content_type or 'application/octet-stream'
+
+# ===== DESTINOS =====
+class DestinoLocal:
+    """Grava em arquivo temporário e move para o caminho final ao concluir"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.caminho_tmp = f'{caminho}.parcial'
+        self._arquivo = open(self.caminho_tmp, 'wb')
+
+    def escrever(self, bloco):
+        self._arquivo.write(bloco)
+
+    def concluir(self):
+        self._arquivo.close()
+        os.replace(self.caminho_tmp, self.caminho)
+        return {'storage_type': 'local', 'caminho': self.caminho}
+
+    def abortar(self):
+        self._arquivo.close()
+        if os.path.exists(self.caminho_tmp):
+            os.remove(self.caminho_tmp)
+
+class DestinoS3:
+    """
+    Upload multipart para S3 com buffer de uma parte
+
+    Arquivos menores que uma parte vão em um único put_object.
+    """
+
+    def __init__(self, s3_client, bucket, chave, metadados=None, tamanho_parte=None):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.chave = chave
+        self.metadados = metadados or {}
+        self.tamanho_parte = tamanho_parte or TAMANHO_PARTE_S3
+        self.content_type = 'application/octet-stream'
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._partes = []
+
+    def _iniciar_multipart(self):
+        resposta = self.s3.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.chave,
+            ContentType=self.content_type,
+            ServerSideEncryption='AES256',
+            Metadata=self.metadados
+        )
+        self._upload_id = resposta['UploadId']
+
+    def _enviar_parte(self, dados):
+        if self._upload_id is None:
+            self._iniciar_multipart()
+        numero = len(self._partes) + 1
+        resposta = self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.chave,
+            UploadId=self._upload_id,
+            PartNumber=numero,
+            Body=dados
+        )
+        self._partes.append({'ETag': resposta['ETag'], 'PartNumber': numero})
+
+    def escrever(self, bloco):
+        # Completa a parte atual e envia o próprio buffer (sem cópia extra)
+        while bloco:
+            falta = self.tamanho_parte - len(self._buffer)
+            self._buffer += bloco[:falta]
+            bloco = bloco[falta:]
+            if len(self._buffer) >= self.tamanho_parte:
+                self._enviar_parte(self._buffer)
+                self._buffer = bytearray()
+
+    def concluir(self):
+        if self._upload_id is None:
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self.chave,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type,
+                ServerSideEncryption='AES256',
+                Metadata=self.metadados
+            )
+        else:
+            if self._buffer:
+                self._enviar_parte(self._buffer)
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.chave,
+                UploadId=self._upload_id,
+                MultipartUpload={'Parts': self._partes}
+            )
+        self._buffer = bytearray()
+        return {'storage_type': 's3', 'aws_s3_key': self.chave, 'aws_s3_bucket': self.bucket}
+
+    def abortar(self):
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.chave, UploadId=self._upload_id)
+            except Exception as e:
+                print(f"⚠️  Erro ao abortar multipart {self.chave}: {e}")
+
+# ===== PIPELINE =====
+def processar_upload(stream, destino, nome_arquivo, tamanho_maximo, content_type=None):
+    """
+    Copiar stream -> destino em uma passada
+
+    Retorna dict com tamanho, hash_sha256, tipo_mime e os campos de
+    armazenamento do destino. Levanta ArquivoMuitoGrande (destino abortado)
+    assim que o limite é ultrapassado.
+    """
+    sha256 = hashlib.sha256()
+    tamanho = 0
+    tipo_mime = None
+
+    try:
+        while True:
+            bloco = stream.read(TAMANHO_BLOCO)
+            if not bloco:
+                break
+
+            if tipo_mime is None:
+                tipo_mime = detectar_mime(bloco, nome_arquivo, content_type)
+                if hasattr(destino, 'content_type'):
+                    destino.content_type = tipo_mime
+
+            tamanho += len(bloco)
+            if tamanho > tamanho_maximo:
+                raise ArquivoMuitoGrande(tamanho_maximo)
+
+            sha256.update(bloco)
+            destino.escrever(bloco)
+
+        if tipo_mime is None:
+            tipo_mime = detectar_mime(b'', nome_arquivo, content_type)
+            if hasattr(destino, 'content_type'):
+                destino.content_type = tipo_mime
+
+        armazenamento = destino.concluir()
+    except BaseException:
+        destino.abortar()
+        raise
+
+    return {
+        'tamanho': tamanho,
+        'hash_sha256': sha256.hexdigest(),
+        'tipo_mime': tipo_mime,
+        **armazenamento
+    }
+
+# ===== ESCOLHA DO DESTINO =====
+# config/aws_s3.py fica na raiz do repositório (fora de app/)
+RAIZ_PROJETO = str(Path(__file__).resolve().parents[2])
+if RAIZ_PROJETO not in sys.path:
+    sys.path.append(RAIZ_PROJETO)
+
+s3_manager = None
+if os.getenv('AWS_S3_BUCKET'):
+    try:
+        from config.aws_s3 import s3_manager
+    except ImportError:
+        s3_manager = None
+
+def s3_disponivel():
+    return bool(s3_manager and s3_manager.s3_enabled)
+
+def criar_destino(upload_folder, nome_seguro, nome_original, pasta_id=None, projeto_id=None):
+    """
+    S3 multipart quando o S3FileManager estiver habilitado; senão disco local
+
+    Retorna (destino, nome_arquivo_unico).
+    """
+    nome_unico = f"{uuid.uuid4().hex}_{nome_seguro}"
+
+    if s3_disponivel():
+        chave = s3_manager.generate_s3_key(nome_seguro, pasta_id, projeto_id)
+        metadados = {
+            'original_name': nome_seguro,
+            'pasta_id': str(pasta_id) if pasta_id else '',
+            'projeto_id': str(projeto_id) if projeto_id else '',
+            'upload_date': datetime.now().isoformat(),
+            'system': 'arconset-hvac'
+        }
+        return DestinoS3(s3_manager.s3_client, s3_manager.bucket_name, chave, metadados), nome_unico
+
+    os.makedirs(upload_folder, exist_ok=True)
+    return DestinoLocal(os.path.join(upload_folder, nome_unico)), nome_unico
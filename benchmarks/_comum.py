@@ -0,0 +1,153 @@
+# 📊 benchmarks/_comum.py - Utilitários compartilhados pelos benchmarks
+# Por padrão os benchmarks rodam offline contra um SQLite temporário.
+# Para medir contra o PostgreSQL, exporte DATABASE_URL antes de executar.
+import os
+import sys
+import time
+import tempfile
+import statistics
+from contextlib import contextmanager
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+if not os.getenv('DATABASE_URL'):
+    _db_file = os.path.join(tempfile.mkdtemp(prefix='arconset_bench_'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{_db_file}'
+
+def percentil(amostras, p):
+    """Percentil simples (interpolação pelo vizinho mais próximo)"""
+    ordenadas = sorted(amostras)
+    indice = min(len(ordenadas) - 1, max(0, int(round(p / 100 * len(ordenadas))) - 1))
+    return ordenadas[indice]
+
+def resumo_tempos(amostras_ms):
+    """p50/p95/média de uma lista de tempos em ms"""
+    return {
+        'p50_ms': round(percentil(amostras_ms, 50), 3),
+        'p95_ms': round(percentil(amostras_ms, 95), 3),
+        'media_ms': round(statistics.mean(amostras_ms), 3)
+    }
+
+class ContadorSQL:
+    """Conta statements e commits enviados ao banco via eventos do engine"""
+
+    def __init__(self, engine):
+        import threading
+        from sqlalchemy import event
+        self.total = 0
+        self.commits = 0
+        self._trava = threading.Lock()
+        event.listen(engine, 'before_cursor_execute', self._contar)
+        event.listen(engine, 'commit', self._contar_commit)
+
+    def _contar(self, conn, cursor, statement, parameters, context, executemany):
+        with self._trava:
+            self.total += 1
+
+    def _contar_commit(self, conn):
+        with self._trava:
+            self.commits += 1
+
+    @contextmanager
+    def medir(self):
+        inicio, commits = self.total, self.commits
+        resultado = {}
+        yield resultado
+        resultado['queries'] = self.total - inicio
+        resultado['commits'] = self.commits - commits
+
+def cronometrar(funcao, repeticoes):
+    """Executar funcao N vezes e devolver os tempos em ms"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+def imprimir_tabela(titulo, linhas):
+    """Imprimir resultados no formato antes/depois"""
+    print(f"\n{titulo}")
+    print("-" * 70)
+    for nome, dados in linhas:
+        detalhes = '  '.join(f"{k}={v}" for k, v in dados.items())
+        print(f"{nome:<12} {detalhes}")
+    print("-" * 70)
+
+def popular_banco(db, clientes=200, projetos_por_cliente=3, contas=1500, arquivos=2000, funcionarios=80):
+    """Popular o banco com dados sintéticos (somente se estiver vazio)"""
+    import random
+    from datetime import datetime, timedelta, UTC
+    from database import Cliente, Projeto, Conta, Arquivo, Funcionario, EquipeProjeto
+
+    if db.query(Cliente).first():
+        return
+
+    aleatorio = random.Random(42)
+    hoje = datetime.now(UTC).date()
+    status_projeto = ['Orçamento', 'Em Andamento', 'Finalizado', 'Cancelado']
+
+    lista_clientes = [
+        Cliente(nome=f'Cliente {i}', email=f'cliente{i}@bench.local', cpf_cnpj=f'{i:011d}')
+        for i in range(clientes)
+    ]
+    db.add_all(lista_clientes)
+    db.flush()
+
+    lista_projetos = []
+    for cliente in lista_clientes:
+        for j in range(projetos_por_cliente):
+            lista_projetos.append(Projeto(
+                nome=f'Projeto {cliente.id}-{j}',
+                cliente_id=cliente.id,
+                valor_total=aleatorio.randint(1000, 90000),
+                progresso=aleatorio.randint(0, 100),
+                status=aleatorio.choice(status_projeto),
+                data_inicio=hoje - timedelta(days=aleatorio.randint(30, 400)),
+                data_prazo=hoje + timedelta(days=aleatorio.randint(-60, 120)),
+                data_conclusao=hoje - timedelta(days=aleatorio.randint(0, 60))
+            ))
+    db.add_all(lista_projetos)
+    db.flush()
+
+    db.add_all([
+        Conta(
+            descricao=f'Conta {i}',
+            valor=aleatorio.randint(50, 9000),
+            tipo='Fornecedor',
+            categoria=aleatorio.choice(['Material', 'Serviço', 'Impostos', None]),
+            data_vencimento=hoje + timedelta(days=aleatorio.randint(-45, 45)),
+            data_pagamento=hoje - timedelta(days=aleatorio.randint(0, 30)),
+            status=aleatorio.choice(['Pendente', 'Paga']),
+            projeto_id=aleatorio.choice(lista_projetos).id
+        )
+        for i in range(contas)
+    ])
+
+    db.add_all([
+        Arquivo(
+            nome_original=f'documento_{i}.pdf',
+            nome_arquivo=f'{i:08d}_documento_{i}.pdf',
+            tamanho=aleatorio.randint(10_000, 5_000_000),
+            tipo_mime='application/pdf',
+            tipo_documento=aleatorio.choice(['Geral', 'Contrato', 'Projeto', 'Nota Fiscal']),
+            projeto_id=aleatorio.choice(lista_projetos).id,
+            created_at=datetime.now(UTC) - timedelta(days=aleatorio.randint(0, 10))
+        )
+        for i in range(arquivos)
+    ])
+
+    lista_funcionarios = [
+        Funcionario(nome=f'Funcionário {i}', cpf=f'{i:011d}', status=aleatorio.choice(['Ativo', 'Ativo', 'Inativo']))
+        for i in range(funcionarios)
+    ]
+    db.add_all(lista_funcionarios)
+    db.flush()
+
+    db.add_all([
+        EquipeProjeto(projeto_id=aleatorio.choice(lista_projetos).id, funcionario_id=f.id, ativo=True)
+        for f in lista_funcionarios for _ in range(2)
+    ])
+    db.commit()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_auth_principal.py - Custo do auth_required por requisição: banco x cache de principal
+# Uso: python benchmarks/bench_auth_principal.py [requisicoes]
+# Falha (exit 1) se o cache não for invalidado ao desativar o usuário (inclusive por UPDATE em massa)
+# ou ao revogar os tokens, ou se um token emitido logo após a revogação for recusado.
+import os
+import sys
+import logging
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+
+import structlog
+# Logs de acesso (info) ficam fora da medição
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask, jsonify, g
+from database import SessionLocal, Base, engine
+from models.user import User
+from middleware.auth_middleware import auth_required, generate_jwt_token, revoke_user_tokens
+from services import cache_principal
+
+def criar_usuario():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'bench_auth').first()
+        if not user:
+            user = User(username='bench_auth', email='bench@auth.local', full_name='Bench', role='manager', is_active=True)
+            user.set_password('bench-senha')
+            db.add(user)
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    Base.metadata.create_all(bind=engine)
+    contador = ContadorSQL(engine)
+    user_id = criar_usuario()
+    token = generate_jwt_token({'user_id': user_id, 'username': 'bench_auth', 'role': 'manager'})
+
+    app = Flask(__name__)
+
+    @app.route('/protegida')
+    @auth_required(roles=['admin', 'manager'])
+    def protegida():
+        return jsonify({'user_id': g.user_id})
+
+    view = app.view_functions['protegida']
+    cabecalhos = {'Authorization': f'Bearer {token}'}
+
+    def chamar():
+        with app.test_request_context('/protegida', headers=cabecalhos):
+            resposta = view()
+            return resposta if isinstance(resposta, tuple) else (resposta, 200)
+
+    linhas = []
+    for rotulo, ttl in [('antes', 0), ('depois', 60)]:
+        cache_principal.TTL_SEGUNDOS = ttl
+        cache_principal._cache.limpar()
+        chamar()
+        with contador.medir() as sql:
+            tempos = cronometrar(chamar, requisicoes)
+        linhas.append((rotulo, {**resumo_tempos(tempos), 'queries_por_req': round(sql['queries'] / requisicoes, 3)}))
+
+    # Desativar o usuário precisa valer na próxima requisição (invalidação após commit)
+    db = SessionLocal()
+    try:
+        db.get(User, user_id).is_active = False
+        db.commit()
+        if chamar()[1] != 401:
+            print("❌ Usuário desativado continuou autorizado (cache não invalidado)")
+            sys.exit(1)
+        db.get(User, user_id).is_active = True
+        db.commit()
+    finally:
+        db.close()
+
+    if chamar()[1] != 200:
+        print("❌ Usuário reativado não voltou a ser autorizado")
+        sys.exit(1)
+
+    # UPDATE em massa não passa pelo flush: precisa descartar o cache do mesmo jeito
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.id == user_id).update({'is_active': False})
+        db.commit()
+        if chamar()[1] != 401:
+            print("❌ Usuário desativado por UPDATE em massa continuou autorizado")
+            sys.exit(1)
+        db.query(User).filter(User.id == user_id).update({'is_active': True})
+        db.commit()
+    finally:
+        db.close()
+
+    revoke_user_tokens(user_id)
+    if chamar()[1] != 401:
+        print("❌ Token revogado continuou válido")
+        sys.exit(1)
+
+    # Login logo após a revogação (mesmo segundo do 'iat') precisa valer
+    novo = generate_jwt_token({'user_id': user_id, 'username': 'bench_auth', 'role': 'manager'})
+    cabecalhos['Authorization'] = f'Bearer {novo}'
+    if chamar()[1] != 200:
+        print("❌ Token emitido logo após a revogação foi recusado")
+        sys.exit(1)
+
+    imprimir_tabela(f"auth_required: {requisicoes} requisições (verificação do JWT + principal)", linhas)
+    print(f"✅ Desativação (ORM e em massa) e revogação invalidam o cache na hora; {cache_principal.estatisticas()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_busca_clientes.py - Seletor de clientes: ILIKE x busca indexada
+# Uso: python benchmarks/bench_busca_clientes.py [clientes] [repeticoes]
+# Falha (exit 1) se a busca indexada não encontrar os casos de acento, erro de digitação e CPF,
+# se as páginas da busca curta divergirem do prefixo ordenado por id ou se '%'/'_' virarem curingas.
+import sys
+import random
+
+from _comum import cronometrar, resumo_tempos, imprimir_tabela
+
+from sqlalchemy import or_
+from database import SessionLocal, Base, engine, Cliente
+from services.busca_clientes import buscar, preparar_indice, normalizar_texto, somente_digitos, _buscar_ilike
+from services.paginacao import parametros_paginacao
+from werkzeug.datastructures import MultiDict
+
+NOMES = ['João', 'Maria', 'José', 'Ana', 'Antônio', 'Francisca', 'Carlos', 'Paulo', 'Lúcia', 'Márcio', 'Conceição', 'Sebastião']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gonçalves', 'Araújo', 'Ribeiro']
+
+def popular(total):
+    """Inserir clientes com CPF formatado em lotes (busca_nome/documento calculados na carga)"""
+    if SessionLocal().query(Cliente.id).first():
+        return
+    aleatorio = random.Random(7)
+    with engine.begin() as conn:
+        lote = []
+        for i in range(total):
+            nome = f'{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)} {i}'
+            cpf = f'{i:09d}{aleatorio.randint(0, 99):02d}'
+            cpf = f'{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}'
+            lote.append({
+                'nome': nome, 'email': f'cliente{i}@bench.local', 'cpf_cnpj': cpf,
+                'busca_nome': normalizar_texto(nome), 'documento_digitos': somente_digitos(cpf)
+            })
+            if len(lote) == 5000:
+                conn.execute(Cliente.__table__.insert(), lote)
+                lote = []
+        if lote:
+            conn.execute(Cliente.__table__.insert(), lote)
+
+def busca_ilike(termo):
+    db = SessionLocal()
+    try:
+        padrao = f'%{termo}%'
+        return db.query(Cliente).filter(or_(
+            Cliente.nome.ilike(padrao), Cliente.email.ilike(padrao), Cliente.cpf_cnpj.ilike(padrao)
+        )).order_by(Cliente.created_at.desc(), Cliente.id.desc()).limit(20).all()
+    finally:
+        db.close()
+
+def busca_indexada(termo, limite=20):
+    db = SessionLocal()
+    try:
+        return buscar(db, termo, parametros_paginacao(MultiDict({'limit': str(limite)})))[0]
+    finally:
+        db.close()
+
+def paginas_curtas(termo, limite=20, paginas=3):
+    """Ids das primeiras páginas da busca curta, seguindo o next_cursor"""
+    db = SessionLocal()
+    try:
+        ids, cursor = [], None
+        for _ in range(paginas):
+            parametros = {'limit': str(limite)}
+            if cursor:
+                parametros['cursor'] = cursor
+            resultados, paginacao = buscar(db, termo, parametros_paginacao(MultiDict(parametros)))
+            ids += [cliente.id for cliente, _ in resultados]
+            cursor = paginacao['next_cursor']
+            if not cursor:
+                break
+        return ids
+    finally:
+        db.close()
+
+def prefixo_por_id(termo, total):
+    db = SessionLocal()
+    try:
+        return [id_ for (id_,) in db.query(Cliente.id).filter(Cliente.busca_nome.like(f'{termo}%'))
+                .order_by(Cliente.id.desc()).limit(total)]
+    finally:
+        db.close()
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    Base.metadata.create_all(bind=engine)
+    popular(total)
+    preparar_indice()
+
+    db = SessionLocal()
+    try:
+        alvo = db.query(Cliente).filter(Cliente.busca_nome.like('sebastiao goncalves%')).first()
+        acento = db.query(Cliente).filter(Cliente.busca_nome.like('joao araujo%')).first()
+    finally:
+        db.close()
+
+    casos = [
+        ('sem acento', 'joao araujo', acento.id),
+        ('erro digit.', 'sebastiao goncalvs', alvo.id),
+        ('cpf parcial', somente_digitos(alvo.cpf_cnpj)[:8], alvo.id),
+        ('curta', 'an', None),
+    ]
+
+    linhas = []
+    for rotulo, termo, esperado in casos:
+        antes = busca_ilike(termo)
+        depois = busca_indexada(termo)
+        if esperado and esperado not in [cliente.id for cliente, _ in busca_indexada(termo, limite=500)]:
+            print(f"❌ {rotulo}: cliente {esperado} não encontrado para '{termo}'")
+            sys.exit(1)
+
+        linhas.append((f'{rotulo} antes', {**resumo_tempos(cronometrar(lambda: busca_ilike(termo), repeticoes)), 'achados': len(antes)}))
+        linhas.append((f'{rotulo} depois', {**resumo_tempos(cronometrar(lambda: busca_indexada(termo), repeticoes)), 'achados': len(depois)}))
+
+    # Busca curta: prefixo comum (janela dos mais recentes) e raro (índice), paginando pelo cursor
+    for termo in ('an', 'zz'):
+        obtidos = paginas_curtas(termo)
+        if obtidos != prefixo_por_id(termo, 60):
+            print(f"❌ busca curta '{termo}': páginas divergem do prefixo ordenado por id")
+            sys.exit(1)
+
+    # '%' e '_' digitados são literais, não curingas
+    db = SessionLocal()
+    try:
+        curingas = {termo: len(_buscar_ilike(db, termo, 20)) for termo in ('%', '_', '%%')}
+    finally:
+        db.close()
+    if any(curingas.values()):
+        print(f"❌ curingas digitados casaram clientes: {curingas}")
+        sys.exit(1)
+
+    imprimir_tabela(f"Busca de clientes em {total} linhas ({engine.dialect.name})", linhas)
+    print("✅ Acento, erro de digitação e CPF sem pontuação encontrados pela busca indexada; busca curta paginada no SQL")
+
+if __name__ == '__main__':
+    main()
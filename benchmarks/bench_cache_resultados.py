@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_cache_resultados.py - Listagens de clientes, funcionários e pastas com e sem o cache de resultados
+# Mede queries e latência de leituras repetidas e, depois de cada tipo de escrita (linha do modelo,
+# linha relacionada, rollback), compara a resposta em cache com a calculada direto no banco.
+# Uso: python benchmarks/bench_cache_resultados.py [leituras]
+# Falha (exit 1) se alguma resposta em cache divergir da do banco após uma escrita,
+# se o cache não reduzir as queries ou se as invalidações não aparecerem nos contadores.
+# Sem Redis configurado mede só o nível em processo.
+import sys
+import time
+import logging
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela, popular_banco
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine, registrar_sessao_requisicao, Cliente, Projeto, Pasta, Arquivo
+from routes.clientes import clientes_bp
+from routes.funcionarios import funcionarios_bp
+from routes.arquivos import arquivos_bp
+from services import cache_resultados, dashboard_snapshot
+
+ROTAS = ['/api/clientes?limit=50', '/api/funcionarios?limit=50', '/api/pastas']
+
+def popular_pastas(db, quantidade=50):
+    """Pastas com arquivos vinculados (popular_banco não cria pastas)"""
+    if db.query(Pasta).first():
+        return
+    pastas = [Pasta(nome=f'Pasta {i}', projeto_id=(i % 10) + 1) for i in range(quantidade)]
+    db.add_all(pastas)
+    db.flush()
+    for arquivo in db.query(Arquivo).limit(quantidade * 5).all():
+        arquivo.pasta_id = pastas[arquivo.id % quantidade].id
+    db.commit()
+
+def ler(cliente, rota):
+    resposta = cliente.get(rota)
+    if resposta.status_code != 200:
+        raise RuntimeError(f'{rota} -> {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}')
+    return resposta.get_json()
+
+def direto(cliente, rota):
+    """Resposta calculada no banco, sem passar pelo cache"""
+    cache_resultados.ATIVO = False
+    try:
+        return ler(cliente, rota)
+    finally:
+        cache_resultados.ATIVO = True
+
+def escrever(alterar):
+    db = SessionLocal()
+    try:
+        alterar(db)
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    leituras = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+        popular_pastas(db)
+    finally:
+        db.close()
+    time.sleep(dashboard_snapshot.DEBOUNCE_SEGUNDOS + 1)
+
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    app.register_blueprint(clientes_bp)
+    app.register_blueprint(funcionarios_bp)
+    app.register_blueprint(arquivos_bp, url_prefix='/api')
+    cliente = app.test_client()
+    contador = ContadorSQL(engine)
+    falhas = []
+    linhas = []
+
+    for rota in ROTAS:
+        resultados = {}
+        for ativo in (False, True):
+            cache_resultados.ATIVO = ativo
+            cache_resultados.zerar()
+            with contador.medir() as consultas:
+                tempos = cronometrar(lambda: ler(cliente, rota), leituras)
+            resultados[ativo] = consultas['queries']
+            rotulo = f"{'com' if ativo else 'sem'} {rota.split('?')[0].rsplit('/', 1)[-1]}"
+            linhas.append((rotulo, {**resumo_tempos(tempos), 'queries': consultas['queries']}))
+        if resultados[True] >= resultados[False]:
+            falhas.append(f'{rota}: cache não reduziu queries ({resultados[False]} -> {resultados[True]})')
+    cache_resultados.ATIVO = True
+
+    # Linhas que aparecem na primeira página de cada listagem
+    primeiro_cliente = direto(cliente, ROTAS[0])['data'][0]['id']
+    funcionario_id = next(item['id'] for item in direto(cliente, ROTAS[1])['data'] if item['projetos_ativos'])
+    pasta_id = direto(cliente, ROTAS[2])['data'][0]['id']
+
+    # Cada escrita precisa invalidar a listagem que depende dela (direta ou pela contagem)
+    def novo_projeto(db):
+        db.add(Projeto(nome='Projeto cache', cliente_id=primeiro_cliente, status='Em Andamento'))
+
+    def renomear_cliente(db):
+        db.get(Cliente, primeiro_cliente).nome = 'Cliente renomeado'
+
+    def status_projetos(db):
+        for projeto in db.query(Projeto).filter(Projeto.equipe_projeto.any(funcionario_id=funcionario_id)):
+            projeto.status = 'Cancelado'
+
+    def arquivo_na_pasta(db):
+        db.add(Arquivo(nome_original='cache.pdf', nome_arquivo='cache.pdf', tamanho=1, pasta_id=pasta_id))
+
+    def renomear_pasta(db):
+        db.get(Pasta, pasta_id).descricao = 'Pasta alterada'
+
+    cenarios = [
+        ('projeto novo do cliente', ROTAS[0], novo_projeto),
+        ('cliente renomeado', ROTAS[0], renomear_cliente),
+        ('status de projetos da equipe', ROTAS[1], status_projetos),
+        ('arquivo novo na pasta', ROTAS[2], arquivo_na_pasta),
+        ('pasta alterada', ROTAS[2], renomear_pasta),
+    ]
+    cache_resultados.zerar()
+    for descricao, rota, alterar in cenarios:
+        ler(cliente, rota)
+        escrever(alterar)
+        if ler(cliente, rota) != direto(cliente, rota):
+            falhas.append(f'{rota}: resposta em cache defasada após {descricao}')
+
+    # Rollback: o que foi lido depois do flush (na mesma sessão) não pode sobreviver
+    ler(cliente, ROTAS[0])
+    db = SessionLocal()
+    try:
+        db.get(Cliente, primeiro_cliente).nome = 'Cliente descartado'
+        db.flush()
+        cache_resultados.em_cache(
+            'listar_clientes', {'limit': '50'},
+            lambda: {'success': True, 'data': [db.get(Cliente, primeiro_cliente).to_dict()]},
+            tags=lambda dados: cache_resultados.tags_linhas(Cliente, dados['data'])
+        )
+        db.rollback()
+    finally:
+        db.close()
+    if ler(cliente, ROTAS[0]) != direto(cliente, ROTAS[0]):
+        falhas.append(f'{ROTAS[0]}: resposta em cache defasada após rollback')
+
+    estatisticas = cache_resultados.estatisticas()
+    for nome in ('listar_clientes', 'listar_funcionarios', 'listar_pastas'):
+        contagens = estatisticas['funcoes'].get(nome, {})
+        if not contagens.get('invalidado'):
+            falhas.append(f'{nome}: nenhuma invalidação registrada ({contagens})')
+        print(f"{nome}: {contagens}")
+
+    imprimir_tabela(f"{leituras} leituras por listagem ({engine.dialect.name})", linhas)
+    print(f"LRU local: {estatisticas['local']}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Leituras repetidas saem do cache; toda escrita relacionada invalida a listagem")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_carga_webhooks.py - Gerador de carga para o receptor de webhooks de boletos
+# Sobe o webhook_bp num servidor WSGI local (127.0.0.1, SQLite temporário, sem rede externa) e
+# dispara webhooks BRADESCO/ITAU/BANCO_BRASIL assinados (HMAC válido), com reenvios duplicados,
+# a partir de N clientes concorrentes.
+# Uso: python benchmarks/bench_carga_webhooks.py [--eventos 3000] [--clientes 8] [--duplicados 0.15]
+#          [--mix BRADESCO=0.5,ITAU=0.3,BANCO_BRASIL=0.2] [--modos sincrona,fila,lote] [--lote 100]
+# Falha (exit 1) se algum modo responder com erro ou gravar uma quantidade de boletos diferente da esperada.
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+import http.client
+from datetime import datetime, timedelta, UTC
+from concurrent.futures import ThreadPoolExecutor
+
+from _comum import ContadorSQL, percentil, imprimir_tabela
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+import tempfile
+from flask import Flask
+from werkzeug.serving import make_server
+from database import SessionLocal, Base, engine
+from services import fila_webhooks
+from routes import webhook_receiver
+from routes.webhook_receiver import webhook_bp, BoletoRecebido, WebhookValidator, processar_itens_fila
+
+BENEFICIARIOS = [
+    'Refrigeração Paulista LTDA', 'Dutos & Cia Comércio', 'Eletro Frio Distribuidora', 'Gás Refrigerante Sul S.A.',
+    'Ferramentas Industriais ME', 'Transportadora Rota 116', 'Locadora de Andaimes Alfa', 'Isolamentos Térmicos Beta'
+]
+
+def gerar_eventos(total, mix, taxa_duplicados, semente):
+    """Lista de (banco, corpo_json, assinatura, codigo_barras) com reenvios do mesmo boleto"""
+    aleatorio = random.Random(semente)
+    bancos, pesos = zip(*mix.items())
+    hoje = datetime.now(UTC)
+    emitidos = {banco: [] for banco in bancos}
+    eventos = []
+    for i in range(total):
+        banco = aleatorio.choices(bancos, pesos)[0]
+        if emitidos[banco] and aleatorio.random() < taxa_duplicados:
+            # Reenvio: mesmo payload (banco não recebeu o 200 e tentou de novo)
+            eventos.append(aleatorio.choice(emitidos[banco]))
+            continue
+        boleto = {
+            'codigo_barras': f'{aleatorio.randrange(10**46):047d}{i:08d}'[:48],
+            'valor': round(min(50_000, aleatorio.lognormvariate(7, 1.1)), 2),
+            'data_vencimento': (hoje + timedelta(days=aleatorio.randint(-3, 45))).isoformat(),
+            'beneficiario': aleatorio.choice(BENEFICIARIOS),
+            'conta_origem': f'{aleatorio.randint(1000, 9999)}-{aleatorio.randint(0, 9)}'
+        }
+        corpo = json.dumps(WebhookValidator.build_payload(banco, boleto))
+        evento = (banco, corpo, WebhookValidator.sign_payload(banco, corpo), boleto['codigo_barras'])
+        emitidos[banco].append(evento)
+        eventos.append(evento)
+    return eventos
+
+def montar_requisicoes(eventos, modo, tamanho_lote):
+    """(caminho, corpo, assinatura, quantidade_de_eventos) por requisição"""
+    if modo != 'lote':
+        return [(f'/api/webhooks/boletos/{banco.lower()}', corpo, assinatura, 1) for banco, corpo, assinatura, _ in eventos]
+
+    requisicoes = []
+    por_banco = {}
+    for banco, corpo, _, _ in eventos:
+        por_banco.setdefault(banco, []).append(corpo)
+    for banco, corpos in por_banco.items():
+        for inicio in range(0, len(corpos), tamanho_lote):
+            bloco = corpos[inicio:inicio + tamanho_lote]
+            corpo = '[' + ','.join(bloco) + ']'
+            requisicoes.append((f'/api/webhooks/boletos/{banco.lower()}/batch', corpo, WebhookValidator.sign_payload(banco, corpo), len(bloco)))
+    return requisicoes
+
+def enviar(porta, requisicao):
+    caminho, corpo, assinatura, _ = requisicao
+    inicio = time.perf_counter()
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    try:
+        conexao.request('POST', caminho, body=corpo.encode(), headers={
+            'Content-Type': 'application/json', 'X-Webhook-Signature': assinatura
+        })
+        resposta = conexao.getresponse()
+        resposta.read()
+        return resposta.status, (time.perf_counter() - inicio) * 1000
+    finally:
+        conexao.close()
+
+def aguardar_fila(limite_segundos=300):
+    fim = time.time() + limite_segundos
+    while fila_webhooks.metricas()['profundidade'] and time.time() < fim:
+        time.sleep(0.05)
+
+def limpar():
+    with engine.begin() as conn:
+        conn.execute(BoletoRecebido.__table__.delete())
+
+def executar(modo, eventos, clientes, tamanho_lote, porta, contador):
+    limpar()
+    webhook_receiver.MODO_INGESTAO = 'sincrona' if modo == 'lote' else modo
+    if modo == 'fila':
+        fila_webhooks.iniciar_workers(processar_itens_fila)
+
+    requisicoes = montar_requisicoes(eventos, modo, tamanho_lote)
+    with contador.medir() as sql:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clientes) as executor:
+            respostas = list(executor.map(lambda requisicao: enviar(porta, requisicao), requisicoes))
+        resposta_s = time.perf_counter() - inicio
+        if modo == 'fila':
+            aguardar_fila()
+        total_s = time.perf_counter() - inicio
+
+    if modo == 'fila':
+        fila_webhooks.parar_workers()
+
+    latencias = [latencia for _, latencia in respostas]
+    erros = sum(1 for status, _ in respostas if status >= 400)
+    gravados = SessionLocal().query(BoletoRecebido).count()
+    return {
+        'eventos_s': int(len(eventos) / total_s),
+        'p50_ms': round(percentil(latencias, 50), 2),
+        'p99_ms': round(percentil(latencias, 99), 2),
+        'ack_s': round(resposta_s, 2),
+        'total_s': round(total_s, 2),
+        'commits': sql['commits'],
+        'erros': erros,
+        '_gravados': gravados
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de carga para webhooks de boletos (offline, SQLite)')
+    parser.add_argument('--eventos', type=int, default=3000)
+    parser.add_argument('--clientes', type=int, default=8, help='Clientes HTTP concorrentes')
+    parser.add_argument('--duplicados', type=float, default=0.15, help='Fração de reenvios do mesmo boleto')
+    parser.add_argument('--mix', default='BRADESCO=0.5,ITAU=0.3,BANCO_BRASIL=0.2')
+    parser.add_argument('--modos', default='sincrona,fila,lote')
+    parser.add_argument('--lote', type=int, default=100, help='Eventos por requisição no modo lote')
+    parser.add_argument('--semente', type=int, default=2024)
+    args = parser.parse_args()
+
+    mix = {banco.upper(): float(peso) for banco, peso in (item.split('=') for item in args.mix.split(','))}
+    eventos = gerar_eventos(args.eventos, mix, args.duplicados, args.semente)
+    unicos = len({codigo for *_, codigo in eventos})
+    duplicados = len(eventos) - unicos
+
+    Base.metadata.create_all(bind=engine)
+    fila_webhooks.CAMINHO = f'{tempfile.mkdtemp(prefix="arconset_fila_")}/fila.db'
+    contador = ContadorSQL(engine)
+
+    app = Flask(__name__)
+    app.register_blueprint(webhook_bp)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    linhas = []
+    falhou = False
+    try:
+        for modo in args.modos.split(','):
+            resultado = executar(modo, eventos, args.clientes, args.lote, servidor.server_port, contador)
+            gravados = resultado.pop('_gravados')
+            resultado['dup_rejeitados'] = round((len(eventos) - gravados) / duplicados, 3) if duplicados else None
+            linhas.append((modo, resultado))
+            if resultado['erros'] or gravados != unicos:
+                print(f"❌ {modo}: {resultado['erros']} erros, {gravados} boletos gravados (esperado {unicos})")
+                falhou = True
+    finally:
+        servidor.shutdown()
+
+    imprimir_tabela(
+        f"Webhooks: {len(eventos)} eventos ({duplicados} reenvios), {args.clientes} clientes, mix {mix} ({engine.dialect.name})",
+        linhas
+    )
+    if falhou:
+        sys.exit(1)
+    print(f"✅ {unicos} boletos únicos gravados em todos os modos, reenvios rejeitados")
+
+if __name__ == '__main__':
+    main()
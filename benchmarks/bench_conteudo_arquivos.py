@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_conteudo_arquivos.py - Listagens de arquivos: blob na tabela quente x arquivo_conteudo
+# Uso: python benchmarks/bench_conteudo_arquivos.py [kb_por_arquivo] [repeticoes]
+#
+# "antes" reproduz o modelo antigo (coluna arquivo_blob carregada junto com a
+# linha, via undefer) com os blobs ainda em 'arquivos'; "depois" roda as mesmas
+# consultas após migrar_conteudo_arquivos.py, com o modelo atual.
+import os
+import sys
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela, popular_banco
+
+from sqlalchemy import update
+from sqlalchemy.orm import undefer
+from database import SessionLocal, Base, engine, Arquivo
+from services.serializers import serializar
+from migrar_conteudo_arquivos import migrar
+
+def preencher_blobs(kb):
+    """Gravar conteúdo na coluna legada de todos os arquivos (como o storage 'database' fazia)"""
+    tabela = Arquivo.__table__
+    with engine.begin() as conn:
+        ids = conn.execute(tabela.select().with_only_columns(tabela.c.id)).scalars().all()
+        for id_ in ids:
+            conn.execute(
+                update(tabela).where(tabela.c.id == id_)
+                .values(arquivo_blob=os.urandom(kb * 1024), storage_type='database')
+            )
+    return len(ids)
+
+def consultas(legado):
+    """Listagem paginada, busca por nome e filtro por categoria (ambas varrem a tabela)"""
+    opcoes = [undefer(Arquivo.arquivo_blob_legado)] if legado else []
+
+    def listagem():
+        db = SessionLocal()
+        try:
+            query = db.query(Arquivo).options(*opcoes).order_by(Arquivo.created_at.desc(), Arquivo.id.desc()).limit(100)
+            return serializar(query, Arquivo)
+        finally:
+            db.close()
+
+    def busca():
+        db = SessionLocal()
+        try:
+            return db.query(Arquivo).options(*opcoes).filter(Arquivo.nome_original.ilike('%_1%')).all()
+        finally:
+            db.close()
+
+    def categoria():
+        db = SessionLocal()
+        try:
+            return db.query(Arquivo).options(*opcoes).filter(Arquivo.tipo_documento == 'Contrato').all()
+        finally:
+            db.close()
+
+    return [('listagem', listagem), ('busca', busca), ('categoria', categoria)]
+
+def medir(rotulo, legado, repeticoes, contador):
+    linhas = []
+    for nome, funcao in consultas(legado):
+        with contador.medir() as sql:
+            funcao()
+        tempos = cronometrar(funcao, repeticoes)
+        linhas.append((f'{nome} {rotulo}', {**resumo_tempos(tempos), 'queries': sql['queries']}))
+    return linhas
+
+def main():
+    kb = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    Base.metadata.create_all(bind=engine)
+    contador = ContadorSQL(engine)
+
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+    finally:
+        db.close()
+
+    total = preencher_blobs(kb)
+
+    db = SessionLocal()
+    try:
+        amostra_id = db.query(Arquivo.id).order_by(Arquivo.id).first()[0]
+        esperado = db.get(Arquivo, amostra_id).arquivo_blob
+    finally:
+        db.close()
+
+    linhas = medir('antes', True, repeticoes, contador)
+    migrar(tamanho_lote=200, verboso=False)
+    linhas += medir('depois', False, repeticoes, contador)
+
+    db = SessionLocal()
+    try:
+        arquivo = db.get(Arquivo, amostra_id)
+        if arquivo.arquivo_blob != esperado or arquivo.arquivo_blob_legado is not None:
+            print("❌ Conteúdo migrado difere do original")
+            sys.exit(1)
+    finally:
+        db.close()
+
+    imprimir_tabela(f"Arquivos: {total} linhas com {kb}KB de conteúdo no banco", linhas)
+    print("✅ Conteúdo conferido após a migração (arquivo_blob lido de arquivo_conteudo)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_dashboard_stats.py - /api/dashboard/stats: antes x depois
+# Uso: python benchmarks/bench_dashboard_stats.py [repeticoes]
+import sys
+from datetime import datetime
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela, popular_banco
+
+from sqlalchemy import func
+from database import SessionLocal, Base, engine, Projeto, Conta, Arquivo, Cliente, Funcionario
+from services.dashboard_stats import calcular_estatisticas_dashboard
+
+def estatisticas_legado(db):
+    """Implementação anterior (um count()/sum() por número)"""
+    hoje = datetime.now().date()
+    total_projetos = db.query(Projeto).count()
+    projetos_ativos = db.query(Projeto).filter(Projeto.status == 'Em Andamento').count()
+    projetos_finalizados = db.query(Projeto).filter(Projeto.status == 'Finalizado').count()
+    progresso_medio = db.query(func.avg(Projeto.progresso)).filter(Projeto.status == 'Em Andamento').scalar() or 0
+    db.query(Conta).count()
+    contas_pendentes = db.query(Conta).filter(Conta.status == 'Pendente').count()
+    contas_atrasadas = db.query(Conta).filter(Conta.data_vencimento < hoje, Conta.status == 'Pendente').count()
+    valor_total_pendente = db.query(func.sum(Conta.valor)).filter(Conta.status == 'Pendente').scalar() or 0
+    valor_projetos_ativos = db.query(func.sum(Projeto.valor_total)).filter(Projeto.status == 'Em Andamento').scalar() or 0
+    total_arquivos = db.query(Arquivo).count()
+    arquivos_hoje = db.query(Arquivo).filter(func.date(Arquivo.created_at) == hoje).count()
+    total_clientes = db.query(Cliente).count()
+    funcionarios_ativos = db.query(Funcionario).filter(Funcionario.status == 'Ativo').count()
+    projetos_por_status = db.query(Projeto.status, func.count(Projeto.id).label('quantidade')).group_by(Projeto.status).all()
+
+    return {
+        'projetos': {
+            'total': total_projetos,
+            'ativos': projetos_ativos,
+            'finalizados': projetos_finalizados,
+            'progresso_medio': round(float(progresso_medio), 1)
+        },
+        'financeiro': {
+            'contas_pendentes': contas_pendentes,
+            'contas_atrasadas': contas_atrasadas,
+            'valor_pendente': float(valor_total_pendente),
+            'valor_projetos_ativos': float(valor_projetos_ativos)
+        },
+        'arquivos': {'total': total_arquivos, 'hoje': arquivos_hoje},
+        'geral': {'clientes': total_clientes, 'funcionarios_ativos': funcionarios_ativos},
+        'projetos_por_status': [{'status': i.status, 'quantidade': i.quantidade} for i in projetos_por_status]
+    }
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    Base.metadata.create_all(bind=engine)
+    contador = ContadorSQL(engine)
+
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+
+        antes = estatisticas_legado(db)
+        depois = calcular_estatisticas_dashboard(db)
+        if antes != depois:
+            print("❌ Resultados divergentes!")
+            print(f"   antes:  {antes}")
+            print(f"   depois: {depois}")
+            sys.exit(1)
+        print("✅ JSON idêntico entre as duas implementações")
+
+        linhas = []
+        for nome, funcao in [('antes', estatisticas_legado), ('depois', calcular_estatisticas_dashboard)]:
+            with contador.medir() as medicao:
+                funcao(db)
+            tempos = cronometrar(lambda: funcao(db), repeticoes)
+            linhas.append((nome, {'queries': medicao['queries'], **resumo_tempos(tempos)}))
+
+        imprimir_tabela(f"/api/dashboard/stats ({engine.dialect.name}, {repeticoes} repetições)", linhas)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
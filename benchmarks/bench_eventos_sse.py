@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_eventos_sse.py - Canal SSE (/api/events) x polling de /api/dashboard-data
+# Abre N conexões de eventos, deixa ociosas (contando queries), grava notificação, pagamento de conta,
+# arquivo e boleto e mede o tempo do commit até o evento chegar em todas as conexões.
+# Uso: python benchmarks/bench_eventos_sse.py [conexoes] [segundos_ociosos]
+# Falha (exit 1) se: conexões ociosas consultarem o banco, algum evento não chegar (ou chegar após
+# rollback), a reconexão com Last-Event-ID não reenviar o que faltou, um ticket valer duas vezes,
+# o JWT em ?token= for aceito ou o stream abrir num worker sem threads.
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from datetime import datetime, timedelta, UTC
+
+from _comum import ContadorSQL, resumo_tempos, imprimir_tabela, popular_banco
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+os.environ.setdefault('EVENTOS_HEARTBEAT', '0.2')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine, registrar_sessao_requisicao, Notificacao, Conta, Arquivo
+from models.user import User
+from routes.dashboard import dashboard_bp
+from routes.webhook_receiver import gravar_eventos
+from middleware.auth_middleware import generate_jwt_token
+from services import eventos, dashboard_snapshot
+
+class Conexao:
+    """Uma aba: consome o stream numa thread e guarda (evento, id, instante de chegada)"""
+
+    def __init__(self, cliente, url, headers=None):
+        # Como o gunicorn gthread: o test client declara wsgi.multithread=False
+        self.resposta = cliente.get(url, headers=headers or {}, buffered=False,
+                                    environ_overrides={'wsgi.multithread': True})
+        self.recebidos = queue.Queue()
+        self.heartbeats = 0
+        self.parar = False
+        self.thread = threading.Thread(target=self._ler, daemon=True)
+        self.thread.start()
+
+    def _ler(self):
+        for pedaco in self.resposta.response:
+            texto = pedaco.decode() if isinstance(pedaco, bytes) else pedaco
+            if texto.startswith(': ping'):
+                self.heartbeats += 1
+            elif 'event: ' in texto:
+                campos = dict(linha.split(': ', 1) for linha in texto.strip().split('\n') if ': ' in linha)
+                self.recebidos.put((campos.get('event'), campos.get('id'), time.perf_counter()))
+            if self.parar:
+                break
+        self.resposta.close()
+
+    def esperar(self, tipo, timeout=5):
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            try:
+                evento = self.recebidos.get(timeout=max(0.0, limite - time.monotonic()))
+            except queue.Empty:
+                break
+            if evento[0] == tipo:
+                return evento
+        return None
+
+    def fechar(self):
+        self.parar = True
+        self.thread.join(timeout=2)
+
+def criar_usuario():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'bench_eventos').first()
+        if not user:
+            user = User(username='bench_eventos', email='bench@eventos.local', full_name='Bench', role='admin', is_active=True)
+            user.set_password('bench-senha')
+            db.add(user)
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def pedir_ticket(cliente, token):
+    resposta = cliente.post('/api/events/ticket', headers={'Authorization': f'Bearer {token}'})
+    if resposta.status_code != 200:
+        raise RuntimeError(f'/api/events/ticket -> {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}')
+    return resposta.get_json()['ticket']
+
+def status_stream(cliente, url, multithread=True):
+    return cliente.get(url, environ_overrides={'wsgi.multithread': multithread}).status_code
+
+def gravar(acao):
+    db = SessionLocal()
+    try:
+        acao(db)
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    total_conexoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    segundos_ociosos = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+    finally:
+        db.close()
+    user_id = criar_usuario()
+    token = generate_jwt_token({'user_id': user_id, 'username': 'bench_eventos', 'role': 'admin'})
+    time.sleep(dashboard_snapshot.DEBOUNCE_SEGUNDOS + 1)
+
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    eventos.registrar_eventos(app)
+    app.register_blueprint(dashboard_bp)
+    cliente = app.test_client()
+    contador = ContadorSQL(engine)
+    falhas = []
+
+    # Custo de uma aba fazendo polling: uma carga do dashboard consolidado
+    cliente.get('/api/dashboard-data')
+    with contador.medir() as polling:
+        cliente.get('/api/dashboard-data')
+
+    if status_stream(cliente, '/api/events') != 401:
+        falhas.append('GET /api/events sem ticket não respondeu 401')
+    if status_stream(cliente, f'/api/events?token={token}') != 401:
+        falhas.append('GET /api/events aceitou o JWT na query string')
+    if status_stream(cliente, f'/api/events?ticket={pedir_ticket(cliente, token)}', multithread=False) != 503:
+        falhas.append('GET /api/events abriu o stream num worker sem threads')
+    if cliente.post('/api/events/ticket').status_code != 401:
+        falhas.append('POST /api/events/ticket sem token não respondeu 401')
+
+    tickets = [pedir_ticket(cliente, token) for _ in range(total_conexoes)]
+    with contador.medir() as abertura:
+        conexoes = [Conexao(cliente, f'/api/events?ticket={ticket}') for ticket in tickets]
+    if status_stream(cliente, f'/api/events?ticket={tickets[0]}') != 401:
+        falhas.append('ticket já usado abriu outro stream')
+    time.sleep(0.2)
+    with contador.medir() as ociosas:
+        time.sleep(segundos_ociosos)
+    heartbeats = sum(conexao.heartbeats for conexao in conexoes)
+    if ociosas['queries']:
+        falhas.append(f"{ociosas['queries']} queries com as conexões ociosas")
+
+    hoje = datetime.now(UTC).date()
+    conta_id = SessionLocal().query(Conta.id).filter(Conta.status == 'Pendente').first()[0]
+    escritas = [
+        ('notificacao_nova', lambda db: db.add(Notificacao(titulo='Bench', mensagem='Evento SSE', tipo='info'))),
+        ('conta_paga', lambda db: db.query(Conta).filter(Conta.id == conta_id).one().__setattr__('status', 'Paga')),
+        ('arquivo_enviado', lambda db: db.add(Arquivo(nome_original='bench.pdf', nome_arquivo='bench_sse.pdf', tamanho=1,
+                                                      tipo_mime='application/pdf', tipo_documento='Geral'))),
+        ('boleto_recebido', None)
+    ]
+    linhas = []
+    for tipo, acao in escritas:
+        inicio = time.perf_counter()
+        if acao:
+            gravar(acao)
+        else:
+            gravar_eventos('BRADESCO', [{
+                'codigoBarras': f'{time.time_ns():044d}', 'valor': 123.45,
+                'dataVencimento': (datetime.now(UTC) + timedelta(days=1)).isoformat(),
+                'beneficiario': 'Fornecedor SSE', 'conta': '0001-1'
+            }])
+        chegadas = [conexao.esperar(tipo) for conexao in conexoes]
+        if not all(chegadas):
+            falhas.append(f'{tipo}: chegou em {sum(map(bool, chegadas))}/{total_conexoes} conexões')
+            continue
+        linhas.append((tipo, resumo_tempos([(chegada[2] - inicio) * 1000 for chegada in chegadas])))
+
+    # O recálculo do snapshot vira 'dashboard_atualizado' com os números
+    if not conexoes[0].esperar('dashboard_atualizado', timeout=dashboard_snapshot.DEBOUNCE_SEGUNDOS + 5):
+        falhas.append('dashboard_atualizado não chegou após o recálculo do snapshot')
+
+    # Rollback não publica
+    db = SessionLocal()
+    try:
+        db.add(Notificacao(titulo='Descartada', mensagem='rollback', tipo='info'))
+        db.flush()
+        db.rollback()
+    finally:
+        db.close()
+    if conexoes[0].esperar('notificacao_nova', timeout=0.5):
+        falhas.append('evento publicado após rollback')
+
+    # Reconexão: Last-Event-ID reenvia o que foi publicado enquanto a aba estava fora
+    ultimo = conexoes[-1]
+    ultimo.fechar()
+    time.sleep(0.3)
+    ultimo_id = eventos.barramento.estatisticas()['ultimo_id']
+    gravar(lambda db: db.add(Notificacao(titulo='Perdida', mensagem='reconexão', tipo='info')))
+    reconectada = Conexao(cliente, f'/api/events?ticket={pedir_ticket(cliente, token)}&ultimo_id={ultimo_id}')
+    if not reconectada.esperar('notificacao_nova', timeout=2):
+        falhas.append('reconexão com ?ultimo_id= não reenviou o evento perdido')
+    reconectada.fechar()
+
+    for conexao in conexoes[:-1]:
+        conexao.fechar()
+    time.sleep(0.5)
+    estado = eventos.estatisticas()
+    if estado['conexoes']:
+        falhas.append(f"{estado['conexoes']} conexões continuam registradas após fechar")
+
+    imprimir_tabela(f"Commit -> evento em {total_conexoes} conexões SSE ({engine.dialect.name})", linhas)
+    por_hora = 3600 / (5 * 60)
+    print(f"Polling (5 min): {polling['queries']} queries por carga -> {polling['queries'] * por_hora:.0f} queries/hora por aba")
+    print(f"SSE: {abertura['queries']} queries para abrir {total_conexoes} conexões; "
+          f"{ociosas['queries']} queries em {segundos_ociosos}s ociosas ({heartbeats} heartbeats)")
+    print(f"Barramento: {estado}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Eventos entregues após o commit, nada após rollback, conexões ociosas sem queries")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_json_arquivos.py - Listagem de 1.000 arquivos: json da stdlib x orjson, completo x compacto
+# Mede só a serialização (dicts já montados -> Response) e o tamanho do corpo.
+# Uso: python benchmarks/bench_json_arquivos.py [linhas] [repeticoes]
+# Falha (exit 1) se o orjson não devolver o mesmo conteúdo que a stdlib ou se o modo compacto
+# perder algum campo canônico.
+import sys
+import json
+import logging
+
+from _comum import cronometrar, resumo_tempos, imprimir_tabela, popular_banco
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine, Arquivo
+from services.serializers import carregar, opcoes_serializacao
+from services.json_rapido import OrjsonProvider, HAS_ORJSON
+
+def main():
+    linhas_listagem = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    if not HAS_ORJSON:
+        print("❌ orjson não instalado (pip install orjson)")
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+        arquivos = carregar(db.query(Arquivo).order_by(Arquivo.created_at.desc()).limit(linhas_listagem), Arquivo)
+    finally:
+        db.close()
+
+    stdlib = Flask('stdlib')
+    rapido = Flask('orjson')
+    rapido.json = OrjsonProvider(rapido)
+
+    variantes = [
+        ('stdlib', stdlib, {}),
+        ('orjson', rapido, {}),
+        ('orjson compact', rapido, {'compact': '1'}),
+        ('orjson fields', rapido, {'fields': 'id,nome_original,tamanho,tipo_mime,pasta_nome,created_at,download_url'})
+    ]
+
+    resultados = []
+    corpos = {}
+    for rotulo, app, args in variantes:
+        opcoes = opcoes_serializacao(args)
+        with app.app_context():
+            def serializar():
+                dados = [arquivo.to_dict(**opcoes) for arquivo in arquivos]
+                return app.json.response({'success': True, 'data': dados, 'total': len(dados)})
+
+            corpo = serializar().get_data()
+            tempos = resumo_tempos(cronometrar(serializar, repeticoes))
+        corpos[rotulo] = corpo
+        resultados.append((rotulo, {**tempos, 'kb': round(len(corpo) / 1024, 1), 'chaves_linha': len(json.loads(corpo)['data'][0])}))
+
+    falhas = []
+    if json.loads(corpos['stdlib']) != json.loads(corpos['orjson']):
+        falhas.append('orjson e stdlib devolveram conteúdos diferentes')
+    compacto = json.loads(corpos['orjson compact'])['data'][0]
+    completo = json.loads(corpos['orjson'])['data'][0]
+    faltando = set(completo) - set(compacto) - set(Arquivo.ALIASES_LEGADOS)
+    if faltando:
+        falhas.append(f'modo compacto perdeu campos canônicos: {sorted(faltando)}')
+
+    imprimir_tabela(f"Serialização de {len(arquivos)} arquivos (to_dict + Response), {repeticoes} repetições", resultados)
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Mesmo conteúdo na stdlib e no orjson; compacto só remove aliases legados")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_jwt_cache.py - Verificação de JWT: jwt.decode a cada chamada x cache de tokens verificados
+# Uso: python benchmarks/bench_jwt_cache.py [verificacoes]
+# Falha (exit 1) se um token revogado continuar válido (inclusive revogado durante a própria
+# verificação) ou se o cache não expirar no 'exp'.
+import os
+import sys
+import time
+import logging
+
+from _comum import cronometrar, resumo_tempos, imprimir_tabela
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+os.environ.setdefault('ENCRYPTION_PASSWORD', 'YmVuY2gtZW5jcnlwdGlvbi1wYXNzd29yZA==')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from middleware import auth_middleware
+from middleware.auth_middleware import verify_jwt_token, generate_jwt_token, revoke_user_tokens
+from middleware.security import security_manager
+from services import cache_tokens
+
+def medir(rotulo, funcao, cache, verificacoes):
+    linhas = []
+    for estado, ativo in [('antes', False), ('depois', True)]:
+        cache.ativo = ativo
+        cache.limpar()
+        funcao()
+        linhas.append((f'{rotulo} {estado}', resumo_tempos(cronometrar(funcao, verificacoes))))
+    return linhas
+
+def main():
+    verificacoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    token = generate_jwt_token({'user_id': 1, 'username': 'bench', 'role': 'admin'})
+    token_seguranca = security_manager.generate_jwt_token({'user_id': 2, 'username': 'bench'})
+
+    linhas = medir('auth_middleware', lambda: verify_jwt_token(token), auth_middleware._tokens_verificados, verificacoes)
+    linhas += medir('security_manager', lambda: security_manager.verify_jwt_token(token_seguranca),
+                    security_manager.tokens_verificados, verificacoes)
+
+    # Revogação pela chave jwt:{user_id} precisa valer mesmo com o token em cache
+    security_manager.revoke_jwt_token(token_seguranca)
+    try:
+        security_manager.verify_jwt_token(token_seguranca)
+        print("❌ Token revogado continuou válido no security_manager")
+        sys.exit(1)
+    except Exception:
+        pass
+
+    # revoke_user_tokens limpa o cache do auth_middleware
+    revoke_user_tokens(1)
+    if auth_middleware._tokens_verificados.obter(token) is not None:
+        print("❌ Token revogado continuou em cache no auth_middleware")
+        sys.exit(1)
+
+    # Corrida: revogação logo depois da checagem no Redis e antes de guardar no cache
+    token_corrida = security_manager.generate_jwt_token({'user_id': 4, 'username': 'bench'})
+    redis_original = security_manager.redis_client
+    existe = redis_original.exists
+
+    def existe_e_revoga(chave):
+        resultado = existe(chave)
+        security_manager.revoke_jwt_token(token_corrida)
+        return resultado
+
+    class RedisComCorrida:
+        def __getattr__(self, nome):
+            return existe_e_revoga if nome == 'exists' else getattr(redis_original, nome)
+
+    security_manager.redis_client = RedisComCorrida()
+    try:
+        security_manager.verify_jwt_token(token_corrida)
+    finally:
+        security_manager.redis_client = redis_original
+    if security_manager.tokens_verificados.obter(token_corrida) is not None:
+        print("❌ Token revogado durante a verificação ficou em cache no security_manager")
+        sys.exit(1)
+
+    # Expiração exatamente no 'exp'
+    curto = generate_jwt_token({'user_id': 3, 'username': 'bench', 'role': 'admin'}, expires_hours=1 / 3600)
+    verify_jwt_token(curto)
+    time.sleep(1.1)
+    if verify_jwt_token(curto) is not None:
+        print("❌ Token expirado continuou válido pelo cache")
+        sys.exit(1)
+
+    imprimir_tabela(f"Verificação de JWT: {verificacoes} chamadas com o mesmo token", linhas)
+    print(f"✅ Revogação e expiração respeitadas; {cache_tokens.estatisticas()}")
+
+if __name__ == '__main__':
+    main()
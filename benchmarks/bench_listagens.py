@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_listagens.py - to_dict() em listagens: lazy loading x serializers
+# Uso: python benchmarks/bench_listagens.py [linhas] [repeticoes]
+# Falha (exit 1) se o JSON divergir ou se o número de queries crescer com as linhas.
+import sys
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela, popular_banco
+
+from database import SessionLocal, Base, engine, Projeto, Cliente, Pasta, Funcionario, Arquivo, Conta
+from services.serializers import serializar
+
+# Queries esperadas por listagem: 1 principal + 1 por selectinload
+QUERIES_ESPERADAS = {
+    Projeto: 2,
+    Cliente: 1,
+    Pasta: 1,
+    Funcionario: 1,
+    Arquivo: 1,
+    Conta: 1
+}
+
+def listar_legado(modelo, linhas):
+    db = SessionLocal()
+    try:
+        return [obj.to_dict() for obj in db.query(modelo).order_by(modelo.id).limit(linhas).all()]
+    finally:
+        db.close()
+
+def listar_serializado(modelo, linhas):
+    db = SessionLocal()
+    try:
+        return serializar(db.query(modelo).order_by(modelo.id).limit(linhas), modelo)
+    finally:
+        db.close()
+
+def popular_pastas(db, quantidade=50):
+    """Pastas com subpastas e arquivos vinculados"""
+    if db.query(Pasta).first():
+        return
+
+    pastas = [Pasta(nome=f'Pasta {i}', projeto_id=(i % 10) + 1) for i in range(quantidade)]
+    db.add_all(pastas)
+    db.flush()
+    for i, pasta in enumerate(pastas[1:], start=1):
+        pasta.pasta_pai_id = pastas[(i - 1) // 3].id
+
+    for arquivo in db.query(Arquivo).limit(quantidade * 5).all():
+        arquivo.pasta_id = pastas[arquivo.id % quantidade].id
+    db.commit()
+
+def main():
+    linhas_por_listagem = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    Base.metadata.create_all(bind=engine)
+    contador = ContadorSQL(engine)
+
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+        popular_pastas(db)
+    finally:
+        db.close()
+
+    linhas = []
+    falhou = False
+    for modelo in QUERIES_ESPERADAS:
+        antes = listar_legado(modelo, linhas_por_listagem)
+        depois = listar_serializado(modelo, linhas_por_listagem)
+        if antes != depois:
+            print(f"❌ {modelo.__name__}: JSON divergente")
+            falhou = True
+
+        for nome, funcao in [('lazy', listar_legado), ('serializer', listar_serializado)]:
+            with contador.medir() as medicao:
+                funcao(modelo, linhas_por_listagem)
+            if nome == 'serializer' and medicao['queries'] != QUERIES_ESPERADAS[modelo]:
+                print(f"❌ {modelo.__name__}: {medicao['queries']} queries (esperado {QUERIES_ESPERADAS[modelo]})")
+                falhou = True
+            tempos = cronometrar(lambda: funcao(modelo, linhas_por_listagem), repeticoes)
+            linhas.append((f'{modelo.__name__} {nome}', {'queries': medicao['queries'], **resumo_tempos(tempos)}))
+
+    imprimir_tabela(f"Listagens de {linhas_por_listagem} linhas ({engine.dialect.name}, {repeticoes} repetições)", linhas)
+
+    if falhou:
+        sys.exit(1)
+    print("✅ JSON idêntico e número de queries fixo por listagem")
+
+if __name__ == '__main__':
+    main()
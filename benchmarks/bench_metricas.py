@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_metricas.py - Custo dos hooks de métricas por requisição
+# Mesma rota (3 SELECTs + JSON) num app sem e num app com registrar_metricas().
+# Uso: python benchmarks/bench_metricas.py [requisicoes]
+# Falha (exit 1) se /metrics não contar as requisições, os statements por requisição ou os bytes,
+# ou se responder sem o METRICS_TOKEN.
+import os
+import re
+import sys
+import timeit
+import logging
+
+from _comum import cronometrar, resumo_tempos, imprimir_tabela
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+os.environ.setdefault('METRICS_TOKEN', 'bench-metricas')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask, jsonify
+from database import SessionLocal, Base, engine, obter_sessao, registrar_sessao_requisicao, Cliente, Conta, Projeto
+from services import statements_requisicao
+from services.metricas import registrar_metricas
+
+def criar_app(com_metricas):
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    if com_metricas:
+        registrar_metricas(app)
+
+    @app.route('/api/resumo/<int:limite>')
+    def resumo(limite):
+        db = obter_sessao()
+        try:
+            return jsonify({
+                'clientes': db.query(Cliente).count(),
+                'contas': db.query(Conta).count(),
+                'projetos': [p.id for p in db.query(Projeto).limit(limite)]
+            })
+        finally:
+            db.close()
+
+    return app
+
+STATEMENTS = 20
+
+def consultas():
+    db = SessionLocal()
+    try:
+        for _ in range(STATEMENTS):
+            db.query(Cliente.id).filter(Cliente.id == 1).first()
+    finally:
+        db.close()
+
+def custo_por_statement(repeticoes):
+    """Melhor de 5 rodadas (o mínimo é menos sensível ao ruído da máquina), em µs"""
+    return min(timeit.repeat(consultas, number=repeticoes, repeat=5)) / (repeticoes * STATEMENTS) * 1e6
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    Base.metadata.create_all(bind=engine)
+
+    # Eventos do engine valem para o processo todo: medir as consultas antes e depois de instrumentar
+    consultas()
+    sql_sem = custo_por_statement(requisicoes // 25)
+    # Rodadas intercaladas para não favorecer quem roda com o processo mais aquecido
+    clientes = {'sem': criar_app(False).test_client(), 'com': criar_app(True).test_client()}
+    sql_com = custo_por_statement(requisicoes // 25)
+    tempos = {'sem': [], 'com': []}
+    for rotulo, cliente in clientes.items():
+        cliente.get('/api/resumo/5')
+    for _ in range(5):
+        for rotulo, cliente in clientes.items():
+            tempos[rotulo] += cronometrar(lambda: cliente.get('/api/resumo/5'), requisicoes // 5)
+    linhas = [(f'HTTP {rotulo}', resumo_tempos(amostras)) for rotulo, amostras in tempos.items()]
+    linhas += [('SQL sem', {'us_por_statement': round(sql_sem, 1)}), ('SQL com', {'us_por_statement': round(sql_com, 1)})]
+    cliente = clientes['com']
+
+    falhas = []
+    if cliente.get('/metrics').status_code != 401:
+        falhas.append('/metrics respondeu sem o METRICS_TOKEN')
+    autorizacao = {'Authorization': f"Bearer {os.environ['METRICS_TOKEN']}"}
+    texto = cliente.get('/metrics', headers=autorizacao).get_data(as_text=True)
+    exportacao = resumo_tempos(cronometrar(lambda: cliente.get('/metrics', headers=autorizacao), 200))
+    linhas.append(('GET /metrics', exportacao))
+
+    total = requisicoes // 5 * 5 + 1
+    rotulos = 'metodo="GET",rota="/api/resumo/<int:limite>"'
+    esperados = {
+        f'arconset_http_requisicoes_total{{{rotulos},status="200"}}': total,
+        f'arconset_db_statements_por_requisicao_sum{{{rotulos}}}': 3 * (total),
+        f'arconset_http_resposta_bytes_count{{{rotulos}}}': total
+    }
+    for serie, esperado in esperados.items():
+        encontrado = re.search(re.escape(serie) + r' ([0-9.e+]+)', texto)
+        if not encontrado or float(encontrado.group(1)) != esperado:
+            falhas.append(f"{serie} = {encontrado.group(1) if encontrado else 'ausente'} (esperado {esperado})")
+
+    imprimir_tabela(f"Hooks de métricas: {requisicoes} requisições ({engine.dialect.name})", linhas)
+    # A diferença HTTP se perde no ruído: medir os hooks isoladamente
+    app = criar_app(True)
+    with app.test_request_context('/api/resumo/5'):
+        app.preprocess_request()
+        resposta = app.make_response({'ok': True})
+        hooks_us = timeit.timeit(lambda: (statements_requisicao._inicio_requisicao(), statements_requisicao._fim_da_requisicao(resposta)),
+                                 number=requisicoes) / requisicoes * 1e6
+    print(f"Hooks before/after_request: {hooks_us:.1f} µs por requisição; "
+          f"eventos do engine: {sql_com - sql_sem:.1f} µs por statement ({(sql_com - sql_sem) / sql_sem:.0%} "
+          f"de um SELECT pelo ORM); exposição com {texto.count(chr(10))} linhas")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Requisições, statements e bytes contados corretamente")
+
+if __name__ == '__main__':
+    main()
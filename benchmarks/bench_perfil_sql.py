@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_perfil_sql.py - Detector de N+1 e log de queries lentas
+# Rota ingênua (Cliente.to_dict() com Cliente.projetos lazy) x GET /api/clientes (carregador em lote),
+# ambas com o perfil e as métricas ativos; depois mede o custo dos eventos por statement.
+# Uso: python benchmarks/bench_perfil_sql.py [clientes_por_pagina] [repeticoes]
+# Falha (exit 1) se o N+1 não for apontado (com a pilha), se a rota em lote for apontada
+# se a query lenta não aparecer no relatório de administração ou se perfil e métricas não
+# compartilharem um único par de eventos por engine.
+import os
+import sys
+import timeit
+import logging
+
+from _comum import imprimir_tabela, popular_banco
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+from flask import Flask, jsonify
+from database import SessionLocal, Base, engine, obter_sessao, registrar_sessao_requisicao, Cliente
+from models.user import User
+from routes.clientes import clientes_bp
+from middleware.auth_middleware import generate_jwt_token
+from services import perfil_sql
+from services.metricas import registrar_metricas
+
+STATEMENTS = 20
+
+def consultas():
+    db = SessionLocal()
+    try:
+        for _ in range(STATEMENTS):
+            db.query(Cliente.id).filter(Cliente.id == 1).first()
+    finally:
+        db.close()
+
+def custo_por_statement(repeticoes):
+    """Melhor de 5 rodadas (o mínimo é menos sensível ao ruído da máquina), em µs"""
+    return round(min(timeit.repeat(consultas, number=repeticoes, repeat=5)) / (repeticoes * STATEMENTS) * 1e6, 1)
+
+def criar_admin():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'bench_perfil').first()
+        if not user:
+            user = User(username='bench_perfil', email='bench@perfil.local', full_name='Bench', role='admin', is_active=True)
+            user.set_password('bench-senha')
+            db.add(user)
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def main():
+    por_pagina = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+    finally:
+        db.close()
+    admin_id = criar_admin()
+
+    consultas()
+    sem_perfil = custo_por_statement(repeticoes)
+
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    perfil_sql.registrar_perfil_sql(app)
+    registrar_metricas(app)
+    app.register_blueprint(clientes_bp)
+
+    @app.route('/api/clientes-ingenuo')
+    def clientes_ingenuo():
+        db = obter_sessao()
+        try:
+            return jsonify([cliente.to_dict() for cliente in db.query(Cliente).limit(por_pagina)])
+        finally:
+            db.close()
+
+    com_perfil = custo_por_statement(repeticoes)
+
+    cliente = app.test_client()
+    cliente.get('/api/clientes-ingenuo')
+    cliente.get(f'/api/clientes?limit={por_pagina}')
+
+    # Query lenta: limiar zerado só para esta requisição
+    limite_original = perfil_sql.LIMITE_LENTA_MS
+    perfil_sql.LIMITE_LENTA_MS = 0
+    cliente.get('/api/clientes?limit=1')
+    perfil_sql.LIMITE_LENTA_MS = limite_original
+
+    token = generate_jwt_token({'user_id': admin_id, 'username': 'bench_perfil', 'role': 'admin'})
+    resposta = cliente.get('/api/admin/perfil-sql', headers={'Authorization': f'Bearer {token}'})
+    if resposta.status_code != 200:
+        print(f"❌ GET /api/admin/perfil-sql respondeu {resposta.status_code}")
+        sys.exit(1)
+    relatorio = resposta.get_json()['data']
+
+    falhas = []
+    pares = (len(engine.dispatch.before_cursor_execute), len(engine.dispatch.after_cursor_execute))
+    if pares != (1, 1):
+        falhas.append(f'perfil + métricas instalaram {pares} listeners before/after_cursor_execute (esperado 1 de cada)')
+    ingenuo = [item for item in relatorio['n_mais_1'] if item['rota'] == 'GET /api/clientes-ingenuo']
+    em_lote = [item for item in relatorio['n_mais_1'] if item['rota'] == 'GET /api/clientes']
+    if not ingenuo or ingenuo[0]['repeticoes_max'] < por_pagina:
+        falhas.append(f'N+1 da rota ingênua não apontado: {ingenuo}')
+    elif not any('database.py' in frame for frame in ingenuo[0]['pilha']):
+        falhas.append(f"pilha do N+1 sem a origem em database.py: {ingenuo[0]['pilha']}")
+    elif any('statements_requisicao.py' in frame or 'perfil_sql.py' in frame for frame in ingenuo[0]['pilha']):
+        falhas.append(f"pilha do N+1 com frames da instrumentação: {ingenuo[0]['pilha']}")
+    if em_lote:
+        falhas.append(f'rota com carregador em lote apontada como N+1: {em_lote}')
+    if not any(item['rota'] == 'GET /api/clientes' for item in relatorio['queries_lentas']):
+        falhas.append('query lenta não registrada no relatório')
+
+    imprimir_tabela(f"Eventos do perfil SQL: {repeticoes * STATEMENTS} statements fora de requisição ({engine.dialect.name})",
+                    [('sem perfil', {'us_por_statement': sem_perfil}), ('perfil+métricas', {'us_por_statement': com_perfil})])
+    for item in ingenuo:
+        print(f"N+1 detectado: {item['rota']} repetiu {item['repeticoes_max']}x -> {item['statement'][:90]}...")
+        print(f"   origem: {item['pilha'][-1] if item['pilha'] else '?'}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print(f"✅ N+1 apontado só na rota ingênua; {len(relatorio['queries_lentas'])} queries lentas no relatório de admin")
+
+if __name__ == '__main__':
+    main()
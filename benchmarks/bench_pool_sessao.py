@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_pool_sessao.py - Pool pequeno sob concorrência: sessão por chamada x sessão por requisição
+# Sobe uma rota com auth_required (principal sem cache, ou seja, consulta ao banco no middleware) + consulta
+# na rota num servidor WSGI local e dispara N clientes concorrentes contra um pool de DB_POOL_SIZE conexões.
+# Uso: python benchmarks/bench_pool_sessao.py [requisicoes] [clientes]
+# Falha (exit 1) se alguma requisição falhar ou se a sessão por requisição usar mais de um checkout.
+import os
+import sys
+import time
+import logging
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+from _comum import percentil, imprimir_tabela
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+os.environ.setdefault('DB_POOL_SIZE', '3')
+os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+os.environ.setdefault('DB_POOL_TIMEOUT', '5')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+import database
+from database import SessionLocal, Base, engine, Cliente, obter_sessao, registrar_sessao_requisicao, metricas_pool, metricas_checkout
+from models.user import User
+from middleware.auth_middleware import auth_required, generate_jwt_token
+from services import cache_principal
+
+def preparar():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'bench_pool').first()
+        if not user:
+            user = User(username='bench_pool', email='bench@pool.local', full_name='Bench', role='manager', is_active=True)
+            user.set_password('bench-senha')
+            db.add(user)
+            db.add_all([Cliente(nome=f'Cliente {i}', email=f'c{i}@pool.local') for i in range(50)])
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def criar_app():
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+
+    @app.route('/api/clientes-pool')
+    @auth_required(roles=['admin', 'manager'])
+    def clientes_pool():
+        db = obter_sessao()
+        try:
+            clientes = db.query(Cliente).order_by(Cliente.id).limit(20).all()
+            # Trabalho da rota com a conexão ainda em uso (serialização, regras, etc.)
+            time.sleep(0.002)
+            return jsonify({'success': True, 'total': len(clientes)})
+        finally:
+            db.close()
+
+    return app
+
+def enviar(porta, token):
+    inicio = time.perf_counter()
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    try:
+        conexao.request('GET', '/api/clientes-pool', headers={'Authorization': f'Bearer {token}'})
+        resposta = conexao.getresponse()
+        resposta.read()
+        return resposta.status, (time.perf_counter() - inicio) * 1000
+    finally:
+        conexao.close()
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clientes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    Base.metadata.create_all(bind=engine)
+    user_id = preparar()
+    token = generate_jwt_token({'user_id': user_id, 'username': 'bench_pool', 'role': 'manager'})
+    cache_principal.TTL_SEGUNDOS = 0
+
+    servidor = make_server('127.0.0.1', 0, criar_app(), threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    linhas = []
+    falhou = False
+    contexto_original = database.has_request_context
+    try:
+        # 'antes': sem contexto de requisição, middleware e rota abrem cada um a sua sessão
+        for rotulo, contexto in [('antes', lambda: False), ('depois', contexto_original)]:
+            database.has_request_context = contexto
+            enviar(servidor.server_port, token)
+            metricas_checkout.zerar()
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clientes) as executor:
+                respostas = list(executor.map(lambda _: enviar(servidor.server_port, token), range(requisicoes)))
+            segundos = time.perf_counter() - inicio
+
+            pool = metricas_pool()
+            latencias = [latencia for _, latencia in respostas]
+            erros = sum(1 for status, _ in respostas if status >= 400)
+            checkouts = round(pool['checkouts'] / requisicoes, 2)
+            linhas.append((rotulo, {
+                'req_s': int(requisicoes / segundos),
+                'p50_ms': round(percentil(latencias, 50), 2),
+                'p99_ms': round(percentil(latencias, 99), 2),
+                'checkouts_req': checkouts,
+                'espera_media_ms': pool['espera_media_ms'],
+                'espera_max_ms': pool['espera_maxima_ms'],
+                'timeouts': pool['timeouts'],
+                'erros': erros
+            }))
+            if erros or (rotulo == 'depois' and checkouts > 1):
+                print(f"❌ {rotulo}: {erros} erros, {checkouts} checkouts por requisição")
+                falhou = True
+    finally:
+        database.has_request_context = contexto_original
+        servidor.shutdown()
+
+    imprimir_tabela(
+        f"Pool {pool['tamanho']}+{pool['max_overflow']} ({engine.dialect.name}): {requisicoes} requisições, {clientes} clientes",
+        linhas
+    )
+    print(f"Histograma de espera (depois): {pool['histograma_espera']}")
+    if falhou:
+        sys.exit(1)
+    print("✅ Middleware e rota compartilham uma conexão por requisição")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_replica_leitura.py - Roteamento de relatórios para a réplica de leitura
+# Primário e réplica são dois arquivos SQLite (a "replicação" é uma cópia do arquivo). Para usar dois
+# PostgreSQL, exporte DATABASE_URL e DATABASE_READ_URL antes de executar (as verificações de conteúdo
+# assumem que a réplica não recebe as escritas feitas durante o teste).
+# Uso: python benchmarks/bench_replica_leitura.py [requisicoes]
+# Falha (exit 1) se: o relatório não sair da réplica, a leitura logo após um POST não vier do primário
+# (read-your-writes), ou se réplica atrasada/fora do ar não cair para o primário.
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela, popular_banco
+
+ARQUIVO_REPLICA = None
+if not os.getenv('DATABASE_READ_URL'):
+    ARQUIVO_REPLICA = os.path.join(tempfile.mkdtemp(prefix='arconset_replica_'), 'replica.db')
+    os.environ['DATABASE_READ_URL'] = f'sqlite:///{ARQUIVO_REPLICA}'
+os.environ.setdefault('DB_REPLICA_VERIFICACAO', '0')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine, engine_leitura, registrar_sessao_requisicao
+from routes.contas import contas_bp
+from routes.dashboard import dashboard_bp
+from services import replica_leitura, dashboard_snapshot
+
+def replicar():
+    """Simular a replicação: copiar o arquivo do primário para a réplica"""
+    engine.dispose()
+    engine_leitura.dispose()
+    shutil.copyfile(engine.url.database, ARQUIVO_REPLICA)
+
+def main():
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+    finally:
+        db.close()
+    # Deixar o recálculo do snapshot (disparado pelos commits da carga) terminar antes de medir
+    time.sleep(dashboard_snapshot.DEBOUNCE_SEGUNDOS + 1)
+    if ARQUIVO_REPLICA:
+        replicar()
+
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    app.register_blueprint(contas_bp)
+    app.register_blueprint(dashboard_bp)
+    cliente = app.test_client()
+    outro_cliente = app.test_client()
+
+    primario = ContadorSQL(engine)
+    replica = ContadorSQL(engine_leitura)
+
+    def relatorio(quem=cliente, **kwargs):
+        resposta = quem.get('/api/contas/relatorio', **kwargs)
+        return resposta.get_json()['data']['estatisticas']['total_contas']
+
+    def medir(rotulo, funcao):
+        with primario.medir() as sql_primario, replica.medir() as sql_replica:
+            tempos = cronometrar(funcao, requisicoes)
+        return (rotulo, {
+            **resumo_tempos(tempos),
+            'q_primario_req': round(sql_primario['queries'] / requisicoes, 2),
+            'q_replica_req': round(sql_replica['queries'] / requisicoes, 2)
+        })
+
+    falhas = []
+    linhas = []
+
+    # Relatório e estatísticas do dashboard: sem escrita recente, saem da réplica
+    linhas.append(medir('relatorio', relatorio))
+    linhas.append(medir('dashboard', lambda: cliente.get('/api/dashboard/stats')))
+    if any(dados['q_primario_req'] for _, dados in linhas):
+        falhas.append('leituras marcadas com @somente_leitura consultaram o primário')
+
+    # Read-your-writes: quem acabou de criar uma conta lê do primário e vê a conta nova
+    antes = relatorio()
+    resposta = cliente.post('/api/contas', json={'descricao': 'Conta bench réplica', 'valor': 123.45,
+                                                 'data_vencimento': '2030-01-10', 'tipo': 'Pagar'})
+    if resposta.status_code not in (200, 201):
+        falhas.append(f'POST /api/contas respondeu {resposta.status_code}')
+    depois = relatorio()
+    if depois != antes + 1:
+        falhas.append(f'read-your-writes: total {depois} logo após o POST (esperado {antes + 1})')
+
+    # Outro cliente (outro usuário) continua na réplica
+    outro_cliente.environ_base['REMOTE_ADDR'] = '10.0.0.2'
+    with replica.medir() as sql_outro:
+        relatorio(outro_cliente)
+    if not sql_outro['queries']:
+        falhas.append('cliente sem escrita recente deixou de usar a réplica')
+
+    # Header de consistência forte força o primário
+    with replica.medir() as sql_forte:
+        relatorio(outro_cliente, headers={'X-Consistencia': 'forte'})
+    if sql_forte['queries']:
+        falhas.append("'X-Consistencia: forte' leu da réplica")
+
+    # Réplica atrasada além do limite: volta ao primário
+    medir_lag_original = replica_leitura.medir_lag
+    replica_leitura.medir_lag = lambda: replica_leitura.LAG_MAXIMO + 10
+    linhas.append(medir('lag alto', lambda: relatorio(outro_cliente)))
+
+    # Réplica fora do ar: volta ao primário sem erro para o cliente
+    def fora_do_ar():
+        raise ConnectionError('réplica indisponível (simulado)')
+    replica_leitura.medir_lag = fora_do_ar
+    linhas.append(medir('fora do ar', lambda: relatorio(outro_cliente)))
+    replica_leitura.medir_lag = medir_lag_original
+    for rotulo, dados in linhas[-2:]:
+        if dados['q_replica_req']:
+            falhas.append(f'{rotulo}: leitura continuou na réplica')
+
+    imprimir_tabela(f"Relatórios com réplica ({engine.dialect.name} -> {engine_leitura.dialect.name}), "
+                    f"{requisicoes} requisições", linhas)
+    print(f"Réplica: {replica_leitura.estatisticas()}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Relatórios na réplica; read-your-writes, lag alto e réplica fora do ar usam o primário")
+
+if __name__ == '__main__':
+    main()
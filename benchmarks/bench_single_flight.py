@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_single_flight.py - "8h da manhã": N requisições simultâneas às mesmas rotas pesadas
+# Sem e com @coalescer (services/single_flight.py), contando queries e medindo a latência de cada rodada.
+# Uso: python benchmarks/bench_single_flight.py [requisicoes_simultaneas] [rodadas]
+# Falha (exit 1) se as respostas coalescidas diferirem das originais, se a coalescência não reduzir
+# as execuções ou se os contadores não baterem com o número de requisições.
+# Sem Redis configurado mede só a coalescência dentro do processo.
+import sys
+import json
+import time
+import logging
+import threading
+
+from _comum import ContadorSQL, resumo_tempos, imprimir_tabela, popular_banco
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine, registrar_sessao_requisicao
+from routes.dashboard import dashboard_bp
+from routes.contas import contas_bp
+from services import single_flight, dashboard_snapshot
+
+ROTAS = ['/api/dashboard-data', '/api/dashboard/atividade-mensal', '/api/contas/relatorio']
+
+def normalizar(corpo):
+    """Conteúdo sem campos que mudam a cada chamada (timestamp, idade do snapshot)"""
+    dados = json.loads(corpo)
+    dados.pop('timestamp', None)
+    dados.pop('snapshot', None)
+    return dados
+
+def rajada(cliente, rota, simultaneas):
+    """Disparar as requisições juntas (Barrier) e devolver (tempos_ms, corpos)"""
+    barreira = threading.Barrier(simultaneas)
+    tempos, corpos = [], []
+    trava = threading.Lock()
+
+    def chamar():
+        barreira.wait()
+        inicio = time.perf_counter()
+        resposta = cliente.get(rota)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        with trava:
+            tempos.append(decorrido)
+            corpos.append((resposta.status_code, resposta.get_data()))
+
+    threads = [threading.Thread(target=chamar) for _ in range(simultaneas)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return tempos, corpos
+
+def main():
+    simultaneas = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rodadas = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+    finally:
+        db.close()
+    time.sleep(dashboard_snapshot.DEBOUNCE_SEGUNDOS + 1)
+
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(contas_bp)
+    cliente = app.test_client()
+    contador = ContadorSQL(engine)
+    falhas = []
+    linhas = []
+
+    for rota in ROTAS:
+        cliente.get(rota)
+        referencia = normalizar(cliente.get(rota).get_data())
+        resultados = {}
+        for ativo in (False, True):
+            single_flight.ATIVO = ativo
+            single_flight.zerar()
+            tempos = []
+            with contador.medir() as consultas:
+                for _ in range(rodadas):
+                    amostras, corpos = rajada(cliente, rota, simultaneas)
+                    tempos += amostras
+                    if any(status != 200 or normalizar(corpo) != referencia for status, corpo in corpos):
+                        falhas.append(f'{rota}: resposta diferente com coalescência={ativo}')
+            resultados[ativo] = consultas['queries']
+            rotulo = f"{'com' if ativo else 'sem'} {rota.rsplit('/', 1)[-1]}"
+            linhas.append((rotulo, {**resumo_tempos(tempos), 'queries': consultas['queries']}))
+
+        contagens = next(iter(single_flight.estatisticas().values()), {})
+        total = sum(contagens.values())
+        if total != simultaneas * rodadas:
+            falhas.append(f'{rota}: contadores somam {total} (esperado {simultaneas * rodadas}): {contagens}')
+        if resultados[True] >= resultados[False]:
+            falhas.append(f'{rota}: coalescência não reduziu queries ({resultados[False]} -> {resultados[True]})')
+        print(f"{rota}: {contagens}")
+
+    imprimir_tabela(f"{simultaneas} requisições simultâneas x {rodadas} rodadas por rota ({engine.dialect.name})", linhas)
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Respostas idênticas; requisições simultâneas compartilharam a mesma execução")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_sync_delta.py - Recarga completa das coleções x GET /api/sync?since=<versão>
+# Carga inicial paginada, depois algumas alterações/exclusões e a sincronização incremental.
+# Uso: python benchmarks/bench_sync_delta.py [alteracoes] [limite_pagina]
+# Falha (exit 1) se o delta não trouxer exatamente as linhas alteradas e as lápides das excluídas,
+# se um flush ou rollback gerar versão ou se a carga inicial não cobrir todas as linhas.
+import os
+import sys
+import time
+import logging
+
+from _comum import ContadorSQL, imprimir_tabela, popular_banco
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine, registrar_sessao_requisicao, Cliente, Conta, Notificacao, Projeto
+from models.user import User
+from routes.sync import sync_bp
+from middleware.auth_middleware import generate_jwt_token
+from services.serializers import PLANOS, carregar
+from services.sincronizacao import MODELOS_SYNC, preparar_sync, versao_atual
+from services import dashboard_snapshot
+
+def criar_usuario():
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == 'bench_sync').first()
+        if not user:
+            user = User(username='bench_sync', email='bench@sync.local', full_name='Bench', role='user', is_active=True)
+            user.set_password('bench-senha')
+            db.add(user)
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def recarga_completa(app):
+    """O que as telas baixam hoje: to_dict() de todas as linhas de cada coleção"""
+    db = SessionLocal()
+    try:
+        dados = {}
+        for entidade, modelo in MODELOS_SYNC.items():
+            query = db.query(modelo)
+            dados[entidade] = [item.to_dict() for item in (carregar(query, modelo) if modelo in PLANOS else query.all())]
+        with app.app_context():
+            return app.json.response(dados).get_data()
+    finally:
+        db.close()
+
+def sincronizar(cliente, headers, desde, limite):
+    """Todas as páginas de /api/sync a partir de 'desde'; devolve (versão, alterados, excluídos, bytes, páginas)"""
+    alterados, excluidos = {}, {}
+    cursor, bytes_total, paginas = None, 0, 0
+    while True:
+        url = f'/api/sync?since={desde}&limit={limite}' + (f'&cursor={cursor}' if cursor else '')
+        resposta = cliente.get(url, headers=headers)
+        if resposta.status_code != 200:
+            raise RuntimeError(f'{url} -> {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}')
+        bytes_total += len(resposta.get_data())
+        paginas += 1
+        corpo = resposta.get_json()
+        for entidade, mudancas in corpo['alteracoes'].items():
+            alterados.setdefault(entidade, set()).update(item['id'] for item in mudancas['alterados'])
+            excluidos.setdefault(entidade, set()).update(mudancas['excluidos'])
+        if not corpo['tem_mais']:
+            return corpo['versao'], alterados, excluidos, bytes_total, paginas
+        cursor = corpo['next_cursor']
+
+def main():
+    total_alteracoes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    limite = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        popular_banco(db)
+    finally:
+        db.close()
+    preparar_sync()
+    token = generate_jwt_token({'user_id': criar_usuario(), 'username': 'bench_sync', 'role': 'user'})
+    headers = {'Authorization': f'Bearer {token}'}
+    time.sleep(dashboard_snapshot.DEBOUNCE_SEGUNDOS + 1)
+
+    app = Flask(__name__)
+    registrar_sessao_requisicao(app)
+    app.register_blueprint(sync_bp)
+    cliente = app.test_client()
+    contador = ContadorSQL(engine)
+    falhas = []
+
+    with contador.medir() as completa:
+        inicio = time.perf_counter()
+        corpo_completo = recarga_completa(app)
+        completa['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    completa['kb'] = round(len(corpo_completo) / 1024, 1)
+
+    with contador.medir() as inicial:
+        inicio = time.perf_counter()
+        versao, alterados, _, bytes_inicial, paginas = sincronizar(cliente, headers, 0, limite)
+        inicial['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    inicial.update(kb=round(bytes_inicial / 1024, 1), paginas=paginas)
+
+    db = SessionLocal()
+    try:
+        for entidade, modelo in MODELOS_SYNC.items():
+            esperado = {id_ for (id_,) in db.query(modelo.id)}
+            if alterados.get(entidade, set()) != esperado:
+                falhas.append(f'carga inicial de {entidade}: {len(alterados.get(entidade, ()))} de {len(esperado)} linhas')
+
+        # Alterações: contas pagas, clientes renomeados, uma notificação nova e um projeto excluído
+        contas = db.query(Conta).filter(Conta.status == 'Pendente').limit(total_alteracoes).all()
+        for conta in contas:
+            conta.status = 'Paga'
+        clientes = db.query(Cliente).limit(total_alteracoes).all()
+        for cliente_db in clientes:
+            cliente_db.nome = cliente_db.nome + ' (editado)'
+        notificacao = Notificacao(titulo='Sync', mensagem='delta', tipo='info')
+        db.add(notificacao)
+        projeto = db.query(Projeto).filter(~Projeto.contas.any(), ~Projeto.arquivos.any()).first() or db.query(Projeto).first()
+        projeto_id = projeto.id
+        db.delete(projeto)
+        db.commit()
+        esperados = {
+            'contas': {conta.id for conta in contas},
+            'clientes': {cliente_db.id for cliente_db in clientes},
+            'notificacoes': {notificacao.id}
+        }
+
+        # Rollback não consome versão; o flush também não (o contador só trava no commit)
+        antes = versao_atual(db)
+        db.add(Notificacao(titulo='Descartada', mensagem='rollback', tipo='info'))
+        db.flush()
+        if versao_atual(db) != antes:
+            falhas.append('flush incrementou a versão (contador travado durante a transação)')
+        db.rollback()
+        if versao_atual(db) != antes:
+            falhas.append('rollback incrementou a versão')
+    finally:
+        db.close()
+
+    with contador.medir() as delta:
+        inicio = time.perf_counter()
+        nova_versao, alterados, excluidos, bytes_delta, paginas = sincronizar(cliente, headers, versao, limite)
+        delta['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    delta.update(kb=round(bytes_delta / 1024, 1), paginas=paginas)
+
+    # Projeto excluído: contas/arquivos ligados podem ter sido alterados pelo cascade (o ORM grava o FK nulo)
+    for entidade, ids in alterados.items():
+        if ids and entidade not in esperados and entidade not in ('contas', 'arquivos', 'projetos'):
+            falhas.append(f'{entidade} sem alterações veio no delta: {sorted(ids)[:5]}')
+    for entidade, ids in esperados.items():
+        if not ids <= alterados.get(entidade, set()):
+            falhas.append(f'delta de {entidade} sem {sorted(ids - alterados.get(entidade, set()))[:5]}')
+    if excluidos.get('projetos') != {projeto_id}:
+        falhas.append(f"lápide do projeto {projeto_id} ausente: {excluidos.get('projetos')}")
+    if nova_versao <= versao:
+        falhas.append(f'versão não avançou ({versao} -> {nova_versao})')
+
+    imprimir_tabela(f"Recarga completa x sincronização incremental ({engine.dialect.name})", [
+        ('completa', completa), ('sync inicial', inicial), ('sync delta', delta)
+    ])
+    print(f"Delta após {total_alteracoes} contas pagas + {total_alteracoes} clientes editados + 1 notificação + 1 exclusão: "
+          f"{sum(map(len, alterados.values()))} linhas, versão {versao} -> {nova_versao}")
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Delta com só as linhas alteradas e a lápide da exclusão; rollback não gera versão")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_upload_memoria.py - Pico de memória do upload: antes x depois
+# Uso: python benchmarks/bench_upload_memoria.py [tamanho_mb]
+#
+# O S3 é simulado pelo moto rodando como servidor em outro processo, para que
+# a memória do próprio moto não entre na medição (tracemalloc deste processo).
+# Requer: pip install "moto[server]"
+import os
+import sys
+import time
+import socket
+import hashlib
+import tempfile
+import subprocess
+import tracemalloc
+
+from _comum import imprimir_tabela
+
+import boto3
+from services.upload_stream import processar_upload, DestinoLocal, DestinoS3
+
+BUCKET = 'arconset-bench'
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def iniciar_moto():
+    """Subir o moto_server e devolver (processo, cliente S3)"""
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'moto.server', '-p', str(porta)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    cliente = boto3.client(
+        's3', endpoint_url=f'http://127.0.0.1:{porta}', region_name='us-east-1',
+        aws_access_key_id='bench', aws_secret_access_key='bench'
+    )
+    for _ in range(100):
+        try:
+            cliente.create_bucket(Bucket=BUCKET)
+            return processo, cliente
+        except Exception:
+            time.sleep(0.1)
+    processo.terminate()
+    raise RuntimeError('moto_server não respondeu')
+
+def gerar_arquivo(tamanho_mb):
+    """Arquivo temporário com conteúdo pseudoaleatório (simula o spool do werkzeug)"""
+    caminho = os.path.join(tempfile.mkdtemp(prefix='arconset_upload_'), 'planta.dwg')
+    bloco = hashlib.sha256(b'arconset').digest() * 32768  # 1MB
+    with open(caminho, 'wb') as f:
+        f.write(b'AC1032')
+        for _ in range(tamanho_mb):
+            f.write(bloco)
+    return caminho
+
+def medir(funcao):
+    """(resultado, pico_mb, segundos) de uma função"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, round(pico / (1024 * 1024), 2), round(duracao, 3)
+
+# ===== IMPLEMENTAÇÕES =====
+def legado_s3(cliente, caminho):
+    """Antes: seek para medir + bytes inteiros no put_object"""
+    with open(caminho, 'rb') as f:
+        f.seek(0, 2)
+        tamanho = f.tell()
+        f.seek(0)
+        conteudo = f.read()
+    cliente.put_object(Bucket=BUCKET, Key='legado/planta.dwg', Body=conteudo, ContentType='image/vnd.dwg')
+    return {'tamanho': tamanho}
+
+def streaming_s3(cliente, caminho):
+    with open(caminho, 'rb') as f:
+        destino = DestinoS3(cliente, BUCKET, 'streaming/planta.dwg')
+        return processar_upload(f, destino, 'planta.dwg', 10 * 1024 ** 3)
+
+def legado_local(caminho, pasta):
+    """Antes: seek para medir + file.save (sem hash, MIME do cliente)"""
+    with open(caminho, 'rb') as f:
+        f.seek(0, 2)
+        tamanho = f.tell()
+        f.seek(0)
+        with open(os.path.join(pasta, 'legado.dwg'), 'wb') as saida:
+            while True:
+                bloco = f.read(16 * 1024)
+                if not bloco:
+                    break
+                saida.write(bloco)
+    return {'tamanho': tamanho}
+
+def streaming_local(caminho, pasta):
+    with open(caminho, 'rb') as f:
+        return processar_upload(f, DestinoLocal(os.path.join(pasta, 'streaming.dwg')), 'planta.dwg', 10 * 1024 ** 3)
+
+def main():
+    tamanho_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    caminho = gerar_arquivo(tamanho_mb)
+    pasta = tempfile.mkdtemp(prefix='arconset_destino_')
+
+    with open(caminho, 'rb') as f:
+        esperado = hashlib.sha256(f.read()).hexdigest()
+
+    processo, cliente = iniciar_moto()
+    try:
+        linhas = []
+        for nome, funcao in [
+            ('s3 antes', lambda: legado_s3(cliente, caminho)),
+            ('s3 depois', lambda: streaming_s3(cliente, caminho)),
+            ('local antes', lambda: legado_local(caminho, pasta)),
+            ('local depois', lambda: streaming_local(caminho, pasta)),
+        ]:
+            resultado, pico_mb, segundos = medir(funcao)
+            linhas.append((nome, {'pico_mb': pico_mb, 'segundos': segundos, 'tamanho': resultado['tamanho']}))
+
+            if 'hash_sha256' in resultado and resultado['hash_sha256'] != esperado:
+                print(f"❌ {nome}: SHA-256 divergente")
+                sys.exit(1)
+
+        # Conferir o objeto montado pelo multipart
+        objeto = cliente.get_object(Bucket=BUCKET, Key='streaming/planta.dwg')
+        if hashlib.sha256(objeto['Body'].read()).hexdigest() != esperado:
+            print("❌ Objeto multipart no S3 difere do original")
+            sys.exit(1)
+
+        imprimir_tabela(f"Upload de {tamanho_mb}MB (pico tracemalloc do processo da API)", linhas)
+        print(f"✅ SHA-256 conferido no retorno e no objeto S3; MIME detectado: {resultado['tipo_mime']}")
+    finally:
+        processo.terminate()
+
+if __name__ == '__main__':
+    main()
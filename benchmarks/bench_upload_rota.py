@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_upload_rota.py - POST /api/arquivos/upload (main.py): conteúdo novo x repetido (deduplicado)
+# Mede a rota completa (multipart, streaming, SHA-256, registro no banco) e confere o fallback
+# "Arquivo salvo (banco com problema)" quando o registro no banco falha.
+# Uso: python benchmarks/bench_upload_rota.py [uploads] [kb_por_arquivo]
+# Falha (exit 1) se algum upload falhar, se o conteúdo repetido não for deduplicado ou se uma
+# falha no banco não cair no fallback (200 com os dados do arquivo salvo).
+import io
+import os
+import sys
+import logging
+import tempfile
+
+from _comum import cronometrar, resumo_tempos, imprimir_tabela
+
+os.environ.setdefault('JWT_SECRET', 'bench-secret-com-pelo-menos-32-caracteres!')
+os.environ.setdefault('FLASK_ENV', 'development')
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+# UPLOAD_FOLDER é relativo ao diretório atual: gravar num diretório temporário
+os.chdir(tempfile.mkdtemp(prefix='arconset_upload_rota_'))
+
+import main
+from database import Base, engine
+from middleware.auth_middleware import generate_jwt_token
+
+def enviar(cliente, headers, conteudo, nome='planta.pdf'):
+    return cliente.post('/api/arquivos/upload', headers=headers, content_type='multipart/form-data',
+                        data={'file': (io.BytesIO(conteudo), nome), 'tipo_documento': 'Geral'})
+
+def main_bench():
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    kb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+
+    app = main.create_app()
+    Base.metadata.create_all(bind=engine)
+    cliente = app.test_client()
+    headers = {'Authorization': f"Bearer {generate_jwt_token({'user_id': 1, 'username': 'admin', 'role': 'admin'})}"}
+    falhas = []
+    linhas = []
+
+    corpo = b'%PDF-1.4\n' + os.urandom(kb * 1024)
+    contador = [0]
+
+    def novo():
+        contador[0] += 1
+        resposta = enviar(cliente, headers, corpo + contador[0].to_bytes(8, 'big'))
+        if resposta.status_code != 200 or not resposta.get_json().get('success'):
+            falhas.append(f'upload novo -> {resposta.status_code}')
+
+    def repetido():
+        resposta = enviar(cliente, headers, corpo)
+        dados = resposta.get_json() or {}
+        if resposta.status_code != 200 or not dados.get('success'):
+            falhas.append(f'upload repetido -> {resposta.status_code}')
+
+    linhas.append(('conteúdo novo', resumo_tempos(cronometrar(novo, uploads))))
+    enviar(cliente, headers, corpo)
+    linhas.append(('repetido', resumo_tempos(cronometrar(repetido, uploads))))
+    if not enviar(cliente, headers, corpo).get_json().get('deduplicado'):
+        falhas.append('conteúdo repetido não foi deduplicado')
+
+    # Falha no registro do banco: o arquivo já está salvo e a resposta cai no fallback
+    original = main.registrar_upload
+
+    def registrar_com_falha(db, resultado):
+        raise RuntimeError('banco indisponível (simulado)')
+
+    main.registrar_upload = registrar_com_falha
+    try:
+        resposta = enviar(cliente, headers, corpo + b'fallback')
+    finally:
+        main.registrar_upload = original
+    dados = resposta.get_json(silent=True) or {}
+    if resposta.status_code != 200 or dados.get('message') != 'Arquivo salvo (banco com problema)':
+        falhas.append(f"falha no banco -> {resposta.status_code}: {resposta.get_data(as_text=True)[:200]}")
+    elif dados['data']['tamanho'] != len(corpo) + len(b'fallback'):
+        falhas.append(f"fallback com tamanho {dados['data']['tamanho']}")
+
+    imprimir_tabela(f"{uploads} uploads de {kb}KB ({engine.dialect.name})", linhas)
+    if falhas:
+        for falha in falhas[:10]:
+            print(f"❌ {falha}")
+        sys.exit(1)
+    print("✅ Uploads aceitos, conteúdo repetido deduplicado, falha no banco cai no fallback")
+
+if __name__ == '__main__':
+    main_bench()
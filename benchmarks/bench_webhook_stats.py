@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_webhook_stats.py - Estatísticas de webhooks: 8 count() por banco x GROUP BY único
+# Mede separadamente o GROUP BY por banco (comparável às 8 queries antigas), o histograma
+# diário e a função inteira.
+# Uso: python benchmarks/bench_webhook_stats.py [boletos] [repeticoes]
+# Falha (exit 1) se os totais por banco divergirem entre as duas versões, se o valor médio
+# divergir do avg() do banco ou se o histograma divergir da contagem por faixa de datas.
+import sys
+import random
+import logging
+from datetime import datetime, timedelta, UTC
+
+from _comum import ContadorSQL, cronometrar, resumo_tempos, imprimir_tabela
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from sqlalchemy import func
+from database import SessionLocal, Base, engine, atualizar_esquema
+from routes import webhook_receiver
+from routes.webhook_receiver import BoletoRecebido, estatisticas_boletos
+
+BANCOS = ['BRADESCO', 'ITAU', 'BANCO_BRASIL']
+
+def popular(total):
+    if SessionLocal().query(BoletoRecebido.id).first():
+        return
+    aleatorio = random.Random(5)
+    agora = datetime.now(UTC)
+    with engine.begin() as conn:
+        lote = []
+        for i in range(total):
+            lote.append({
+                'banco_origem': aleatorio.choice(BANCOS),
+                'codigo_barras': f'{i:044d}',
+                'valor': round(aleatorio.uniform(50, 9000), 2),
+                'data_vencimento': agora + timedelta(days=aleatorio.randint(-5, 40)),
+                'beneficiario': f'Fornecedor {i % 300}',
+                'status': aleatorio.choice(['pendente', 'pendente', 'pago', 'cancelado']),
+                'urgente': aleatorio.random() < 0.2,
+                'processado': aleatorio.random() < 0.5,
+                'data_recebimento': agora - timedelta(minutes=aleatorio.randint(0, 60 * 24 * 90))
+            })
+            if len(lote) == 10_000:
+                conn.execute(BoletoRecebido.__table__.insert(), lote)
+                lote = []
+        if lote:
+            conn.execute(BoletoRecebido.__table__.insert(), lote)
+
+def stats_antigo():
+    """Versão anterior: 2 count() por banco + 2 totais"""
+    db = SessionLocal()
+    try:
+        stats = {}
+        for banco in BANCOS:
+            total = db.query(BoletoRecebido).filter(BoletoRecebido.banco_origem == banco).count()
+            urgentes = db.query(BoletoRecebido).filter(
+                BoletoRecebido.banco_origem == banco, BoletoRecebido.urgente == True
+            ).count()
+            stats[banco] = {'total': total, 'urgentes': urgentes}
+        db.query(BoletoRecebido).count()
+        db.query(BoletoRecebido).filter(BoletoRecebido.urgente == True).count()
+        return stats
+    finally:
+        db.close()
+
+def stats_novo():
+    db = SessionLocal()
+    try:
+        return estatisticas_boletos(db, 30)
+    finally:
+        db.close()
+
+def so_agrupamento():
+    """Só o GROUP BY por banco: mesma informação das 8 queries antigas (e mais)"""
+    db = SessionLocal()
+    try:
+        return db.query(
+            BoletoRecebido.banco_origem, BoletoRecebido.urgente, BoletoRecebido.status, BoletoRecebido.processado,
+            func.count(), func.sum(BoletoRecebido.valor)
+        ).group_by(
+            BoletoRecebido.banco_origem, BoletoRecebido.urgente, BoletoRecebido.status, BoletoRecebido.processado
+        ).all()
+    finally:
+        db.close()
+
+def so_histograma(dias=30):
+    db = SessionLocal()
+    try:
+        inicio = datetime.now(UTC).date() - timedelta(days=dias - 1)
+        dia = webhook_receiver.DIA_RECEBIMENTO
+        return db.query(dia, BoletoRecebido.banco_origem, func.count()).filter(
+            dia >= inicio
+        ).group_by(dia, BoletoRecebido.banco_origem).all()
+    finally:
+        db.close()
+
+def conferir(novo):
+    """Valor médio contra avg() do banco e cada dia do histograma contra uma contagem por faixa"""
+    falhas = []
+    db = SessionLocal()
+    try:
+        media = db.query(func.avg(BoletoRecebido.valor)).scalar()
+        if round(float(media), 2) != novo['valor_medio']:
+            falhas.append(f"valor_medio {novo['valor_medio']} != avg() {round(float(media), 2)}")
+        for banco, media_banco in db.query(BoletoRecebido.banco_origem, func.avg(BoletoRecebido.valor)).group_by(BoletoRecebido.banco_origem):
+            if round(float(media_banco), 2) != novo['por_banco'][banco]['valor_medio']:
+                falhas.append(f"{banco}: valor_medio {novo['por_banco'][banco]['valor_medio']} != avg() {round(float(media_banco), 2)}")
+        for item in novo['histograma_diario']:
+            inicio = datetime.fromisoformat(item['dia'])
+            total = db.query(func.count(BoletoRecebido.id)).filter(
+                BoletoRecebido.data_recebimento >= inicio,
+                BoletoRecebido.data_recebimento < inicio + timedelta(days=1)
+            ).scalar()
+            if total != item['total']:
+                falhas.append(f"histograma {item['dia']}: {item['total']} != {total}")
+    finally:
+        db.close()
+    return falhas
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    Base.metadata.create_all(bind=engine)
+    atualizar_esquema()
+    popular(total)
+    contador = ContadorSQL(engine)
+
+    antigo = stats_antigo()
+    novo = stats_novo()
+    for banco in BANCOS:
+        if (antigo[banco]['total'], antigo[banco]['urgentes']) != (novo['por_banco'][banco]['total'], novo['por_banco'][banco]['urgentes']):
+            print(f"❌ {banco}: {antigo[banco]} != {novo['por_banco'][banco]}")
+            sys.exit(1)
+    falhas = conferir(novo)
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        sys.exit(1)
+
+    linhas = []
+    for rotulo, funcao in [('antes (8 queries)', stats_antigo), ('group by', so_agrupamento),
+                           ('histograma', so_histograma), ('depois (tudo)', stats_novo)]:
+        with contador.medir() as sql:
+            tempos = cronometrar(funcao, repeticoes)
+        linhas.append((rotulo, {**resumo_tempos(tempos), 'queries': sql['queries'] // repeticoes}))
+
+    imprimir_tabela(f"Estatísticas de {total} boletos ({engine.dialect.name})", linhas)
+    print(f"✅ Totais por banco idênticos, valor médio = avg() e histograma conferido; depois inclui histograma de {len(novo['histograma_diario'])} dias, "
+          f"valor médio e pendentes/processados")
+
+if __name__ == '__main__':
+    main()
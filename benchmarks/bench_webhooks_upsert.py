@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# 📊 benchmarks/bench_webhooks_upsert.py - Replay de webhooks históricos: verificar-e-inserir x lote com ON CONFLICT
+# Uso: python benchmarks/bench_webhooks_upsert.py [eventos] [tamanho_lote]
+# Falha (exit 1) se os dois caminhos não gravarem os mesmos boletos ou se o replay repetido criar linhas.
+import sys
+import json
+import time
+import random
+import logging
+from datetime import datetime, timedelta, UTC
+
+from _comum import ContadorSQL, imprimir_tabela
+
+import structlog
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+from flask import Flask
+from database import SessionLocal, Base, engine
+from routes.webhook_receiver import webhook_bp, BoletoRecebido, montar_boleto
+
+def gerar_eventos(total):
+    """Eventos BRADESCO com ~20% de reenvios (mesmo código de barras)"""
+    aleatorio = random.Random(11)
+    hoje = datetime.now(UTC)
+    eventos = []
+    for i in range(total):
+        codigo = i if i < 50 or aleatorio.random() > 0.2 else aleatorio.randrange(i)
+        eventos.append({
+            'codigoBarras': f'{codigo:044d}',
+            'valor': round(aleatorio.uniform(50, 9000), 2),
+            'dataVencimento': (hoje + timedelta(days=aleatorio.randint(-5, 40))).isoformat(),
+            'beneficiario': f'Fornecedor {codigo % 300}',
+            'conta': f'{codigo % 97:04d}-{codigo % 9}'
+        })
+    return eventos
+
+def limpar():
+    with engine.begin() as conn:
+        conn.execute(BoletoRecebido.__table__.delete())
+
+def replay_antigo(eventos):
+    """Caminho original: SELECT por codigo_barras + INSERT + COMMIT por evento"""
+    db = SessionLocal()
+    try:
+        for evento in eventos:
+            linha = montar_boleto('BRADESCO', evento)
+            if db.query(BoletoRecebido).filter(BoletoRecebido.codigo_barras == linha['codigo_barras']).first():
+                continue
+            db.add(BoletoRecebido(**linha))
+            db.commit()
+    finally:
+        db.close()
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tamanho_lote = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    Base.metadata.create_all(bind=engine)
+    contador = ContadorSQL(engine)
+    eventos = gerar_eventos(total)
+
+    app = Flask(__name__)
+    app.register_blueprint(webhook_bp)
+    cliente = app.test_client()
+
+    def replay_lote():
+        resumo = {'criado': 0, 'duplicado': 0, 'invalido': 0}
+        for inicio in range(0, total, tamanho_lote):
+            resposta = cliente.post('/api/webhooks/boletos/bradesco/batch',
+                                    data=json.dumps(eventos[inicio:inicio + tamanho_lote]),
+                                    content_type='application/json')
+            for status, quantidade in resposta.get_json()['resumo'].items():
+                resumo[status] += quantidade
+        return resumo
+
+    linhas = []
+    limpar()
+    with contador.medir() as sql:
+        inicio = time.perf_counter()
+        replay_antigo(eventos)
+        segundos = time.perf_counter() - inicio
+    esperado = SessionLocal().query(BoletoRecebido).count()
+    linhas.append(('antes', {'segundos': round(segundos, 2), 'eventos_s': int(total / segundos), 'queries': sql['queries']}))
+
+    limpar()
+    with contador.medir() as sql:
+        inicio = time.perf_counter()
+        resumo = replay_lote()
+        segundos = time.perf_counter() - inicio
+    obtido = SessionLocal().query(BoletoRecebido).count()
+    linhas.append(('depois', {'segundos': round(segundos, 2), 'eventos_s': int(total / segundos), 'queries': sql['queries'], **resumo}))
+
+    if obtido != esperado or resumo['criado'] != esperado:
+        print(f"❌ Lote gravou {obtido} boletos (criados={resumo['criado']}), esperado {esperado}")
+        sys.exit(1)
+
+    # Replay repetido é idempotente
+    repetido = replay_lote()
+    if repetido['criado'] or SessionLocal().query(BoletoRecebido).count() != esperado:
+        print(f"❌ Replay repetido criou linhas: {repetido}")
+        sys.exit(1)
+
+    imprimir_tabela(f"Replay de {total} webhooks ({engine.dialect.name}, lotes de {tamanho_lote})", linhas)
+    print(f"✅ {esperado} boletos únicos nos dois caminhos; replay repetido: {repetido}")
+
+if __name__ == '__main__':
+    main()
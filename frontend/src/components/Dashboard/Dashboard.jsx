@@ -2,6 +2,7 @@
 import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import { useDashboardData } from './hooks/useDashboardData';
 import { useSecureBankMonitor } from './hooks/useSecureBankMonitor';
+import { useServerEvents } from './hooks/useServerEvents';
 import { useModal } from './hooks/useModal';
 import { useAuth } from './hooks/useAuth';
 
@@ -43,6 +44,8 @@ const Dashboard = () => {
     loading,
     error,
     loadData,
+    reloadSection,
+    applyStats,
     createItem,
     updateItem,
     deleteItem,
@@ -234,9 +237,26 @@ const Dashboard = () => {
     }
   }, [user, loadData, hasConfiguredBanks, manualInit]);
 
-  // Auto-refresh otimizado (apenas se necessário)
+  // 🔔 Eventos do servidor: recarregar só a seção afetada
+  const serverEventHandlers = useMemo(() => ({
+    notificacao_nova: () => reloadSection('notifications'),
+    conta_paga: () => reloadSection('bills'),
+    arquivo_enviado: () => reloadSection('files'),
+    dashboard_atualizado: (evento) => applyStats(evento.stats),
+    boleto_recebido: () => {
+      if (hasConfiguredBanks && !loadingBoletos) {
+        verificarTodosBoletos();
+      }
+    },
+    // Eventos perdidos (reconexão fora do histórico): recarregar tudo uma vez
+    resync: () => loadData()
+  }), [reloadSection, applyStats, loadData, hasConfiguredBanks, loadingBoletos, verificarTodosBoletos]);
+
+  const { connected: eventsConnected } = useServerEvents(serverEventHandlers, Boolean(user));
+
+  // Auto-refresh apenas sem o canal de eventos (fallback)
   useEffect(() => {
-    if (!user || activeTab !== 'dashboard') return;
+    if (!user || activeTab !== 'dashboard' || eventsConnected) return;
 
     const interval = setInterval(() => {
       // Refresh silencioso apenas se não estiver carregando
@@ -246,7 +266,7 @@ const Dashboard = () => {
     }, 5 * 60 * 1000); // 5 minutos
 
     return () => clearInterval(interval);
-  }, [user, activeTab, loading, isRefreshing, loadData]);
+  }, [user, activeTab, eventsConnected, loading, isRefreshing, loadData]);
 
   // ===== RENDERIZAÇÃO DOS CONTEÚDOS =====
   const renderContent = () => {
@@ -32,6 +32,31 @@ import {
   Cloud
 } from 'lucide-react';
 
+// SHA-256 do conteúdo (hex) para upload instantâneo; null se o navegador não suporta
+const calcularSha256 = async (file) => {
+  if (!window.crypto?.subtle) return null;
+  try {
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+  } catch {
+    return null;
+  }
+};
+
+// Prova de posse do upload por hash: SHA-256 das faixas [inicio, fim) sorteadas pelo servidor
+const calcularProva = async (file, faixas) => {
+  const partes = await Promise.all(faixas.map(([inicio, fim]) => file.slice(inicio, fim).arrayBuffer()));
+  const total = partes.reduce((soma, parte) => soma + parte.byteLength, 0);
+  const bytes = new Uint8Array(total);
+  let posicao = 0;
+  for (const parte of partes) {
+    bytes.set(new Uint8Array(parte), posicao);
+    posicao += parte.byteLength;
+  }
+  const digest = await window.crypto.subtle.digest('SHA-256', bytes);
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
 const EnhancedFilesComponent = ({ 
   onUpload,
   onDelete,
@@ -210,10 +235,57 @@ const EnhancedFilesComponent = ({
     
     setUploading(true);
     
+    const limparProgresso = (nome) => setTimeout(() => {
+      setUploadProgress(prev => {
+        const updated = { ...prev };
+        delete updated[nome];
+        return updated;
+      });
+    }, 2000);
+    
     for (const file of validFiles) {
       try {
         setUploadProgress(prev => ({ ...prev, [file.name]: 0 }));
         
+        const token = localStorage.getItem('auth_token');
+        const category = getFileCategory(file.type);
+        
+        // Upload instantâneo: se o conteúdo já está no servidor, só registra pelo SHA-256
+        const sha256 = await calcularSha256(file);
+        if (sha256) {
+          const registrarPorHash = (extra = {}) => fetch('http://localhost:5000/api/arquivos/upload/por-hash', {
+            method: 'POST',
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+              sha256,
+              nome_original: file.name,
+              projeto_id: selectedProject || null,
+              tipo_documento: category,
+              descricao: `Upload via interface - ${file.name}`,
+              ...extra
+            })
+          });
+          
+          let hashResponse = await registrarPorHash();
+          if (hashResponse.status === 409) {
+            // Conteúdo de outro usuário/projeto: provar que temos os bytes
+            const { desafio, faixas } = await hashResponse.json();
+            if (desafio && faixas) {
+              hashResponse = await registrarPorHash({ desafio, prova: await calcularProva(file, faixas) });
+            }
+          }
+          
+          if (hashResponse.status === 201) {
+            setUploadProgress(prev => ({ ...prev, [file.name]: 100 }));
+            addNotification('success', `${file.name} enviado com sucesso!`);
+            limparProgresso(file.name);
+            continue;
+          }
+        }
+        
         const formData = new FormData();
         formData.append('file', file);
         
@@ -222,7 +294,6 @@ const EnhancedFilesComponent = ({
           formData.append('projectId', selectedProject);
         }
         
-        const category = getFileCategory(file.type);
         formData.append('tipo_documento', category);
         formData.append('fileType', category);
         formData.append('descricao', `Upload via interface - ${file.name}`);
@@ -230,7 +301,6 @@ const EnhancedFilesComponent = ({
         
         setUploadProgress(prev => ({ ...prev, [file.name]: 30 }));
         
-        const token = localStorage.getItem('auth_token');
         const response = await fetch('http://localhost:5000/api/arquivos/upload', {
           method: 'POST',
           headers: {
@@ -255,13 +325,7 @@ const EnhancedFilesComponent = ({
         addNotification('error', `${file.name}: ${error.message}`);
       }
       
-      setTimeout(() => {
-        setUploadProgress(prev => {
-          const updated = { ...prev };
-          delete updated[file.name];
-          return updated;
-        });
-      }, 2000);
+      limparProgresso(file.name);
     }
     
     setUploading(false);
@@ -86,6 +86,13 @@ const apiRequest = async (endpoint, options = {}) => {
   }
 };
 
+// 🔔 Seções atualizáveis por evento (SSE) sem recarregar o dashboard inteiro
+const SECTION_ENDPOINTS = {
+  notifications: { endpoint: '/api/notificacoes?limit=10', limit: 10 },
+  bills: { endpoint: '/api/contas?limit=20', limit: 20 },
+  files: { endpoint: '/api/arquivos', limit: 10 }
+};
+
 // 🎯 Hook principal otimizado
 export const useDashboardData = () => {
   const [data, setData] = useState({
@@ -243,6 +250,40 @@ export const useDashboardData = () => {
     };
   }, [loadData]);
 
+  // 🔔 Recarregar só uma seção (notifications, bills, files)
+  const reloadSection = useCallback(async (section) => {
+    const config = SECTION_ENDPOINTS[section];
+    if (!config) return;
+
+    try {
+      const response = await apiRequest(config.endpoint);
+      if (!response?.success || !Array.isArray(response.data) || !mountedRef.current) return;
+
+      setData(prevData => {
+        const updated = { ...prevData, [section]: response.data.slice(0, config.limit) };
+        if (cache.data) {
+          cache.data = updated;
+        }
+        return updated;
+      });
+    } catch (error) {
+      console.warn(`⚠️ Erro ao recarregar seção ${section}:`, error.message);
+    }
+  }, []);
+
+  // 📊 Estatísticas recebidas no evento 'dashboard_atualizado' (sem requisição)
+  const applyStats = useCallback((stats) => {
+    if (!stats || !mountedRef.current) return;
+
+    setData(prevData => {
+      const updated = { ...prevData, stats: { ...prevData.stats, ...stats } };
+      if (cache.data) {
+        cache.data = updated;
+      }
+      return updated;
+    });
+  }, []);
+
   // 🎯 Operações CRUD otimizadas
   const createItem = useCallback(async (type, itemData) => {
     try {
@@ -513,6 +554,8 @@ export const useDashboardData = () => {
     
     // 🔄 Funções de carregamento
     loadData: useCallback(() => loadData(true), [loadData]),
+    reloadSection,
+    applyStats,
     clearError,
     retryLoadData,
     
@@ -0,0 +1,121 @@
+// 📁 src/components/Dashboard/hooks/useServerEvents.js - EVENTOS DO SERVIDOR (SSE)
+import { useState, useEffect, useRef } from 'react';
+
+// 🔧 Configuração
+const EVENTS_URL = 'http://localhost:5000/api/events';
+const TICKET_URL = `${EVENTS_URL}/ticket`;
+const MAX_FALHAS = 5;
+const EVENT_TYPES = [
+  'notificacao_nova',
+  'conta_paga',
+  'boleto_recebido',
+  'arquivo_enviado',
+  'dashboard_atualizado',
+  'resync'
+];
+
+// 🎫 Troca o JWT (header) por um ticket de uso único: o token nunca vai na URL
+const fetchTicket = async (token) => {
+  const response = await fetch(TICKET_URL, {
+    method: 'POST',
+    headers: { Authorization: `Bearer ${token}` }
+  });
+  const data = await response.json().catch(() => ({}));
+  if (!response.ok || !data.ticket) {
+    throw new Error(data.error || `HTTP ${response.status}`);
+  }
+  return data.ticket;
+};
+
+// 🔔 Abre /api/events e chama handlers[tipo](dados) a cada evento.
+// Cada conexão usa um ticket novo (o anterior já foi consumido), então a
+// reconexão é feita aqui e não pelo EventSource, continuando do último evento
+// recebido (?ultimo_id=). Depois de MAX_FALHAS seguidas (401/503, servidor
+// fora), `connected` fica false e quem usa continua no polling.
+export const useServerEvents = (handlers, enabled = true) => {
+  const [connected, setConnected] = useState(false);
+  const handlersRef = useRef(handlers);
+
+  // Handlers sempre atualizados sem reabrir a conexão
+  useEffect(() => {
+    handlersRef.current = handlers;
+  }, [handlers]);
+
+  useEffect(() => {
+    const token = localStorage.getItem('auth_token');
+    if (!enabled || !token || typeof EventSource === 'undefined') {
+      setConnected(false);
+      return;
+    }
+
+    let source = null;
+    let timer = null;
+    let closed = false;
+    let failures = 0;
+    let lastEventId = '';
+
+    const scheduleReconnect = () => {
+      failures += 1;
+      if (failures >= MAX_FALHAS) {
+        console.warn('⚠️ Canal de eventos indisponível, usando atualização periódica');
+        return;
+      }
+      timer = setTimeout(connect, Math.min(30000, 1000 * 2 ** failures));
+    };
+
+    const connect = async () => {
+      let ticket;
+      try {
+        ticket = await fetchTicket(token);
+      } catch (error) {
+        if (!closed) scheduleReconnect();
+        return;
+      }
+      if (closed) return;
+
+      const params = new URLSearchParams({ ticket });
+      if (lastEventId) params.set('ultimo_id', lastEventId);
+      source = new EventSource(`${EVENTS_URL}?${params}`);
+
+      source.onopen = () => {
+        failures = 0;
+        setConnected(true);
+      };
+      source.onerror = () => {
+        // Fim do stream ou recusa: o ticket não vale mais, reconectar com outro
+        setConnected(false);
+        source.close();
+        if (!closed) scheduleReconnect();
+      };
+
+      EVENT_TYPES.forEach(type => {
+        source.addEventListener(type, (event) => {
+          if (event.lastEventId) lastEventId = event.lastEventId;
+          const handler = handlersRef.current?.[type];
+          if (!handler) return;
+
+          let payload = {};
+          try {
+            payload = JSON.parse(event.data || '{}');
+          } catch {
+            payload = {};
+          }
+          handler(payload);
+        });
+      });
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(timer);
+      if (source) source.close();
+      setConnected(false);
+    };
+  }, [enabled]);
+
+  return { connected };
+};
+
+export default useServerEvents;
@@ -39,10 +39,28 @@ api.interceptors.response.use(
   }
 );
 
+// ===== PAGINAÇÃO POR CURSOR =====
+// As listagens devolvem pagination.next_cursor; getAll percorre todas as páginas
+const getAllPages = async (url) => {
+  const response = await api.get(url);
+  let cursor = response.data?.pagination?.next_cursor;
+
+  while (cursor) {
+    const separator = url.includes('?') ? '&' : '?';
+    const page = await api.get(`${url}${separator}cursor=${encodeURIComponent(cursor)}`);
+    response.data.data = [...(response.data.data || []), ...(page.data.data || [])];
+    cursor = page.data?.pagination?.next_cursor;
+  }
+
+  response.data.count = (response.data.data || []).length;
+  response.data.total = response.data.count;
+  return response;
+};
+
 // ===== CLIENTES ===== ✅ MANTIDO
 export const clientesAPI = {
   // Buscar todos os clientes
-  getAll: () => api.get('/api/clientes'),
+  getAll: () => getAllPages('/api/clientes'),
   
   // Buscar cliente por ID
   getById: (id) => api.get(`/api/clientes/${id}`),
@@ -63,7 +81,7 @@ export const clientesAPI = {
 // ===== PROJETOS/OBRAS ===== ✅ MANTIDO
 export const projectsAPI = {
   // Buscar todos os projetos
-  getAll: () => api.get('/api/projects'),
+  getAll: () => getAllPages('/api/projects'),
   
   // Buscar projeto por ID
   getById: (id) => api.get(`/api/projects/${id}`),
@@ -84,7 +102,7 @@ export const projectsAPI = {
 // ===== CONTAS A PAGAR ===== ✅ MANTIDO
 export const contasAPI = {
   // Buscar todas as contas
-  getAll: () => api.get('/api/contas'),
+  getAll: () => getAllPages('/api/contas'),
   
   // Buscar conta por ID
   getById: (id) => api.get(`/api/contas/${id}`),
@@ -102,7 +120,7 @@ export const contasAPI = {
   markAsPaid: (id, paymentData = {}) => api.patch(`/api/contas/${id}/pagar`, paymentData),
   
   // Buscar contas por vencimento
-  getByVencimento: (periodo = 'proximos_7_dias') => api.get(`/api/contas/vencimento?periodo=${periodo}`),
+  getByVencimento: (periodo = 'proximos_7_dias') => getAllPages(`/api/contas/vencimento?periodo=${periodo}`),
   
   // Relatório financeiro
   getRelatorio: () => api.get('/api/contas/relatorio'),
@@ -111,7 +129,7 @@ export const contasAPI = {
 // ===== FUNCIONÁRIOS ===== ✅ MANTIDO
 export const funcionariosAPI = {
   // Buscar todos os funcionários
-  getAll: () => api.get('/api/funcionarios'),
+  getAll: () => getAllPages('/api/funcionarios'),
   
   // Buscar funcionário por ID
   getById: (id) => api.get(`/api/funcionarios/${id}`),
@@ -126,7 +144,7 @@ export const funcionariosAPI = {
   delete: (id) => api.delete(`/api/funcionarios/${id}`),
   
   // Funcionários disponíveis
-  getDisponiveis: () => api.get('/api/funcionarios/disponiveis'),
+  getDisponiveis: () => getAllPages('/api/funcionarios/disponiveis'),
   
   // Adicionar funcionário a projeto
   addToProjeto: (funcionarioId, projetoData) => api.post(`/api/funcionarios/${funcionarioId}/projetos`, projetoData),